@@ -0,0 +1,86 @@
+"""
+Benchmark da gravação dos logs de auditoria (audit_system/writer.py).
+
+Simula requisições de login passando pelo ``AuditMiddleware``: cada uma
+dispara ``user_logged_in`` (e ``--eventos`` - 1 ações customizadas) e mede
+o tempo gasto na thread da requisição em três modos:
+
+- direto: um INSERT por log na hora (comportamento antigo, fora do escopo
+  da requisição);
+- lote: buffer da requisição gravado com um bulk_create no fim;
+- fila: o lote vai para a thread de gravação (AUDIT_GRAVACAO_ASSINCRONA).
+
+    python manage.py benchmark_auditoria --requisicoes 500 --eventos 3
+
+Os logs e o usuário criados são removidos no final.
+"""
+import time
+
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from audit_system.middleware import AuditMiddleware
+from audit_system.models import AuditLog
+from audit_system.writer import gravador
+
+USUARIO = 'benchmark-auditoria'
+
+
+class Command(BaseCommand):
+    help = 'Mede o tempo de requisição gasto gravando logs de auditoria (direto, em lote e na fila)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requisicoes', type=int, default=300, help='Requisições simuladas por modo (padrão: 300)')
+        parser.add_argument('--eventos', type=int, default=3, help='Logs por requisição (padrão: 3)')
+
+    def handle(self, *args, **options):
+        usuario, _ = User.objects.get_or_create(username=USUARIO)
+        fabrica = RequestFactory()
+        eventos = max(1, options['eventos'])
+        requisicoes = max(1, options['requisicoes'])
+
+        def view(request):
+            user_logged_in.send(sender=User, request=request, user=usuario)
+            for numero in range(eventos - 1):
+                AuditLog.log_action('CUSTOM_ACTION', obj=usuario, request=request, extra_data={'evento': numero})
+            return HttpResponse()
+
+        self.stdout.write(f'{requisicoes} requisições por modo, {eventos} log(s) por requisição')
+        try:
+            # Direto: a view fora do middleware grava cada log na hora
+            self._medir('direto', view, usuario, fabrica, requisicoes, eventos)
+            self._medir('lote', AuditMiddleware(view), usuario, fabrica, requisicoes, eventos)
+            with override_settings(AUDIT_GRAVACAO_ASSINCRONA=True):
+                self._medir('fila', AuditMiddleware(view), usuario, fabrica, requisicoes, eventos)
+                gravador.parar()
+        finally:
+            removidos = AuditLog.objects.filter(user=usuario).delete()[0]
+            usuario.delete()
+            self.stdout.write(f'\n{removidos} log(s) de benchmark removidos')
+
+    def _medir(self, nome, view, usuario, fabrica, requisicoes, eventos):
+        antes = AuditLog.objects.count()
+        gravador.zerar_estatisticas()
+        inicio = time.perf_counter()
+        for _ in range(requisicoes):
+            request = fabrica.post('/accounts/login/', REMOTE_ADDR='127.0.0.1', HTTP_USER_AGENT='benchmark')
+            request.session = SessionStore()
+            request.user = usuario
+            view(request)
+        segundos = time.perf_counter() - inicio
+        gravador.esperar()
+        total = time.perf_counter() - inicio
+
+        gravados = AuditLog.objects.count() - antes
+        estatisticas = gravador.estatisticas()
+        self.stdout.write(
+            f'  {nome:<7} {requisicoes / segundos:>8.0f} req/s'
+            f'  {segundos * 1000 / requisicoes:>7.3f} ms/req na requisição'
+            f'  (gravação concluída em {total:.2f}s, {gravados} logs,'
+            f' {estatisticas["lotes"]} lote(s), fila cheia: {estatisticas["fila_cheia"]})'
+        )
+        if gravados != requisicoes * eventos:
+            self.stderr.write(f'  ✗ esperados {requisicoes * eventos} logs, gravados {gravados}')
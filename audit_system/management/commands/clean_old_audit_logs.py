@@ -5,7 +5,8 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
 from django.db.models import Count
-from audit_system.models import AuditLog
+from audit_system.models import AuditLog, AuditLogHourly
+from audit_system.rollups import reprocessar
 
 
 class Command(BaseCommand):
@@ -94,6 +95,11 @@ class Command(BaseCommand):
                 
                 self.stdout.write(f"Removidos {removed_count}/{total_count} logs...")
             
+            # Contagens consolidadas das horas afetadas voltam a bater com os logs
+            first_hour = AuditLogHourly.objects.order_by('hour').values_list('hour', flat=True).first()
+            if first_hour is not None:
+                reprocessar(first_hour, cutoff_date)
+            
             self.stdout.write(
                 self.style.SUCCESS(f"Limpeza concluída! {removed_count} logs removidos")
             )
@@ -0,0 +1,41 @@
+"""
+Consolida por hora os logs de auditoria usados pelo dashboard (ver audit_system/rollups.py).
+
+    python manage.py consolidar_auditoria
+    python manage.py consolidar_auditoria --reprocessar-desde 2025-01-01
+
+Agendado a cada 5 minutos pelo timer systemd webreceptivo-auditoria, criado
+pelos scripts de deploy (ou pelo cron: */5 * * * *). A primeira execução
+consolida todo o histórico, um dia por transação.
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from audit_system import rollups
+
+
+class Command(BaseCommand):
+    help = 'Consolida por hora os logs de auditoria do dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reprocessar-desde', metavar='AAAA-MM-DD',
+            help='Refaz também as horas já consolidadas a partir desta data',
+        )
+
+    def handle(self, *args, **options):
+        if options['reprocessar_desde']:
+            try:
+                dia = datetime.strptime(options['reprocessar_desde'], '%Y-%m-%d').date()
+            except ValueError as exc:
+                raise CommandError('Data inválida: use AAAA-MM-DD') from exc
+            rollups.reprocessar(rollups.inicio_do_dia(dia), timezone.now())
+            self.stdout.write(f'Horas consolidadas desde {dia:%d/%m/%Y} refeitas')
+
+        horas = rollups.consolidar()
+        marca = rollups.marca()
+        self.stdout.write(self.style.SUCCESS(
+            f'{horas} hora(s) consolidada(s); consolidado até '
+            f'{timezone.localtime(marca):%d/%m/%Y %H:%M}' if marca else 'Nada a consolidar'
+        ))
@@ -1,94 +1,84 @@
 """
-Comando para gerar resumos de auditoria periodicamente
+Comando para gerar resumos de auditoria periodicamente (ver audit_system/resumos.py)
+
+    python manage.py generate_audit_summaries                 # só os logs novos
+    python manage.py generate_audit_summaries --rebuild --days 30 --workers 4
+
+``--clean-old`` (obsoleto) equivale a ``--rebuild --days 30``, o período que
+ele recalculava antes.
 """
-from django.core.management.base import BaseCommand
-from django.utils import timezone
+import os
+import time
 from datetime import timedelta
-from audit_system.models import AuditLog, AuditLogSummary
-from django.db.models import Count
-from django.contrib.auth.models import User
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from audit_system import resumos
+
+# Dias recalculados pelo --clean-old (o padrão antigo do --days)
+DIAS_CLEAN_OLD = 30
 
 
 class Command(BaseCommand):
     help = 'Gera resumos de auditoria para otimização de consultas'
-    
+
     def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Apaga e recalcula os resumos (todos, ou os últimos --days dias)'
+        )
+
         parser.add_argument(
             '--days',
             type=int,
-            default=30,
-            help='Número de dias para gerar resumos (padrão: 30)'
+            default=None,
+            help='Com --rebuild, recalcula só os últimos X dias'
         )
-        
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help='Threads que agregam os intervalos de datas no --rebuild'
+        )
+
         parser.add_argument(
             '--clean-old',
             action='store_true',
-            help='Remove resumos antigos antes de gerar novos'
+            help=f'Obsoleto: o mesmo que --rebuild --days {DIAS_CLEAN_OLD} (ou os --days informados)'
         )
-    
+
     def handle(self, *args, **options):
+        inicio = time.perf_counter()
         days = options['days']
-        clean_old = options['clean_old']
-        
-        self.stdout.write(f"Gerando resumos de auditoria para os últimos {days} dias...")
-        
-        # Limpar resumos antigos se solicitado
-        if clean_old:
-            deleted_count = AuditLogSummary.objects.all().delete()[0]
-            self.stdout.write(f"Removidos {deleted_count} resumos antigos")
-        
-        # Calcular data de início
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=days)
-        
-        # Gerar resumos por data, usuário e ação
-        logs_queryset = AuditLog.objects.filter(
-            timestamp__date__gte=start_date,
-            timestamp__date__lte=end_date
-        )
-        
-        # Agrupar por data, usuário e ação
-        summaries = (logs_queryset
-                    .values('timestamp__date', 'user', 'action')
-                    .annotate(count=Count('id'))
-                    .order_by('timestamp__date', 'user', 'action'))
-        
-        created_count = 0
-        updated_count = 0
-        
-        for summary_data in summaries:
-            date = summary_data['timestamp__date']
-            user_id = summary_data['user']
-            action = summary_data['action']
-            count = summary_data['count']
-            
-            # Obter usuário se existir
-            user = None
-            if user_id:
-                try:
-                    user = User.objects.get(pk=user_id)
-                except User.DoesNotExist:
-                    pass
-            
-            # Criar ou atualizar resumo
-            summary, created = AuditLogSummary.objects.get_or_create(
-                date=date,
-                user=user,
-                action=action,
-                defaults={'count': count}
+
+        if days is not None and not (options['rebuild'] or options['clean_old']):
+            raise CommandError('--days só vale com --rebuild; sem ele os resumos são incrementais')
+        if days is not None and days < 0:
+            raise CommandError('--days deve ser zero ou positivo')
+
+        if options['clean_old']:
+            if days is None:
+                days = DIAS_CLEAN_OLD
+            self.stderr.write(self.style.WARNING(
+                f'--clean-old está obsoleto; use --rebuild --days {days}'
+            ))
+
+        if options['rebuild'] or options['clean_old']:
+            desde = None
+            if days is not None:
+                desde = timezone.localdate() - timedelta(days=days)
+            self.stdout.write(
+                f"Recalculando resumos {'de todo o histórico' if desde is None else f'desde {desde:%d/%m/%Y}'}..."
             )
-            
-            if created:
-                created_count += 1
-            else:
-                if summary.count != count:
-                    summary.count = count
-                    summary.save()
-                    updated_count += 1
-        
+            logs, gravados = resumos.reconstruir(desde=desde, workers=max(1, options['workers']))
+        else:
+            logs, gravados = resumos.resumir()
+
         self.stdout.write(
             self.style.SUCCESS(
                 f"Resumos gerados com sucesso! "
-                f"Criados: {created_count}, Atualizados: {updated_count}"
+                f"{logs} logs somados em {gravados} resumos ({time.perf_counter() - inicio:.2f}s)"
             )
         )
@@ -2,12 +2,14 @@
 Middleware para capturar automaticamente dados da requisição para auditoria.
 """
 from .signals import set_current_request
+from .writer import gravador
 
 
 class AuditMiddleware:
     """
     Middleware que armazena a requisição atual no thread local
-    para permitir acesso aos dados da requisição nos signals
+    para permitir acesso aos dados da requisição nos signals, e
+    grava em lote os logs de auditoria da requisição quando ela termina
     """
     
     def __init__(self, get_response):
@@ -16,10 +18,11 @@ class AuditMiddleware:
     def __call__(self, request):
         # Armazena a requisição no thread local
         set_current_request(request)
-        
-        response = self.get_response(request)
-        
-        # Limpa a requisição após o processamento
-        set_current_request(None)
+        try:
+            with gravador.requisicao():
+                response = self.get_response(request)
+        finally:
+            # Limpa a requisição após o processamento
+            set_current_request(None)
         
         return response
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_system', '0003_auditlog_timestamp_evento'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='action',
+            field=models.CharField(choices=[('USER_CREATED', 'Usuário Criado'), ('USER_UPDATED', 'Usuário Atualizado'), ('USER_DELETED', 'Usuário Deletado'), ('USER_ACTIVATED', 'Usuário Ativado'), ('USER_DEACTIVATED', 'Usuário Desativado'), ('USER_PASSWORD_CHANGED', 'Senha Alterada'), ('USER_LOGIN', 'Login Realizado'), ('USER_LOGOUT', 'Logout Realizado'), ('USER_LOGIN_FAILED', 'Login Falhado'), ('GROUP_CREATED', 'Grupo Criado'), ('GROUP_UPDATED', 'Grupo Atualizado'), ('GROUP_DELETED', 'Grupo Deletado'), ('GROUP_USER_ADDED', 'Usuário Adicionado ao Grupo'), ('GROUP_USER_REMOVED', 'Usuário Removido do Grupo'), ('GROUP_PERMISSION_ADDED', 'Permissão Adicionada ao Grupo'), ('GROUP_PERMISSION_REMOVED', 'Permissão Removida do Grupo'), ('PERMISSION_GRANTED', 'Permissão Concedida'), ('PERMISSION_REVOKED', 'Permissão Revogada'), ('ROLE_CHANGED', 'Papel/Função Alterada'), ('OBJECT_CREATED', 'Registro Criado'), ('OBJECT_UPDATED', 'Registro Alterado'), ('OBJECT_DELETED', 'Registro Excluído'), ('SYSTEM_ACCESS', 'Acesso ao Sistema'), ('DATA_EXPORT', 'Dados Exportados'), ('SETTINGS_CHANGED', 'Configurações Alteradas'), ('CUSTOM_ACTION', 'Ação Customizada')], max_length=50, verbose_name='Ação'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_system', '0004_auditlog_acoes_registros'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rolled_up_until', models.DateTimeField(blank=True, null=True, verbose_name='Consolidado até')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Estado da Consolidação',
+                'verbose_name_plural': 'Estado da Consolidação',
+            },
+        ),
+        migrations.CreateModel(
+            name='AuditLogHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(db_index=True, verbose_name='Hora')),
+                ('action', models.CharField(max_length=50, verbose_name='Ação')),
+                ('success', models.BooleanField(default=True, verbose_name='Sucesso')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Contador')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Consolidado por Hora',
+                'verbose_name_plural': 'Consolidados por Hora',
+            },
+        ),
+    ]
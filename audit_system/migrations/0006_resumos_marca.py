@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_system', '0005_consolidado_por_hora'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditrollupstate',
+            name='summaries_last_id',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='Resumido até o log'),
+        ),
+    ]
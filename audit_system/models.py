@@ -39,6 +39,11 @@ class AuditLog(models.Model):
         ('PERMISSION_REVOKED', 'Permissão Revogada'),
         ('ROLE_CHANGED', 'Papel/Função Alterada'),
         
+        # Registros dos modelos auditados (audit_system/registry.py)
+        ('OBJECT_CREATED', 'Registro Criado'),
+        ('OBJECT_UPDATED', 'Registro Alterado'),
+        ('OBJECT_DELETED', 'Registro Excluído'),
+        
         # Ações gerais
         ('SYSTEM_ACCESS', 'Acesso ao Sistema'),
         ('DATA_EXPORT', 'Dados Exportados'),
@@ -84,7 +89,8 @@ class AuditLog(models.Model):
     )
     
     # Dados temporais
-    timestamp = models.DateTimeField('Data/Hora', auto_now_add=True, db_index=True)
+    # Momento da ação (o log pode ser gravado depois, em lote: ver writer.py)
+    timestamp = models.DateTimeField('Data/Hora', default=timezone.now, db_index=True)
     
     # Dados de contexto da requisição
     ip_address = models.GenericIPAddressField('Endereço IP', null=True, blank=True)
@@ -112,6 +118,7 @@ class AuditLog(models.Model):
         ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['timestamp']),
+            models.Index(fields=['timestamp', 'id']),  # paginação por keyset
             models.Index(fields=['user', 'timestamp']),
             models.Index(fields=['action', 'timestamp']),
             models.Index(fields=['content_type', 'object_id']),
@@ -141,10 +148,18 @@ class AuditLog(models.Model):
     
     @classmethod
     def log_action(cls, action, obj=None, user=None, changes=None, extra_data=None, 
-                   request=None, success=True, error_message=None):
+                   request=None, success=True, error_message=None, critical=None,
+                   object_repr=None):
         """
-        Método helper para criar logs de auditoria
+        Método helper para criar logs de auditoria.
+
+        O log é entregue ao gravador (audit_system/writer.py): ações críticas
+        são gravadas na hora, as demais em lote no fim da requisição.
+        ``critical`` força um ou outro comportamento. ``object_repr`` evita o
+        ``str(obj)``, que pode consultar o banco.
         """
+        from .writer import ACOES_CRITICAS, gravador
+
         log_data = {
             'action': action,
             'user': user,
@@ -157,7 +172,7 @@ class AuditLog(models.Model):
         # Dados do objeto
         if obj:
             log_data['content_object'] = obj
-            log_data['object_repr'] = str(obj)
+            log_data['object_repr'] = object_repr or str(obj)
         else:
             log_data['object_repr'] = f"Ação: {action}"
         
@@ -173,7 +188,9 @@ class AuditLog(models.Model):
             if not user and hasattr(request, 'user') and request.user.is_authenticated:
                 log_data['user'] = request.user
         
-        return cls.objects.create(**log_data)
+        if critical is None:
+            critical = action in ACOES_CRITICAS
+        return gravador.registrar(cls(**log_data), critico=critical)
     
     def is_recent(self, minutes=5):
         """
@@ -198,6 +215,40 @@ class AuditLogSummary(models.Model):
         unique_together = ['date', 'user', 'action']
 
 
+class AuditLogHourly(models.Model):
+    """
+    Contagem de logs por hora, ação, usuário e resultado (audit_system/rollups.py).
+
+    Mantida pelo comando consolidar_auditoria; o dashboard e a API de
+    estatísticas somam estas linhas em vez de varrer o AuditLog.
+    """
+    hour = models.DateTimeField('Hora', db_index=True)
+    action = models.CharField('Ação', max_length=50)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    success = models.BooleanField('Sucesso', default=True)
+    count = models.PositiveIntegerField('Contador', default=0)
+
+    class Meta:
+        verbose_name = 'Consolidado por Hora'
+        verbose_name_plural = 'Consolidados por Hora'
+
+
+class AuditRollupState(models.Model):
+    """
+    Marcas d'água das consolidações (linha única): logs a partir de
+    ``rolled_up_until`` ainda não estão em AuditLogHourly, e logs com id
+    acima de ``summaries_last_id`` ainda não estão em AuditLogSummary.
+    """
+    rolled_up_until = models.DateTimeField('Consolidado até', null=True, blank=True)
+    # Último AuditLog somado em AuditLogSummary (audit_system/resumos.py)
+    summaries_last_id = models.BigIntegerField('Resumido até o log', null=True, blank=True)
+    updated_at = models.DateTimeField('Atualizado em', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Estado da Consolidação'
+        verbose_name_plural = 'Estado da Consolidação'
+
+
 def get_client_ip(request):
     """
     Extrai o IP real do cliente da requisição
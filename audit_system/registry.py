@@ -0,0 +1,217 @@
+"""
+Auditoria de alterações dos modelos de negócio, por registro.
+
+    from audit_system import registry
+
+    registry.register(Transfer, fields=['nome', 'valor', 'ativo'])
+    registry.register(OrdemServico, exclude=['atualizado_em'], rotulo=lambda os: f'OS {os.numero_os}')
+    registry.register(LancamentoServico, parent='ordem_servico')
+
+Cada save/delete de um modelo registrado gera um log (``OBJECT_CREATED``,
+``OBJECT_UPDATED`` ou ``OBJECT_DELETED``) com os campos alterados,
+comparados com o estado carregado do banco (snapshot.py, sem consulta). Os
+logs passam pelo gravador em lote (writer.py).
+
+Modelos com ``parent`` são itens de outro registro: suas alterações entram
+no log do pai, com chaves como ``Lançamento de Serviço #12 qtd_inteira``.
+Dentro de ``agrupar(obj)`` todas as alterações de ``obj`` e dos seus itens
+viram um único log na saída do bloco. As escritas em lote (``bulk_create``
+e ``bulk_update`` não disparam signals) são informadas com
+``registrar_lote``. Exclusões em cascata a partir de um modelo registrado
+ficam só no log do registro excluído. ``desativado()`` suspende a auditoria
+dos modelos registrados na thread (cargas em massa, benchmarks).
+"""
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.db.models.signals import post_delete, post_save
+
+from . import snapshot
+
+_local = threading.local()
+
+
+@dataclass
+class _Registro:
+    model: type
+    parent: object = None  # campo (ForeignKey) do pai, se o modelo é item de outro
+    rotulo: object = None
+
+    def descrever(self, instance):
+        if self.rotulo is not None:
+            return str(self.rotulo(instance))[:200]
+        return f'{self.model._meta.verbose_name} #{instance.pk}'
+
+    def item(self, instance):
+        return f'{self.model._meta.verbose_name} #{instance.pk}'
+
+
+@dataclass
+class _Grupo:
+    raiz: object
+    criado: bool = False
+    changes: dict = field(default_factory=dict)
+
+    def contem(self, instance):
+        return type(instance) is type(self.raiz) and instance.pk == self.raiz.pk
+
+
+_registros = {}
+
+
+def register(model, fields=None, exclude=(), parent=None, rotulo=None):
+    """
+    Audita as alterações de ``model``: ``fields`` limita os campos
+    comparados e ``exclude`` os ignora; ``parent`` é o nome do ForeignKey
+    para o registro a que os itens pertencem; ``rotulo(instância)`` é a
+    descrição gravada no log (padrão: nome do modelo e pk, sem consulta).
+    """
+    parent_field = model._meta.get_field(parent) if parent else None
+    _registros[model] = _Registro(model, parent_field, rotulo)
+    snapshot.rastrear(model, campos=fields, ignorar=exclude)
+    uid = f'audit_registry_{model._meta.label_lower}'
+    post_save.connect(_ao_salvar, sender=model, dispatch_uid=uid)
+    post_delete.connect(_ao_remover, sender=model, dispatch_uid=uid)
+
+
+def registered(model):
+    return model in _registros
+
+
+@contextmanager
+def desativado():
+    """Não audita os modelos registrados dentro do bloco (só nesta thread)"""
+    anterior = getattr(_local, 'desativado', False)
+    _local.desativado = True
+    try:
+        yield
+    finally:
+        _local.desativado = anterior
+
+
+# Agrupamento
+
+def _grupos():
+    grupos = getattr(_local, 'grupos', None)
+    if grupos is None:
+        grupos = _local.grupos = []
+    return grupos
+
+
+@contextmanager
+def agrupar(obj):
+    """Junta em um único log as alterações de ``obj`` e dos seus itens feitas no bloco"""
+    grupos = _grupos()
+    if any(grupo.raiz is obj for grupo in grupos):
+        yield
+        return
+    grupo = _Grupo(obj)
+    grupos.append(grupo)
+    try:
+        yield
+    except BaseException:
+        grupos.remove(grupo)
+        raise
+    grupos.remove(grupo)
+    if grupo.criado:
+        _registrar('OBJECT_CREATED', obj, grupo.changes)
+    elif grupo.changes:
+        _registrar('OBJECT_UPDATED', obj, grupo.changes)
+
+
+def _grupo_de(instance):
+    """Grupo ativo do registro (ou do pai do item), se houver"""
+    registro = _registros[type(instance)]
+    for grupo in reversed(_grupos()):
+        if grupo.contem(instance):
+            return grupo
+        if (
+            registro.parent is not None
+            and isinstance(grupo.raiz, registro.parent.related_model)
+            and getattr(instance, registro.parent.attname) == grupo.raiz.pk
+        ):
+            return grupo
+    return None
+
+
+# Registro das alterações
+
+def _registrar(action, instance, changes, object_repr=None):
+    from .models import AuditLog
+    from .signals import get_current_request
+
+    AuditLog.log_action(
+        action=action,
+        obj=instance,
+        request=get_current_request(),
+        changes=changes,
+        object_repr=object_repr or _registros[type(instance)].descrever(instance),
+    )
+
+
+def _alteracao(instance, changes, criado=False, removido=False):
+    if getattr(_local, 'desativado', False):
+        return
+    registro = _registros[type(instance)]
+    grupo = _grupo_de(instance)
+
+    if registro.parent is None or (grupo is not None and grupo.contem(instance)):
+        if grupo is not None:
+            grupo.criado = grupo.criado or criado
+            grupo.changes.update(changes)
+        elif removido:
+            _registrar('OBJECT_DELETED', instance, changes)
+        elif criado or changes:
+            _registrar('OBJECT_CREATED' if criado else 'OBJECT_UPDATED', instance, changes)
+        return
+
+    # Item: as alterações entram no log do pai
+    chave = registro.item(instance)
+    if criado:
+        itens = {chave: {'old': None, 'new': 'criado'}}
+    elif removido:
+        itens = {chave: {'old': 'removido', 'new': None}}
+    else:
+        itens = {f'{chave} {campo}': valores for campo, valores in changes.items()}
+    if not itens:
+        return
+    if grupo is not None:
+        grupo.changes.update(itens)
+        return
+    pai_id = getattr(instance, registro.parent.attname)
+    if pai_id is None:
+        return
+    # Instância só com o pk: o log aponta para o pai sem carregá-lo
+    pai = registro.parent.related_model(pk=pai_id)
+    _registrar('OBJECT_UPDATED', pai, itens, object_repr=f'{pai._meta.verbose_name} #{pai_id}')
+
+
+def registrar_lote(model, criados=(), alterados=()):
+    """Registra as alterações de instâncias gravadas com bulk_create/bulk_update"""
+    if model not in _registros:
+        return
+    for instance in criados:
+        snapshot.guardar(instance)
+        _alteracao(instance, {}, criado=True)
+    for instance in alterados:
+        changes = snapshot.alteracoes(instance)
+        if changes:
+            _alteracao(instance, changes)
+
+
+def _ao_salvar(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        snapshot.guardar(instance)
+        _alteracao(instance, {}, criado=True)
+    else:
+        _alteracao(instance, snapshot.alteracoes(instance, update_fields))
+
+
+def _ao_remover(sender, instance, origin=None, **kwargs):
+    if origin is not None and origin is not instance and type(origin) in _registros:
+        # Cascata de um registro auditado: fica no log dele
+        return
+    _alteracao(instance, {}, removido=True)
@@ -0,0 +1,202 @@
+"""
+Resumos diários de auditoria (AuditLogSummary: dia, usuário e ação).
+
+``resumir`` é incremental: soma só os logs com id acima da marca d'água
+(``AuditRollupState.summaries_last_id``), em lotes de ids. Cada lote é
+agregado com uma consulta, os totais são somados aos resumos existentes
+(uma consulta) e gravados com um ``bulk_create(update_conflicts=True)``.
+
+Só entram logs inseridos há mais de ``ATRASO``: com a gravação em lote
+(writer.py) um id menor pode ficar visível depois de um maior, e a marca
+não volta atrás. Uma transação aberta por mais tempo que isso pode ter
+seus logs ignorados; ``reconstruir`` refaz os resumos de um período.
+
+``reconstruir`` apaga e recalcula os resumos a partir de um dia, com os
+intervalos de datas agregados em paralelo (threads, uma conexão cada) e,
+depois, a gravação na conexão principal, em uma transação. Em uma
+reconstrução parcial, os logs acima da marca com data anterior ao período
+(timestamp retroativo) são somados aos resumos mantidos antes de a marca
+passar por eles; sem marca, ela continua vazia e o próximo ``resumir``
+reconstrói tudo.
+
+Resumos sem usuário não passam pelo ``update_conflicts``: o índice único
+(dia, usuário, ação) não considera NULLs iguais, então eles são
+atualizados pelo pk.
+"""
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import AuditLog, AuditLogSummary, AuditRollupState
+from .rollups import inicio_do_dia
+
+# Ids de AuditLog agregados por lote
+TAMANHO_LOTE = 50000
+# Idade mínima (inserção) de um log para entrar no resumo
+ATRASO = timedelta(minutes=5)
+# Dias agregados por tarefa na reconstrução
+DIAS_POR_INTERVALO = 7
+TAMANHO_GRAVACAO = 1000
+
+
+def _agregar(logs):
+    """Counter {(dia, user_id, action): total} de um queryset de AuditLog"""
+    linhas = (
+        logs.annotate(dia=TruncDate('timestamp'))
+        .values('dia', 'user', 'action')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    return Counter({(linha['dia'], linha['user'], linha['action']): linha['total'] for linha in linhas})
+
+
+def _gravar(totais, somar=True):
+    """Grava os totais em AuditLogSummary (somando aos existentes se ``somar``)"""
+    if not totais:
+        return 0
+    existentes = {}
+    if somar:
+        dias = {dia for dia, _, _ in totais}
+        for resumo in AuditLogSummary.objects.filter(date__in=dias):
+            existentes[(resumo.date, resumo.user_id, resumo.action)] = resumo
+
+    com_usuario, criar_sem_usuario, atualizar_sem_usuario = [], [], []
+    for (dia, user_id, action), total in totais.items():
+        atual = existentes.get((dia, user_id, action))
+        count = total + (atual.count if atual else 0)
+        if user_id is not None:
+            com_usuario.append(AuditLogSummary(date=dia, user_id=user_id, action=action, count=count))
+        elif atual is not None:
+            atual.count = count
+            atualizar_sem_usuario.append(atual)
+        else:
+            criar_sem_usuario.append(AuditLogSummary(date=dia, action=action, count=count))
+
+    AuditLogSummary.objects.bulk_create(
+        com_usuario, batch_size=TAMANHO_GRAVACAO,
+        update_conflicts=True, unique_fields=['date', 'user', 'action'], update_fields=['count'],
+    )
+    AuditLogSummary.objects.bulk_create(criar_sem_usuario, batch_size=TAMANHO_GRAVACAO)
+    AuditLogSummary.objects.bulk_update(atualizar_sem_usuario, ['count'], batch_size=TAMANHO_GRAVACAO)
+    return len(totais)
+
+
+def _ultimo_id_pronto(agora=None):
+    """Maior id entre os logs inseridos há mais de ``ATRASO``"""
+    limite = (agora or timezone.now()) - ATRASO
+    return (
+        AuditLog.objects.filter(created_at__lt=limite)
+        .order_by('-id').values_list('id', flat=True).first()
+    )
+
+
+def _estado():
+    estado, _ = AuditRollupState.objects.select_for_update().get_or_create(pk=1)
+    return estado
+
+
+def resumir(agora=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Soma aos resumos os logs novos desde a marca d'água. Sem marca (primeira
+    execução), reconstrói tudo. Retorna (logs somados, resumos gravados).
+    """
+    with transaction.atomic():
+        primeira = _estado().summaries_last_id is None
+    if primeira:
+        return reconstruir(agora=agora, workers=1)
+
+    fim = _ultimo_id_pronto(agora)
+    logs_somados = resumos_gravados = 0
+    while True:
+        with transaction.atomic():
+            estado = _estado()
+            inicio = estado.summaries_last_id
+            if fim is None or inicio >= fim:
+                return logs_somados, resumos_gravados
+            lote_fim = min(inicio + tamanho_lote, fim)
+            logs = AuditLog.objects.filter(id__gt=inicio, id__lte=lote_fim)
+            totais = _agregar(logs)
+            resumos_gravados += _gravar(totais)
+            logs_somados += sum(totais.values())
+            estado.summaries_last_id = lote_fim
+            estado.save(update_fields=['summaries_last_id', 'updated_at'])
+
+
+def _intervalos(inicio, fim, dias=DIAS_POR_INTERVALO):
+    """Intervalos [de, até) de datas cobrindo ``inicio`` a ``fim`` (inclusive)"""
+    atual = inicio
+    while atual <= fim:
+        proximo = min(atual + timedelta(days=dias), fim + timedelta(days=1))
+        yield atual, proximo
+        atual = proximo
+
+
+def _agregar_intervalo(de, ate, ultimo_id, thread_propria):
+    try:
+        logs = AuditLog.objects.filter(
+            timestamp__gte=inicio_do_dia(de), timestamp__lt=inicio_do_dia(ate), id__lte=ultimo_id,
+        )
+        return _agregar(logs)
+    finally:
+        if thread_propria:
+            # Cada thread abre a sua conexão
+            connection.close()
+
+
+def reconstruir(desde=None, agora=None, workers=4):
+    """
+    Apaga e recalcula os resumos a partir do dia ``desde`` (padrão: o
+    primeiro log), agregando intervalos de datas em ``workers`` threads.
+    Retorna (logs somados, resumos gravados).
+    """
+    ultimo_id = _ultimo_id_pronto(agora)
+    hoje = timezone.localdate(agora)
+    parcial = desde is not None
+    if desde is None:
+        primeiro = AuditLog.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+        desde = timezone.localdate(primeiro) if primeiro is not None else hoje
+    intervalos = list(_intervalos(desde, hoje)) if ultimo_id is not None else []
+
+    # Agrega antes de abrir a transação de escrita: com as threads lendo em
+    # outras conexões, o lock de escrita (sqlite) as bloquearia. Os logs
+    # inseridos nesse meio-tempo têm id acima de ``ultimo_id``.
+    if workers > 1 and len(intervalos) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            parciais = list(executor.map(
+                lambda intervalo: _agregar_intervalo(*intervalo, ultimo_id, True), intervalos
+            ))
+    else:
+        parciais = [_agregar_intervalo(de, ate, ultimo_id, False) for de, ate in intervalos]
+
+    with transaction.atomic():
+        estado = _estado()
+        AuditLogSummary.objects.filter(date__gte=desde).delete()
+        if ultimo_id is not None and (estado.summaries_last_id or 0) > ultimo_id:
+            # Um ``resumir`` avançou a marca enquanto as threads agregavam
+            parciais.append(_agregar(AuditLog.objects.filter(
+                id__gt=ultimo_id, id__lte=estado.summaries_last_id, timestamp__gte=inicio_do_dia(desde),
+            )))
+        logs_somados = resumos_gravados = 0
+        for totais in parciais:
+            resumos_gravados += _gravar(totais, somar=len(parciais) > len(intervalos))
+            logs_somados += sum(totais.values())
+        if parcial and estado.summaries_last_id is None:
+            # Os resumos anteriores a ``desde`` não são confiáveis sem marca
+            return logs_somados, resumos_gravados
+        if ultimo_id is not None and (estado.summaries_last_id or 0) < ultimo_id:
+            # Logs ainda não somados com data anterior a ``desde``: os resumos
+            # desses dias não foram apagados, então entram somados a eles
+            anteriores = _agregar(AuditLog.objects.filter(
+                id__gt=estado.summaries_last_id or 0, id__lte=ultimo_id, timestamp__lt=inicio_do_dia(desde),
+            ))
+            resumos_gravados += _gravar(anteriores)
+            logs_somados += sum(anteriores.values())
+        if ultimo_id is not None or estado.summaries_last_id is None:
+            estado.summaries_last_id = max(ultimo_id or 0, estado.summaries_last_id or 0)
+            estado.save(update_fields=['summaries_last_id', 'updated_at'])
+    return logs_somados, resumos_gravados
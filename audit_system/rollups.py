@@ -0,0 +1,203 @@
+"""
+Contagens consolidadas por hora dos logs de auditoria.
+
+O dashboard e a API de estatísticas contavam o AuditLog inteiro a cada
+acesso (``timestamp__date`` ainda impede o uso do índice no PostgreSQL).
+Agora eles somam ``AuditLogHourly``: uma linha por hora, ação, usuário e
+resultado, mantida por ``consolidar`` (comando ``consolidar_auditoria``,
+rodado pelo cron a cada poucos minutos).
+
+``AuditRollupState.rolled_up_until`` é a marca d'água: as horas anteriores
+estão consolidadas e o que vem depois (a hora corrente e o que o comando
+ainda não processou) é contado ao vivo no AuditLog, por faixa de
+``timestamp``, que usa o índice. As consultas combinam as duas partes, então
+os números batem com o AuditLog mesmo se o comando atrasar. O comando é
+agendado pelos scripts de deploy (timer systemd webreceptivo-auditoria, a cada
+5 minutos); se ele parar, a parte ao vivo cresce e o dashboard avisa
+(``atrasada``).
+
+Os logs podem chegar depois da hora em que ocorreram (gravação em lote,
+writer.py): uma hora só é consolidada ``ATRASO`` depois de terminar, e cada
+execução refaz as últimas ``MARGEM`` horas já consolidadas. Quem apaga logs
+antigos (clean_old_audit_logs) refaz as horas afetadas com ``reprocessar``.
+
+As horas são em UTC; os dias são agrupados no fuso do projeto, o que
+pressupõe um fuso com deslocamento em horas inteiras.
+"""
+from collections import Counter
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+from .models import AuditLog, AuditLogHourly, AuditRollupState
+
+# Horas já consolidadas refeitas a cada execução (logs gravados com atraso)
+MARGEM = timedelta(hours=2)
+# Tempo depois do fim de uma hora até ela ser consolidada
+ATRASO = timedelta(minutes=5)
+# Intervalo consolidado por transação (carga inicial de um log grande)
+BLOCO = timedelta(days=1)
+TAMANHO_LOTE = 1000
+
+_UMA_HORA = timedelta(hours=1)
+
+
+def _hora(momento):
+    """Início (UTC) da hora de ``momento``"""
+    return momento.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def inicio_do_dia(dia):
+    """Meia-noite de ``dia`` no fuso do projeto"""
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def marca():
+    """Até quando (exclusive) os logs estão consolidados, ou None"""
+    return AuditRollupState.objects.filter(pk=1).values_list('rolled_up_until', flat=True).first()
+
+
+def atrasada(agora=None, tolerancia=timedelta(hours=1)):
+    """True se a consolidação nunca rodou ou está parada há mais de ``tolerancia``"""
+    limite = marca()
+    return limite is None or limite < (agora or timezone.now()) - tolerancia
+
+
+# Consolidação
+
+def _consolidar_intervalo(inicio, fim):
+    """Refaz as linhas das horas em [inicio, fim) a partir do AuditLog"""
+    AuditLogHourly.objects.filter(hour__gte=inicio, hour__lt=fim).delete()
+    linhas = (
+        AuditLog.objects
+        .filter(timestamp__gte=inicio, timestamp__lt=fim)
+        .annotate(hora=TruncHour('timestamp', tzinfo=dt_timezone.utc))
+        .values('hora', 'action', 'user', 'success')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    AuditLogHourly.objects.bulk_create(
+        [
+            AuditLogHourly(
+                hour=linha['hora'], action=linha['action'], user_id=linha['user'],
+                success=linha['success'], count=linha['total'],
+            )
+            for linha in linhas
+        ],
+        batch_size=TAMANHO_LOTE,
+    )
+
+
+def _estado():
+    estado, _ = AuditRollupState.objects.select_for_update().get_or_create(pk=1)
+    return estado
+
+
+def consolidar(agora=None):
+    """
+    Consolida as horas completas desde a marca d'água (refazendo as últimas
+    ``MARGEM``) e a avança. Na primeira execução começa pelo log mais
+    antigo. Retorna o número de horas processadas.
+    """
+    fim = _hora((agora or timezone.now()) - ATRASO)
+    horas = 0
+    inicio = None
+    while True:
+        # Uma transação por bloco; a linha de estado serializa execuções paralelas
+        with transaction.atomic():
+            estado = _estado()
+            if inicio is None:
+                if estado.rolled_up_until is not None:
+                    inicio = estado.rolled_up_until - MARGEM
+                else:
+                    primeiro = AuditLog.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+                    inicio = _hora(primeiro) if primeiro is not None else fim
+            if inicio >= fim:
+                if estado.rolled_up_until is None or estado.rolled_up_until < fim:
+                    estado.rolled_up_until = fim
+                    estado.save()
+                return horas
+            bloco_fim = min(inicio + BLOCO, fim)
+            _consolidar_intervalo(inicio, bloco_fim)
+            if estado.rolled_up_until is None or estado.rolled_up_until < bloco_fim:
+                estado.rolled_up_until = bloco_fim
+                estado.save()
+        horas += (bloco_fim - inicio) // _UMA_HORA
+        inicio = bloco_fim
+
+
+def reprocessar(inicio, fim):
+    """Refaz as horas consolidadas entre ``inicio`` e ``fim`` (ex.: depois de apagar logs)"""
+    inicio = _hora(inicio)
+    fim = _hora(fim) + _UMA_HORA
+    while inicio < fim:
+        with transaction.atomic():
+            limite = _estado().rolled_up_until
+            if limite is None or inicio >= limite:
+                return
+            bloco_fim = min(inicio + BLOCO, fim, limite)
+            _consolidar_intervalo(inicio, bloco_fim)
+        inicio = bloco_fim
+
+
+# Consultas
+
+def _fontes(desde=None):
+    """Querysets (consolidado, ao vivo) cobrindo os logs a partir de ``desde``"""
+    limite = marca()
+    consolidado = AuditLogHourly.objects.all()
+    ao_vivo = AuditLog.objects.all()
+    if limite is None:
+        consolidado = consolidado.none()
+    else:
+        consolidado = consolidado.filter(hour__lt=limite)
+        ao_vivo = ao_vivo.filter(timestamp__gte=limite)
+    if desde is not None:
+        consolidado = consolidado.filter(hour__gte=desde)
+        ao_vivo = ao_vivo.filter(timestamp__gte=desde)
+    return consolidado, ao_vivo
+
+
+def _filtro(campo, desde=None, success=None):
+    condicoes = {}
+    if desde is not None:
+        condicoes[f'{campo}__gte'] = desde
+    if success is not None:
+        condicoes['success'] = success
+    return Q(**condicoes) if condicoes else None
+
+
+def totais(**contagens):
+    """
+    Total de logs de cada contagem, com filtros opcionais ``desde`` e
+    ``success``: ``totais(hoje={'desde': meia_noite}, falhas={'success': False})``.
+    Uma consulta em cada parte.
+    """
+    consolidado, ao_vivo = _fontes()
+    somas = consolidado.aggregate(**{
+        nome: Sum('count', filter=_filtro('hour', **filtros)) for nome, filtros in contagens.items()
+    })
+    contados = ao_vivo.aggregate(**{
+        nome: Count('id', filter=_filtro('timestamp', **filtros)) for nome, filtros in contagens.items()
+    })
+    return {nome: (somas[nome] or 0) + contados[nome] for nome in contagens}
+
+
+def agrupar(desde, *campos):
+    """
+    Counter {valores de ``campos``: total} dos logs desde ``desde``.
+    Campos: ``action``, ``success``, ``user__username`` e ``dia`` (data local).
+    """
+    consolidado, ao_vivo = _fontes(desde)
+    if 'dia' in campos:
+        consolidado = consolidado.annotate(dia=TruncDate('hour'))
+        ao_vivo = ao_vivo.annotate(dia=TruncDate('timestamp'))
+    resultado = Counter()
+    for linha in consolidado.values(*campos).annotate(total=Sum('count')).order_by():
+        resultado[tuple(linha[campo] for campo in campos)] += linha['total']
+    for linha in ao_vivo.values(*campos).annotate(total=Count('id')).order_by():
+        resultado[tuple(linha[campo] for campo in campos)] += linha['total']
+    return resultado
@@ -1,12 +1,13 @@
 """
 Signals para capturar automaticamente ações do sistema e registrar logs de auditoria.
 """
-from django.db.models.signals import post_save, post_delete, pre_save
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
 from django.contrib.auth.models import User, Group
 from django.dispatch import receiver
 from django.utils import timezone
 from .models import AuditLog
+from . import snapshot
 import threading
 
 # Thread local storage para armazenar dados da requisição
@@ -23,58 +24,31 @@ def get_current_request():
     return getattr(_local, 'request', None)
 
 
-def get_field_changes(instance, old_instance=None):
+def get_field_changes(instance, update_fields=None):
     """
-    Compara dois instances do mesmo modelo e retorna as mudanças
+    Retorna as mudanças da instância desde que foi carregada do banco
+    (sem consulta: ver snapshot.py)
     """
-    if not old_instance:
-        return {}
-    
-    changes = {}
-    for field in instance._meta.fields:
-        field_name = field.name
-        old_value = getattr(old_instance, field_name, None)
-        new_value = getattr(instance, field_name, None)
-        
-        # Ignorar campos de timestamp automáticos
-        if field_name in ['created_at', 'updated_at', 'last_login', 'date_joined']:
-            continue
-            
-        if old_value != new_value:
-            changes[field_name] = {
-                'old': str(old_value) if old_value is not None else None,
-                'new': str(new_value) if new_value is not None else None
-            }
-    
-    return changes
+    return snapshot.alteracoes(instance, update_fields)
 
 
-# Store original instances for comparison
-original_instances = {}
-
-
-@receiver(pre_save, sender=User)
-def store_original_user(sender, instance, **kwargs):
-    """Armazena o estado original do usuário antes da alteração"""
-    if instance.pk:
-        try:
-            original_instances[f"user_{instance.pk}"] = User.objects.get(pk=instance.pk)
-        except User.DoesNotExist:
-            pass
+# Estado carregado do banco dos modelos com alterações auditadas
+snapshot.rastrear(User)
+snapshot.rastrear(Group)
 
 
 @receiver(post_save, sender=User)
-def log_user_changes(sender, instance, created, **kwargs):
+def log_user_changes(sender, instance, created, update_fields=None, **kwargs):
     """Registra mudanças em usuários"""
     request = get_current_request()
     
     if created:
         action = 'USER_CREATED'
         changes = {}
+        snapshot.guardar(instance)
     else:
         action = 'USER_UPDATED'
-        original = original_instances.pop(f"user_{instance.pk}", None)
-        changes = get_field_changes(instance, original)
+        changes = get_field_changes(instance, update_fields)
         
         # Se não houve mudanças significativas, não registrar
         if not changes:
@@ -105,28 +79,18 @@ def log_user_deletion(sender, instance, **kwargs):
     )
 
 
-@receiver(pre_save, sender=Group)
-def store_original_group(sender, instance, **kwargs):
-    """Armazena o estado original do grupo antes da alteração"""
-    if instance.pk:
-        try:
-            original_instances[f"group_{instance.pk}"] = Group.objects.get(pk=instance.pk)
-        except Group.DoesNotExist:
-            pass
-
-
 @receiver(post_save, sender=Group)
-def log_group_changes(sender, instance, created, **kwargs):
+def log_group_changes(sender, instance, created, update_fields=None, **kwargs):
     """Registra mudanças em grupos"""
     request = get_current_request()
     
     if created:
         action = 'GROUP_CREATED'
         changes = {}
+        snapshot.guardar(instance)
     else:
         action = 'GROUP_UPDATED'
-        original = original_instances.pop(f"group_{instance.pk}", None)
-        changes = get_field_changes(instance, original)
+        changes = get_field_changes(instance, update_fields)
         
         if not changes:
             return
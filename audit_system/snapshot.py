@@ -0,0 +1,108 @@
+"""
+Estado carregado do banco dos modelos auditados, para comparar alterações.
+
+Os signals de auditoria (signals.py) faziam um ``Model.objects.get(pk=...)``
+em todo ``pre_save`` de User e Group para saber o que mudou, e guardavam a
+cópia em um dicionário global até o ``post_save`` (que ficava lá se o save
+falhasse). Agora o ``from_db`` dos modelos registrados com ``rastrear``
+guarda na própria instância uma tupla com os valores dos campos
+acompanhados, e ``alteracoes`` compara com ela sem consulta nenhuma:
+
+    rastrear(User, ignorar=('last_login',))
+    usuario = User.objects.get(username='ana')   # guarda o estado
+    usuario.first_name = 'Ana'
+    usuario.save()
+    alteracoes(usuario)  # {'first_name': {'old': '', 'new': 'Ana'}}
+
+Instâncias que não vieram do banco (``User(pk=1)``) não têm estado
+guardado e não geram alterações. Campos adiados (``only``/``defer``)
+ficam fora da comparação.
+"""
+import copy
+
+from django.db.models import DEFERRED
+
+# Campos de data automáticos nunca são comparados
+CAMPOS_IGNORADOS = frozenset({
+    'created_at', 'updated_at', 'last_login', 'date_joined', 'criado_em', 'atualizado_em', 'data_criacao',
+})
+
+# Atributo da instância com a tupla de valores carregados
+_ATRIBUTO = '_auditoria_estado'
+
+
+def _campos_acompanhados(model, campos=None, ignorar=()):
+    ignorados = CAMPOS_IGNORADOS | set(ignorar)
+    escolhidos = []
+    for field in model._meta.concrete_fields:
+        if field.primary_key or field.name in ignorados:
+            continue
+        if campos is not None and field.name not in campos:
+            continue
+        escolhidos.append((field.name, field.attname))
+    return tuple(escolhidos)
+
+
+def rastrear(model, campos=None, ignorar=()):
+    """Passa a guardar o estado das instâncias de ``model`` carregadas do banco"""
+    model._auditoria_campos = _campos_acompanhados(model, campos, ignorar)
+    if getattr(model.from_db, '_auditoria', False):
+        return
+    from_db_original = model.from_db.__func__
+
+    def from_db(cls, db, field_names, values):
+        instance = from_db_original(cls, db, field_names, values)
+        guardar(instance)
+        return instance
+
+    from_db._auditoria = True
+    model.from_db = classmethod(from_db)
+
+
+def rastreado(model):
+    return hasattr(model, '_auditoria_campos')
+
+
+def _valor(valores, attname):
+    valor = valores.get(attname, DEFERRED)
+    # Listas e dicionários (JSONField) podem ser alterados no lugar
+    return copy.deepcopy(valor) if isinstance(valor, (list, dict)) else valor
+
+
+def guardar(instance):
+    """Guarda o estado atual da instância como o estado do banco"""
+    valores = instance.__dict__
+    instance.__dict__[_ATRIBUTO] = tuple(
+        _valor(valores, attname) for _, attname in instance._auditoria_campos
+    )
+
+
+def alteracoes(instance, update_fields=None):
+    """
+    Campos alterados desde o carregamento (ou o último save auditado), no
+    formato ``{campo: {'old': ..., 'new': ...}}``, e passa a considerar o
+    estado atual como o salvo. Com ``update_fields`` só esses campos contam.
+    """
+    anterior = instance.__dict__.get(_ATRIBUTO)
+    if anterior is None:
+        if update_fields is None:
+            guardar(instance)
+        return {}
+
+    valores = instance.__dict__
+    atual = list(anterior)
+    changes = {}
+    for posicao, (nome, attname) in enumerate(instance._auditoria_campos):
+        if update_fields is not None and nome not in update_fields and attname not in update_fields:
+            continue
+        novo = _valor(valores, attname)
+        atual[posicao] = novo
+        antigo = anterior[posicao]
+        if antigo is DEFERRED or novo is DEFERRED or antigo == novo:
+            continue
+        changes[nome] = {
+            'old': str(antigo) if antigo is not None else None,
+            'new': str(novo) if novo is not None else None,
+        }
+    instance.__dict__[_ATRIBUTO] = tuple(atual)
+    return changes
@@ -1,3 +1,434 @@
-from django.test import TestCase
+from collections import Counter
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group, User
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import resumos, rollups
+from .models import AuditLog, AuditLogHourly, AuditLogSummary, AuditRollupState
+from .writer import gravador
+
+
+class AuditLogsListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser('auditor', 'auditor@example.com', 'senha-forte-123')
+
+    def test_listagem_paginada_por_cursor(self):
+        AuditLog.objects.bulk_create([
+            AuditLog(action='CUSTOM_ACTION', object_repr=f'Registro {i}') for i in range(60)
+        ])
+        self.client.force_login(self.staff)
+
+        response = self.client.get(reverse('audit_system:logs_list'), {'action': 'CUSTOM_ACTION'})
+        self.assertEqual(response.status_code, 200)
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 50)
+        self.assertTrue(page_obj.has_next())
+        self.assertContains(response, 'cursor=')
+
+        response = self.client.get(reverse('audit_system:logs_list'), {
+            'action': 'CUSTOM_ACTION',
+            'cursor': page_obj.next_cursor,
+        })
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertFalse(response.context['page_obj'].has_next())
+
+
+class GravadorAuditoriaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('operador', 'operador@example.com', 'senha-forte-123')
+
+    def test_fora_de_requisicao_grava_na_hora(self):
+        log = AuditLog.log_action('CUSTOM_ACTION', user=self.usuario)
+        self.assertIsNotNone(log.pk)
+
+    def test_logs_da_requisicao_gravados_em_um_insert(self):
+        with CaptureQueriesContext(connection) as consultas, gravador.requisicao():
+            # Dentro do TestCase tudo roda em uma transação: o log espera o commit
+            with self.captureOnCommitCallbacks(execute=True):
+                for numero in range(5):
+                    AuditLog.log_action('CUSTOM_ACTION', user=self.usuario, extra_data={'n': numero})
+            self.assertFalse(AuditLog.objects.filter(action='CUSTOM_ACTION').exists())
+        inserts = [q for q in consultas.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(AuditLog.objects.filter(user=self.usuario).count(), 5)
+
+    def test_acao_critica_gravada_na_hora(self):
+        with gravador.requisicao():
+            log = AuditLog.log_action('USER_PASSWORD_CHANGED', obj=self.usuario, user=self.usuario)
+            self.assertTrue(AuditLog.objects.filter(pk=log.pk).exists())
+            AuditLog.log_action('CUSTOM_ACTION', user=self.usuario, critical=True)
+            self.assertEqual(AuditLog.objects.filter(user=self.usuario).count(), 2)
+
+    def test_log_de_transacao_desfeita_descartado(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with gravador.requisicao():
+                try:
+                    with transaction.atomic():
+                        AuditLog.log_action('CUSTOM_ACTION', user=self.usuario, extra_data={'desfeito': True})
+                        raise ValueError
+                except ValueError:
+                    pass
+                with transaction.atomic():
+                    AuditLog.log_action('CUSTOM_ACTION', user=self.usuario, extra_data={'desfeito': False})
+        self.assertEqual(
+            list(AuditLog.objects.filter(action='CUSTOM_ACTION').values_list('extra_data', flat=True)),
+            [{'desfeito': False}],
+        )
+
+    def test_login_registrado_pelo_middleware(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            resposta = self.client.post(reverse('accounts:login'), {
+                'username': 'operador', 'password': 'senha-forte-123',
+            })
+        self.assertEqual(resposta.status_code, 302)
+        self.assertTrue(AuditLog.objects.filter(action='USER_LOGIN', user=self.usuario).exists())
+
+
+class GravadorAuditoriaFilaTests(TransactionTestCase):
+    """A thread de gravação usa outra conexão: os dados precisam estar confirmados"""
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('operador', 'operador@example.com', 'senha-forte-123')
+        gravador.zerar_estatisticas()
+        self.addCleanup(gravador.parar)
+
+    @override_settings(AUDIT_GRAVACAO_ASSINCRONA=True)
+    def test_fila_grava_em_segundo_plano(self):
+        with gravador.requisicao():
+            for numero in range(20):
+                AuditLog.log_action('CUSTOM_ACTION', user=self.usuario, extra_data={'n': numero})
+        self.assertTrue(gravador.esperar(timeout=10))
+        self.assertEqual(AuditLog.objects.filter(user=self.usuario).count(), 20)
+        self.assertEqual(gravador.estatisticas()['fila_cheia'], 0)
+
+    @override_settings(AUDIT_GRAVACAO_ASSINCRONA=True, AUDIT_FILA_MAX=1, AUDIT_FILA_ESPERA=0)
+    def test_fila_cheia_grava_na_requisicao(self):
+        gravador.parar()
+        with gravador.requisicao():
+            for numero in range(50):
+                AuditLog.log_action('CUSTOM_ACTION', user=self.usuario, extra_data={'n': numero})
+        self.assertTrue(gravador.esperar(timeout=10))
+        self.assertEqual(AuditLog.objects.filter(user=self.usuario).count(), 50)
+        self.assertGreater(gravador.estatisticas()['fila_cheia'], 0)
+
+
+class AlteracoesAuditadasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('operador', 'operador@example.com', 'senha-forte-123')
+
+    def _ultimo_log(self, action):
+        return AuditLog.objects.filter(action=action).order_by('-pk').first()
+
+    def test_alteracao_sem_consulta_extra(self):
+        usuario = User.objects.get(pk=self.usuario.pk)
+        usuario.first_name = 'Ana'
+        usuario.email = 'ana@example.com'
+        with CaptureQueriesContext(connection) as consultas:
+            usuario.save()
+        # Outros receivers (perfil do usuário) podem consultar, mas não o auth_user
+        self.assertFalse([q for q in consultas.captured_queries if q['sql'].startswith('SELECT "auth_user"')])
+
+        log = self._ultimo_log('USER_UPDATED')
+        self.assertEqual(log.changes, {
+            'first_name': {'old': '', 'new': 'Ana'},
+            'email': {'old': 'operador@example.com', 'new': 'ana@example.com'},
+        })
+
+    def test_saves_seguidos_comparam_com_o_ultimo_salvo(self):
+        usuario = User.objects.get(pk=self.usuario.pk)
+        usuario.first_name = 'Ana'
+        usuario.save()
+        usuario.save()
+        self.assertEqual(AuditLog.objects.filter(action='USER_UPDATED').count(), 1)
+
+        usuario.first_name = 'Bia'
+        usuario.save()
+        self.assertEqual(self._ultimo_log('USER_UPDATED').changes, {'first_name': {'old': 'Ana', 'new': 'Bia'}})
+
+    def test_update_fields_e_campos_ignorados(self):
+        usuario = User.objects.get(pk=self.usuario.pk)
+        usuario.first_name = 'Ana'
+        usuario.last_login = timezone.now()
+        usuario.save(update_fields=['last_login'])
+        self.assertFalse(AuditLog.objects.filter(action='USER_UPDATED').exists())
+
+        usuario.save(update_fields=['first_name'])
+        self.assertEqual(self._ultimo_log('USER_UPDATED').changes, {'first_name': {'old': '', 'new': 'Ana'}})
+
+    def test_campos_adiados_nao_comparados(self):
+        usuario = User.objects.only('first_name').get(pk=self.usuario.pk)
+        usuario.first_name = 'Ana'
+        usuario.save()
+        self.assertEqual(self._ultimo_log('USER_UPDATED').changes, {'first_name': {'old': '', 'new': 'Ana'}})
+
+    def test_instancia_nova_e_grupo(self):
+        grupo = Group.objects.create(name='Guias')
+        grupo.name = 'Guias de turismo'
+        grupo.save()
+        self.assertEqual(
+            self._ultimo_log('GROUP_UPDATED').changes, {'name': {'old': 'Guias', 'new': 'Guias de turismo'}}
+        )
+
+
+class ConsolidacaoAuditoriaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser('auditor', 'auditor@example.com', 'senha-forte-123')
+        AuditLog.objects.all().delete()
+
+    def criar_logs(self, quantidade, momento, action='CUSTOM_ACTION', success=True, user=None):
+        AuditLog.objects.bulk_create([
+            AuditLog(action=action, object_repr='Registro', timestamp=momento, success=success, user=user)
+            for _ in range(quantidade)
+        ])
+
+    def contagens_brutas(self):
+        hoje = rollups.inicio_do_dia(timezone.localdate())
+        return {
+            'total_logs': AuditLog.objects.count(),
+            'today_logs': AuditLog.objects.filter(timestamp__gte=hoje).count(),
+            'failed_actions': AuditLog.objects.filter(success=False).count(),
+        }
+
+    def test_consolidado_mais_hora_corrente_bate_com_os_logs(self):
+        agora = timezone.now()
+        self.criar_logs(3, agora - timedelta(days=3), user=self.staff)
+        self.criar_logs(2, agora - timedelta(days=1), success=False)
+        rollups.consolidar(agora)
+        self.criar_logs(4, agora, action='USER_LOGIN', user=self.staff)
+
+        self.assertEqual(AuditLogHourly.objects.aggregate(total=Sum('count'))['total'], 5)
+        totais = rollups.totais(
+            total_logs={}, today_logs={'desde': rollups.inicio_do_dia(timezone.localdate())},
+            failed_actions={'success': False},
+        )
+        self.assertEqual(totais, self.contagens_brutas())
+        acoes = rollups.agrupar(agora - timedelta(days=7), 'action')
+        self.assertEqual(acoes, {('CUSTOM_ACTION',): 5, ('USER_LOGIN',): 4})
+        usuarios = rollups.agrupar(agora - timedelta(days=7), 'user__username')
+        self.assertEqual(usuarios[('auditor',)], 7)
+
+    def test_logs_atrasados_dentro_da_margem(self):
+        agora = timezone.now()
+        self.criar_logs(1, agora - timedelta(hours=5))
+        rollups.consolidar(agora)
+        # Gravado depois da consolidação, com o horário do evento
+        self.criar_logs(2, agora - timedelta(minutes=70))
+        rollups.consolidar(agora + timedelta(minutes=10))
+
+        self.assertEqual(rollups.totais(total={})['total'], 3)
+        self.assertEqual(AuditLogHourly.objects.aggregate(total=Sum('count'))['total'], 3)
+
+    def test_reprocessar_apos_apagar_logs(self):
+        agora = timezone.now()
+        self.criar_logs(3, agora - timedelta(days=40))
+        self.criar_logs(1, agora - timedelta(days=2))
+        rollups.consolidar(agora)
+
+        AuditLog.objects.filter(timestamp__lt=agora - timedelta(days=30)).delete()
+        rollups.reprocessar(agora - timedelta(days=41), agora - timedelta(days=30))
+
+        self.assertEqual(rollups.totais(total={})['total'], 1)
+
+    def test_dashboard_com_consultas_constantes(self):
+        agora = timezone.now()
+        self.client.force_login(self.staff)
+
+        def consultas_do_dashboard():
+            # Consolida desde o início (os logs do teste são criados no passado)
+            AuditRollupState.objects.all().delete()
+            rollups.consolidar(agora)
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.get(reverse('audit_system:dashboard'))
+            self.assertEqual(response.status_code, 200)
+            return response, len(consultas)
+
+        self.criar_logs(5, agora - timedelta(days=2), user=self.staff)
+        _, poucas = consultas_do_dashboard()
+        self.criar_logs(500, agora - timedelta(days=3), user=self.staff)
+        self.criar_logs(50, agora - timedelta(days=1), success=False)
+        response, muitas = consultas_do_dashboard()
+
+        self.assertEqual(poucas, muitas)
+        stats = response.context['stats']
+        self.assertEqual(stats['failed_actions'], 50)
+        self.assertEqual(stats['total_logs'], AuditLog.objects.count())
+        self.assertEqual(response.context['active_users'][0]['user__username'], 'auditor')
+
+    def test_dashboard_avisa_consolidacao_parada(self):
+        self.client.force_login(self.staff)
+        url = reverse('audit_system:dashboard')
+
+        self.assertTrue(self.client.get(url).context['consolidacao_atrasada'])
+        rollups.consolidar()
+        self.assertFalse(self.client.get(url).context['consolidacao_atrasada'])
+        self.assertTrue(rollups.atrasada(agora=timezone.now() + timedelta(hours=2)))
+
+    def test_api_de_estatisticas(self):
+        agora = timezone.now()
+        self.criar_logs(2, agora - timedelta(days=2))
+        self.criar_logs(1, agora - timedelta(days=2), success=False)
+        rollups.consolidar(agora)
+        self.client.force_login(self.staff)
+
+        data = self.client.get(reverse('audit_system:api_stats'), {'days': 7}).json()
+
+        dia = timezone.localtime(agora - timedelta(days=2)).date().isoformat()
+        item = next(item for item in data['daily_activity'] if item['timestamp__date'] == dia)
+        self.assertEqual((item['total'], item['successful'], item['failed']), (3, 2, 1))
+        self.assertEqual(data['action_distribution'][0], {'action': 'CUSTOM_ACTION', 'count': 3})
+
+
+class ResumosAuditoriaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('operador', 'operador@example.com', 'senha-forte-123')
+        AuditLog.objects.all().delete()
+
+    def criar_logs(self, quantidade, momento, action='CUSTOM_ACTION', user=None):
+        AuditLog.objects.bulk_create([
+            AuditLog(action=action, object_repr='Registro', timestamp=momento, user=user)
+            for _ in range(quantidade)
+        ])
+
+    def resumos(self):
+        return {
+            (resumo.date, resumo.user_id, resumo.action): resumo.count
+            for resumo in AuditLogSummary.objects.all()
+        }
+
+    def esperados(self):
+        return dict(Counter(
+            (timezone.localdate(log.timestamp), log.user_id, log.action) for log in AuditLog.objects.all()
+        ))
+
+    def test_incremental_soma_apenas_os_logs_novos(self):
+        agora = timezone.now()
+        self.criar_logs(3, agora - timedelta(days=2), user=self.usuario)
+        self.criar_logs(2, agora - timedelta(days=2))
+        depois = agora + resumos.ATRASO + timedelta(seconds=1)
+        resumos.resumir(agora=depois)
+        self.assertEqual(self.resumos(), self.esperados())
+
+        self.criar_logs(4, agora - timedelta(days=2), user=self.usuario)
+        self.criar_logs(1, agora - timedelta(days=2))
+        self.criar_logs(2, agora, action='USER_LOGIN', user=self.usuario)
+        with CaptureQueriesContext(connection) as consultas:
+            logs, _ = resumos.resumir(agora=depois)
+
+        self.assertEqual(logs, 7)
+        self.assertEqual(self.resumos(), self.esperados())
+        # Nada de consulta por linha: usuário, get_or_create, save
+        self.assertFalse([q for q in consultas.captured_queries if 'auth_user' in q['sql']])
+        self.assertEqual(resumos.resumir(agora=depois), (0, 0))
+
+    def test_logs_recentes_esperam_o_atraso(self):
+        agora = timezone.now()
+        self.criar_logs(2, agora, user=self.usuario)
+        resumos.resumir(agora=agora)
+        self.assertEqual(self.resumos(), {})
+
+        resumos.resumir(agora=agora + resumos.ATRASO + timedelta(seconds=1))
+        self.assertEqual(sum(self.resumos().values()), 2)
+
+    def test_reconstrucao_por_intervalos(self):
+        agora = timezone.now()
+        for dias in (1, 9, 20, 35):
+            self.criar_logs(dias, agora - timedelta(days=dias), user=self.usuario)
+            self.criar_logs(1, agora - timedelta(days=dias))
+        AuditLogSummary.objects.create(date=timezone.localdate(), action='OBSOLETO', count=99)
+
+        depois = agora + resumos.ATRASO + timedelta(seconds=1)
+        resumos.reconstruir(agora=depois, workers=1)
+
+        self.assertEqual(self.resumos(), self.esperados())
+        self.assertEqual(resumos.resumir(agora=depois), (0, 0))
+
+
+    def test_reconstrucao_parcial_soma_logs_retroativos(self):
+        agora = timezone.now()
+        depois = agora + resumos.ATRASO + timedelta(seconds=1)
+        self.criar_logs(2, agora - timedelta(days=40), user=self.usuario)
+        self.criar_logs(1, agora - timedelta(days=2))
+        resumos.resumir(agora=depois)
+
+        # Depois da marca: um log com data antiga (fora do período) e um novo
+        self.criar_logs(3, agora - timedelta(days=40), user=self.usuario)
+        self.criar_logs(1, agora, action='USER_LOGIN')
+        resumos.reconstruir(desde=timezone.localdate(agora) - timedelta(days=7), agora=depois, workers=1)
+
+        self.assertEqual(self.resumos(), self.esperados())
+        self.assertEqual(resumos.resumir(agora=depois), (0, 0))
+
+    def test_reconstrucao_parcial_sem_marca_mantem_a_reconstrucao_completa(self):
+        agora = timezone.now()
+        depois = agora + resumos.ATRASO + timedelta(seconds=1)
+        self.criar_logs(2, agora - timedelta(days=40), user=self.usuario)
+        self.criar_logs(1, agora)
+
+        resumos.reconstruir(desde=timezone.localdate(agora) - timedelta(days=7), agora=depois, workers=1)
+        self.assertIsNone(AuditRollupState.objects.get(pk=1).summaries_last_id)
+
+        resumos.resumir(agora=depois)
+        self.assertEqual(self.resumos(), self.esperados())
+
+class GenerateAuditSummariesCommandTests(TestCase):
+
+    def executar(self, *args):
+        from io import StringIO
+
+        saida, erros = StringIO(), StringIO()
+        call_command('generate_audit_summaries', *args, stdout=saida, stderr=erros)
+        return saida.getvalue(), erros.getvalue()
+
+    def test_days_sem_rebuild_e_rejeitado(self):
+        with self.assertRaises(CommandError):
+            self.executar('--days', '7')
+
+    def test_clean_old_reconstroi_so_os_ultimos_30_dias(self):
+        AuditLog.objects.all().delete()
+        antigo = timezone.localdate() - timedelta(days=90)
+        AuditLogSummary.objects.create(date=antigo, action='CUSTOM_ACTION', count=5)
+
+        with mock.patch.object(resumos, 'reconstruir', wraps=resumos.reconstruir) as reconstruir:
+            _, erros = self.executar('--clean-old')
+
+        self.assertIn('obsoleto', erros)
+        self.assertEqual(reconstruir.call_args.kwargs['desde'], timezone.localdate() - timedelta(days=30))
+        # Fora da janela: o resumo antigo fica
+        self.assertTrue(AuditLogSummary.objects.filter(date=antigo).exists())
+
+
+class ResumosAuditoriaParalelosTests(TransactionTestCase):
+    """As threads da reconstrução usam outras conexões: os logs precisam estar confirmados"""
+
+    def test_reconstrucao_em_paralelo(self):
+        usuario = User.objects.create_user('operador', 'operador@example.com', 'senha-forte-123')
+        AuditLog.objects.all().delete()
+        agora = timezone.now()
+        for dias in range(0, 60, 3):
+            AuditLog.objects.bulk_create([
+                AuditLog(action='CUSTOM_ACTION', object_repr='Registro', timestamp=agora - timedelta(days=dias), user=usuario)
+                for _ in range(dias + 1)
+            ])
+
+        logs, _ = resumos.reconstruir(agora=agora + resumos.ATRASO + timedelta(seconds=1), workers=3)
+
+        self.assertEqual(logs, AuditLog.objects.count())
+        self.assertEqual(AuditLogSummary.objects.aggregate(total=Sum('count'))['total'], logs)
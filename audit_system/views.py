@@ -3,59 +3,51 @@ from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.http import JsonResponse, HttpResponse
 from django.core.paginator import Paginator
-from django.db.models import Count, Q
+from core.pagination import KeysetPaginator
+from django.db.models import Q
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 from datetime import datetime, timedelta
 import csv
 import json
 from .models import AuditLog, AuditLogSummary
+from . import rollups
 
 
 @staff_member_required
 def audit_dashboard(request):
     """Dashboard principal de auditoria"""
-    # Estatísticas gerais
-    today = timezone.now().date()
-    week_ago = today - timedelta(days=7)
-    month_ago = today - timedelta(days=30)
-    
-    stats = {
-        'total_logs': AuditLog.objects.count(),
-        'today_logs': AuditLog.objects.filter(timestamp__date=today).count(),
-        'week_logs': AuditLog.objects.filter(timestamp__date__gte=week_ago).count(),
-        'month_logs': AuditLog.objects.filter(timestamp__date__gte=month_ago).count(),
-        'failed_actions': AuditLog.objects.filter(success=False).count(),
-    }
+    # Estatísticas gerais: contagens consolidadas por hora (ver rollups.py)
+    today = timezone.localdate()
+    week_ago = rollups.inicio_do_dia(today - timedelta(days=7))
+    month_ago = rollups.inicio_do_dia(today - timedelta(days=30))
+    
+    stats = rollups.totais(
+        total_logs={},
+        today_logs={'desde': rollups.inicio_do_dia(today)},
+        week_logs={'desde': week_ago},
+        month_logs={'desde': month_ago},
+        failed_actions={'success': False},
+    )
     
     # Ações mais comuns (últimos 30 dias)
-    common_actions = (AuditLog.objects
-                     .filter(timestamp__date__gte=month_ago)
-                     .values('action')
-                     .annotate(count=Count('action'))
-                     .order_by('-count')[:10])
+    common_actions = [
+        {'action': action, 'count': count}
+        for (action,), count in rollups.agrupar(month_ago, 'action').most_common(10)
+    ]
     
     # Usuários mais ativos (últimos 30 dias)
-    active_users = (AuditLog.objects
-                   .filter(timestamp__date__gte=month_ago, user__isnull=False)
-                   .values('user__username')
-                   .annotate(count=Count('user'))
-                   .order_by('-count')[:10])
-    
-    # Atividade por dia (últimos 30 dias)
-    daily_activity = (AuditLog.objects
-                     .filter(timestamp__date__gte=month_ago)
-                     .values('timestamp__date')
-                     .annotate(count=Count('id'))
-                     .order_by('timestamp__date'))
-    
-    # Converter para formato JSON-friendly
-    daily_activity_json = []
-    for item in daily_activity:
-        daily_activity_json.append({
-            'timestamp__date': item['timestamp__date'].strftime('%Y-%m-%d'),
-            'count': item['count']
-        })
+    active_users = [
+        {'user__username': username, 'count': count}
+        for (username,), count in rollups.agrupar(month_ago, 'user__username').most_common()
+        if username is not None
+    ][:10]
+    
+    # Atividade por dia (últimos 30 dias), em formato JSON-friendly
+    daily_activity_json = [
+        {'timestamp__date': dia.strftime('%Y-%m-%d'), 'count': count}
+        for (dia,), count in sorted(rollups.agrupar(month_ago, 'dia').items())
+    ]
     
     # Logs recentes
     recent_logs = AuditLog.objects.select_related('user', 'content_type')[:20]
@@ -66,6 +58,7 @@ def audit_dashboard(request):
         'active_users': active_users,
         'daily_activity': daily_activity_json,
         'recent_logs': recent_logs,
+        'consolidacao_atrasada': rollups.atrasada(),
         'title': 'Dashboard de Auditoria',
     }
     
@@ -117,10 +110,9 @@ def audit_logs_list(request):
             Q(error_message__icontains=search_query)
         )
     
-    # Paginação
-    paginator = Paginator(logs, 50)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginação por keyset (sem COUNT/OFFSET sobre a tabela inteira)
+    paginator = KeysetPaginator(logs, 50, ordering=('-timestamp', '-id'), estimate_total=True)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     # Choices para filtros
     action_choices = AuditLog.ACTION_CHOICES
@@ -236,47 +228,38 @@ def audit_export_csv(request):
 def audit_api_stats(request):
     """API para estatísticas do dashboard"""
     days = int(request.GET.get('days', 30))
-    start_date = timezone.now().date() - timedelta(days=days)
-    
-    # Atividade diária
-    daily_stats = (AuditLog.objects
-                  .filter(timestamp__date__gte=start_date)
-                  .values('timestamp__date')
-                  .annotate(
-                      total=Count('id'),
-                      successful=Count('id', filter=Q(success=True)),
-                      failed=Count('id', filter=Q(success=False))
-                  )
-                  .order_by('timestamp__date'))
+    start_date = rollups.inicio_do_dia(timezone.localdate() - timedelta(days=days))
+    
+    # Atividade diária (contagens consolidadas por hora, ver rollups.py)
+    daily_stats = {}
+    for (dia, success), count in rollups.agrupar(start_date, 'dia', 'success').items():
+        item = daily_stats.setdefault(dia, {'total': 0, 'successful': 0, 'failed': 0})
+        item['total'] += count
+        item['successful' if success else 'failed'] += count
     
     # Converter datas para formato JSON-friendly
-    daily_stats_json = []
-    for item in daily_stats:
-        daily_stats_json.append({
-            'timestamp__date': item['timestamp__date'].strftime('%Y-%m-%d'),
-            'total': item['total'],
-            'successful': item['successful'],
-            'failed': item['failed']
-        })
+    daily_stats_json = [
+        {'timestamp__date': dia.strftime('%Y-%m-%d'), **daily_stats[dia]}
+        for dia in sorted(daily_stats)
+    ]
     
     # Ações por tipo
-    action_stats = (AuditLog.objects
-                   .filter(timestamp__date__gte=start_date)
-                   .values('action')
-                   .annotate(count=Count('id'))
-                   .order_by('-count'))
+    action_stats = [
+        {'action': action, 'count': count}
+        for (action,), count in rollups.agrupar(start_date, 'action').most_common()
+    ]
     
     # Usuários mais ativos
-    user_stats = (AuditLog.objects
-                 .filter(timestamp__date__gte=start_date, user__isnull=False)
-                 .values('user__username')
-                 .annotate(count=Count('id'))
-                 .order_by('-count')[:10])
+    user_stats = [
+        {'user__username': username, 'count': count}
+        for (username,), count in rollups.agrupar(start_date, 'user__username').most_common()
+        if username is not None
+    ][:10]
     
     data = {
         'daily_activity': daily_stats_json,
-        'action_distribution': list(action_stats),
-        'top_users': list(user_stats),
+        'action_distribution': action_stats,
+        'top_users': user_stats,
     }
     
     return JsonResponse(data)
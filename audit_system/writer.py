@@ -0,0 +1,247 @@
+"""
+Gravação em lote dos logs de auditoria.
+
+``AuditLog.log_action`` gravava cada log com um INSERT síncrono dentro da
+requisição (login, logout, login falhado, alterações de usuário e grupo...).
+Agora ele monta o registro e o entrega ao ``gravador`` do processo:
+
+- ações críticas (``ACOES_CRITICAS``: exclusões, senhas, permissões,
+  configurações) continuam gravadas na hora, na transação de quem as fez;
+- durante uma requisição (``AuditMiddleware``) os demais logs ficam em um
+  buffer da thread e são gravados com um único ``bulk_create`` quando a
+  resposta sai;
+- logs criados dentro de uma transação só entram no buffer quando ela é
+  confirmada (``on_commit``): se ela for desfeita, o log também é;
+- fora de requisições (comandos, shell) o log é gravado na hora, como antes.
+
+Com ``AUDIT_GRAVACAO_ASSINCRONA`` os lotes vão para uma fila limitada
+(``AUDIT_FILA_MAX`` registros) consumida por uma thread do processo, e a
+requisição não espera o banco. Fila cheia: a requisição espera até
+``AUDIT_FILA_ESPERA`` segundos e, se ainda não houver espaço, grava o lote
+ela mesma (nenhum log é descartado).
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, close_old_connections, transaction
+
+logger = logging.getLogger('audit_system')
+
+# Ações gravadas na hora, mesmo durante uma requisição
+ACOES_CRITICAS = frozenset({
+    'USER_DELETED', 'USER_PASSWORD_CHANGED', 'USER_ACTIVATED', 'USER_DEACTIVATED',
+    'GROUP_DELETED', 'GROUP_PERMISSION_ADDED', 'GROUP_PERMISSION_REMOVED',
+    'PERMISSION_GRANTED', 'PERMISSION_REVOKED', 'ROLE_CHANGED',
+    'SETTINGS_CHANGED', 'DATA_EXPORT',
+})
+
+# Registros por bulk_create da thread de gravação
+TAMANHO_LOTE = 500
+# Segundos que a thread espera por mais registros antes de gravar um lote
+INTERVALO_GRAVACAO = 0.2
+
+
+class GravadorAuditoria:
+    """Buffers por requisição/transação e, opcionalmente, a thread de gravação"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._fila = None
+        self._thread = None
+        self._pid = None
+        self._parar = threading.Event()
+        self._contadores = {
+            'registrados': 0, 'sincronos': 0, 'lotes': 0, 'gravados': 0,
+            'fila_cheia': 0, 'erros': 0,
+        }
+
+    # Registro
+
+    def registrar(self, log, critico=False):
+        """Grava ``log`` (AuditLog não salvo) agora ou no próximo lote"""
+        self._contar(registrados=1)
+        buffer = getattr(self._local, 'buffer', None)
+        if critico or (buffer is None and not self.assincrono):
+            log.save()
+            self._contar(sincronos=1)
+            return log
+
+        conexao = transaction.get_connection()
+        if conexao.in_atomic_block:
+            # Só entra no lote se a transação (e o savepoint) for confirmada
+            conexao.on_commit(partial(self._adicionar, [log]))
+        elif buffer is not None:
+            buffer.append(log)
+        else:
+            self._enviar([log])
+        return log
+
+    def _adicionar(self, logs):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            buffer.extend(logs)
+        else:
+            self._enviar(logs)
+
+    # Escopo da requisição
+
+    @contextmanager
+    def requisicao(self):
+        """Acumula os logs do bloco e os grava em lote no final (ver AuditMiddleware)"""
+        if getattr(self._local, 'buffer', None) is not None:
+            # Escopo aninhado: o externo grava
+            yield
+            return
+        self._local.buffer = []
+        try:
+            yield
+        finally:
+            logs = self._local.buffer
+            self._local.buffer = None
+            if logs:
+                self._enviar(logs)
+
+    # Gravação
+
+    @property
+    def assincrono(self):
+        return settings.AUDIT_GRAVACAO_ASSINCRONA
+
+    def _enviar(self, logs):
+        if not self.assincrono:
+            self.gravar(logs)
+            return
+        fila = self._iniciar_thread()
+        espera = settings.AUDIT_FILA_ESPERA
+        for posicao, log in enumerate(logs):
+            try:
+                fila.put(log, timeout=espera)
+            except queue.Full:
+                # Contrapressão: a requisição grava ela mesma o que sobrou
+                self._contar(fila_cheia=len(logs) - posicao)
+                self.gravar(logs[posicao:])
+                return
+
+    def gravar(self, logs):
+        """Grava ``logs`` com um bulk_create (um a um se o lote falhar)"""
+        from .models import AuditLog
+
+        if not logs:
+            return
+        try:
+            with transaction.atomic():
+                AuditLog.objects.bulk_create(logs)
+        except IntegrityError:
+            # Ex.: usuário removido antes do lote ser gravado
+            self._gravar_um_a_um(logs)
+        except DatabaseError:
+            self._contar(erros=len(logs))
+            logger.exception('Falha ao gravar %d log(s) de auditoria', len(logs))
+            return
+        self._contar(lotes=1, gravados=len(logs))
+
+    def _gravar_um_a_um(self, logs):
+        for log in logs:
+            log.pk = None
+            try:
+                with transaction.atomic():
+                    log.save(force_insert=True)
+            except IntegrityError:
+                log.pk = log.user_id = None
+                log.extra_data = {**(log.extra_data or {}), 'usuario_removido': True}
+                try:
+                    with transaction.atomic():
+                        log.save(force_insert=True)
+                except DatabaseError:
+                    self._contar(erros=1)
+                    logger.exception('Falha ao gravar log de auditoria %s', log.action)
+
+    # Thread de gravação
+
+    def _iniciar_thread(self):
+        # Depois de um fork (gunicorn --preload) a thread do pai não existe no filho
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                    self._fila = queue.Queue(maxsize=settings.AUDIT_FILA_MAX)
+                    self._parar.clear()
+                    self._pid = os.getpid()
+                    self._thread = threading.Thread(target=self._trabalhar, name='gravador-auditoria', daemon=True)
+                    self._thread.start()
+        return self._fila
+
+    def _trabalhar(self):
+        fila = self._fila
+        while True:
+            try:
+                primeiro = fila.get(timeout=INTERVALO_GRAVACAO)
+            except queue.Empty:
+                if self._parar.is_set():
+                    break
+                continue
+            lote = [primeiro]
+            prazo = time.monotonic() + INTERVALO_GRAVACAO
+            while len(lote) < TAMANHO_LOTE:
+                restante = prazo - time.monotonic()
+                try:
+                    lote.append(fila.get(timeout=max(restante, 0)) if restante > 0 else fila.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.gravar(lote)
+            except Exception:
+                logger.exception('Falha ao gravar %d log(s) de auditoria', len(lote))
+            finally:
+                for _ in lote:
+                    fila.task_done()
+                close_old_connections()
+
+    def esperar(self, timeout=None):
+        """Espera a fila esvaziar (testes, benchmark); retorna False se o prazo acabar"""
+        fila = self._fila
+        if fila is None:
+            return True
+        limite = None if timeout is None else time.monotonic() + timeout
+        while fila.unfinished_tasks:
+            if limite is not None and time.monotonic() > limite:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def parar(self, timeout=5):
+        """Grava o que está na fila e encerra a thread (saída do processo)"""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self.esperar(timeout)
+        self._parar.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    # Estatísticas
+
+    def _contar(self, **valores):
+        with self._lock:
+            for nome, valor in valores.items():
+                self._contadores[nome] += valor
+
+    def estatisticas(self):
+        with self._lock:
+            dados = dict(self._contadores)
+        dados['na_fila'] = self._fila.qsize() if self._fila is not None else 0
+        return dados
+
+    def zerar_estatisticas(self):
+        with self._lock:
+            self._contadores = dict.fromkeys(self._contadores, 0)
+
+
+gravador = GravadorAuditoria()
+atexit.register(gravador.parar)
@@ -0,0 +1,204 @@
+"""
+Paginação por keyset (cursor) para listagens grandes.
+
+Diferente do ``django.core.paginator.Paginator``, não executa ``COUNT(*)`` nem
+``OFFSET``: cada página é buscada a partir do último (ou primeiro) registro da
+página anterior, usando o índice da ordenação. O custo de abrir a página 500
+é o mesmo da página 1.
+
+Uso:
+    paginator = KeysetPaginator(AuditLog.objects.all(), 50, ordering=('-timestamp', '-id'))
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+"""
+import base64
+import datetime
+import decimal
+import json
+
+from django.db import connections
+from django.db.models import Q
+
+
+def _json_default(valor):
+    # isoformat() completo: o DjangoJSONEncoder trunca microssegundos, o que
+    # tornaria o cursor ambíguo entre registros do mesmo milissegundo
+    if isinstance(valor, (datetime.datetime, datetime.date, datetime.time)):
+        return valor.isoformat()
+    if isinstance(valor, decimal.Decimal):
+        return str(valor)
+    raise TypeError(f'Tipo não serializável no cursor: {type(valor).__name__}')
+
+
+class InvalidCursor(Exception):
+    """Cursor malformado ou incompatível com a ordenação do paginator"""
+
+
+class KeysetPage:
+    """Uma página de resultados com cursores opacos para navegação"""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __repr__(self):
+        return f'<KeysetPage de {len(self.object_list)} itens>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], reverse=False)
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], reverse=True)
+
+    @property
+    def estimated_total(self):
+        return self.paginator.estimated_count
+
+
+class KeysetPaginator:
+    """
+    Paginador por keyset sobre uma ordenação total.
+
+    A ordenação deve terminar em um campo único (normalmente ``id``) para que
+    o cursor identifique uma posição sem ambiguidade. Todos os campos devem ter
+    a mesma direção, para que a comparação use um único índice composto.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-id',), estimate_total=False):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.estimate_total = estimate_total
+        self._estimated_count = None
+
+        direcoes = {campo.startswith('-') for campo in self.ordering}
+        if len(direcoes) != 1:
+            raise ValueError('Todos os campos da ordenação devem ter a mesma direção')
+        self.descending = direcoes.pop()
+        self.fields = [campo.lstrip('-') for campo in self.ordering]
+
+    # ------------------------------------------------------------------ cursor
+
+    def encode_cursor(self, obj, reverse):
+        valores = [getattr(obj, campo) for campo in self.fields]
+        payload = json.dumps({'r': int(reverse), 'v': valores}, default=_json_default, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(cursor + padding))
+            valores = payload['v']
+            reverse = bool(payload['r'])
+        except (ValueError, TypeError, KeyError):
+            raise InvalidCursor(cursor)
+        if len(valores) != len(self.fields):
+            raise InvalidCursor(cursor)
+
+        opts = self.queryset.model._meta
+        try:
+            valores = [opts.get_field(campo).to_python(valor) for campo, valor in zip(self.fields, valores)]
+        except Exception:
+            raise InvalidCursor(cursor)
+        return reverse, valores
+
+    def _filtro_apos(self, valores, reverse):
+        """Q que seleciona os registros depois (ou antes, se reverse) da posição"""
+        # Percorrendo em ordem decrescente, "depois" significa menor
+        lookup = 'lt' if self.descending != reverse else 'gt'
+        filtro = Q()
+        iguais = {}
+        for campo, valor in zip(self.fields, valores):
+            filtro |= Q(**iguais, **{f'{campo}__{lookup}': valor})
+            iguais[campo] = valor
+        if len(self.fields) > 1:
+            # Redundante, mas o OR sozinho não vira faixa do índice no
+            # PostgreSQL: com o limite no primeiro campo a página profunda
+            # começa direto na posição do cursor em vez de filtrar a tabela
+            filtro = Q(**{f'{self.fields[0]}__{lookup}e': valores[0]}) & filtro
+        return filtro
+
+    # ------------------------------------------------------------------ páginas
+
+    def get_page(self, cursor=None):
+        """Retorna a página do cursor; cursores inválidos caem na primeira página"""
+        reverse = False
+        valores = None
+        if cursor:
+            try:
+                reverse, valores = self.decode_cursor(cursor)
+            except InvalidCursor:
+                valores = None
+
+        qs = self.queryset
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(campo[1:] if campo.startswith('-') else f'-{campo}' for campo in ordering)
+        if valores is not None:
+            qs = qs.filter(self._filtro_apos(valores, reverse))
+        objetos = list(qs.order_by(*ordering)[:self.per_page + 1])
+
+        tem_mais = len(objetos) > self.per_page
+        objetos = objetos[:self.per_page]
+
+        if reverse:
+            objetos.reverse()
+            return KeysetPage(objetos, self, has_next=True, has_previous=tem_mais)
+        return KeysetPage(objetos, self, has_next=tem_mais, has_previous=valores is not None)
+
+    @property
+    def estimated_count(self):
+        """
+        Total aproximado de registros (ou None se desabilitado ou sem estimativa).
+
+        No PostgreSQL usa a estimativa do planejador (EXPLAIN), que não varre a
+        tabela; nos demais bancos não há estimativa barata e o total é omitido
+        (um COUNT exato seria justamente a varredura que o keyset evita).
+        """
+        if not self.estimate_total:
+            return None
+        if self._estimated_count is None:
+            self._estimated_count = estimate_count(self.queryset)
+        return self._estimated_count
+
+
+def estimate_count(queryset):
+    """Estimativa barata de linhas de um queryset, ou None se o banco não tiver uma"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plano = cursor.fetchone()[0]
+        if isinstance(plano, str):
+            plano = json.loads(plano)
+        return int(plano[0]['Plan']['Plan Rows'])
+    except Exception:
+        return None
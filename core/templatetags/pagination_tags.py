@@ -0,0 +1,35 @@
+"""
+Template tags para paginação por keyset (core.pagination.KeysetPaginator)
+"""
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def cursor_url(context, cursor):
+    """
+    Monta a query string da página do cursor preservando os demais filtros.
+    Uso: <a href="{% cursor_url page_obj.next_cursor %}">
+    """
+    params = context['request'].GET.copy()
+    params.pop('page', None)
+    if cursor:
+        params['cursor'] = cursor
+    else:
+        params.pop('cursor', None)
+    return f'?{params.urlencode()}' if params else '?'
+
+
+@register.inclusion_tag('partials/keyset_pagination.html', takes_context=True)
+def keyset_pagination(context, page_obj, label='itens', size=''):
+    """
+    Renderiza os controles Primeira/Anterior/Próxima de uma KeysetPage.
+    Uso: {% keyset_pagination page_obj 'logs' %}
+    """
+    return {
+        'request': context['request'],
+        'page_obj': page_obj,
+        'label': label,
+        'size': size,
+    }
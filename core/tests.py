@@ -1,3 +1,91 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .pagination import KeysetPaginator
+
+
+class KeysetPaginatorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # Datas repetidas para exercitar o desempate pelo id
+        for i in range(23):
+            User.objects.create(
+                username=f'user{i:02d}',
+                date_joined=datetime(2025, 1, 1 + i // 5, tzinfo=dt_timezone.utc),
+            )
+
+    def _paginator(self):
+        return KeysetPaginator(User.objects.all(), 5, ordering=('-date_joined', '-id'))
+
+    def test_percorre_todas_as_paginas_sem_repetir(self):
+        paginator = self._paginator()
+        esperado = list(User.objects.order_by('-date_joined', '-id').values_list('id', flat=True))
+
+        vistos = []
+        page = paginator.get_page()
+        self.assertFalse(page.has_previous())
+        while True:
+            vistos.extend(u.id for u in page)
+            if not page.has_next():
+                break
+            page = paginator.get_page(page.next_cursor)
+
+        self.assertEqual(vistos, esperado)
+
+    def test_volta_para_a_pagina_anterior(self):
+        paginator = self._paginator()
+        primeira = paginator.get_page()
+        segunda = paginator.get_page(primeira.next_cursor)
+        terceira = paginator.get_page(segunda.next_cursor)
+
+        anterior = paginator.get_page(terceira.previous_cursor)
+        self.assertEqual([u.id for u in anterior], [u.id for u in segunda])
+        self.assertTrue(anterior.has_next())
+
+        inicio = paginator.get_page(anterior.previous_cursor)
+        self.assertEqual([u.id for u in inicio], [u.id for u in primeira])
+        self.assertFalse(inicio.has_previous())
+
+    def test_pagina_sem_count(self):
+        paginator = self._paginator()
+        primeira = paginator.get_page()
+        with self.assertNumQueries(1):
+            paginator.get_page(primeira.next_cursor)
+
+    def test_cursor_invalido_volta_para_primeira_pagina(self):
+        paginator = self._paginator()
+        page = paginator.get_page('nao-e-um-cursor')
+        self.assertEqual([u.id for u in page], [u.id for u in paginator.get_page()])
+
+    def test_total_estimado(self):
+        paginator = KeysetPaginator(User.objects.all(), 5, ordering=('-id',), estimate_total=True)
+        with CaptureQueriesContext(connection) as ctx:
+            total = paginator.get_page().estimated_total
+
+        if connection.vendor == 'postgresql':
+            self.assertGreater(total, 0)
+        else:
+            # Sem estimativa do planejador: nada de COUNT(*) no lugar
+            self.assertIsNone(total)
+        self.assertFalse(any('COUNT(' in q['sql'].upper() for q in ctx.captured_queries))
+        self.assertIsNone(self._paginator().get_page().estimated_total)
+
+    def test_cursor_limita_o_primeiro_campo_da_ordenacao(self):
+        paginator = self._paginator()
+        cursor = paginator.get_page().next_cursor
+        reverse, valores = paginator.decode_cursor(cursor)
+
+        sql = str(User.objects.filter(paginator._filtro_apos(valores, reverse)).query)
+
+        # date_joined <= v AND (date_joined < v OR (date_joined = v AND id < n))
+        self.assertIn('"date_joined" <=', sql)
+        self.assertIn(' AND (', sql)
 
-# Create your tests here.
+    def test_ordenacao_com_direcoes_mistas(self):
+        with self.assertRaises(ValueError):
+            KeysetPaginator(User.objects.all(), 5, ordering=('-date_joined', 'id'))
@@ -72,6 +72,13 @@ echo -e "${GREEN}✅ PostgreSQL configurado${NC}"
 echo -e "${YELLOW}5. Configurando arquivo .env...${NC}"
 
 cp .env.production .env
+# Traduções na fila do serviço webreceptivo-traducao (passo 9); idempotente
+if grep -q '^TRADUCAO_ASSINCRONA=' .env; then
+    sed -i 's/^TRADUCAO_ASSINCRONA=.*/TRADUCAO_ASSINCRONA=1/' .env
+else
+    [ -n "$(tail -c1 .env)" ] && echo >> .env
+    echo 'TRADUCAO_ASSINCRONA=1' >> .env
+fi
 echo "Edite .env com suas configurações reais!"
 
 echo -e "${GREEN}✅ .env criado (EDITE AGORA!)${NC}"
@@ -143,6 +150,67 @@ sudo systemctl start webreceptivo
 
 echo -e "${GREEN}✅ Gunicorn configurado${NC}"
 
+# Fila de traduções de roteiro (TRADUCAO_ASSINCRONA=1 no .env): sem este
+# serviço as traduções novas ficam pendentes para sempre
+sudo tee /etc/systemd/system/webreceptivo-traducao.service > /dev/null <<EOF
+[Unit]
+Description=WebReceptivo - Fila de traduções de roteiro
+After=network.target postgresql.service
+
+[Service]
+User=www-data
+Group=www-data
+WorkingDirectory=$PROJECT_DIR
+ExecStart=$PROJECT_DIR/venv/bin/python manage.py processar_traducoes
+KillSignal=SIGTERM
+TimeoutStopSec=60
+
+Restart=always
+RestartSec=10
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+sudo systemctl daemon-reload
+sudo systemctl enable webreceptivo-traducao
+sudo systemctl restart webreceptivo-traducao
+
+echo -e "${GREEN}✅ Fila de traduções configurada${NC}"
+
+# Consolidação horária da auditoria (audit_system/rollups.py): sem ela o
+# dashboard volta a contar o AuditLog inteiro a cada acesso
+sudo tee /etc/systemd/system/webreceptivo-auditoria.service > /dev/null <<EOF
+[Unit]
+Description=WebReceptivo - Consolidação da auditoria
+After=network.target
+
+[Service]
+Type=oneshot
+User=www-data
+Group=www-data
+WorkingDirectory=$PROJECT_DIR
+ExecStart=$PROJECT_DIR/venv/bin/python manage.py consolidar_auditoria
+EOF
+
+sudo tee /etc/systemd/system/webreceptivo-auditoria.timer > /dev/null <<EOF
+[Unit]
+Description=WebReceptivo - Consolidação da auditoria a cada 5 minutos
+
+[Timer]
+OnBootSec=2min
+OnUnitActiveSec=5min
+Persistent=true
+
+[Install]
+WantedBy=timers.target
+EOF
+
+sudo systemctl daemon-reload
+sudo systemctl enable --now webreceptivo-auditoria.timer
+
+echo -e "${GREEN}✅ Consolidação da auditoria agendada${NC}"
+
 # ===== 10. CONFIGURAR NGINX =====
 echo -e "${YELLOW}10. Configurando Nginx...${NC}"
 
@@ -249,6 +317,7 @@ echo "4. Acesse: http://seu-dominio.com.br"
 echo ""
 echo "📊 STATUS:"
 echo "  Gunicorn: sudo systemctl status webreceptivo"
+echo "  Traduções: sudo systemctl status webreceptivo-traducao"
 echo "  Nginx: sudo systemctl status nginx"
 echo "  PostgreSQL: sudo systemctl status postgresql"
 echo ""
@@ -85,6 +85,15 @@ else
     echo "✓ Arquivo .env já existe"
 fi
 
+# Traduções na fila do serviço webreceptivo-traducao (criado abaixo), também
+# em um .env existente; idempotente
+if grep -q '^TRADUCAO_ASSINCRONA=' .env; then
+    sed -i 's/^TRADUCAO_ASSINCRONA=.*/TRADUCAO_ASSINCRONA=1/' .env
+else
+    [ -n "$(tail -c1 .env)" ] && echo >> .env
+    echo 'TRADUCAO_ASSINCRONA=1' >> .env
+fi
+
 echo ""
 echo "=================================================="
 echo "5. Configurando Systemd Service"
@@ -125,12 +134,74 @@ else
     echo "✓ Serviço já existe"
 fi
 
+if [ ! -f "/etc/systemd/system/webreceptivo-traducao.service" ]; then
+    echo "✓ Criando serviço da fila de traduções..."
+    sudo tee /etc/systemd/system/webreceptivo-traducao.service > /dev/null << EOF
+[Unit]
+Description=WebReceptivo - Fila de traduções de roteiro
+After=network.target postgresql.service
+
+[Service]
+User=www-data
+Group=www-data
+WorkingDirectory=$WEBRECEPTIVO_DIR
+ExecStart=$WEBRECEPTIVO_DIR/venv/bin/python manage.py processar_traducoes
+KillSignal=SIGTERM
+TimeoutStopSec=60
+
+Restart=always
+RestartSec=10
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+    sudo systemctl daemon-reload
+    sudo systemctl enable webreceptivo-traducao
+else
+    echo "✓ Serviço da fila de traduções já existe"
+fi
+
+if [ ! -f "/etc/systemd/system/webreceptivo-auditoria.timer" ]; then
+    echo "✓ Agendando a consolidação da auditoria..."
+    sudo tee /etc/systemd/system/webreceptivo-auditoria.service > /dev/null << EOF
+[Unit]
+Description=WebReceptivo - Consolidação da auditoria
+After=network.target postgresql.service
+
+[Service]
+Type=oneshot
+User=www-data
+Group=www-data
+WorkingDirectory=$WEBRECEPTIVO_DIR
+ExecStart=$WEBRECEPTIVO_DIR/venv/bin/python manage.py consolidar_auditoria
+EOF
+
+    sudo tee /etc/systemd/system/webreceptivo-auditoria.timer > /dev/null << EOF
+[Unit]
+Description=WebReceptivo - Consolidação da auditoria a cada 5 minutos
+
+[Timer]
+OnBootSec=2min
+OnUnitActiveSec=5min
+Persistent=true
+
+[Install]
+WantedBy=timers.target
+EOF
+
+    sudo systemctl daemon-reload
+    sudo systemctl enable --now webreceptivo-auditoria.timer
+else
+    echo "✓ Consolidação da auditoria já agendada"
+fi
+
 echo ""
 echo "=================================================="
 echo "6. Iniciando Serviço"
 echo "=================================================="
 
-sudo systemctl restart webreceptivo
+sudo systemctl restart webreceptivo webreceptivo-traducao
 sudo systemctl status webreceptivo --no-pager
 
 echo ""
@@ -4,8 +4,11 @@ Configuração do Django Admin para serviços turísticos
 from django.contrib import admin
 from .models import (
     Categoria, SubCategoria, TipoMeiaEntrada, LancamentoServico,
-    Transfer, Cliente, OrdemServico, TransferOrdemServico
+    Transfer, Cliente, OrdemServico, TransferOrdemServico, RevisaoCatalogo, SegmentoTraducao,
+    TrabalhoTraducao,
 )
+from .catalog import cache_catalogo
+from .translation import motor as motor_traducao
 
 
 @admin.register(Categoria)
@@ -55,6 +58,7 @@ class LancamentoServicoAdmin(admin.ModelAdmin):
         'total_pax', 'valor_total', 'criado_por', 'criado_em'
     )
     list_filter = ('categoria', 'data_servico', 'criado_em')
+    list_select_related = ('categoria', 'subcategoria', 'criado_por')
     search_fields = ('subcategoria__nome', 'obs_publica', 'obs_privada')
     date_hierarchy = 'data_servico'
     readonly_fields = ('criado_em', 'atualizado_em', 'criado_por')
@@ -65,7 +69,7 @@ class LancamentoServicoAdmin(admin.ModelAdmin):
         }),
         ('Quantidades', {
             'fields': ('qtd_inteira', 'qtd_meia', 'qtd_infantil', 'idades_criancas', 'tipos_meia_entrada'),
-            'description': 'Informe as idades das crianças separadas por vírgula e os tipos de meia entrada (um por linha)'
+            'description': 'Informe as idades das crianças como lista (ex: [3, 5]) e os tipos de meia entrada (um por linha)'
         }),
         ('Valores Unitários (snapshot)', {
             'fields': ('valor_unit_inteira', 'valor_unit_meia', 'valor_unit_infantil'),
@@ -123,6 +127,10 @@ class LancamentoServicoInline(admin.TabularInline):
     fields = ('data_servico', 'categoria', 'subcategoria', 'qtd_inteira', 'qtd_meia', 'qtd_infantil', 'valor_total')
     readonly_fields = ('valor_total',)
 
+    def get_queryset(self, request):
+        # valor_total usa as regras de idade do serviço (servicos/pricing.py)
+        return super().get_queryset(request).select_related('subcategoria')
+
 
 
 class TransferOrdemServicoInline(admin.TabularInline):
@@ -177,3 +185,66 @@ class OrdemServicoAdmin(admin.ModelAdmin):
 class TransferOrdemServicoAdmin(admin.ModelAdmin):
     list_display = ('ordem_servico', 'transfer', 'valor')
     search_fields = ('ordem_servico__numero_os', 'transfer__nome')
+
+
+@admin.register(RevisaoCatalogo)
+class RevisaoCatalogoAdmin(admin.ModelAdmin):
+    """Indicador da revisão do catálogo (somente leitura)"""
+    list_display = ('revisao', 'atualizado_em', 'revisao_neste_processo', 'snapshot_carregado_em')
+    readonly_fields = ('revisao', 'atualizado_em', 'revisao_neste_processo', 'snapshot_carregado_em')
+
+    @admin.display(description='Revisão em memória (este processo)')
+    def revisao_neste_processo(self, obj):
+        snapshot = cache_catalogo.snapshot
+        return snapshot.revisao if snapshot else '-'
+
+    @admin.display(description='Snapshot carregado em')
+    def snapshot_carregado_em(self, obj):
+        snapshot = cache_catalogo.snapshot
+        return snapshot.carregado_em if snapshot else '-'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SegmentoTraducao)
+class SegmentoTraducaoAdmin(admin.ModelAdmin):
+    """Memória de tradução: permite revisar e corrigir traduções de segmentos"""
+    list_display = ('origem', 'traducao', 'idioma', 'criado_em')
+    list_filter = ('idioma',)
+    search_fields = ('origem', 'traducao')
+    readonly_fields = ('idioma', 'hash', 'origem', 'criado_em')
+
+    def has_add_permission(self, request):
+        return False
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        motor_traducao.memoria.esquecer(obj.idioma, obj.hash)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        motor_traducao.memoria.esquecer(obj.idioma, obj.hash)
+
+    def delete_queryset(self, request, queryset):
+        chaves = list(queryset.values_list('idioma', 'hash'))
+        super().delete_queryset(request, queryset)
+        for idioma, chave in chaves:
+            motor_traducao.memoria.esquecer(idioma, chave)
+
+
+@admin.register(TrabalhoTraducao)
+class TrabalhoTraducaoAdmin(admin.ModelAdmin):
+    """Fila de traduções (somente leitura)"""
+    list_display = ('id', 'idioma', 'status', 'solicitacoes', 'tentativas', 'trabalhador', 'criado_em', 'concluido_em')
+    list_filter = ('status', 'idioma')
+    readonly_fields = [field.name for field in TrabalhoTraducao._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ServicosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'servicos'
+
+    def ready(self):
+        """Conecta os signals e invalida o registro de capacidades do schema após migrations"""
+        from . import signals  # noqa
+        from .schema import capabilities
+        post_migrate.connect(capabilities.invalidate, dispatch_uid='servicos_schema_capabilities')
@@ -0,0 +1,107 @@
+"""
+Cache do preview de roteiro das Ordens de Serviço.
+
+O roteiro (texto estilo WhatsApp + resumo de transfers) é guardado no cache
+padrão do Django com a chave::
+
+    servicos:roteiro:<ordem_id>:<atualizado_em>:c<revisao do catálogo>:<schema>
+
+``atualizado_em`` é a versão da OS e vem do banco: muda a cada gravação da
+OS e também a cada alteração dos seus itens, porque a atualização do resumo
+(servicos/resumo.py), feita pelos signals de LancamentoServico/
+TransferOrdemServico e pelo OrdemServicoWriter na mesma transação, também o
+avança. O preview também traz dados do catálogo (nome e descrição do
+serviço, regras de idade, nome do transfer), por isso a revisão do catálogo
+(servicos/catalog.py) entra na chave: editar um serviço invalida os roteiros
+que o usam. Nada é apagado: entradas antigas simplesmente deixam de ser
+lidas e expiram.
+
+Como a versão não fica no cache, cada worker com o seu LocMemCache nunca
+serve o roteiro de uma versão anterior, só guarda cópias próprias. Com um
+backend compartilhado (Redis/Memcached) as entradas e os contadores de
+acerto passam a ser comuns a todos os processos.
+"""
+from datetime import timezone as dt_timezone
+
+from django.core.cache import cache
+
+from .catalog import catalogo
+from .schema import capabilities
+
+PREFIXO = 'servicos:roteiro'
+TIMEOUT = 60 * 60 * 24
+
+CHAVE_ACERTOS = f'{PREFIXO}:stats:acertos'
+CHAVE_FALHAS = f'{PREFIXO}:stats:falhas'
+
+
+def versao(atualizado_em):
+    """Versão da OS a partir de ``atualizado_em`` (em microssegundos, sem arredondar)"""
+    if atualizado_em is None:
+        return '0'
+    return atualizado_em.astimezone(dt_timezone.utc).strftime('%Y%m%d%H%M%S%f')
+
+
+def chave_roteiro(ordem):
+    return (
+        f'{PREFIXO}:{ordem.pk}:{versao(ordem.atualizado_em)}:c{catalogo().revisao}'
+        f':{int(capabilities.transfer_nome_personalizado)}'
+    )
+
+
+def etag_itens(ordem_id):
+    """
+    ETag dos itens da OS (payload do editor), com uma consulta de uma coluna.
+
+    Muda junto com ``atualizado_em``, ou seja, sempre que a OS, um
+    lançamento ou um transfer dela é gravado ou removido. None se a OS não
+    existe.
+    """
+    from .models import OrdemServico
+
+    atualizado_em = OrdemServico.objects.filter(pk=ordem_id).values_list('atualizado_em', flat=True).first()
+    if atualizado_em is None:
+        return None
+    return f'os-{ordem_id}-{versao(atualizado_em)}-{int(capabilities.transfer_nome_personalizado)}'
+
+
+def _contar(chave):
+    try:
+        cache.incr(chave)
+    except ValueError:
+        if not cache.add(chave, 1, None):
+            cache.incr(chave)
+
+
+def obter_roteiro(ordem, gerar):
+    """
+    Retorna o preview da OS do cache, ou gera com ``gerar(ordem)`` e guarda.
+
+    ``gerar`` deve retornar um valor serializável (texto e dicts).
+    """
+    chave = chave_roteiro(ordem)
+    valor = cache.get(chave)
+    if valor is not None:
+        _contar(CHAVE_ACERTOS)
+        return valor
+    _contar(CHAVE_FALHAS)
+    valor = gerar(ordem)
+    cache.set(chave, valor, TIMEOUT)
+    return valor
+
+
+def estatisticas():
+    """Acertos, falhas e taxa de acerto do cache de roteiro"""
+    acertos = cache.get(CHAVE_ACERTOS) or 0
+    falhas = cache.get(CHAVE_FALHAS) or 0
+    total = acertos + falhas
+    return {
+        'acertos': acertos,
+        'falhas': falhas,
+        'taxa_acerto': round(acertos / total, 4) if total else None,
+        'backend': f'{cache.__class__.__module__}.{cache.__class__.__name__}',
+    }
+
+
+def zerar_estatisticas():
+    cache.delete_many([CHAVE_ACERTOS, CHAVE_FALHAS])
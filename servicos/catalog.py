@@ -0,0 +1,283 @@
+"""
+Catálogo de serviços usado pelo formulário de OS.
+
+Categorias, serviços (SubCategoria) com valores e regras de idade, tipos de
+meia-entrada e transfers mudam raramente, mas eram consultados a cada
+requisição (formulários, listagens e AJAX). Cada processo guarda um
+snapshot imutável desses dados e o reaproveita enquanto a revisão do
+catálogo não mudar:
+
+    from servicos.catalog import catalogo
+
+    snapshot = catalogo()
+    snapshot.categorias_ativas()
+    snapshot.servico(servico_id)
+
+A revisão fica em RevisaoCatalogo e é incrementada pelos signals
+(servicos/signals.py) sempre que um desses models é gravado ou removido,
+dentro da mesma transação: se a alteração for desfeita, a revisão também é.
+Cada worker confere a revisão no banco no máximo a cada
+``INTERVALO_VERIFICACAO`` segundos e recarrega o snapshot quando ela muda;
+no processo que fez a alteração (e dentro de transações) a conferência é
+imediata. A versão comparada inclui o horário da última alteração, então
+uma revisão desfeita e reemitida com outro conteúdo não é confundida.
+
+O catálogo inteiro também é servido ao navegador como ``catalog.json``
+(``Catalogo.as_json``), versionado pela mesma revisão.
+"""
+import threading
+import time
+from types import MappingProxyType
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Categoria, RevisaoCatalogo, SubCategoria, TipoMeiaEntrada, Transfer
+
+MODELOS_CATALOGO = (Categoria, SubCategoria, TipoMeiaEntrada, Transfer)
+
+# Segundos entre conferências da revisão no banco (por processo)
+INTERVALO_VERIFICACAO = 2.0
+
+# Campos de SubCategoria expostos ao formulário (mesmos de ajax_get_servico_info)
+CAMPOS_SERVICO = (
+    'id', 'categoria_id', 'nome', 'descricao',
+    'valor_inteira', 'valor_meia', 'valor_infantil',
+    'aceita_meia_entrada', 'regras_meia_entrada',
+    'permite_infantil', 'idade_minima_infantil', 'idade_maxima_infantil',
+    'possui_isencao', 'idade_isencao_min', 'idade_isencao_max', 'texto_isencao',
+    'tem_idade_minima', 'idade_minima',
+)
+CAMPOS_VALOR = ('valor_inteira', 'valor_meia', 'valor_infantil')
+
+
+# ---------------------------------------------------------------------- revisão
+
+def versao_atual():
+    """(revisão, atualizado_em) do catálogo, com uma query"""
+    versao = RevisaoCatalogo.objects.filter(pk=1).values_list('revisao', 'atualizado_em').first()
+    return versao if versao is not None else (1, None)
+
+
+def revisao_atual():
+    """Revisão atual do catálogo lida do banco (uma query)"""
+    return versao_atual()[0]
+
+
+def incrementar_revisao():
+    """Avança a revisão do catálogo (UPDATE atômico; cria a linha se faltar)"""
+    agora = timezone.now()
+    if RevisaoCatalogo.objects.filter(pk=1).update(revisao=F('revisao') + 1, atualizado_em=agora):
+        return
+    try:
+        with transaction.atomic():
+            RevisaoCatalogo.objects.create(pk=1, revisao=2)
+    except IntegrityError:
+        # Criada em paralelo por outra requisição
+        RevisaoCatalogo.objects.filter(pk=1).update(revisao=F('revisao') + 1, atualizado_em=agora)
+
+
+# ---------------------------------------------------------------------- snapshots
+
+class _Snapshot:
+    """Registro imutável criado a partir de um dict de ``.values()``"""
+
+    __slots__ = ()
+
+    def __init__(self, **campos):
+        for nome, valor in campos.items():
+            object.__setattr__(self, nome, valor)
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError(f'{type(self).__name__} é imutável')
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.id}: {self.nome}>'
+
+    def __str__(self):
+        return self.nome
+
+
+class CategoriaSnapshot(_Snapshot):
+    __slots__ = ('id', 'nome', 'ordem', 'ativo')
+
+
+class ServicoSnapshot(_Snapshot):
+    __slots__ = CAMPOS_SERVICO + ('ativo', 'categoria_nome')
+
+    def __str__(self):
+        return f"{self.categoria_nome} - {self.nome}"
+
+    def as_dict(self, campos=CAMPOS_SERVICO + ('categoria_nome',)):
+        """Campos do serviço para JSON, valores em float como nas respostas AJAX"""
+        dados = {campo: getattr(self, campo) for campo in campos}
+        for campo in CAMPOS_VALOR:
+            if campo in dados:
+                dados[campo] = float(dados[campo])
+        return dados
+
+
+class TipoMeiaSnapshot(_Snapshot):
+    __slots__ = ('id', 'nome', 'ativo')
+
+
+class TransferSnapshot(_Snapshot):
+    __slots__ = ('id', 'nome', 'valor', 'descricao', 'ativo')
+
+    def __str__(self):
+        return f"{self.nome} - R$ {self.valor}"
+
+
+class Catalogo:
+    """Snapshot do catálogo inteiro em uma revisão (inclui registros inativos)"""
+
+    __slots__ = (
+        'revisao', 'versao', 'carregado_em', 'categorias', 'servicos', 'tipos_meia', 'transfers',
+        '_categorias_por_id', '_servicos_por_id', '_servicos_por_categoria',
+    )
+
+    def __init__(self, versao, categorias, servicos, tipos_meia, transfers):
+        self.versao = versao
+        self.revisao = versao[0]
+        self.carregado_em = timezone.now()
+        self.categorias = tuple(categorias)
+        self.servicos = tuple(servicos)
+        self.tipos_meia = tuple(tipos_meia)
+        self.transfers = tuple(transfers)
+        self._categorias_por_id = MappingProxyType({c.id: c for c in self.categorias})
+        self._servicos_por_id = MappingProxyType({s.id: s for s in self.servicos})
+        por_categoria = {}
+        for servico in self.servicos:
+            por_categoria.setdefault(servico.categoria_id, []).append(servico)
+        self._servicos_por_categoria = MappingProxyType({k: tuple(v) for k, v in por_categoria.items()})
+
+    @classmethod
+    def carregar(cls, versao):
+        """Lê o catálogo do banco com uma query por model"""
+        categorias = [CategoriaSnapshot(**c) for c in Categoria.objects.values('id', 'nome', 'ordem', 'ativo')]
+        nomes = {c.id: c.nome for c in categorias}
+        servicos = [
+            ServicoSnapshot(categoria_nome=nomes.get(s['categoria_id'], ''), **s)
+            for s in SubCategoria.objects.values(*CAMPOS_SERVICO, 'ativo')
+        ]
+        tipos_meia = [TipoMeiaSnapshot(**t) for t in TipoMeiaEntrada.objects.values('id', 'nome', 'ativo')]
+        transfers = [
+            TransferSnapshot(**t) for t in Transfer.objects.values('id', 'nome', 'valor', 'descricao', 'ativo')
+        ]
+        return cls(versao, categorias, servicos, tipos_meia, transfers)
+
+    # Consultas (mesma ordenação dos models)
+
+    def categoria(self, categoria_id):
+        return self._categorias_por_id.get(_id(categoria_id))
+
+    def servico(self, servico_id):
+        return self._servicos_por_id.get(_id(servico_id))
+
+    def categorias_ativas(self):
+        return [c for c in self.categorias if c.ativo]
+
+    def servicos_da_categoria(self, categoria_id, apenas_ativos=True):
+        servicos = self._servicos_por_categoria.get(_id(categoria_id), ())
+        return [s for s in servicos if s.ativo] if apenas_ativos else list(servicos)
+
+    def tipos_meia_ativos(self):
+        return [t for t in self.tipos_meia if t.ativo]
+
+    def transfers_ativos(self):
+        return [t for t in self.transfers if t.ativo]
+
+    def as_json(self):
+        """Catálogo ativo para o navegador (catalog.json)"""
+        categorias_ativas = {c.id for c in self.categorias if c.ativo}
+        return {
+            'revisao': self.revisao,
+            'categorias': [{'id': c.id, 'nome': c.nome, 'ordem': c.ordem} for c in self.categorias if c.ativo],
+            'servicos': [
+                s.as_dict() for s in self.servicos if s.ativo and s.categoria_id in categorias_ativas
+            ],
+            'tipos_meia': [{'id': t.id, 'nome': t.nome} for t in self.tipos_meia if t.ativo],
+            'transfers': [
+                {'id': t.id, 'nome': t.nome, 'valor': float(t.valor), 'descricao': t.descricao}
+                for t in self.transfers if t.ativo
+            ],
+        }
+
+
+def _id(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------------------------------------------------------------------- cache por processo
+
+class CacheCatalogo:
+    """Snapshot do catálogo do processo, recarregado quando a revisão muda"""
+
+    def __init__(self):
+        self._snapshot = None
+        self._verificado_em = 0.0
+        self._lock = threading.Lock()
+
+    def obter(self, verificar=False):
+        """
+        Snapshot atual. A revisão é conferida no banco se passou o intervalo
+        de verificação (ou com ``verificar=True``).
+
+        Dentro de uma transação a revisão é sempre conferida e a conferência
+        não vale para depois dela: a transação pode ter alterado o catálogo
+        e ainda ser desfeita.
+        """
+        snapshot = self._snapshot
+        agora = time.monotonic()
+        em_transacao = connection.in_atomic_block
+        if (snapshot is not None and not verificar and not em_transacao
+                and agora - self._verificado_em < INTERVALO_VERIFICACAO):
+            return snapshot
+
+        versao = versao_atual()
+        if snapshot is None or snapshot.versao != versao:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.versao != versao:
+                    snapshot = self._snapshot = Catalogo.carregar(versao)
+        self._verificado_em = 0.0 if em_transacao else agora
+        return snapshot
+
+    @property
+    def snapshot(self):
+        """Snapshot em memória, sem consultar o banco (None se ainda não carregado)"""
+        return self._snapshot
+
+    def expirar(self):
+        """Força a conferência da revisão no próximo acesso"""
+        self._verificado_em = 0.0
+
+    def limpar(self):
+        self._snapshot = None
+        self._verificado_em = 0.0
+
+
+cache_catalogo = CacheCatalogo()
+
+
+def catalogo(verificar=False):
+    """Snapshot do catálogo deste processo (ver CacheCatalogo.obter)"""
+    return cache_catalogo.obter(verificar)
+
+
+def opcoes(registros, vazio='---------'):
+    """Choices de formulário a partir de snapshots (o queryset do campo continua validando)"""
+    return [('', vazio)] + [(registro.id, str(registro)) for registro in registros]
+
+
+def montar_catalogo():
+    """Catálogo ativo serializável (conteúdo do catalog.json)"""
+    return catalogo().as_json()
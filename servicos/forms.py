@@ -8,6 +8,7 @@ from .models import (
     Categoria, SubCategoria, TipoMeiaEntrada, LancamentoServico,
     Transfer, Cliente, OrdemServico, TransferOrdemServico
 )
+from .catalog import catalogo, opcoes
 
 
 class CategoriaForm(forms.ModelForm):
@@ -117,8 +118,9 @@ class SubCategoriaForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Filtrar apenas categorias ativas
+        # Filtrar apenas categorias ativas (opções lidas do snapshot do catálogo)
         self.fields['categoria'].queryset = Categoria.objects.filter(ativo=True)
+        self.fields['categoria'].choices = opcoes(catalogo().categorias_ativas())
 
 
 class TipoMeiaEntradaForm(forms.ModelForm):
@@ -214,15 +216,19 @@ class LancamentoServicoForm(forms.ModelForm):
         self.fields['obs_publica'].required = False
         self.fields['obs_privada'].required = False
         
-        # Filtrar apenas categorias ativas
+        # Filtrar apenas categorias ativas (opções lidas do snapshot do catálogo)
+        snapshot = catalogo()
         self.fields['categoria'].queryset = Categoria.objects.filter(ativo=True)
+        self.fields['categoria'].choices = opcoes(snapshot.categorias_ativas())
         
         # Se estiver editando, filtrar subcategorias pela categoria
-        if self.instance and self.instance.pk and self.instance.categoria:
+        if self.instance and self.instance.pk and self.instance.categoria_id:
             self.fields['subcategoria'].queryset = SubCategoria.objects.filter(
-                categoria=self.instance.categoria,
+                categoria_id=self.instance.categoria_id,
                 ativo=True
             )
+            self.fields['subcategoria'].choices = opcoes(
+                snapshot.servicos_da_categoria(self.instance.categoria_id))
         else:
             # Na criação, inicialmente vazio
             self.fields['subcategoria'].queryset = SubCategoria.objects.none()
@@ -235,6 +241,7 @@ class LancamentoServicoForm(forms.ModelForm):
                     categoria_id=categoria_id,
                     ativo=True
                 )
+                self.fields['subcategoria'].choices = opcoes(snapshot.servicos_da_categoria(categoria_id))
             except (ValueError, TypeError):
                 pass
         
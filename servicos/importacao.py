@@ -0,0 +1,403 @@
+"""
+Importação em lote do catálogo de serviços (SubCategoria).
+
+Usado pelos comandos ``importar_catalogo`` (CSV, JSON ou NDJSON) e
+``importar_servicos_foz`` (fixture de Foz). As linhas são lidas do arquivo
+em fluxo, sem carregá-lo inteiro, validadas pelos campos do model e
+gravadas em lotes de ``TAMANHO_LOTE``:
+
+1. uma query traz os serviços do lote que já existem (categoria + nome);
+2. a assinatura (hash) dos campos importados de cada linha é comparada com
+   a do registro atual: linhas iguais não são gravadas;
+3. novos e alterados vão em um único ``bulk_create(update_conflicts=True)``
+   (INSERT ... ON CONFLICT DO UPDATE sobre ``unique_together``).
+
+Colunas ausentes na linha mantêm o valor atual do serviço (ou o padrão do
+model, se ele for novo). Como ``bulk_create`` não dispara signals, a
+revisão do catálogo (servicos/catalog.py) é avançada uma vez no final, e os
+serviços criados e alterados são informados à auditoria
+(``registry.registrar_lote``, comparando com os valores já lidos para a
+assinatura). Os logs são gravados em lote depois do commit se o escopo
+``gravador.requisicao()`` estiver aberto fora da transação: quem chama
+``importar`` dentro de outra transação (os comandos) deve abri-lo antes
+dela, senão cada log é gravado sozinho no commit.
+"""
+import csv
+import hashlib
+import json
+import re
+from decimal import Decimal
+from functools import lru_cache
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from audit_system import registry as auditoria
+from audit_system import snapshot
+from audit_system.writer import gravador
+
+from .catalog import cache_catalogo, incrementar_revisao
+from .models import Categoria, SubCategoria
+
+TAMANHO_LOTE = 1000
+
+# Campos do serviço que a importação grava (além de categoria e nome)
+CAMPOS_IMPORTADOS = (
+    'descricao', 'valor_inteira', 'valor_meia', 'valor_infantil',
+    'aceita_meia_entrada', 'regras_meia_entrada',
+    'permite_infantil', 'idade_minima_infantil', 'idade_maxima_infantil',
+    'possui_isencao', 'idade_isencao_min', 'idade_isencao_max', 'texto_isencao',
+    'tem_idade_minima', 'idade_minima', 'ativo',
+)
+
+# Nomes de coluna aceitos além dos nomes dos campos (fixture servicos_foz.json)
+SINONIMOS = {
+    'regras_meia': 'regras_meia_entrada',
+    'regras_isencao': 'texto_isencao',
+    'servico': 'nome',
+}
+
+FORMATOS = ('csv', 'json', 'ndjson')
+
+_VERDADEIROS = {'1', 't', 'true', 's', 'sim', 'y', 'yes', 'x'}
+_FALSOS = {'0', 'f', 'false', 'n', 'nao', 'não', 'no'}
+
+# Faixa de idade no texto da isenção (ex: "CRIANÇA DE 0 A 6 ANOS")
+_RE_FAIXA_ISENCAO = re.compile(r'(\d+)\s*A\s*(\d+)', re.I)
+
+_CAMPOS = {campo: SubCategoria._meta.get_field(campo) for campo in ('nome',) + CAMPOS_IMPORTADOS}
+
+
+class LinhaInvalida(Exception):
+    """Linha do arquivo que não pode ser importada"""
+
+    def __init__(self, numero, erros):
+        super().__init__(f'linha {numero}: {"; ".join(erros)}')
+        self.numero = numero
+        self.erros = erros
+
+
+# ---------------------------------------------------------------------- leitura
+
+def detectar_formato(caminho):
+    """Formato pelo nome do arquivo (None se não reconhecido)"""
+    nome = caminho.lower()
+    if nome.endswith('.csv'):
+        return 'csv'
+    if nome.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if nome.endswith('.json'):
+        return 'json'
+    return None
+
+
+def ler_linhas(arquivo, formato, delimitador=','):
+    """Gera (número da linha, dict) do arquivo aberto em modo texto"""
+    if formato == 'csv':
+        leitor = csv.DictReader(arquivo, delimiter=delimitador)
+        for linha in leitor:
+            yield leitor.line_num, linha
+    elif formato == 'ndjson':
+        for numero, texto in enumerate(arquivo, 1):
+            if texto.strip():
+                yield numero, _json(texto, numero)
+    elif formato == 'json':
+        yield from enumerate(_ler_array_json(arquivo), 1)
+    else:
+        raise ValueError(f'Formato desconhecido: {formato}')
+
+
+def _json(texto, numero):
+    try:
+        return json.loads(texto)
+    except json.JSONDecodeError as exc:
+        raise LinhaInvalida(numero, [f'JSON inválido: {exc.msg}']) from exc
+
+
+def _ler_array_json(arquivo, tamanho_bloco=1 << 16):
+    """Itens de um array JSON, lidos em blocos (o arquivo não é carregado inteiro)"""
+    decodificador = json.JSONDecoder()
+    buffer, posicao = arquivo.read(tamanho_bloco), 0
+
+    def proximo_caractere():
+        nonlocal buffer, posicao
+        while True:
+            while posicao < len(buffer) and buffer[posicao].isspace():
+                posicao += 1
+            if posicao < len(buffer):
+                return buffer[posicao]
+            buffer, posicao = arquivo.read(tamanho_bloco), 0
+            if not buffer:
+                return ''
+
+    if proximo_caractere() != '[':
+        raise ValueError('O arquivo JSON deve conter uma lista de serviços')
+    posicao += 1
+    while True:
+        caractere = proximo_caractere()
+        if caractere == ']':
+            return
+        if caractere == ',':
+            posicao += 1
+            continue
+        if not caractere:
+            raise ValueError('Lista JSON incompleta')
+        try:
+            item, fim = decodificador.raw_decode(buffer, posicao)
+        except json.JSONDecodeError:
+            # Item cortado no fim do bloco: lê mais e tenta de novo
+            mais = arquivo.read(tamanho_bloco)
+            if not mais:
+                raise
+            buffer, posicao = buffer[posicao:] + mais, 0
+            continue
+        yield item
+        posicao = fim
+        if posicao > tamanho_bloco:
+            buffer, posicao = buffer[posicao:], 0
+
+
+# ---------------------------------------------------------------------- validação
+
+def _texto(campo):
+    return campo.get_internal_type() in ('CharField', 'TextField')
+
+
+@lru_cache(maxsize=8192)
+def _valor_em_cache(nome, tipo_valor, valor):
+    # Valores se repetem muito entre linhas (booleanos, idades, regras):
+    # cada um é convertido e validado uma vez. O tipo entra na chave
+    # porque True == 1 == 1.0.
+    return _valor(_CAMPOS[nome], valor)
+
+
+def _valor(campo, valor):
+    """Valor convertido e validado pelo campo do model (ValidationError se inválido)"""
+    tipo = campo.get_internal_type()
+    if isinstance(valor, str) and not _texto(campo):
+        valor = valor.strip()
+        if tipo == 'BooleanField':
+            if valor.lower() in _VERDADEIROS:
+                valor = True
+            elif valor.lower() in _FALSOS:
+                valor = False
+        elif tipo == 'DecimalField' and ',' in valor:
+            # Formato brasileiro: 1.234,56
+            valor = valor.replace('.', '').replace(',', '.')
+    elif isinstance(valor, (int, float)) and _texto(campo):
+        valor = str(valor)
+    valor = campo.clean(valor, None)
+    if isinstance(valor, Decimal):
+        valor = valor.quantize(Decimal(1).scaleb(-campo.decimal_places))
+    return valor
+
+
+def normalizar(numero, linha, categoria_padrao=None):
+    """
+    (categoria, nome, campos) de uma linha do arquivo.
+
+    ``campos`` só tem as colunas presentes na linha (vazias contam como
+    ausentes, exceto em campos de texto). Levanta LinhaInvalida.
+    """
+    if not isinstance(linha, dict):
+        raise LinhaInvalida(numero, ['a linha deve ser um objeto'])
+    dados = {SINONIMOS.get(coluna, coluna): valor for coluna, valor in linha.items() if coluna}
+    erros = []
+    categoria = str(dados.get('categoria') or categoria_padrao or '').strip()
+    if not categoria:
+        erros.append('categoria: obrigatória')
+
+    campos = {}
+    for nome, campo in _CAMPOS.items():
+        if nome not in dados:
+            continue
+        valor = dados[nome]
+        if nome == 'nome' and isinstance(valor, str):
+            valor = valor.strip()
+        if valor is None or (valor == '' and not _texto(campo)):
+            continue
+        try:
+            campos[nome] = _valor_em_cache(nome, type(valor), valor)
+        except ValidationError as exc:
+            erros.append(f'{nome}: {" ".join(exc.messages)}')
+    if 'nome' not in campos and not any(erro.startswith('nome:') for erro in erros):
+        erros.append('nome: obrigatório')
+    if erros:
+        raise LinhaInvalida(numero, erros)
+
+    # Sem colunas de idade da isenção: extrai do texto (como a importação antiga)
+    if campos.get('possui_isencao') and 'idade_isencao_min' not in campos and 'idade_isencao_max' not in campos:
+        faixa = _RE_FAIXA_ISENCAO.search(campos.get('texto_isencao', ''))
+        if faixa:
+            campos['idade_isencao_min'], campos['idade_isencao_max'] = int(faixa.group(1)), int(faixa.group(2))
+
+    return categoria, campos.pop('nome'), campos
+
+
+def assinatura(campos):
+    """Hash dos campos importados de um serviço (detecta linhas sem alteração)"""
+    return hashlib.sha1(
+        '\x1f'.join(str(campos[campo]) for campo in CAMPOS_IMPORTADOS).encode('utf-8')
+    ).hexdigest()
+
+
+# ---------------------------------------------------------------------- gravação
+
+class ResultadoImportacao:
+    """Contadores e, na simulação, as alterações que seriam gravadas"""
+
+    def __init__(self):
+        self.lidas = 0
+        self.criados = 0
+        self.atualizados = 0
+        self.inalterados = 0
+        self.ignorados = 0
+        self.invalidas = []
+        self.categorias_criadas = []
+        self.alteracoes = []
+
+    @property
+    def gravados(self):
+        return self.criados + self.atualizados
+
+
+def _alterado(pk, categoria_id, nome, atual, campos):
+    """Instância com o estado atual guardado para a auditoria e os valores importados aplicados"""
+    servico = SubCategoria(pk=pk, categoria_id=categoria_id, nome=nome, **atual)
+    snapshot.guardar(servico)
+    for campo, valor in campos.items():
+        setattr(servico, campo, valor)
+    return servico
+
+
+def _preencher_pks(servicos):
+    """pk dos serviços criados pelo bulk_create, nos bancos que não o devolvem"""
+    faltando = [servico for servico in servicos if servico.pk is None]
+    if not faltando:
+        return
+    pks = dict(
+        ((categoria_id, nome), pk) for pk, categoria_id, nome in SubCategoria.objects.filter(
+            categoria_id__in={servico.categoria_id for servico in faltando},
+            nome__in={servico.nome for servico in faltando},
+        ).values_list('pk', 'categoria_id', 'nome')
+    )
+    for servico in faltando:
+        servico.pk = pks.get((servico.categoria_id, servico.nome))
+
+
+class ImportadorCatalogo:
+    """
+    Importa linhas já lidas (``ler_linhas``) para SubCategoria.
+
+    ``somente_novos`` não altera serviços existentes. ``simular`` não grava
+    nada e guarda em ``resultado.alteracoes`` o que mudaria:
+    ``('+', categoria, nome, campos)`` ou ``('~', categoria, nome,
+    {campo: (atual, novo)})``.
+    """
+
+    def __init__(self, categoria_padrao=None, somente_novos=False, simular=False, tamanho_lote=TAMANHO_LOTE):
+        self.categoria_padrao = categoria_padrao
+        self.somente_novos = somente_novos
+        self.simular = simular
+        self.tamanho_lote = tamanho_lote
+        self.resultado = ResultadoImportacao()
+        self._categorias = None
+        self._padroes = {campo: _CAMPOS[campo].get_default() for campo in CAMPOS_IMPORTADOS}
+
+    def importar(self, linhas):
+        """Importa todas as linhas (em uma transação) e retorna o ResultadoImportacao"""
+        # Os logs de auditoria dos lotes saem em um bulk_create após o commit
+        with gravador.requisicao(), transaction.atomic():
+            self._categorias = dict(Categoria.objects.values_list('nome', 'id'))
+            lote = {}
+            linhas = iter(linhas)
+            while True:
+                try:
+                    numero, linha = next(linhas)
+                except StopIteration:
+                    break
+                except LinhaInvalida as exc:
+                    self.resultado.lidas += 1
+                    self.resultado.invalidas.append(exc)
+                    continue
+                self.resultado.lidas += 1
+                try:
+                    categoria, nome, campos = normalizar(numero, linha, self.categoria_padrao)
+                except LinhaInvalida as exc:
+                    self.resultado.invalidas.append(exc)
+                    continue
+                # Repetida no arquivo: vale a última
+                lote.pop((categoria, nome), None)
+                lote[(categoria, nome)] = campos
+                if len(lote) >= self.tamanho_lote:
+                    self._gravar_lote(lote)
+                    lote = {}
+            if lote:
+                self._gravar_lote(lote)
+
+            if self.resultado.gravados and not self.simular:
+                incrementar_revisao()
+                transaction.on_commit(cache_catalogo.expirar)
+        return self.resultado
+
+    def _categoria_id(self, nome):
+        categoria_id = self._categorias.get(nome)
+        if categoria_id is None and nome not in self._categorias:
+            if not self.simular:
+                categoria_id = Categoria.objects.get_or_create(nome=nome, defaults={'ativo': True})[0].pk
+            self._categorias[nome] = categoria_id
+            self.resultado.categorias_criadas.append(nome)
+        return categoria_id
+
+    def _gravar_lote(self, lote):
+        resultado = self.resultado
+        ids_categoria = {categoria: self._categoria_id(categoria) for categoria, _ in lote}
+        existentes = {}
+        conhecidas = {categoria_id for categoria_id in ids_categoria.values() if categoria_id is not None}
+        if conhecidas:
+            for atual in SubCategoria.objects.filter(
+                categoria_id__in=conhecidas, nome__in={nome for _, nome in lote},
+            ).values('id', 'categoria_id', 'nome', *CAMPOS_IMPORTADOS):
+                existentes[(atual.pop('categoria_id'), atual.pop('nome'))] = atual
+
+        gravar = []
+        alterados = []
+        for (categoria, nome), importados in lote.items():
+            categoria_id = ids_categoria[categoria]
+            atual = existentes.get((categoria_id, nome)) if categoria_id is not None else None
+            if atual is None:
+                campos = {**self._padroes, **importados}
+                resultado.criados += 1
+                if self.simular:
+                    resultado.alteracoes.append(('+', categoria, nome, campos))
+            elif self.somente_novos:
+                resultado.ignorados += 1
+                continue
+            else:
+                pk = atual.pop('id')
+                campos = {**atual, **importados}
+                if assinatura(campos) == assinatura(atual):
+                    resultado.inalterados += 1
+                    continue
+                resultado.atualizados += 1
+                if self.simular:
+                    resultado.alteracoes.append(('~', categoria, nome, {
+                        campo: (atual[campo], valor) for campo, valor in campos.items() if atual[campo] != valor
+                    }))
+                else:
+                    alterados.append(_alterado(pk, categoria_id, nome, atual, campos))
+            gravar.append(SubCategoria(categoria_id=categoria_id, nome=nome, **campos))
+
+        if gravar and not self.simular:
+            SubCategoria.objects.bulk_create(
+                gravar,
+                update_conflicts=True,
+                unique_fields=['categoria', 'nome'],
+                update_fields=list(CAMPOS_IMPORTADOS) + ['atualizado_em'],
+            )
+            criados = [
+                servico for servico in gravar
+                if (servico.categoria_id, servico.nome) not in existentes
+            ]
+            _preencher_pks(criados)
+            auditoria.registrar_lote(SubCategoria, criados=criados, alterados=alterados)
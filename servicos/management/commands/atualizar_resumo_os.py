@@ -0,0 +1,74 @@
+"""
+Comando para preencher/verificar o resumo desnormalizado das Ordens de Serviço
+(primeira/última data de serviço, qtd de itens e transfers, categorias).
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from servicos.models import OrdemServico
+from servicos.resumo import (
+    CAMPOS_RESUMO, calcular_categorias, calcular_resumos, categorias_gravadas, gravar_categorias, resumo_vazio,
+)
+
+
+class Command(BaseCommand):
+    help = 'Recalcula (ou apenas verifica) o resumo desnormalizado das Ordens de Serviço'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Apenas verifica a consistência, sem gravar alterações (retorna erro se houver divergências)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Quantidade de OS processadas por lote (padrão: 500)'
+        )
+
+    def handle(self, *args, **options):
+        verificar = options['verificar']
+        batch_size = options['batch_size']
+
+        ids = list(OrdemServico.objects.order_by('pk').values_list('pk', flat=True))
+        self.stdout.write(f'Encontradas {len(ids)} Ordens de Serviço')
+
+        divergentes = 0
+        for inicio in range(0, len(ids), batch_size):
+            lote = ids[inicio:inicio + batch_size]
+            resumos = calcular_resumos(lote)
+            categorias = calcular_categorias(lote)
+            gravadas = categorias_gravadas(lote)
+            alteradas = []
+            categorias_alteradas = {}
+            for ordem in OrdemServico.objects.filter(pk__in=lote).only('pk', 'numero_os', *CAMPOS_RESUMO):
+                esperado = resumos.get(ordem.pk, resumo_vazio())
+                diferencas = {
+                    campo: (getattr(ordem, campo), valor)
+                    for campo, valor in esperado.items()
+                    if getattr(ordem, campo) != valor
+                }
+                esperadas = categorias.get(ordem.pk, set())
+                if gravadas.get(ordem.pk, set()) != esperadas:
+                    diferencas['categorias'] = (sorted(gravadas.get(ordem.pk, set())), sorted(esperadas))
+                    categorias_alteradas[ordem.pk] = esperadas
+                if not diferencas:
+                    continue
+                divergentes += 1
+                detalhes = ', '.join(f'{campo}: {antes!r} → {depois!r}' for campo, (antes, depois) in diferencas.items())
+                self.stdout.write(self.style.WARNING(f'OS #{ordem.numero_os}: {detalhes}'))
+                for campo, valor in esperado.items():
+                    setattr(ordem, campo, valor)
+                alteradas.append(ordem)
+
+            if alteradas and not verificar:
+                with transaction.atomic():
+                    OrdemServico.objects.bulk_update(alteradas, CAMPOS_RESUMO)
+                    gravar_categorias(categorias_alteradas)
+
+        if verificar:
+            if divergentes:
+                raise CommandError(f'{divergentes} OS com resumo divergente')
+            self.stdout.write(self.style.SUCCESS('✅ Resumo de todas as OS está consistente'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'\n✅ Resumo atualizado! {divergentes} OS corrigidas.'))
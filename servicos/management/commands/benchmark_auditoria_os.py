@@ -0,0 +1,73 @@
+"""
+Custo da auditoria na edição de Ordens de Serviço (audit_system/registry.py).
+
+Edita uma OS sintética (benchmark_roteiro) com o ``OrdemServicoWriter``,
+como o ``ordem_servico_edit``, alterando a quantidade de um item a cada
+vez: primeiro com a auditoria desativada, depois com ela. Cada edição roda
+no escopo de requisição do gravador de auditoria, então o log (um por
+edição) é gravado no fim dela, como no ``AuditMiddleware``:
+
+    python manage.py benchmark_auditoria_os --edicoes 200 --itens 30 --orcamento-ms 2
+
+Termina com erro se a auditoria custar mais que ``--orcamento-ms`` por
+edição. A OS e os logs criados são removidos no final.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from audit_system import registry as auditoria
+from audit_system.models import AuditLog
+from audit_system.writer import gravador
+from servicos.models import OrdemServico
+from servicos.services import OrdemServicoWriter, payload_editor
+
+from .benchmark_roteiro import criar_ordem_sintetica
+
+
+class Command(BaseCommand):
+    help = 'Mede quanto a auditoria acrescenta à edição de uma Ordem de Serviço'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--edicoes', type=int, default=100, help='Edições medidas em cada modo (padrão: 100)')
+        parser.add_argument('--dias', type=int, default=7, help='Dias da OS sintética (padrão: 7)')
+        parser.add_argument('--itens', type=int, default=30, help='Lançamentos da OS sintética (padrão: 30)')
+        parser.add_argument(
+            '--orcamento-ms', type=float, default=None,
+            help='Falha se a auditoria acrescentar mais que isso por edição',
+        )
+
+    def handle(self, *args, **options):
+        edicoes = max(1, options['edicoes'])
+        with auditoria.desativado():
+            ordem = criar_ordem_sintetica(options['dias'], options['itens'], transfers=options['dias'])
+        ordem = OrdemServico.objects.get(pk=ordem.pk)
+        servicos = payload_editor(ordem.pk)['lancamentos']
+        self.stdout.write(f'OS {ordem.numero_os}: {len(servicos)} itens, {edicoes} edições por modo')
+
+        try:
+            with auditoria.desativado():
+                sem = self._medir(ordem, servicos, edicoes)
+            logs_antes = AuditLog.objects.filter(action='OBJECT_UPDATED').count()
+            com = self._medir(ordem, servicos, edicoes)
+            logs = AuditLog.objects.filter(action='OBJECT_UPDATED').count() - logs_antes
+        finally:
+            AuditLog.objects.filter(object_repr=f'OS {ordem.numero_os}').delete()
+            with auditoria.desativado():
+                ordem.delete()
+
+        extra = com - sem
+        self.stdout.write(f'  sem auditoria {sem:>8.3f} ms/edição')
+        self.stdout.write(f'  com auditoria {com:>8.3f} ms/edição ({extra:+.3f} ms, {logs} logs)')
+        if logs != edicoes:
+            raise CommandError(f'Esperado um log por edição ({edicoes}), gravados {logs}')
+        if options['orcamento_ms'] is not None and extra > options['orcamento_ms']:
+            raise CommandError(f'Auditoria acima do orçamento: {extra:.3f} ms > {options["orcamento_ms"]} ms')
+
+    def _medir(self, ordem, servicos, edicoes):
+        inicio = time.perf_counter()
+        for _ in range(edicoes):
+            # Alterna a quantidade do primeiro item: toda edição grava algo
+            servicos[0]['qtd_inteira'] = 5 if servicos[0]['qtd_inteira'] != 5 else 6
+            with gravador.requisicao():
+                OrdemServicoWriter(ordem).salvar(servicos)
+        return (time.perf_counter() - inicio) * 1000 / edicoes
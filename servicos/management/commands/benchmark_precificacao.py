@@ -0,0 +1,156 @@
+"""
+Benchmark do motor de precificação (servicos/pricing.py).
+
+Gera lançamentos sintéticos em memória (sem banco) e compara o cálculo em
+lote com as properties antigas do model, item a item, conferindo que
+os totais são idênticos.
+"""
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from servicos.models import LancamentoServico, SubCategoria
+from servicos.pricing import calcular_lote
+
+
+class _LancamentoLegado:
+    """
+    Cópia das properties de LancamentoServico anteriores ao motor (referência).
+
+    Cada property reprocessa idades_criancas e relê as faixas do serviço.
+    """
+
+    def __init__(self, lancamento):
+        self.l = lancamento
+
+    def get_idades_lista(self):
+        if not self.l.idades_criancas:
+            return []
+        if isinstance(self.l.idades_criancas, list):
+            return [int(i) if isinstance(i, str) else i for i in self.l.idades_criancas]
+        try:
+            return [int(idade.strip()) for idade in self.l.idades_criancas.split(',') if idade.strip()]
+        except (ValueError, AttributeError):
+            return []
+
+    @property
+    def qtd_infantil_isentas(self):
+        idades = self.get_idades_lista()
+        if not idades or not self.l.subcategoria:
+            return 0
+        idade_min = self.l.subcategoria.idade_isencao_min
+        idade_max = self.l.subcategoria.idade_isencao_max
+        if idade_min is None or idade_max is None:
+            return 0
+        return sum(1 for idade in idades if idade_min <= idade <= idade_max)
+
+    @property
+    def qtd_infantil_pagam_inteira(self):
+        if not self.l.subcategoria:
+            return 0
+        if not self.l.subcategoria.aceita_meia_entrada or not self.l.subcategoria.permite_infantil:
+            return self.l.qtd_infantil - self.qtd_infantil_isentas
+        count = 0
+        for idade in self.get_idades_lista():
+            if (self.l.subcategoria.possui_isencao
+                    and self.l.subcategoria.idade_isencao_min <= idade <= self.l.subcategoria.idade_isencao_max):
+                continue
+            if idade < self.l.subcategoria.idade_minima_infantil or idade > self.l.subcategoria.idade_maxima_infantil:
+                count += 1
+        return count
+
+    @property
+    def qtd_infantil_pagam_infantil(self):
+        if not self.l.subcategoria:
+            return 0
+        if not self.l.subcategoria.aceita_meia_entrada or not self.l.subcategoria.permite_infantil:
+            return 0
+        count = 0
+        for idade in self.get_idades_lista():
+            if (self.l.subcategoria.possui_isencao
+                    and self.l.subcategoria.idade_isencao_min <= idade <= self.l.subcategoria.idade_isencao_max):
+                continue
+            if self.l.subcategoria.idade_minima_infantil <= idade <= self.l.subcategoria.idade_maxima_infantil:
+                count += 1
+        return count
+
+    @property
+    def valor_total(self):
+        total = Decimal('0.00')
+        total += self.l.qtd_inteira * self.l.valor_unit_inteira
+        total += self.l.qtd_meia * self.l.valor_unit_meia
+        total += self.qtd_infantil_pagam_infantil * self.l.valor_unit_infantil
+        total += self.qtd_infantil_pagam_inteira * self.l.valor_unit_inteira
+        return total
+
+
+def gerar_lancamentos(quantidade, servicos=50, semente=42):
+    """Lançamentos sintéticos não salvos, com serviços de regras variadas"""
+    rnd = random.Random(semente)
+    subcategorias = []
+    for pk in range(1, servicos + 1):
+        isencao_max = rnd.choice([0, 2, 4, 6])
+        subcategorias.append(SubCategoria(
+            pk=pk,
+            nome=f'Serviço {pk}',
+            valor_inteira=Decimal(rnd.randint(50, 400)),
+            valor_meia=Decimal(rnd.randint(25, 200)),
+            valor_infantil=Decimal(rnd.randint(10, 150)),
+            aceita_meia_entrada=rnd.random() > 0.2,
+            permite_infantil=rnd.random() > 0.2,
+            possui_isencao=isencao_max > 0,
+            idade_isencao_min=0,
+            idade_isencao_max=isencao_max,
+            idade_minima_infantil=isencao_max + 1,
+            idade_maxima_infantil=rnd.choice([10, 11, 12]),
+        ))
+
+    lancamentos = []
+    for pk in range(1, quantidade + 1):
+        sub = rnd.choice(subcategorias)
+        qtd_infantil = rnd.choice([0, 0, 1, 2, 3])
+        idades = [rnd.randint(0, 17) for _ in range(qtd_infantil)]
+        lancamentos.append(LancamentoServico(
+            pk=pk,
+            ordem_servico_id=pk // 20 + 1,
+            subcategoria=sub,
+            qtd_inteira=rnd.randint(0, 4),
+            qtd_meia=rnd.randint(0, 2),
+            qtd_infantil=qtd_infantil,
+            idades_criancas=idades,
+            valor_unit_inteira=sub.valor_inteira,
+            valor_unit_meia=sub.valor_meia,
+            valor_unit_infantil=sub.valor_infantil,
+        ))
+    return lancamentos
+
+
+class Command(BaseCommand):
+    help = 'Mede o cálculo de totais de lançamentos (motor em lote x properties antigas)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quantidade', type=int, default=100_000,
+                            help='Quantidade de lançamentos sintéticos (padrão: 100000)')
+        parser.add_argument('--servicos', type=int, default=50,
+                            help='Quantidade de serviços distintos (padrão: 50)')
+
+    def handle(self, *args, **options):
+        lancamentos = gerar_lancamentos(options['quantidade'], options['servicos'])
+        self.stdout.write(f'{len(lancamentos)} lançamentos sintéticos gerados')
+
+        inicio = time.perf_counter()
+        legado = [_LancamentoLegado(lancamento).valor_total for lancamento in lancamentos]
+        tempo_legado = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        motor = [resultado.valor_total for resultado in calcular_lote(lancamentos)]
+        tempo_motor = time.perf_counter() - inicio
+
+        divergentes = sum(1 for a, b in zip(legado, motor) if a != b)
+        self.stdout.write(f'Properties antigas: {tempo_legado:.3f}s')
+        self.stdout.write(f'Motor em lote:      {tempo_motor:.3f}s '
+                          f'({tempo_legado / tempo_motor if tempo_motor else 0:.1f}x)')
+        if divergentes:
+            raise CommandError(f'{divergentes} lançamentos com total divergente!')
+        self.stdout.write(self.style.SUCCESS(f'✅ Totais idênticos (R$ {sum(motor)})'))
@@ -0,0 +1,226 @@
+"""
+Benchmark do roteiro das OS (servicos/roteiro.py).
+
+Cria uma OS sintética (padrão: 30 dias, 200 lançamentos) dentro de uma
+transação que é desfeita no final e compara as funções antigas, que
+montavam cada formato separadamente concatenando strings, com o modelo
+intermediário montado uma vez e renderizado em todos os formatos.
+"""
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from servicos.models import (
+    Categoria, LancamentoServico, OrdemServico, SubCategoria, Transfer, TransferOrdemServico,
+)
+from servicos.pricing import calcular_lote
+from servicos.roteiro import RENDERIZADORES, montar_itinerario, renderizar_texto, renderizar_whatsapp
+from servicos.schema import capabilities
+
+
+def _formatar_moeda_br(valor):
+    return f'R$ {float(valor):.2f}'.replace('.', ',')
+
+
+def _preview_legado(ordem):
+    """Cópia do antigo _gerar_preview_roteiro_ordem (referência)"""
+    lancamentos = list(ordem.lancamentos.select_related('categoria', 'subcategoria').all())
+    valores_lancamentos = {
+        lancamento.pk: float(resultado.valor_total)
+        for lancamento, resultado in zip(lancamentos, calcular_lote(lancamentos))
+    }
+    transfers = list(ordem.transfers.select_related('transfer').all()) if capabilities.transfer_nome_personalizado else []
+
+    por_data = {}
+    for lancamento in lancamentos:
+        por_data.setdefault(lancamento.data_servico.strftime('%Y-%m-%d'), []).append(lancamento)
+    transfers_por_data = {}
+    for transfer_ordem in transfers:
+        data_transfer = transfer_ordem.data_transfer.strftime('%Y-%m-%d') if transfer_ordem.data_transfer else ''
+        transfers_por_data.setdefault(data_transfer, []).append(transfer_ordem)
+
+    roteiro = '✨ *ROTEIRO* ✨\n'
+    roteiro += '\n\n'
+    resumo_servicos = []
+    resumo_transfers = []
+    total_tickets = total_transfers = total_geral = 0.0
+
+    for data in sorted(set(por_data) | set(transfers_por_data)):
+        if data:
+            roteiro += f'🗓️ *DIA | {data[8:10]}/{data[5:7]}/{data[0:4]}*\n'
+            roteiro += '───────────────────\n'
+        if por_data.get(data):
+            roteiro += '🎟️ *Atividades & Ingressos:*\n'
+            for lancamento in por_data[data]:
+                qtds = []
+                if lancamento.qtd_inteira > 0:
+                    qtds.append(f'{lancamento.qtd_inteira}x Inteira')
+                if lancamento.qtd_meia > 0:
+                    qtds.append(f'{lancamento.qtd_meia}x Meia')
+                if lancamento.qtd_infantil > 0:
+                    qtds.append(f'{lancamento.qtd_infantil}x Infantil')
+                nome_atividade = lancamento.obs_publica or lancamento.subcategoria.nome
+                roteiro += f'  • {nome_atividade} ({", ".join(qtds)})\n'
+                subtotal_ingressos = valores_lancamentos[lancamento.pk]
+                resumo_servicos.append({'nome': nome_atividade, 'valorIngressos': subtotal_ingressos})
+                total_tickets += subtotal_ingressos
+                total_geral += subtotal_ingressos
+            roteiro += '\n'
+        if transfers_por_data.get(data):
+            roteiro += '🚘 *Transporte Privativo:*\n'
+            for transfer_ordem in transfers_por_data[data]:
+                roteiro += f'  • {transfer_ordem.nome_exibicao}\n'
+                valor_t = float(transfer_ordem.valor)
+                resumo_transfers.append({'nome': transfer_ordem.nome_exibicao, 'valor': valor_t})
+                total_transfers += valor_t
+                total_geral += valor_t
+            roteiro += '\n'
+
+    roteiro += '═══════════════════\n'
+    roteiro += '💼 *RESUMO FINANCEIRO*\n'
+    roteiro += '═══════════════════\n'
+    if resumo_transfers:
+        roteiro += '\n🚘 *Investimento em Transporte:*\n'
+        for item in resumo_transfers:
+            roteiro += f'  • {item["nome"]}: {_formatar_moeda_br(item["valor"])}\n'
+        roteiro += f'  _*Subtotal Transporte: {_formatar_moeda_br(total_transfers)}*_\n'
+    if resumo_servicos:
+        roteiro += '\n🎟️ *Investimento em Ingressos:*\n'
+        for item in resumo_servicos:
+            if item['valorIngressos'] > 0:
+                roteiro += f'  • {item["nome"]}: {_formatar_moeda_br(item["valorIngressos"])}\n'
+        roteiro += f'  _*Subtotal Ingressos: {_formatar_moeda_br(total_tickets)}*_\n'
+    roteiro += '\n───────────────────\n'
+    roteiro += f'💎 *VALOR TOTAL DO PACOTE: {_formatar_moeda_br(total_geral)}*\n'
+    roteiro += '───────────────────\n\n'
+    roteiro += 'Ficamos à disposição para esclarecer qualquer dúvida ou realizar ajustes no roteiro!'
+    return roteiro
+
+
+def _texto_legado(ordem):
+    """Cópia do antigo OrdemServico.gerar_roteiro (referência)"""
+    roteiro_parts = []
+    lancamentos_por_data = {}
+    for lancamento in ordem.lancamentos.select_related('subcategoria').order_by('data_servico'):
+        lancamentos_por_data.setdefault(lancamento.data_servico, []).append(lancamento)
+    for data, lancamentos in lancamentos_por_data.items():
+        roteiro_parts.append(f"{data.strftime('%A').upper()} {data.strftime('%d/%m')}\n")
+        for lancamento in lancamentos:
+            servico = lancamento.subcategoria
+            roteiro_parts.append(f"\n{servico.nome}:")
+            if servico.descricao:
+                for line in servico.descricao.strip().split('\n'):
+                    if line.strip():
+                        roteiro_parts.append(f"- {line.strip()}")
+            if lancamento.valor_total > 0:
+                roteiro_parts.append(
+                    f"R$ {lancamento.valor_total:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'))
+            roteiro_parts.append("")
+        roteiro_parts.append("\n")
+    return "\n".join(roteiro_parts)
+
+
+def criar_ordem_sintetica(dias=30, itens=200, transfers=30, semente=42):
+    """
+    OS com ``itens`` lançamentos distribuídos em ``dias`` dias e um transfer por dia.
+
+    O catálogo sintético (20 serviços e um transfer) é criado na primeira
+    chamada e reaproveitado pelas seguintes.
+    """
+    rnd = random.Random(semente)
+    usuario = get_user_model().objects.order_by('pk').first()
+    categoria, criada = Categoria.objects.get_or_create(nome='Benchmark roteiro')
+    if criada:
+        SubCategoria.objects.bulk_create([
+            SubCategoria(
+                categoria=categoria,
+                nome=f'Serviço benchmark {n}',
+                descricao='Saída do hotel às 8h\nGuia bilíngue\nIngresso incluso',
+                valor_inteira=Decimal(rnd.randint(50, 400)),
+                valor_meia=Decimal(rnd.randint(25, 200)),
+                valor_infantil=Decimal(rnd.randint(10, 150)),
+            )
+            for n in range(20)
+        ])
+    servicos = list(SubCategoria.objects.filter(categoria=categoria).order_by('pk'))
+    transfer, _ = Transfer.objects.get_or_create(nome='Transfer benchmark', defaults={'valor': Decimal('120.00')})
+    inicio = date(2030, 1, 1)
+
+    ordem = OrdemServico.objects.create(criado_por=usuario)
+    LancamentoServico.objects.bulk_create([
+        LancamentoServico(
+            ordem_servico=ordem,
+            categoria=categoria,
+            subcategoria=servico,
+            data_servico=inicio + timedelta(days=n % dias),
+            qtd_inteira=rnd.randint(1, 4),
+            qtd_meia=rnd.randint(0, 2),
+            qtd_infantil=0,
+            valor_unit_inteira=servico.valor_inteira,
+            valor_unit_meia=servico.valor_meia,
+            valor_unit_infantil=servico.valor_infantil,
+        )
+        for n, servico in ((n, rnd.choice(servicos)) for n in range(itens))
+    ])
+    TransferOrdemServico.objects.bulk_create([
+        TransferOrdemServico(
+            ordem_servico=ordem, transfer=transfer, valor=transfer.valor,
+            data_transfer=inicio + timedelta(days=n % dias),
+        )
+        for n in range(transfers)
+    ])
+    return ordem
+
+
+def _medir(func, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = func()
+    return (time.perf_counter() - inicio) / repeticoes, resultado
+
+
+class Command(BaseCommand):
+    help = 'Mede a geração do roteiro de uma OS grande (funções antigas x modelo + renderizadores)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=30, help='Dias da OS sintética (padrão: 30)')
+        parser.add_argument('--itens', type=int, default=200, help='Lançamentos da OS sintética (padrão: 200)')
+        parser.add_argument('--repeticoes', type=int, default=50, help='Repetições de cada medição (padrão: 50)')
+
+    def handle(self, *args, **options):
+        repeticoes = options['repeticoes']
+        with transaction.atomic():
+            ordem = criar_ordem_sintetica(options['dias'], options['itens'], transfers=options['dias'])
+            self.stdout.write(f'OS sintética: {options["dias"]} dias, {options["itens"]} lançamentos')
+
+            def legado():
+                return _preview_legado(ordem), _texto_legado(ordem)
+
+            def novo():
+                itinerario = montar_itinerario(ordem)
+                return tuple(func(itinerario) for func in RENDERIZADORES.values())
+
+            tempo_legado, (preview_legado, texto_legado) = _medir(legado, repeticoes)
+            tempo_novo, _ = _medir(novo, repeticoes)
+            itinerario = montar_itinerario(ordem)
+            tempo_render, _ = _medir(lambda: [func(itinerario) for func in RENDERIZADORES.values()], repeticoes)
+
+            preview_novo = renderizar_whatsapp(itinerario)
+            texto_novo = renderizar_texto(itinerario)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'Antigo (preview + texto, 2 passadas):       {tempo_legado * 1000:.2f} ms')
+        self.stdout.write(f'Modelo + {len(RENDERIZADORES)} formatos ({", ".join(RENDERIZADORES)}): '
+                          f'{tempo_novo * 1000:.2f} ms ({tempo_legado / tempo_novo if tempo_novo else 0:.1f}x)')
+        self.stdout.write(f'Só renderização (modelo reaproveitado):   {tempo_render * 1000:.2f} ms')
+
+        if preview_novo != preview_legado:
+            raise CommandError('Preview divergente do formato antigo!')
+        # O texto antigo não definia a ordem dos itens dentro do dia: compara as linhas
+        if sorted(texto_novo.split('\n')) != sorted(texto_legado.split('\n')):
+            raise CommandError('Roteiro em texto divergente do formato antigo!')
+        self.stdout.write(self.style.SUCCESS('✅ Saídas idênticas às funções antigas'))
@@ -0,0 +1,98 @@
+"""
+Benchmark da memória de tradução (servicos/translation_memory.py).
+
+Traduz o roteiro de uma OS sintética (benchmark_roteiro) com a memória
+vazia (fria, só o dicionário evita o modelo), de novo com o LRU preenchido (quente), com o LRU vazio mas a
+tabela preenchida (outro worker) e por fim o roteiro de outra OS com os
+mesmos serviços. Tudo roda dentro de uma transação desfeita no final.
+
+Usa os modelos do Argos. Sem eles instalados, ``--latencia-ms`` simula um
+modelo que gasta esse tempo por segmento e devolve o texto como está (mede
+só o ganho da memória).
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from servicos.roteiro import montar_itinerario, renderizar_whatsapp
+from servicos.translation import ROTAS, MotorTraducao, TraducaoIndisponivel
+from servicos.translation_dictionary import DicionarioTraducao
+from servicos.translation_memory import MemoriaTraducao
+
+from .benchmark_roteiro import criar_ordem_sintetica
+
+
+def _modelo_simulado(latencia):
+    def traduzir(texto, origem, destino):
+        time.sleep(latencia * (texto.count('\n') + 1))
+        return texto
+    return traduzir
+
+
+class Command(BaseCommand):
+    help = 'Mede a tradução de roteiros com a memória de tradução fria e quente'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--idiomas', default=','.join(ROTAS), help='Idiomas de destino (padrão: en,es,fr)')
+        parser.add_argument('--dias', type=int, default=7, help='Dias da OS sintética (padrão: 7)')
+        parser.add_argument('--itens', type=int, default=30, help='Lançamentos da OS sintética (padrão: 30)')
+        parser.add_argument(
+            '--latencia-ms', type=float, default=None,
+            help='Simula o modelo com essa latência por segmento em vez de usar o Argos',
+        )
+
+    def handle(self, *args, **options):
+        idiomas = [idioma.strip() for idioma in options['idiomas'].split(',') if idioma.strip()]
+        desconhecidos = [idioma for idioma in idiomas if idioma not in ROTAS]
+        if desconhecidos:
+            raise CommandError(f'Idiomas sem rota de tradução: {", ".join(desconhecidos)}')
+        tradutor = None
+        if options['latencia_ms'] is not None:
+            tradutor = _modelo_simulado(options['latencia_ms'] / 1000)
+            self.stdout.write(f'Modelo simulado: {options["latencia_ms"]} ms por segmento')
+
+        with transaction.atomic():
+            ordem = criar_ordem_sintetica(options['dias'], options['itens'], transfers=options['dias'])
+            outra = criar_ordem_sintetica(options['dias'], options['itens'], transfers=options['dias'], semente=7)
+            roteiro = renderizar_whatsapp(montar_itinerario(ordem))
+            roteiro_parecido = renderizar_whatsapp(montar_itinerario(outra))
+            self.stdout.write(
+                f'Roteiro: {len(roteiro.splitlines())} linhas, {len(roteiro)} caracteres '
+                f'({options["dias"]} dias, {options["itens"]} lançamentos)'
+            )
+
+            try:
+                for idioma in idiomas:
+                    self._medir_idioma(idioma, roteiro, roteiro_parecido, tradutor)
+            except TraducaoIndisponivel as exc:
+                raise CommandError(f'{exc}. Use --latencia-ms para simular o modelo.') from exc
+            finally:
+                transaction.set_rollback(True)
+
+    def _medir_idioma(self, idioma, roteiro, roteiro_parecido, tradutor):
+        memoria = MemoriaTraducao()
+        motor = MotorTraducao(tradutor=tradutor, memoria=memoria, dicionario=DicionarioTraducao())
+        motor.aquecer([idioma])
+
+        medicoes = [('fria', motor.traduzir(roteiro, idioma))]
+        medicoes.append(('quente (LRU)', motor.traduzir(roteiro, idioma)))
+        memoria.limpar()
+        medicoes.append(('quente (banco)', motor.traduzir(roteiro, idioma)))
+        medicoes.append(('outra OS', motor.traduzir(roteiro_parecido, idioma)))
+
+        if medicoes[1][1].texto != medicoes[0][1].texto:
+            raise CommandError(f'[{idioma}] Tradução da memória diferente da tradução original!')
+
+        self.stdout.write(f'\n[{idioma}]')
+        fria = medicoes[0][1].tempos['total']
+        for nome, resultado in medicoes:
+            segmentos = resultado.segmentos
+            sem_modelo = segmentos['do_dicionario'] + segmentos['da_memoria']
+            taxa = sem_modelo / segmentos['unicos'] if segmentos['unicos'] else 0
+            self.stdout.write(
+                f'  {nome:<15} {resultado.tempos["total"]:>9.2f} ms'
+                f'  ({fria / resultado.tempos["total"] if resultado.tempos["total"] else 0:>6.1f}x)'
+                f'  segmentos: {segmentos["unicos"]:>3}, do dicionário {segmentos["do_dicionario"]:>3},'
+                f' da memória {segmentos["da_memoria"]:>3} ({taxa:.0%} sem o modelo)'
+            )
+        self.stdout.write(f'  taxa de acerto acumulada: {memoria.estatisticas()["taxa_acerto"]:.0%}')
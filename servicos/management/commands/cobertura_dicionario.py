@@ -0,0 +1,72 @@
+"""
+Cobertura do dicionário de tradução (servicos/translation_dictionary.py).
+
+Renderiza o roteiro (formato WhatsApp) das OS mais recentes, protege e
+segmenta como o motor de tradução e conta, por idioma, quantos segmentos
+o dicionário traduz sem o modelo:
+
+    python manage.py cobertura_dicionario --limite 500 --mostrar 30
+
+Lista também as sequências de palavras que mais impedem a cobertura: são
+as candidatas a entrar em servicos/translations.py.
+"""
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from servicos.models import OrdemServico
+from servicos.roteiro import montar_itinerario, renderizar_whatsapp
+from servicos.translation import motor, proteger, segmentar
+from servicos.translation_dictionary import DicionarioTraducao
+
+
+class Command(BaseCommand):
+    help = 'Mostra quanto dos roteiros reais o dicionário de tradução cobre sem o modelo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--idiomas', default=','.join(motor.idiomas), help='Idiomas de destino (padrão: en,es,fr)')
+        parser.add_argument('--limite', type=int, default=200, help='OS mais recentes analisadas (padrão: 200)')
+        parser.add_argument('--mostrar', type=int, default=20, help='Trechos sem tradução listados (padrão: 20)')
+
+    def handle(self, *args, **options):
+        dicionario = DicionarioTraducao()
+        idiomas = [idioma.strip() for idioma in options['idiomas'].split(',') if idioma.strip()]
+        desconhecidos = [idioma for idioma in idiomas if idioma not in dicionario.idiomas]
+        if desconhecidos:
+            raise CommandError(f'Idiomas sem dicionário: {", ".join(desconhecidos)}')
+
+        ordens = list(OrdemServico.objects.order_by('-pk')[:options['limite']])
+        if not ordens:
+            raise CommandError('Nenhuma Ordem de Serviço encontrada')
+
+        # Segmentos de cada roteiro (com repetição: é o que o motor traduz)
+        roteiros = []
+        for ordem in ordens:
+            protegido, _ = proteger(renderizar_whatsapp(montar_itinerario(ordem)), motor.padrao())
+            roteiros.append([segmento.chave for segmento in segmentar(protegido) if segmento.chave is not None])
+        total = sum(len(segmentos) for segmentos in roteiros)
+        unicos = {chave for segmentos in roteiros for chave in segmentos}
+        self.stdout.write(
+            f'{len(roteiros)} roteiro(s): {total} segmentos a traduzir, {len(unicos)} diferentes'
+        )
+
+        for idioma in idiomas:
+            cobertos = {chave for chave in unicos if dicionario.traduzir(idioma, chave) is not None}
+            segmentos_cobertos = sum(chave in cobertos for segmentos in roteiros for chave in segmentos)
+            roteiros_cobertos = sum(all(chave in cobertos for chave in segmentos) for segmentos in roteiros)
+            self.stdout.write(
+                f'\n[{idioma}] segmentos: {segmentos_cobertos}/{total} ({_pct(segmentos_cobertos, total)})'
+                f' | diferentes: {len(cobertos)}/{len(unicos)} ({_pct(len(cobertos), len(unicos))})'
+                f' | roteiros inteiros sem o modelo: {roteiros_cobertos}/{len(roteiros)}'
+            )
+
+            faltando = Counter()
+            for segmentos in roteiros:
+                for chave in segmentos:
+                    if chave not in cobertos:
+                        faltando.update(dicionario.palavras_faltando(idioma, chave))
+            for trecho, vezes in faltando.most_common(options['mostrar']):
+                self.stdout.write(f'  {vezes:>6}x  {trecho}')
+
+
+def _pct(parte, total):
+    return f'{parte / total:.0%}' if total else '-'
@@ -0,0 +1,98 @@
+"""
+Teste de estresse da numeração de Ordens de Serviço.
+
+Dispara vários alocadores concorrentes (threads e/ou processos) contra a
+sequência de um ano de teste e verifica que nenhum número foi repetido.
+Lacunas são aceitas (blocos parcialmente usados, transações desfeitas).
+"""
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from servicos.models import SequenciaOrdemServico
+from servicos.numeracao import proximo_numero_os, reservar_bloco_os
+
+
+def alocar(ano, quantidade, bloco):
+    """Executa ``quantidade`` alocações e retorna os números obtidos"""
+    numeros = []
+    try:
+        for _ in range(quantidade):
+            if bloco > 1:
+                numeros.extend(reservar_bloco_os(bloco, ano))
+            else:
+                numeros.append(proximo_numero_os(ano))
+    finally:
+        # Cada thread/processo abre a própria conexão
+        connections.close_all()
+    return numeros
+
+
+def _alocar_em_threads(args):
+    ano, threads, quantidade, bloco = args
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futuros = [executor.submit(alocar, ano, quantidade, bloco) for _ in range(threads)]
+        return [numero for futuro in futuros for numero in futuro.result()]
+
+
+def executar_estresse(ano, threads=8, processos=0, por_worker=50, bloco=1):
+    """
+    Roda os alocadores concorrentes e retorna a lista de números emitidos.
+
+    Com ``processos`` > 0 cada processo roda ``threads`` threads; os
+    processos herdam a configuração do Django via fork.
+    """
+    if not processos:
+        return _alocar_em_threads((ano, threads, por_worker, bloco))
+
+    connections.close_all()
+    contexto = multiprocessing.get_context('fork')
+    with contexto.Pool(processes=processos) as pool:
+        resultados = pool.map(_alocar_em_threads, [(ano, threads, por_worker, bloco)] * processos)
+    return [numero for numeros in resultados for numero in numeros]
+
+
+class Command(BaseCommand):
+    help = 'Estressa a numeração de OS com alocadores concorrentes e verifica a unicidade'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ano', type=int, default=9999,
+                            help='Ano usado no teste (padrão: 9999, para não consumir números reais)')
+        parser.add_argument('--threads', type=int, default=8, help='Threads por processo (padrão: 8)')
+        parser.add_argument('--processos', type=int, default=0,
+                            help='Processos paralelos (padrão: 0 = apenas threads no processo atual)')
+        parser.add_argument('--por-worker', type=int, default=50,
+                            help='Alocações feitas por thread (padrão: 50)')
+        parser.add_argument('--bloco', type=int, default=1,
+                            help='Números reservados por alocação (padrão: 1)')
+        parser.add_argument('--manter', action='store_true',
+                            help='Mantém a sequência do ano de teste ao final')
+
+    def handle(self, *args, **options):
+        ano = options['ano']
+        inicio = time.perf_counter()
+        numeros = executar_estresse(
+            ano,
+            threads=options['threads'],
+            processos=options['processos'],
+            por_worker=options['por_worker'],
+            bloco=options['bloco'],
+        )
+        duracao = time.perf_counter() - inicio
+
+        valores = sorted(int(numero.split('-')[1]) for numero in numeros)
+        repetidos = len(valores) - len(set(valores))
+        lacunas = (valores[-1] - valores[0] + 1 - len(set(valores))) if valores else 0
+
+        if not options['manter']:
+            SequenciaOrdemServico.objects.filter(ano=ano).delete()
+
+        self.stdout.write(
+            f'{len(numeros)} números emitidos em {duracao:.2f}s '
+            f'({len(numeros) / duracao if duracao else 0:.0f}/s), lacunas: {lacunas}'
+        )
+        if repetidos:
+            raise CommandError(f'{repetidos} números de OS repetidos!')
+        self.stdout.write(self.style.SUCCESS('✅ Nenhum número repetido'))
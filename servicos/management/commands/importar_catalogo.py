@@ -0,0 +1,113 @@
+"""
+Importa serviços (SubCategoria) de um arquivo CSV, JSON ou NDJSON.
+
+    python manage.py importar_catalogo servicos.csv --categoria Atrativos
+    python manage.py importar_catalogo servicos.ndjson --dry-run
+    cat servicos.csv | python manage.py importar_catalogo - --formato csv
+
+Cada linha tem ``nome`` e, opcionalmente, ``categoria`` (senão vale
+``--categoria``) e os campos do serviço (``valor_inteira``,
+``aceita_meia_entrada``, ``texto_isencao``...). Serviços existentes (mesma
+categoria e nome) são atualizados, e colunas ausentes mantêm o valor atual.
+Tudo roda em uma transação: com linhas inválidas nada é gravado, a menos
+que ``--ignorar-invalidas`` seja usado. Ver servicos/importacao.py.
+"""
+import io
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from audit_system.writer import gravador
+from servicos.importacao import (
+    FORMATOS, TAMANHO_LOTE, ImportadorCatalogo, detectar_formato, ler_linhas,
+)
+
+# Linhas inválidas listadas na saída
+MAX_ERROS_LISTADOS = 20
+
+
+class Command(BaseCommand):
+    help = 'Importa serviços do catálogo de um arquivo CSV, JSON ou NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Caminho do arquivo (ou - para a entrada padrão)')
+        parser.add_argument('--formato', choices=FORMATOS, help='Formato do arquivo (padrão: pela extensão)')
+        parser.add_argument('--categoria', help='Categoria das linhas sem a coluna categoria')
+        parser.add_argument('--delimitador', default=',', help='Delimitador do CSV (padrão: ,)')
+        parser.add_argument('--dry-run', action='store_true', help='Mostra as alterações sem gravar nada')
+        parser.add_argument('--somente-novos', action='store_true', help='Não altera serviços existentes')
+        parser.add_argument('--ignorar-invalidas', action='store_true', help='Importa as linhas válidas mesmo com erros')
+        parser.add_argument(
+            '--lote', type=int, default=TAMANHO_LOTE, help=f'Linhas por lote gravado (padrão: {TAMANHO_LOTE})'
+        )
+
+    def handle(self, *args, **options):
+        caminho = options['arquivo']
+        formato = options['formato'] or (None if caminho == '-' else detectar_formato(caminho))
+        if formato is None:
+            raise CommandError('Formato não reconhecido: use --formato csv, json ou ndjson')
+
+        importador = ImportadorCatalogo(
+            categoria_padrao=options['categoria'],
+            somente_novos=options['somente_novos'],
+            simular=options['dry_run'],
+            tamanho_lote=max(1, options['lote']),
+        )
+        inicio = time.perf_counter()
+        try:
+            # Escopo do gravador fora da transação: os logs de auditoria entram
+            # no lote no commit e são gravados juntos na saída do escopo
+            with gravador.requisicao(), self._abrir(caminho) as arquivo, transaction.atomic():
+                resultado = importador.importar(ler_linhas(arquivo, formato, options['delimitador']))
+                if resultado.invalidas and not options['ignorar_invalidas'] and not options['dry_run']:
+                    self._listar_invalidas(resultado)
+                    raise CommandError(
+                        f'{len(resultado.invalidas)} linha(s) inválida(s): nada foi gravado '
+                        '(use --ignorar-invalidas para importar as demais)'
+                    )
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Erro ao ler {caminho}: {exc}') from exc
+        segundos = time.perf_counter() - inicio
+
+        if options['dry_run']:
+            self._listar_alteracoes(resultado)
+        self._listar_invalidas(resultado)
+
+        self.stdout.write(self.style.NOTICE('\n' + '=' * 60))
+        self.stdout.write(f'Linhas lidas: {resultado.lidas} em {segundos:.2f}s')
+        prefixo = 'Seriam criados' if options['dry_run'] else 'Criados'
+        self.stdout.write(self.style.SUCCESS(f'✓ {prefixo}: {resultado.criados}'))
+        prefixo = 'Seriam atualizados' if options['dry_run'] else 'Atualizados'
+        self.stdout.write(self.style.WARNING(f'✓ {prefixo}: {resultado.atualizados}'))
+        self.stdout.write(f'→ Sem alteração: {resultado.inalterados}')
+        if options['somente_novos']:
+            self.stdout.write(f'→ Existentes ignorados: {resultado.ignorados}')
+        if resultado.categorias_criadas:
+            self.stdout.write(f'→ Categorias novas: {", ".join(resultado.categorias_criadas)}')
+        if resultado.invalidas:
+            self.stdout.write(self.style.ERROR(f'✗ Inválidas: {len(resultado.invalidas)}'))
+        self.stdout.write(self.style.NOTICE('=' * 60))
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Simulação (--dry-run): nada foi gravado'))
+
+    def _abrir(self, caminho):
+        if caminho == '-':
+            return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+        # utf-8-sig: CSV salvo pelo Excel começa com BOM
+        return open(caminho, encoding='utf-8-sig', newline='')
+
+    def _listar_alteracoes(self, resultado):
+        for tipo, categoria, nome, campos in resultado.alteracoes:
+            if tipo == '+':
+                self.stdout.write(self.style.SUCCESS(f'+ {categoria} / {nome}'))
+                continue
+            self.stdout.write(self.style.WARNING(f'~ {categoria} / {nome}'))
+            for campo, (atual, novo) in campos.items():
+                self.stdout.write(f'    {campo}: {atual!r} → {novo!r}')
+
+    def _listar_invalidas(self, resultado):
+        for erro in resultado.invalidas[:MAX_ERROS_LISTADOS]:
+            self.stderr.write(f'✗ {erro}')
+        if len(resultado.invalidas) > MAX_ERROS_LISTADOS:
+            self.stderr.write(f'  ... e mais {len(resultado.invalidas) - MAX_ERROS_LISTADOS}')
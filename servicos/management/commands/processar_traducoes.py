@@ -0,0 +1,111 @@
+"""
+Trabalhador da fila de traduções de roteiro (servicos/translation_jobs.py).
+
+Roda como serviço à parte dos workers web (ver scripts/deploy_vps_lite.sh):
+
+    python manage.py processar_traducoes
+
+Carrega os modelos uma vez, executa até ``--simultaneas`` traduções ao mesmo
+tempo (threads no mesmo processo, compartilhando os modelos e a memória de
+tradução) e para de forma limpa com SIGTERM/SIGINT, terminando as traduções
+em andamento. ``--uma-vez`` esvazia a fila e sai (útil em cron e testes).
+"""
+import os
+import signal
+import socket
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from servicos.translation import TraducaoIndisponivel, motor
+from servicos.translation_jobs import (
+    ABANDONADO_APOS, RETER_TERMINADOS, processar_proximo, recuperar_abandonados, remover_antigos,
+)
+
+# Segundos entre as limpezas (trabalhos abandonados e antigos)
+INTERVALO_MANUTENCAO = 60
+
+
+class Command(BaseCommand):
+    help = 'Processa a fila de traduções de roteiro'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--simultaneas', type=int, default=None,
+            help='Traduções ao mesmo tempo (padrão: TRADUCAO_MAX_SIMULTANEAS)',
+        )
+        parser.add_argument('--intervalo', type=float, default=1.0, help='Segundos entre consultas à fila vazia')
+        parser.add_argument('--uma-vez', action='store_true', help='Processa os trabalhos pendentes e sai')
+        parser.add_argument('--sem-aquecer', action='store_true', help='Não carrega os modelos antes de começar')
+
+    def handle(self, *args, **options):
+        simultaneas = max(1, options['simultaneas'] or settings.TRADUCAO_MAX_SIMULTANEAS)
+        nome = f'{socket.gethostname()}:{os.getpid()}'
+
+        if not options['sem_aquecer']:
+            try:
+                segundos = motor.aquecer()
+                self.stdout.write(f'Modelos carregados em {segundos:.1f}s')
+            except TraducaoIndisponivel as exc:
+                self.stderr.write(f'⚠ {exc}: os trabalhos vão terminar com erro')
+
+        recuperados = recuperar_abandonados(ABANDONADO_APOS)
+        if recuperados:
+            self.stdout.write(f'{recuperados} trabalho(s) abandonado(s) de volta na fila')
+
+        parar = threading.Event()
+        processados = []
+        threads = [
+            threading.Thread(
+                target=self._trabalhar,
+                args=(f'{nome}/{n}', parar, options['intervalo'], options['uma_vez'], processados),
+                name=f'traducao-{n}',
+            )
+            for n in range(simultaneas)
+        ]
+        for thread in threads:
+            thread.start()
+
+        if options['uma_vez']:
+            for thread in threads:
+                thread.join()
+            self.stdout.write(self.style.SUCCESS(f'✅ {len(processados)} trabalho(s) processado(s)'))
+            return
+
+        self.stdout.write(f'Processando a fila com {simultaneas} tradução(ões) simultânea(s) ({nome})')
+        for sinal in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sinal, lambda *_: parar.set())
+        while not parar.wait(INTERVALO_MANUTENCAO):
+            recuperar_abandonados(ABANDONADO_APOS)
+            remover_antigos(RETER_TERMINADOS)
+        self.stdout.write('Encerrando: aguardando traduções em andamento...')
+        for thread in threads:
+            thread.join()
+
+    def _trabalhar(self, nome, parar, intervalo, ate_esvaziar, processados):
+        try:
+            while not parar.is_set():
+                try:
+                    trabalho = processar_proximo(motor, nome)
+                except DatabaseError as exc:
+                    # Banco indisponível/travado: tenta de novo depois (o trabalho
+                    # reservado volta à fila por recuperar_abandonados)
+                    self.stderr.write(f'{nome}: erro no banco: {exc}')
+                    connection.close()
+                    if parar.wait(intervalo) or ate_esvaziar:
+                        return
+                    continue
+                if trabalho is None:
+                    if ate_esvaziar:
+                        return
+                    parar.wait(intervalo)
+                    continue
+                processados.append(trabalho.pk)
+                self.stdout.write(
+                    f'#{trabalho.pk} [{trabalho.idioma}] {trabalho.get_status_display()}'
+                    f' em {trabalho.tempos.get("total", 0):.0f} ms'
+                    + (f': {trabalho.erro}' if trabalho.erro else '')
+                )
+        finally:
+            connection.close()
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:21
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+CAMPOS_RESUMO = (
+    'primeira_data_servico', 'ultima_data_servico', 'num_lancamentos', 'num_transfers', 'categorias_ids',
+)
+
+
+def preencher_resumo(apps, schema_editor):
+    # Cálculo copiado aqui (e não importado de servicos.resumo) para a migration
+    # não mudar junto com o código atual
+    OrdemServico = apps.get_model('servicos', 'OrdemServico')
+    LancamentoServico = apps.get_model('servicos', 'LancamentoServico')
+    TransferOrdemServico = apps.get_model('servicos', 'TransferOrdemServico')
+
+    def vazio():
+        return {
+            'primeira_data_servico': None, 'ultima_data_servico': None,
+            'num_lancamentos': 0, 'num_transfers': 0, 'categorias_ids': '',
+        }
+
+    resumos = {}
+    lancamentos = LancamentoServico.objects.filter(ordem_servico__isnull=False).order_by()
+    for linha in lancamentos.values('ordem_servico_id').annotate(
+        primeira=Min('data_servico'), ultima=Max('data_servico'), total=Count('pk'),
+    ):
+        resumo = resumos.setdefault(linha['ordem_servico_id'], vazio())
+        resumo['primeira_data_servico'] = linha['primeira']
+        resumo['ultima_data_servico'] = linha['ultima']
+        resumo['num_lancamentos'] = linha['total']
+
+    categorias = {}
+    for ordem_id, categoria_id in lancamentos.values_list('ordem_servico_id', 'subcategoria__categoria_id').distinct():
+        if categoria_id is not None:
+            categorias.setdefault(ordem_id, set()).add(categoria_id)
+    for ordem_id, ids in categorias.items():
+        resumos[ordem_id]['categorias_ids'] = f",{','.join(map(str, sorted(ids)))},"
+
+    for linha in TransferOrdemServico.objects.order_by().values('ordem_servico_id').annotate(total=Count('pk')):
+        resumos.setdefault(linha['ordem_servico_id'], vazio())['num_transfers'] = linha['total']
+
+    ordens = []
+    for ordem in OrdemServico.objects.filter(pk__in=list(resumos)).only('pk'):
+        for campo, valor in resumos[ordem.pk].items():
+            setattr(ordem, campo, valor)
+        ordens.append(ordem)
+    OrdemServico.objects.bulk_update(ordens, CAMPOS_RESUMO, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('servicos', '0016_ordemservico_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordemservico',
+            name='categorias_ids',
+            field=models.CharField(blank=True, default='', editable=False, help_text='IDs das categorias dos serviços da OS no formato ,1,4,9,', max_length=255, verbose_name='Categorias dos Serviços'),
+        ),
+        migrations.AddField(
+            model_name='ordemservico',
+            name='num_lancamentos',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Qtd de Lançamentos'),
+        ),
+        migrations.AddField(
+            model_name='ordemservico',
+            name='num_transfers',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Qtd de Transfers'),
+        ),
+        migrations.AddField(
+            model_name='ordemservico',
+            name='primeira_data_servico',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, verbose_name='Primeira Data de Serviço'),
+        ),
+        migrations.AddField(
+            model_name='ordemservico',
+            name='ultima_data_servico',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, verbose_name='Última Data de Serviço'),
+        ),
+        migrations.RunPython(preencher_resumo, migrations.RunPython.noop),
+    ]
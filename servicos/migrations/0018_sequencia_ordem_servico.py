@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:27
+
+from django.db import migrations, models
+
+
+def preencher_sequencias(apps, schema_editor):
+    """Inicializa a sequência de cada ano com o maior número de OS já emitido"""
+    OrdemServico = apps.get_model('servicos', 'OrdemServico')
+    SequenciaOrdemServico = apps.get_model('servicos', 'SequenciaOrdemServico')
+    maiores = {}
+    for numero_os in OrdemServico.objects.values_list('numero_os', flat=True).iterator():
+        try:
+            ano, numero = (int(parte) for parte in numero_os.split('-', 1))
+        except (AttributeError, ValueError):
+            continue
+        maiores[ano] = max(maiores.get(ano, 0), numero)
+    SequenciaOrdemServico.objects.bulk_create([
+        SequenciaOrdemServico(ano=ano, ultimo_numero=numero)
+        for ano, numero in maiores.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('servicos', '0017_ordemservico_resumo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenciaOrdemServico',
+            fields=[
+                ('ano', models.PositiveIntegerField(primary_key=True, serialize=False, verbose_name='Ano')),
+                ('ultimo_numero', models.PositiveIntegerField(default=0, verbose_name='Último número emitido')),
+            ],
+            options={
+                'verbose_name': 'Sequência de OS',
+                'verbose_name_plural': 'Sequências de OS',
+            },
+        ),
+        migrations.RunPython(preencher_sequencias, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:05
+
+import json
+import re
+import sys
+
+from django.db import migrations, models
+
+# Formatos gravados pelo formulário antigo: '3, 5' ou '[3, 5]'
+_RE_LISTA = re.compile(r'^\s*\d+(\s*,\s*\d+)*\s*$')
+_RE_NUMERO = re.compile(r'\d+')
+
+
+def _para_lista(valor):
+    """
+    Converte o texto antigo em lista de inteiros: (lista, exata). Fora dos
+    formatos conhecidos ('3 anos', '3;5') os números são extraídos do texto e
+    ``exata`` é False, para a conversão ser conferida.
+    """
+    valor = (valor or '').strip()
+    if not valor:
+        return [], True
+    if valor.startswith('['):
+        try:
+            itens = json.loads(valor)
+            if isinstance(itens, list):
+                return [int(i) for i in itens], True
+        except (TypeError, ValueError):
+            pass
+    elif _RE_LISTA.match(valor):
+        return [int(parte) for parte in valor.split(',')], True
+    return [int(numero) for numero in _RE_NUMERO.findall(valor)], False
+
+
+def csv_para_json(apps, schema_editor):
+    LancamentoServico = apps.get_model('servicos', 'LancamentoServico')
+    alterados = []
+    inexatos = []
+    for lancamento in LancamentoServico.objects.exclude(idades_criancas='').only('pk', 'idades_criancas').iterator():
+        lancamento.idades_criancas_lista, exata = _para_lista(lancamento.idades_criancas)
+        if not exata:
+            inexatos.append((lancamento.pk, lancamento.idades_criancas, lancamento.idades_criancas_lista))
+        alterados.append(lancamento)
+    LancamentoServico.objects.bulk_update(alterados, ['idades_criancas_lista'], batch_size=500)
+
+    if inexatos:
+        # O texto original some com a coluna: registra o que foi interpretado
+        sys.stdout.write(f'\n  {len(inexatos)} lançamento(s) com idades fora do formato; confira:\n')
+        for pk, original, lista in sorted(inexatos):
+            sys.stdout.write(f'    LancamentoServico #{pk}: {original!r} → {lista}\n')
+
+
+def json_para_csv(apps, schema_editor):
+    LancamentoServico = apps.get_model('servicos', 'LancamentoServico')
+    alterados = []
+    for lancamento in LancamentoServico.objects.only('pk', 'idades_criancas_lista').iterator():
+        if lancamento.idades_criancas_lista:
+            lancamento.idades_criancas = ','.join(str(i) for i in lancamento.idades_criancas_lista)
+            alterados.append(lancamento)
+    LancamentoServico.objects.bulk_update(alterados, ['idades_criancas'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('servicos', '0018_sequencia_ordem_servico'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lancamentoservico',
+            name='idades_criancas_lista',
+            field=models.JSONField(blank=True, default=list, verbose_name='Idades das Crianças'),
+        ),
+        migrations.RunPython(csv_para_json, json_para_csv),
+        migrations.RemoveField(
+            model_name='lancamentoservico',
+            name='idades_criancas',
+        ),
+        migrations.RenameField(
+            model_name='lancamentoservico',
+            old_name='idades_criancas_lista',
+            new_name='idades_criancas',
+        ),
+        migrations.AlterField(
+            model_name='lancamentoservico',
+            name='idades_criancas',
+            field=models.JSONField(blank=True, default=list, help_text='Lista com a idade de cada criança. Ex: [3, 5, 8]', verbose_name='Idades das Crianças'),
+        ),
+    ]
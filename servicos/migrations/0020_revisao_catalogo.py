@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:39
+
+from django.db import migrations, models
+
+
+def criar_revisao(apps, schema_editor):
+    RevisaoCatalogo = apps.get_model('servicos', 'RevisaoCatalogo')
+    RevisaoCatalogo.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('servicos', '0019_idades_criancas_json'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevisaoCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('revisao', models.PositiveBigIntegerField(default=1, verbose_name='Revisão')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Revisão do catálogo',
+                'verbose_name_plural': 'Revisão do catálogo',
+            },
+        ),
+        migrations.RunPython(criar_revisao, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('servicos', '0020_revisao_catalogo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SegmentoTraducao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idioma', models.CharField(max_length=5, verbose_name='Idioma')),
+                ('hash', models.CharField(max_length=64, verbose_name='Hash')),
+                ('origem', models.TextField(verbose_name='Segmento original')),
+                ('traducao', models.TextField(verbose_name='Tradução')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+            ],
+            options={
+                'verbose_name': 'Segmento de tradução',
+                'verbose_name_plural': 'Memória de tradução',
+                'constraints': [models.UniqueConstraint(fields=('idioma', 'hash'), name='segmento_traducao_idioma_hash')],
+            },
+        ),
+    ]
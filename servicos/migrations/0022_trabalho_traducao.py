@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('servicos', '0021_memoria_traducao'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabalhoTraducao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(db_index=True, max_length=64, verbose_name='Chave')),
+                ('idioma', models.CharField(max_length=5, verbose_name='Idioma')),
+                ('texto', models.TextField(verbose_name='Texto original')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluido', 'Concluído'), ('erro', 'Erro')], default='pendente', max_length=20, verbose_name='Status')),
+                ('resultado', models.TextField(blank=True, verbose_name='Tradução')),
+                ('erro', models.TextField(blank=True, verbose_name='Erro')),
+                ('tempos', models.JSONField(blank=True, default=dict, verbose_name='Tempos (ms)')),
+                ('segmentos', models.JSONField(blank=True, default=dict, verbose_name='Segmentos')),
+                ('solicitacoes', models.PositiveIntegerField(default=1, verbose_name='Solicitações')),
+                ('tentativas', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('trabalhador', models.CharField(blank=True, max_length=100, verbose_name='Trabalhador')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('concluido_em', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='traducoes_solicitadas', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Trabalho de tradução',
+                'verbose_name_plural': 'Trabalhos de tradução',
+                'ordering': ['-criado_em'],
+                'indexes': [models.Index(fields=['status', 'id'], name='trabalho_traducao_fila')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['pendente', 'processando'])), fields=('chave',), name='trabalho_traducao_em_andamento')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('servicos', '0022_trabalho_traducao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabalhotraducao',
+            name='traducoes',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Traduções (lote)'),
+        ),
+        migrations.AlterField(
+            model_name='trabalhotraducao',
+            name='idioma',
+            field=models.CharField(max_length=20, verbose_name='Idioma(s)'),
+        ),
+    ]
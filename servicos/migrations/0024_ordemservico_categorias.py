@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+def preencher_categorias(apps, schema_editor):
+    # Recalculado a partir dos lançamentos (não do texto ,1,4,9,, que podia estar truncado)
+    OrdemServico = apps.get_model('servicos', 'OrdemServico')
+    LancamentoServico = apps.get_model('servicos', 'LancamentoServico')
+    Ligacao = OrdemServico.categorias.through
+
+    pares = (
+        LancamentoServico.objects.filter(ordem_servico__isnull=False, subcategoria__isnull=False)
+        .order_by()
+        .values_list('ordem_servico_id', 'subcategoria__categoria_id')
+        .distinct()
+    )
+    Ligacao.objects.bulk_create(
+        (Ligacao(ordemservico_id=ordem_id, categoria_id=categoria_id) for ordem_id, categoria_id in pares),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('servicos', '0023_trabalho_traducao_lote'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordemservico',
+            name='categorias',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='+', to='servicos.categoria', verbose_name='Categorias dos Serviços'),
+        ),
+        migrations.RunPython(preencher_categorias, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='ordemservico',
+            name='categorias_ids',
+        ),
+    ]
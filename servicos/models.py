@@ -2,6 +2,8 @@
 Models para gerenciamento de serviços turísticos
 """
 from django.db import models
+from django.db.models import Count, F, OuterRef, Prefetch, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 from django.utils import timezone
@@ -209,9 +211,205 @@ class Cliente(models.Model):
         return self.nome
 
 
+def _subquery_por_ordem(model, expressao):
+    """Subquery agregada por OS, correlacionada com a OS externa"""
+    return Subquery(
+        model.objects.filter(ordem_servico=OuterRef('pk'))
+        .order_by()
+        .values('ordem_servico')
+        .annotate(resultado=expressao)
+        .values('resultado')
+    )
+
+
+class SequenciaOrdemServico(models.Model):
+    """
+    Contador anual usado para numerar as Ordens de Serviço (AAAA-NNNNN).
+
+    Incrementado de forma atômica por servicos/numeracao.py; não editar à mão.
+    """
+
+    ano = models.PositiveIntegerField('Ano', primary_key=True)
+    ultimo_numero = models.PositiveIntegerField('Último número emitido', default=0)
+
+    class Meta:
+        verbose_name = 'Sequência de OS'
+        verbose_name_plural = 'Sequências de OS'
+
+    def __str__(self):
+        return f"{self.ano}: {self.ultimo_numero}"
+
+
+class RevisaoCatalogo(models.Model):
+    """
+    Revisão do catálogo de serviços (categorias, serviços, tipos de meia e transfers).
+
+    Linha única, incrementada pelos signals a cada alteração do catálogo
+    (servicos/catalog.py); identifica a versão do catalog.json.
+    """
+
+    revisao = models.PositiveBigIntegerField('Revisão', default=1)
+    atualizado_em = models.DateTimeField('Atualizado em', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Revisão do catálogo'
+        verbose_name_plural = 'Revisão do catálogo'
+
+    def __str__(self):
+        return f"Catálogo rev. {self.revisao}"
+
+
+class SegmentoTraducao(models.Model):
+    """
+    Memória de tradução: um segmento (linha normalizada do roteiro) já traduzido.
+
+    ``hash`` é o SHA-256 do segmento normalizado, com placeholders renumerados
+    (servicos/translation.py); a busca é sempre por (idioma, hash).
+    """
+
+    idioma = models.CharField('Idioma', max_length=5)
+    hash = models.CharField('Hash', max_length=64)
+    origem = models.TextField('Segmento original')
+    traducao = models.TextField('Tradução')
+    criado_em = models.DateTimeField('Criado em', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Segmento de tradução'
+        verbose_name_plural = 'Memória de tradução'
+        constraints = [
+            models.UniqueConstraint(fields=['idioma', 'hash'], name='segmento_traducao_idioma_hash'),
+        ]
+
+    def __str__(self):
+        return f"[{self.idioma}] {self.origem[:60]}"
+
+
+class TrabalhoTraducao(models.Model):
+    """
+    Tradução de roteiro na fila, executada fora dos workers web.
+
+    Criada por ``translate_text``/``translate_batch`` e processada pelo
+    comando ``processar_traducoes`` (servicos/translation_jobs.py). Pedidos
+    idênticos (mesmo texto e idiomas) enquanto o trabalho está pendente ou em
+    processamento reaproveitam o mesmo registro.
+
+    Trabalhos de lote têm vários idiomas em ``idioma`` (separados por
+    vírgula) e o resultado de cada um em ``traducoes``.
+    """
+
+    PENDENTE = 'pendente'
+    PROCESSANDO = 'processando'
+    CONCLUIDO = 'concluido'
+    ERRO = 'erro'
+    STATUS_CHOICES = [
+        (PENDENTE, 'Pendente'),
+        (PROCESSANDO, 'Processando'),
+        (CONCLUIDO, 'Concluído'),
+        (ERRO, 'Erro'),
+    ]
+    EM_ANDAMENTO = (PENDENTE, PROCESSANDO)
+
+    chave = models.CharField('Chave', max_length=64, db_index=True)
+    idioma = models.CharField('Idioma(s)', max_length=20)
+    texto = models.TextField('Texto original')
+    status = models.CharField('Status', max_length=20, choices=STATUS_CHOICES, default=PENDENTE)
+    resultado = models.TextField('Tradução', blank=True)
+    traducoes = models.JSONField('Traduções (lote)', default=dict, blank=True)
+    erro = models.TextField('Erro', blank=True)
+    tempos = models.JSONField('Tempos (ms)', default=dict, blank=True)
+    segmentos = models.JSONField('Segmentos', default=dict, blank=True)
+    solicitacoes = models.PositiveIntegerField('Solicitações', default=1)
+    tentativas = models.PositiveSmallIntegerField('Tentativas', default=0)
+    trabalhador = models.CharField('Trabalhador', max_length=100, blank=True)
+    solicitado_por = models.ForeignKey(
+        'auth.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='traducoes_solicitadas',
+        verbose_name='Solicitado por'
+    )
+    criado_em = models.DateTimeField('Criado em', auto_now_add=True)
+    iniciado_em = models.DateTimeField('Iniciado em', null=True, blank=True)
+    concluido_em = models.DateTimeField('Concluído em', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Trabalho de tradução'
+        verbose_name_plural = 'Trabalhos de tradução'
+        ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['status', 'id'], name='trabalho_traducao_fila'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['chave'],
+                condition=models.Q(status__in=['pendente', 'processando']),
+                name='trabalho_traducao_em_andamento',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Tradução #{self.pk} ({self.idioma}, {self.get_status_display()})"
+
+    @property
+    def idiomas(self):
+        return self.idioma.split(',')
+
+    @property
+    def lote(self):
+        return ',' in self.idioma
+
+
+class OrdemServicoQuerySet(models.QuerySet):
+    """QuerySet de Ordens de Serviço com anotações para a listagem"""
+
+    def with_list_annotations(self, incluir_transfers=True):
+        """
+        Anota contagens e totais por OS e pré-carrega lançamentos/transfers,
+        de forma que a listagem execute um número fixo de queries
+        independente da quantidade de OS.
+        """
+        zero_decimal = Value(Decimal('0.00'), output_field=models.DecimalField(max_digits=10, decimal_places=2))
+        qs = self.select_related('criado_por', 'cliente').annotate(
+            qtd_lancamentos=Coalesce(_subquery_por_ordem(LancamentoServico, Count('pk')), 0),
+        ).prefetch_related(
+            Prefetch(
+                'lancamentos',
+                queryset=LancamentoServico.objects.select_related('categoria', 'subcategoria'),
+            ),
+        )
+
+        if not incluir_transfers:
+            return qs.annotate(
+                qtd_transfers=Value(0),
+                valor_transfers=zero_decimal,
+                total_itens=F('qtd_lancamentos'),
+            )
+
+        return qs.annotate(
+            qtd_transfers=Coalesce(_subquery_por_ordem(TransferOrdemServico, Count('pk')), 0),
+            valor_transfers=Coalesce(_subquery_por_ordem(TransferOrdemServico, Sum('valor')), zero_decimal),
+            total_itens=F('qtd_lancamentos') + F('qtd_transfers'),
+        ).prefetch_related(
+            Prefetch(
+                'transfers',
+                queryset=TransferOrdemServico.objects.select_related('transfer'),
+            ),
+        )
+
+    def list_totals(self, incluir_transfers=True):
+        """Totais da listagem (quantidade de OS, itens e valor) em uma única query"""
+        totais = self.with_list_annotations(incluir_transfers).order_by().aggregate(
+            total_ordens=Count('pk'),
+            total_servicos=Coalesce(Sum('total_itens'), 0),
+            valor_total=Coalesce(Sum('valor_total'), Decimal('0.00'), output_field=models.DecimalField(max_digits=14, decimal_places=2)),
+        )
+        return totais
+
+
 class OrdemServico(models.Model):
     """Ordem de Serviço - agrupa múltiplos lançamentos/serviços"""
-    
+
     STATUS_CHOICES = [
         ('orcamento', 'Orçamento'),
         ('confirmado', 'Confirmado'),
@@ -249,6 +447,20 @@ class OrdemServico(models.Model):
         default=Decimal('0.00')
     )
     
+    # Resumo desnormalizado dos itens (mantido por servicos/signals.py)
+    primeira_data_servico = models.DateField('Primeira Data de Serviço', null=True, blank=True, db_index=True, editable=False)
+    ultima_data_servico = models.DateField('Última Data de Serviço', null=True, blank=True, db_index=True, editable=False)
+    num_lancamentos = models.PositiveIntegerField('Qtd de Lançamentos', default=0, editable=False)
+    num_transfers = models.PositiveIntegerField('Qtd de Transfers', default=0, editable=False)
+    # Tabela de ligação (ordem, categoria): o filtro por categoria usa o índice de categoria_id
+    categorias = models.ManyToManyField(
+        Categoria,
+        related_name='+',
+        blank=True,
+        editable=False,
+        verbose_name='Categorias dos Serviços',
+    )
+    
     criado_por = models.ForeignKey(
         'auth.User',
         on_delete=models.SET_NULL,
@@ -259,10 +471,16 @@ class OrdemServico(models.Model):
     )
     atualizado_em = models.DateTimeField('Atualizado em', auto_now=True)
     
+    objects = OrdemServicoQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Ordem de Serviço'
         verbose_name_plural = 'Ordens de Serviço'
         ordering = ['-data_criacao']
+        indexes = [
+            # Paginação por keyset da listagem: (-data_criacao, -id)
+            models.Index(fields=['data_criacao', 'id']),
+        ]
     
     def __str__(self):
         return f"OS {self.numero_os} - {self.cliente.nome if self.cliente else 'Sem cliente'}"
@@ -270,98 +488,74 @@ class OrdemServico(models.Model):
     def save(self, *args, **kwargs):
         """Gera número da OS automaticamente"""
         if not self.numero_os:
-            # Gerar número baseado no ano e sequencial
-            ano = timezone.now().year
-            ultima_os = OrdemServico.objects.filter(
-                numero_os__startswith=f'{ano}'
-            ).order_by('-numero_os').first()
-            
-            if ultima_os and ultima_os.numero_os:
-                try:
-                    ultimo_numero = int(ultima_os.numero_os.split('-')[1])
-                    proximo_numero = ultimo_numero + 1
-                except (IndexError, ValueError):
-                    proximo_numero = 1
-            else:
-                proximo_numero = 1
-            
-            self.numero_os = f'{ano}-{proximo_numero:05d}'
+            # Número sequencial por ano, alocado atomicamente (servicos/numeracao.py)
+            from .numeracao import proximo_numero_os
+            self.numero_os = proximo_numero_os()
+        
+        # O resumo dos itens é mantido pelos signals dos lançamentos/transfers;
+        # um save() completo de uma instância carregada antes não deve sobrescrevê-lo.
+        # Campos do resumo só são gravados se o chamador mudou o valor carregado
+        # (ou se pediu em update_fields)
+        if not self._state.adding and not args and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            from .resumo import CAMPOS_RESUMO
+            carregado = getattr(self, '_resumo_carregado', {})
+            mantidos = {
+                campo for campo in CAMPOS_RESUMO
+                if campo not in carregado or getattr(self, campo) == carregado[campo]
+            }
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in mantidos
+            ]
         
         super().save(*args, **kwargs)
+        self._guardar_resumo()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._guardar_resumo()
+        return instancia
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._guardar_resumo()
+    
+    def _guardar_resumo(self):
+        """Valores do resumo como lidos/gravados, para o save() saber se foram alterados"""
+        from .resumo import CAMPOS_RESUMO
+        self._resumo_carregado = {campo: self.__dict__[campo] for campo in CAMPOS_RESUMO if campo in self.__dict__}
     
     def calcular_total(self):
         """Calcula o valor total somando lançamentos e transfers"""
-        total = Decimal('0.00')
-        for lancamento in self.lancamentos.all():
-            total += lancamento.valor_total
-        for transfer in self.transfers.all():
-            total += transfer.valor
-        self.valor_total = total
+        from .pricing import total_ordem
+        self.valor_total = total_ordem(self)
         self.save(update_fields=['valor_total'])
     
     def gerar_roteiro(self):
-        """Gera o roteiro formatado a partir dos lançamentos"""
+        """Gera o roteiro formatado a partir dos lançamentos (ver servicos/roteiro.py)"""
         if self.roteiro:
             # Se já tem roteiro editado, não sobrescreve
             return self.roteiro
-        
-        roteiro_parts = []
-        
-        # Agrupar lançamentos por data
-        lancamentos_por_data = {}
-        for lancamento in self.lancamentos.select_related('subcategoria').order_by('data_servico'):
-            data = lancamento.data_servico
-            if data not in lancamentos_por_data:
-                lancamentos_por_data[data] = []
-            lancamentos_por_data[data].append(lancamento)
-        
-        # Gerar roteiro por data
-        for data, lancamentos in lancamentos_por_data.items():
-            dia_semana = data.strftime('%A').upper()
-            data_formatada = data.strftime('%d/%m')
-            
-            roteiro_parts.append(f"{dia_semana} {data_formatada}\n")
-            
-            for lancamento in lancamentos:
-                servico = lancamento.subcategoria
-                roteiro_parts.append(f"\n{servico.nome}:")
-                
-                # Adicionar descrição se houver
-                if servico.descricao:
-                    descricao_lines = servico.descricao.strip().split('\n')
-                    for line in descricao_lines:
-                        if line.strip():
-                            roteiro_parts.append(f"- {line.strip()}")
-                
-                # Adicionar valor se houver
-                if lancamento.valor_total > 0:
-                    roteiro_parts.append(f"R$ {lancamento.valor_total:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'))
-                
-                roteiro_parts.append("")  # Linha em branco
-            
-            roteiro_parts.append("\n")
-        
-        self.roteiro = "\n".join(roteiro_parts)
+
+        from .roteiro import renderizar
+        self.roteiro = renderizar(self, 'texto')
         return self.roteiro
-    
+
     def gerar_texto_whatsapp(self):
         """Gera texto formatado para WhatsApp"""
-        texto = f"*ROTEIRO - OS {self.numero_os}*\n"
-        texto += f"*Cliente:* {self.cliente.nome}\n"
-        
+        from .roteiro import formatar_moeda_milhar
+
+        partes = [f"*ROTEIRO - OS {self.numero_os}*\n", f"*Cliente:* {self.cliente.nome}\n"]
         if self.data_inicio and self.data_fim:
-            texto += f"*Período:* {self.data_inicio.strftime('%d/%m/%Y')} a {self.data_fim.strftime('%d/%m/%Y')}\n"
-        
-        texto += "\n" + "="*15 + "\n\n"
-        
+            partes.append(f"*Período:* {self.data_inicio.strftime('%d/%m/%Y')} a {self.data_fim.strftime('%d/%m/%Y')}\n")
+
         # Usar roteiro editado ou gerar novo
-        roteiro = self.roteiro if self.roteiro else self.gerar_roteiro()
-        texto += roteiro
-        
-        texto += "\n" + "="*15 + "\n"
-        texto += f"\n*VALOR TOTAL: R$ {self.valor_total:,.2f}*".replace(',', 'X').replace('.', ',').replace('X', '.')
-        
-        return texto
+        partes.append("\n" + "="*15 + "\n\n")
+        partes.append(self.roteiro if self.roteiro else self.gerar_roteiro())
+        partes.append("\n" + "="*15 + "\n")
+        partes.append(f"\n*VALOR TOTAL: {formatar_moeda_milhar(self.valor_total)}*")
+        return ''.join(partes)
 
 
 
@@ -460,12 +654,12 @@ class LancamentoServico(models.Model):
         validators=[MinValueValidator(0)]
     )
     
-    # Idades das crianças (separadas por vírgula)
-    idades_criancas = models.CharField(
+    # Idades das crianças (lista de inteiros, uma por criança)
+    idades_criancas = models.JSONField(
         'Idades das Crianças',
-        max_length=200,
+        default=list,
         blank=True,
-        help_text='Informe as idades separadas por vírgula. Ex: 3, 5, 8'
+        help_text='Lista com a idade de cada criança. Ex: [3, 5, 8]'
     )
     
     # Tipo de meia entrada (obrigatório apenas se qtd_meia > 0)
@@ -553,46 +747,25 @@ class LancamentoServico(models.Model):
         return f"{self.subcategoria.nome} - {self.data_servico.strftime('%d/%m/%Y')}"
     
     def get_idades_lista(self):
-        """Converte o campo idades_criancas (string CSV) para lista de inteiros"""
-        if not self.idades_criancas:
-            return []
-        
-        if isinstance(self.idades_criancas, list):
-            return [int(i) if isinstance(i, str) else i for i in self.idades_criancas]
-        
-        # Se for string, separar por vírgula e converter para int
-        try:
-            return [int(idade.strip()) for idade in self.idades_criancas.split(',') if idade.strip()]
-        except (ValueError, AttributeError):
-            return []
+        """Idades das crianças como lista de inteiros"""
+        from .pricing import parse_idades
+        return list(parse_idades(self.idades_criancas))
     
     @property
     def total_pax(self):
         """Total de passageiros"""
         return self.qtd_inteira + self.qtd_meia + self.qtd_infantil
     
+    @property
+    def precificacao(self):
+        """Classificação das crianças e valor total (ver servicos/pricing.py)"""
+        from .pricing import calcular_item
+        return calcular_item(self)
+    
     @property
     def qtd_infantil_isentas(self):
         """Retorna quantas crianças estão isentas por idade"""
-        idades = self.get_idades_lista()
-        if not idades:
-            return 0
-        
-        if not self.subcategoria:
-            return 0
-        
-        idade_min = self.subcategoria.idade_isencao_min
-        idade_max = self.subcategoria.idade_isencao_max
-        
-        if idade_min is None or idade_max is None:
-            return 0
-        
-        count = 0
-        for idade in idades:
-            if idade_min <= idade <= idade_max:
-                count += 1
-        
-        return count
+        return self.precificacao.isentas
     
     @property
     def qtd_infantil_pagas(self):
@@ -607,39 +780,7 @@ class LancamentoServico(models.Model):
         1. Não estão isentas E
         2. Estão fora da faixa infantil OU o serviço não permite infantil OU não aceita meia
         """
-        if not self.subcategoria:
-            return 0
-        
-        # Se não aceita meia entrada, todas as crianças não isentas pagam inteira
-        if not self.subcategoria.aceita_meia_entrada:
-            return self.qtd_infantil_pagas
-        
-        # Se aceita meia mas não permite infantil, todas as crianças não isentas pagam inteira
-        if not self.subcategoria.permite_infantil:
-            return self.qtd_infantil_pagas
-        
-        # Contar crianças fora da faixa infantil
-        count = 0
-        idades = self.get_idades_lista()
-        
-        # Crianças isentas
-        idade_isencao_min = self.subcategoria.idade_isencao_min
-        idade_isencao_max = self.subcategoria.idade_isencao_max
-        
-        # Faixa infantil
-        idade_infantil_min = self.subcategoria.idade_minima_infantil
-        idade_infantil_max = self.subcategoria.idade_maxima_infantil
-        
-        for idade in idades:
-            # Pular se está isenta
-            if self.subcategoria.possui_isencao and idade_isencao_min <= idade <= idade_isencao_max:
-                continue
-            
-            # Se não está na faixa infantil, paga inteira
-            if idade < idade_infantil_min or idade > idade_infantil_max:
-                count += 1
-        
-        return count
+        return self.precificacao.pagam_inteira
     
     @property
     def qtd_infantil_pagam_infantil(self):
@@ -650,35 +791,7 @@ class LancamentoServico(models.Model):
         2. Estão dentro da faixa infantil E
         3. O serviço permite infantil E aceita meia
         """
-        if not self.subcategoria:
-            return 0
-        
-        # Se não aceita meia ou não permite infantil, ninguém paga infantil
-        if not self.subcategoria.aceita_meia_entrada or not self.subcategoria.permite_infantil:
-            return 0
-        
-        # Contar crianças dentro da faixa infantil
-        count = 0
-        idades = self.get_idades_lista()
-        
-        # Crianças isentas
-        idade_isencao_min = self.subcategoria.idade_isencao_min
-        idade_isencao_max = self.subcategoria.idade_isencao_max
-        
-        # Faixa infantil
-        idade_infantil_min = self.subcategoria.idade_minima_infantil
-        idade_infantil_max = self.subcategoria.idade_maxima_infantil
-        
-        for idade in idades:
-            # Pular se está isenta
-            if self.subcategoria.possui_isencao and idade_isencao_min <= idade <= idade_isencao_max:
-                continue
-            
-            # Se está na faixa infantil, paga infantil
-            if idade_infantil_min <= idade <= idade_infantil_max:
-                count += 1
-        
-        return count
+        return self.precificacao.pagam_infantil
     
     @property
     def valor_total(self):
@@ -688,26 +801,9 @@ class LancamentoServico(models.Model):
         1. ISENTAS (R$ 0,00) - dentro da faixa de isenção
         2. INFANTIL - dentro da faixa infantil (se serviço permite infantil e aceita meia)
         3. INTEIRA - fora das faixas acima ou quando serviço não permite infantil/meia
-        Inclui valores de transfers (ida + volta)
+        Transfers são somados no total da OrdemServico, não aqui.
         """
-        total = Decimal('0.00')
-        
-        # Adultos inteira
-        total += self.qtd_inteira * self.valor_unit_inteira
-        
-        # Adultos meia
-        total += self.qtd_meia * self.valor_unit_meia
-        
-        # Crianças que pagam INFANTIL
-        total += self.qtd_infantil_pagam_infantil * self.valor_unit_infantil
-        
-        # Crianças que pagam INTEIRA
-        total += self.qtd_infantil_pagam_inteira * self.valor_unit_inteira
-        
-        # Crianças isentas não somam (R$ 0,00)
-        # Transfers são somados no total da OrdemServico, não aqui.
-        
-        return total
+        return self.precificacao.valor_total
     
     def save(self, *args, **kwargs):
         """Sobrescreve save para capturar valores unitários da subcategoria"""
@@ -815,7 +911,7 @@ Aguardamos você! 🎉"""
                     
                     # Validar idade mínima do serviço
                     if self.subcategoria and self.subcategoria.tem_idade_minima and self.subcategoria.idade_minima > 0:
-                        for idade in self.idades_criancas:
+                        for idade in idades:
                             if idade < self.subcategoria.idade_minima:
                                 errors['__all__'] = f'Este serviço exige idade mínima de {self.subcategoria.idade_minima} anos. Criança com {idade} anos não atende o requisito.'
                                 break
@@ -0,0 +1,130 @@
+"""
+Numeração das Ordens de Serviço (AAAA-NNNNN).
+
+Cada ano tem uma linha em SequenciaOrdemServico com o último número emitido.
+O incremento é feito de forma atômica no banco, sem varrer as OS existentes:
+
+- PostgreSQL: ``SELECT ... FOR UPDATE`` na linha do ano e incremento;
+- SQLite: ``UPDATE ... RETURNING`` (uma única instrução);
+- demais bancos: ``UPDATE`` com F() seguido da leitura na mesma transação.
+
+Números são únicos mas podem ter lacunas (ex.: bloco reservado por uma
+importação e não usado por inteiro); nunca são reaproveitados.
+"""
+import time
+
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OrdemServico, SequenciaOrdemServico
+
+# Tentativas quando o SQLite reporta a tabela bloqueada por outro escritor
+TENTATIVAS = 50
+ESPERA_INICIAL = 0.005
+
+
+def formatar_numero_os(ano, numero):
+    return f'{ano}-{numero:05d}'
+
+
+def _maior_numero_existente(ano):
+    """Maior número já usado no ano (só consultado ao criar a sequência do ano)"""
+    ultima_os = (OrdemServico.objects
+                 .filter(numero_os__startswith=f'{ano}-')
+                 .order_by('-numero_os')
+                 .values_list('numero_os', flat=True)
+                 .first())
+    if not ultima_os:
+        return 0
+    try:
+        return int(ultima_os.split('-')[1])
+    except (IndexError, ValueError):
+        return 0
+
+
+def _incrementar(ano, quantidade):
+    """Soma ``quantidade`` ao contador do ano e retorna o novo valor (None se não existe)"""
+    if connection.vendor == 'postgresql':
+        sequencia = SequenciaOrdemServico.objects.select_for_update().filter(ano=ano).first()
+        if sequencia is None:
+            return None
+        sequencia.ultimo_numero += quantidade
+        sequencia.save(update_fields=['ultimo_numero'])
+        return sequencia.ultimo_numero
+
+    if connection.vendor == 'sqlite' and connection.features.can_return_columns_from_insert:
+        # can_return_columns_from_insert indica SQLite >= 3.35 (suporte a RETURNING)
+        tabela = connection.ops.quote_name(SequenciaOrdemServico._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {tabela} SET ultimo_numero = ultimo_numero + %s WHERE ano = %s RETURNING ultimo_numero',
+                [quantidade, ano],
+            )
+            linha = cursor.fetchone()
+        return linha[0] if linha else None
+
+    atualizadas = (SequenciaOrdemServico.objects
+                   .filter(ano=ano)
+                   .update(ultimo_numero=F('ultimo_numero') + quantidade))
+    if not atualizadas:
+        return None
+    return SequenciaOrdemServico.objects.filter(ano=ano).values_list('ultimo_numero', flat=True).get()
+
+
+def _tabela_bloqueada(erro):
+    mensagem = str(erro).lower()
+    return connection.vendor == 'sqlite' and 'locked' in mensagem
+
+
+def reservar_numeros(quantidade=1, ano=None):
+    """
+    Reserva ``quantidade`` números consecutivos do ano e retorna o primeiro.
+
+    Dentro de uma transação maior (ex.: gravação da OS) o número volta para a
+    sequência se a transação for desfeita; no PostgreSQL a linha do ano fica
+    bloqueada até o commit, serializando apenas a alocação.
+    """
+    if quantidade < 1:
+        raise ValueError('quantidade deve ser maior que zero')
+    ano = ano or timezone.now().year
+
+    espera = ESPERA_INICIAL
+    for tentativa in range(TENTATIVAS):
+        try:
+            with transaction.atomic():
+                ultimo = _incrementar(ano, quantidade)
+                if ultimo is None:
+                    # Primeira OS do ano: cria a sequência a partir do que já existe
+                    ultimo = SequenciaOrdemServico.objects.create(
+                        ano=ano,
+                        ultimo_numero=_maior_numero_existente(ano) + quantidade,
+                    ).ultimo_numero
+            return ultimo - quantidade + 1
+        except IntegrityError:
+            # Outro processo criou a sequência do ano ao mesmo tempo: incrementa a dele
+            continue
+        except OperationalError as erro:
+            if not _tabela_bloqueada(erro) or tentativa == TENTATIVAS - 1:
+                raise
+            time.sleep(espera)
+            espera = min(espera * 2, 0.2)
+    raise OperationalError(f'Não foi possível reservar número de OS para {ano}')
+
+
+def proximo_numero_os(ano=None):
+    """Próximo número de OS formatado (ex.: '2025-00042')"""
+    ano = ano or timezone.now().year
+    return formatar_numero_os(ano, reservar_numeros(1, ano))
+
+
+def reservar_bloco_os(quantidade, ano=None):
+    """
+    Reserva um bloco de números com uma única operação na sequência.
+
+    Para importações em lote: os números são atribuídos às OS antes do
+    bulk_create. Números do bloco que não forem usados ficam como lacuna.
+    """
+    ano = ano or timezone.now().year
+    primeiro = reservar_numeros(quantidade, ano)
+    return [formatar_numero_os(ano, numero) for numero in range(primeiro, primeiro + quantidade)]
@@ -0,0 +1,180 @@
+"""
+Motor de precificação dos lançamentos de serviço.
+
+Centraliza as regras de cobrança por idade que antes estavam espalhadas nas
+properties de LancamentoServico (cada uma reprocessava ``idades_criancas`` e
+percorria as faixas do serviço de novo). Aqui as idades são lidas uma vez e
+cada criança é classificada em uma única passada:
+
+- ISENTA: dentro da faixa de isenção do serviço (R$ 0,00);
+- INFANTIL: dentro da faixa infantil, se o serviço permite infantil e aceita meia;
+- INTEIRA: demais casos.
+
+As regras de cada serviço (SubCategoria) são extraídas uma única vez por
+lote. Use ``calcular_lote`` / ``totais_por_ordem`` com lançamentos carregados
+com ``select_related('subcategoria')``.
+"""
+from decimal import Decimal
+
+ZERO = Decimal('0.00')
+
+
+def parse_idades(valor):
+    """
+    Normaliza idades_criancas em tupla de inteiros; inválido → ().
+
+    O campo guarda uma lista JSON; texto CSV ("3, 5") ainda é aceito para
+    payloads e dados antigos.
+    """
+    if not valor:
+        return ()
+    try:
+        if isinstance(valor, (list, tuple)):
+            return tuple(int(i) if isinstance(i, str) else i for i in valor)
+        return tuple(int(idade.strip()) for idade in valor.split(',') if idade.strip())
+    except (ValueError, TypeError, AttributeError):
+        return ()
+
+
+class RegrasIdade:
+    """Faixas etárias e flags de cobrança de um serviço, já extraídas do model"""
+
+    __slots__ = (
+        'aceita_meia', 'permite_infantil', 'possui_isencao',
+        'isencao_min', 'isencao_max', 'infantil_min', 'infantil_max',
+    )
+
+    def __init__(self, subcategoria):
+        self.aceita_meia = subcategoria.aceita_meia_entrada
+        self.permite_infantil = subcategoria.permite_infantil
+        self.possui_isencao = subcategoria.possui_isencao
+        self.isencao_min = subcategoria.idade_isencao_min
+        self.isencao_max = subcategoria.idade_isencao_max
+        self.infantil_min = subcategoria.idade_minima_infantil
+        self.infantil_max = subcategoria.idade_maxima_infantil
+
+    @property
+    def cobra_infantil(self):
+        return self.aceita_meia and self.permite_infantil
+
+
+class Precificacao:
+    """Resultado do cálculo de um lançamento"""
+
+    __slots__ = ('isentas', 'pagam_infantil', 'pagam_inteira', 'valor_total')
+
+    def __init__(self, isentas=0, pagam_infantil=0, pagam_inteira=0, valor_total=ZERO):
+        self.isentas = isentas
+        self.pagam_infantil = pagam_infantil
+        self.pagam_inteira = pagam_inteira
+        self.valor_total = valor_total
+
+
+def classificar_criancas(idades, qtd_infantil, regras):
+    """
+    Classifica as crianças em uma passada; retorna (isentas, pagam_infantil, pagam_inteira).
+
+    Mantém exatamente as regras históricas do model:
+    - ``isentas`` considera a faixa de isenção mesmo sem ``possui_isencao``;
+    - se o serviço não cobra infantil, todas as não isentas pagam inteira
+      (inclusive as sem idade informada);
+    - caso contrário só as crianças com idade informada são classificadas.
+    """
+    if regras is None:
+        return 0, 0, 0
+
+    isencao_min, isencao_max = regras.isencao_min, regras.isencao_max
+    infantil_min, infantil_max = regras.infantil_min, regras.infantil_max
+    faixa_isencao = isencao_min is not None and isencao_max is not None
+    possui_isencao = regras.possui_isencao
+
+    isentas = pagam_infantil = pagam_inteira = 0
+    for idade in idades:
+        na_isencao = faixa_isencao and isencao_min <= idade <= isencao_max
+        if na_isencao:
+            isentas += 1
+            if possui_isencao:
+                continue
+        if infantil_min <= idade <= infantil_max:
+            pagam_infantil += 1
+        else:
+            pagam_inteira += 1
+
+    if not regras.cobra_infantil:
+        return isentas, 0, qtd_infantil - isentas
+    return isentas, pagam_infantil, pagam_inteira
+
+
+def calcular_item(lancamento, regras=None, idades=None):
+    """Calcula um lançamento; ``regras``/``idades`` podem vir pré-processados do lote"""
+    if regras is None and lancamento.subcategoria_id is not None:
+        regras = RegrasIdade(lancamento.subcategoria)
+    if idades is None:
+        idades = parse_idades(lancamento.idades_criancas)
+
+    isentas, pagam_infantil, pagam_inteira = classificar_criancas(idades, lancamento.qtd_infantil, regras)
+    valor_total = (
+        (lancamento.qtd_inteira + pagam_inteira) * lancamento.valor_unit_inteira
+        + lancamento.qtd_meia * lancamento.valor_unit_meia
+        + pagam_infantil * lancamento.valor_unit_infantil
+        + ZERO
+    )
+    return Precificacao(isentas, pagam_infantil, pagam_inteira, valor_total)
+
+
+def calcular_lote(lancamentos):
+    """
+    Calcula vários lançamentos de uma vez.
+
+    As regras de cada serviço são extraídas uma única vez e a classificação
+    das crianças é reaproveitada entre lançamentos com o mesmo serviço, idades
+    e quantidade infantil (o caso comum em grupos e pacotes).
+
+    Retorna a lista de Precificacao na mesma ordem da entrada.
+    """
+    regras_por_servico = {}
+    classificacoes = {}
+    resultados = []
+    for lancamento in lancamentos:
+        subcategoria_id = lancamento.subcategoria_id
+        idades = lancamento.idades_criancas
+        qtd_infantil = lancamento.qtd_infantil
+
+        chave = (subcategoria_id, tuple(idades) if isinstance(idades, list) else idades, qtd_infantil)
+        classificacao = classificacoes.get(chave)
+        if classificacao is None:
+            regras = regras_por_servico.get(subcategoria_id)
+            if regras is None and subcategoria_id is not None:
+                regras = regras_por_servico[subcategoria_id] = RegrasIdade(lancamento.subcategoria)
+            classificacao = classificacoes[chave] = classificar_criancas(
+                parse_idades(idades), qtd_infantil, regras)
+        isentas, pagam_infantil, pagam_inteira = classificacao
+
+        valor_total = (
+            (lancamento.qtd_inteira + pagam_inteira) * lancamento.valor_unit_inteira
+            + lancamento.qtd_meia * lancamento.valor_unit_meia
+            + pagam_infantil * lancamento.valor_unit_infantil
+            + ZERO
+        )
+        resultados.append(Precificacao(isentas, pagam_infantil, pagam_inteira, valor_total))
+    return resultados
+
+
+def totais_por_ordem(lancamentos):
+    """Soma os lançamentos por OS: {ordem_servico_id: Decimal}"""
+    lancamentos = list(lancamentos)
+    totais = {}
+    for lancamento, resultado in zip(lancamentos, calcular_lote(lancamentos)):
+        ordem_id = lancamento.ordem_servico_id
+        totais[ordem_id] = totais.get(ordem_id, ZERO) + resultado.valor_total
+    return totais
+
+
+def total_ordem(ordem):
+    """Total da OS (lançamentos + transfers) com duas queries"""
+    total = ZERO
+    for resultado in calcular_lote(ordem.lancamentos.select_related('subcategoria')):
+        total += resultado.valor_total
+    for valor in ordem.transfers.values_list('valor', flat=True):
+        total += valor
+    return total
@@ -0,0 +1,182 @@
+"""
+Resumo desnormalizado das Ordens de Serviço.
+
+Cada OS guarda a primeira/última data de serviço, a quantidade de lançamentos
+e de transfers e o conjunto de categorias dos seus serviços (tabela de
+ligação ``OrdemServico.categorias``, com índice por categoria). Os campos são
+mantidos pelos signals de LancamentoServico/TransferOrdemServico (ver
+servicos/signals.py), na mesma transação da escrita, e permitem filtrar a
+listagem sem JOIN + DISTINCT em lançamentos.
+
+A atualização do resumo também avança ``atualizado_em`` da OS: é a versão
+gravada no banco que o cache de roteiro e o ETag do editor usam
+(servicos/cache_roteiro.py), então qualquer alteração de item a muda.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+
+CAMPOS_RESUMO = (
+    'primeira_data_servico',
+    'ultima_data_servico',
+    'num_lancamentos',
+    'num_transfers',
+)
+
+_estado = threading.local()
+
+
+def filtro_categoria(categoria_id):
+    """Lookup para filtrar OS que possuem serviços da categoria informada"""
+    # Um par (ordem, categoria) por OS na tabela de ligação: o JOIN não duplica
+    return {'categorias': int(categoria_id)}
+
+
+def resumo_vazio():
+    return {
+        'primeira_data_servico': None,
+        'ultima_data_servico': None,
+        'num_lancamentos': 0,
+        'num_transfers': 0,
+    }
+
+
+def _models(lancamento_model=None, transfer_model=None):
+    if lancamento_model is None or transfer_model is None:
+        from .models import LancamentoServico, TransferOrdemServico
+        lancamento_model = lancamento_model or LancamentoServico
+        transfer_model = transfer_model or TransferOrdemServico
+    return lancamento_model, transfer_model
+
+
+def _lancamentos(ordem_ids, lancamento_model):
+    lancamentos = lancamento_model.objects.filter(ordem_servico__isnull=False)
+    if ordem_ids is not None:
+        lancamentos = lancamentos.filter(ordem_servico_id__in=ordem_ids)
+    return lancamentos.order_by()
+
+
+def calcular_resumos(ordem_ids=None, lancamento_model=None, transfer_model=None):
+    """
+    Calcula o resumo de várias OS com duas queries agrupadas.
+
+    Retorna {ordem_id: {campo: valor}}; OS sem lançamentos nem transfers não
+    aparecem no resultado. As categorias ficam em ``calcular_categorias``.
+    """
+    lancamento_model, transfer_model = _models(lancamento_model, transfer_model)
+    transfers = transfer_model.objects.all()
+    if ordem_ids is not None:
+        transfers = transfers.filter(ordem_servico_id__in=ordem_ids)
+
+    resumos = {}
+    agregados = (_lancamentos(ordem_ids, lancamento_model)
+                 .values('ordem_servico_id')
+                 .annotate(primeira=Min('data_servico'), ultima=Max('data_servico'), total=Count('pk')))
+    for linha in agregados:
+        resumo = resumos.setdefault(linha['ordem_servico_id'], resumo_vazio())
+        resumo['primeira_data_servico'] = linha['primeira']
+        resumo['ultima_data_servico'] = linha['ultima']
+        resumo['num_lancamentos'] = linha['total']
+
+    for linha in transfers.order_by().values('ordem_servico_id').annotate(total=Count('pk')):
+        resumo = resumos.setdefault(linha['ordem_servico_id'], resumo_vazio())
+        resumo['num_transfers'] = linha['total']
+
+    return resumos
+
+
+def calcular_categorias(ordem_ids=None, lancamento_model=None):
+    """{ordem_id: {categoria_id, ...}} das categorias dos serviços de cada OS (uma query)"""
+    lancamento_model, _ = _models(lancamento_model, None)
+    categorias = {}
+    pares = (_lancamentos(ordem_ids, lancamento_model)
+             .values_list('ordem_servico_id', 'subcategoria__categoria_id')
+             .distinct())
+    for ordem_id, categoria_id in pares:
+        if categoria_id is not None:
+            categorias.setdefault(ordem_id, set()).add(categoria_id)
+    return categorias
+
+
+def categorias_gravadas(ordem_ids):
+    """{ordem_id: {categoria_id, ...}} da tabela de ligação"""
+    from .models import OrdemServico
+
+    gravadas = {}
+    ligacoes = OrdemServico.categorias.through.objects.filter(ordemservico_id__in=ordem_ids)
+    for ordem_id, categoria_id in ligacoes.values_list('ordemservico_id', 'categoria_id'):
+        gravadas.setdefault(ordem_id, set()).add(categoria_id)
+    return gravadas
+
+
+def gravar_categorias(esperadas):
+    """
+    Sincroniza a tabela de ligação com ``esperadas`` ({ordem_id: set de
+    categorias}, incluindo as OS que devem ficar sem nenhuma): só insere e
+    apaga os pares que mudaram.
+    """
+    from .models import OrdemServico
+
+    Ligacao = OrdemServico.categorias.through
+    gravadas = categorias_gravadas(list(esperadas))
+    novas = []
+    removidas = []
+    for ordem_id, categorias in esperadas.items():
+        atuais = gravadas.get(ordem_id, set())
+        novas += [Ligacao(ordemservico_id=ordem_id, categoria_id=c) for c in categorias - atuais]
+        removidas += [(ordem_id, c) for c in atuais - categorias]
+    if novas:
+        Ligacao.objects.bulk_create(novas, ignore_conflicts=True)
+    if removidas:
+        filtro = Q()
+        for ordem_id, categoria_id in removidas:
+            filtro |= Q(ordemservico_id=ordem_id, categoria_id=categoria_id)
+        Ligacao.objects.filter(filtro).delete()
+
+
+def atualizar_resumo(ordem_id):
+    """Recalcula e grava o resumo de uma OS (e avança o seu ``atualizado_em``)"""
+    from .models import OrdemServico
+
+    if ordem_id is None:
+        return
+    resumo = calcular_resumos([ordem_id]).get(ordem_id, resumo_vazio())
+    with transaction.atomic():
+        OrdemServico.objects.filter(pk=ordem_id).update(atualizado_em=timezone.now(), **resumo)
+        gravar_categorias({ordem_id: calcular_categorias([ordem_id]).get(ordem_id, set())})
+
+
+def agendar_atualizacao(ordem_id):
+    """
+    Atualiza o resumo imediatamente ou, dentro de ``resumo_adiado()``,
+    acumula a OS para uma única atualização no final do bloco.
+    """
+    pendentes = getattr(_estado, 'pendentes', None)
+    if pendentes is not None:
+        pendentes.add(ordem_id)
+    else:
+        atualizar_resumo(ordem_id)
+
+
+@contextmanager
+def resumo_adiado():
+    """
+    Agrupa as atualizações de resumo de um bloco de escritas em lote
+    (ex.: salvar uma OS com dezenas de itens) em uma por OS.
+    """
+    if getattr(_estado, 'pendentes', None) is not None:
+        # Bloco aninhado: o mais externo aplica as atualizações
+        yield
+        return
+
+    _estado.pendentes = set()
+    try:
+        yield
+        pendentes = _estado.pendentes
+    finally:
+        _estado.pendentes = None
+    for ordem_id in pendentes:
+        atualizar_resumo(ordem_id)
@@ -0,0 +1,322 @@
+"""
+Roteiro das Ordens de Serviço: modelo intermediário + renderizadores.
+
+O roteiro era montado em três lugares, cada um relendo lançamentos e
+transfers e concatenando strings (``OrdemServico.gerar_roteiro``,
+``OrdemServico.gerar_texto_whatsapp`` e o preview da tela da OS). Agora uma
+única passada monta o ``Itinerario`` (dias, itens, transfers e totais, com
+os valores do motor de precificação) e cada formato é só um renderizador
+sobre ele:
+
+- ``whatsapp``: preview com emojis mostrado no cadastro/detalhe da OS;
+- ``texto``: roteiro simples por dia da semana (campo ``OrdemServico.roteiro``);
+- ``html``: fragmento para páginas e e-mails;
+- ``json``: estrutura serializável para APIs e o front-end.
+
+Os renderizadores acumulam as partes em uma lista e fazem um único
+``''.join`` no final. ``itinerario_da_ordem`` guarda o modelo na instância
+da OS, então gerar vários formatos na mesma requisição custa as mesmas duas
+queries. Novos formatos entram com ``@renderizador('nome')``.
+"""
+from django.utils.html import escape
+
+from .pricing import ZERO, calcular_lote
+from .schema import capabilities
+
+SEPARADOR_DIA = '───────────────────\n'
+SEPARADOR_RESUMO = '═══════════════════\n'
+
+
+def formatar_moeda(valor):
+    """R$ 1234,56 (formato do preview)"""
+    return f'R$ {float(valor):.2f}'.replace('.', ',')
+
+
+def formatar_moeda_milhar(valor):
+    """R$ 1.234,56 (formato do roteiro em texto e do WhatsApp da OS)"""
+    return f'R$ {valor:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+class ItemRoteiro:
+    """Lançamento de serviço já precificado"""
+
+    __slots__ = ('nome', 'servico', 'descricao', 'qtd_inteira', 'qtd_meia', 'qtd_infantil', 'valor')
+
+    def __init__(self, lancamento, valor):
+        subcategoria = lancamento.subcategoria
+        self.servico = subcategoria.nome
+        self.nome = lancamento.obs_publica or subcategoria.nome
+        self.descricao = tuple(
+            linha.strip() for linha in (subcategoria.descricao or '').strip().split('\n') if linha.strip()
+        )
+        self.qtd_inteira = lancamento.qtd_inteira
+        self.qtd_meia = lancamento.qtd_meia
+        self.qtd_infantil = lancamento.qtd_infantil
+        self.valor = valor
+
+    @property
+    def quantidades(self):
+        qtds = []
+        if self.qtd_inteira > 0:
+            qtds.append(f'{self.qtd_inteira}x Inteira')
+        if self.qtd_meia > 0:
+            qtds.append(f'{self.qtd_meia}x Meia')
+        if self.qtd_infantil > 0:
+            qtds.append(f'{self.qtd_infantil}x Infantil')
+        return ', '.join(qtds)
+
+
+class TransferRoteiro:
+    """Transfer avulso da OS"""
+
+    __slots__ = ('nome', 'valor', 'data')
+
+    def __init__(self, transfer_ordem):
+        self.nome = transfer_ordem.nome_exibicao
+        self.valor = transfer_ordem.valor
+        self.data = transfer_ordem.data_transfer
+
+    def as_dict(self):
+        """Formato de ``resumo_transfers`` usado pelos templates"""
+        return {
+            'nome': self.nome,
+            'valor': float(self.valor),
+            'data_transfer': self.data.strftime('%Y-%m-%d') if self.data else '',
+            'data_transfer_br': self.data.strftime('%d/%m/%Y') if self.data else '',
+        }
+
+
+class DiaRoteiro:
+    """Itens e transfers de uma data (``data`` None = transfers sem data)"""
+
+    __slots__ = ('data', 'itens', 'transfers')
+
+    def __init__(self, data):
+        self.data = data
+        self.itens = []
+        self.transfers = []
+
+
+class Itinerario:
+    """Roteiro completo de uma OS, independente de formato"""
+
+    __slots__ = ('ordem', 'dias', 'total_ingressos', 'total_transfers')
+
+    def __init__(self, ordem, dias):
+        self.ordem = ordem
+        self.dias = dias
+        self.total_ingressos = sum((item.valor for dia in dias for item in dia.itens), ZERO)
+        self.total_transfers = sum((t.valor for dia in dias for t in dia.transfers), ZERO)
+
+    @property
+    def total(self):
+        return self.total_ingressos + self.total_transfers
+
+    def itens(self):
+        return [item for dia in self.dias for item in dia.itens]
+
+    def transfers(self):
+        return [transfer for dia in self.dias for transfer in dia.transfers]
+
+    def resumo_transfers(self):
+        return [transfer.as_dict() for transfer in self.transfers()]
+
+
+def montar_itinerario(ordem, lancamentos=None, transfers=None):
+    """
+    Monta o Itinerario da OS com uma query para lançamentos e outra para transfers.
+
+    Os dias saem em ordem cronológica (transfers sem data primeiro); dentro
+    do dia, itens e transfers seguem a ordenação padrão dos models.
+    Transfers só entram se a coluna de nome personalizado existir no banco
+    (mesma condição do preview antigo).
+
+    Quem já carregou os itens (com ``subcategoria``/``transfer`` em
+    select_related) pode passá-los em ``lancamentos``/``transfers`` e
+    nenhuma query é feita.
+    """
+    if lancamentos is None:
+        lancamentos = list(ordem.lancamentos.select_related('subcategoria'))
+    if transfers is None:
+        transfers = list(ordem.transfers.select_related('transfer')) if capabilities.transfer_nome_personalizado else []
+
+    dias = {}
+    for lancamento, resultado in zip(lancamentos, calcular_lote(lancamentos)):
+        dia = dias.get(lancamento.data_servico)
+        if dia is None:
+            dia = dias[lancamento.data_servico] = DiaRoteiro(lancamento.data_servico)
+        dia.itens.append(ItemRoteiro(lancamento, resultado.valor_total))
+    for transfer_ordem in transfers:
+        dia = dias.get(transfer_ordem.data_transfer)
+        if dia is None:
+            dia = dias[transfer_ordem.data_transfer] = DiaRoteiro(transfer_ordem.data_transfer)
+        dia.transfers.append(TransferRoteiro(transfer_ordem))
+
+    ordenados = sorted(dias.values(), key=lambda dia: (dia.data is not None, dia.data or 0))
+    return Itinerario(ordem, ordenados)
+
+
+def itinerario_da_ordem(ordem):
+    """Itinerario da OS, montado uma vez por instância (reaproveitado entre formatos)"""
+    itinerario = getattr(ordem, '_itinerario', None)
+    if itinerario is None:
+        itinerario = ordem._itinerario = montar_itinerario(ordem)
+    return itinerario
+
+
+def descartar_itinerario(ordem):
+    """Esquece o Itinerario guardado na instância (itens da OS mudaram)"""
+    ordem.__dict__.pop('_itinerario', None)
+
+
+# ---------------------------------------------------------------------- formatos
+
+RENDERIZADORES = {}
+
+
+def renderizador(nome):
+    """Registra um renderizador ``func(itinerario) -> saída`` para o formato ``nome``"""
+    def registrar(func):
+        RENDERIZADORES[nome] = func
+        return func
+    return registrar
+
+
+def renderizar(ordem, formato):
+    """Renderiza o roteiro da OS no formato pedido (ver RENDERIZADORES)"""
+    try:
+        func = RENDERIZADORES[formato]
+    except KeyError:
+        raise ValueError(f'Formato de roteiro desconhecido: {formato}') from None
+    return func(itinerario_da_ordem(ordem))
+
+
+@renderizador('whatsapp')
+def renderizar_whatsapp(itinerario):
+    """Preview no mesmo formato visual usado no cadastro da OS"""
+    partes = ['✨ *ROTEIRO* ✨\n\n\n']
+    escrever = partes.append
+
+    for dia in itinerario.dias:
+        if dia.data:
+            escrever(f'🗓️ *DIA | {dia.data:%d/%m/%Y}*\n')
+            escrever(SEPARADOR_DIA)
+        if dia.itens:
+            escrever('🎟️ *Atividades & Ingressos:*\n')
+            for item in dia.itens:
+                escrever(f'  • {item.nome} ({item.quantidades})\n')
+            escrever('\n')
+        if dia.transfers:
+            escrever('🚘 *Transporte Privativo:*\n')
+            for transfer in dia.transfers:
+                escrever(f'  • {transfer.nome}\n')
+            escrever('\n')
+
+    escrever(SEPARADOR_RESUMO)
+    escrever('💼 *RESUMO FINANCEIRO*\n')
+    escrever(SEPARADOR_RESUMO)
+
+    transfers = itinerario.transfers()
+    if transfers:
+        escrever('\n🚘 *Investimento em Transporte:*\n')
+        for transfer in transfers:
+            escrever(f'  • {transfer.nome}: {formatar_moeda(transfer.valor)}\n')
+        escrever(f'  _*Subtotal Transporte: {formatar_moeda(itinerario.total_transfers)}*_\n')
+
+    itens = itinerario.itens()
+    if itens:
+        escrever('\n🎟️ *Investimento em Ingressos:*\n')
+        for item in itens:
+            if item.valor > 0:
+                escrever(f'  • {item.nome}: {formatar_moeda(item.valor)}\n')
+        escrever(f'  _*Subtotal Ingressos: {formatar_moeda(itinerario.total_ingressos)}*_\n')
+
+    escrever('\n' + SEPARADOR_DIA)
+    escrever(f'💎 *VALOR TOTAL DO PACOTE: {formatar_moeda(itinerario.total)}*\n')
+    escrever(SEPARADOR_DIA + '\n')
+    escrever('Ficamos à disposição para esclarecer qualquer dúvida ou realizar ajustes no roteiro!')
+    return ''.join(partes)
+
+
+@renderizador('texto')
+def renderizar_texto(itinerario):
+    """Roteiro simples por dia (serviços, descrição e valor), sem transfers"""
+    partes = []
+    escrever = partes.append
+    for dia in itinerario.dias:
+        if not dia.itens:
+            continue
+        escrever(f"\n{dia.data.strftime('%A').upper()} {dia.data:%d/%m}\n")
+        for item in dia.itens:
+            escrever(f'\n\n{item.servico}:')
+            for linha in item.descricao:
+                escrever(f'\n- {linha}')
+            if item.valor > 0:
+                escrever('\n' + formatar_moeda_milhar(item.valor))
+            escrever('\n')
+        escrever('\n\n')
+    # Cada parte começa com a quebra que o antigo "\n".join colocava entre elas
+    return ''.join(partes)[1:]
+
+
+@renderizador('html')
+def renderizar_html(itinerario):
+    """Fragmento HTML do roteiro (textos escapados)"""
+    partes = ['<div class="roteiro">']
+    escrever = partes.append
+    for dia in itinerario.dias:
+        escrever('<section class="roteiro-dia">')
+        if dia.data:
+            escrever(f'<h4>{dia.data:%d/%m/%Y}</h4>')
+        if dia.itens:
+            escrever('<ul class="roteiro-itens">')
+            for item in dia.itens:
+                escrever(
+                    f'<li>{escape(item.nome)} <small>({escape(item.quantidades)})</small>'
+                    f' <span class="valor">{formatar_moeda_milhar(item.valor)}</span></li>'
+                )
+            escrever('</ul>')
+        if dia.transfers:
+            escrever('<ul class="roteiro-transfers">')
+            for transfer in dia.transfers:
+                escrever(
+                    f'<li>{escape(transfer.nome)}'
+                    f' <span class="valor">{formatar_moeda_milhar(transfer.valor)}</span></li>'
+                )
+            escrever('</ul>')
+        escrever('</section>')
+    escrever(
+        f'<p class="roteiro-total">Transporte: {formatar_moeda_milhar(itinerario.total_transfers)}'
+        f' · Ingressos: {formatar_moeda_milhar(itinerario.total_ingressos)}'
+        f' · <strong>Total: {formatar_moeda_milhar(itinerario.total)}</strong></p>'
+    )
+    escrever('</div>')
+    return ''.join(partes)
+
+
+@renderizador('json')
+def renderizar_json(itinerario):
+    """Estrutura serializável (datas ISO, valores em float como nas demais respostas JSON)"""
+    return {
+        'dias': [
+            {
+                'data': dia.data.isoformat() if dia.data else '',
+                'itens': [
+                    {
+                        'nome': item.nome,
+                        'servico': item.servico,
+                        'qtd_inteira': item.qtd_inteira,
+                        'qtd_meia': item.qtd_meia,
+                        'qtd_infantil': item.qtd_infantil,
+                        'valor': float(item.valor),
+                    }
+                    for item in dia.itens
+                ],
+                'transfers': [transfer.as_dict() for transfer in dia.transfers],
+            }
+            for dia in itinerario.dias
+        ],
+        'total_ingressos': float(itinerario.total_ingressos),
+        'total_transfers': float(itinerario.total_transfers),
+        'total': float(itinerario.total),
+    }
@@ -0,0 +1,78 @@
+"""
+Registro de capacidades do schema do banco de dados.
+
+Algumas colunas opcionais (adicionadas por migrations mais recentes) podem não
+existir em bancos antigos. Em vez de abrir um cursor e introspectar a tabela a
+cada requisição, as capacidades são detectadas uma vez por processo (no
+primeiro uso) e invalidadas pelo signal ``post_migrate``.
+
+Uso:
+    from servicos.schema import capabilities
+
+    if capabilities.transfer_nome_personalizado:
+        ...
+"""
+import threading
+
+from django.db import connection
+
+
+# Flag -> (model label, coluna)
+OPTIONAL_COLUMNS = {
+    'transfer_nome_personalizado': ('servicos.TransferOrdemServico', 'nome_personalizado'),
+    'transfer_data_transfer': ('servicos.TransferOrdemServico', 'data_transfer'),
+}
+
+
+class SchemaCapabilities:
+    """Flags de colunas opcionais, introspectadas uma vez por processo"""
+
+    def __init__(self, columns):
+        self._columns = columns
+        self._flags = None
+        self._lock = threading.Lock()
+
+    def _introspect(self):
+        from django.apps import apps
+
+        tabelas = {}
+        flags = {}
+        try:
+            with connection.cursor() as cursor:
+                for flag, (model_label, coluna) in self._columns.items():
+                    tabela = apps.get_model(model_label)._meta.db_table
+                    if tabela not in tabelas:
+                        tabelas[tabela] = {
+                            column.name for column in connection.introspection.get_table_description(cursor, tabela)
+                        }
+                    flags[flag] = coluna in tabelas[tabela]
+        except Exception:
+            # Banco indisponível ou tabela inexistente: nada é cacheado,
+            # a próxima consulta tenta novamente.
+            return None
+        return flags
+
+    def as_dict(self):
+        """Retorna todas as flags, introspectando o banco apenas no primeiro uso"""
+        flags = self._flags
+        if flags is None:
+            with self._lock:
+                if self._flags is None:
+                    self._flags = self._introspect()
+                flags = self._flags
+            if flags is None:
+                return dict.fromkeys(self._columns, False)
+        return flags
+
+    def invalidate(self, **kwargs):
+        """Descarta as flags cacheadas (conectado ao signal post_migrate)"""
+        with self._lock:
+            self._flags = None
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self._columns:
+            raise AttributeError(name)
+        return self.as_dict()[name]
+
+
+capabilities = SchemaCapabilities(OPTIONAL_COLUMNS)
@@ -0,0 +1,411 @@
+"""
+Camada de serviço para gravação de Ordens de Serviço.
+
+O ``OrdemServicoWriter`` recebe o payload JSON do formulário de OS (lista
+``servicos`` com lançamentos e blocos ``__transfer_avulso``) e grava tudo em
+uma única transação: resolve os Transfers e SubCategorias referenciados com
+uma query cada, grava os itens em lote e recalcula o total da OS uma única
+vez no final. Qualquer erro no meio do caminho desfaz a gravação inteira,
+nunca deixando uma OS pela metade.
+
+Na edição os itens não são apagados e recriados: cada item do payload traz o
+id do registro que representa e só o que mudou é gravado (ver
+``OrdemServicoWriter.salvar``). O caminho inverso, do banco para o payload
+que o editor carrega, é ``payload_editor``.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from audit_system import registry as auditoria
+
+from .catalog import catalogo
+from .models import (
+    LancamentoServico, OrdemServico, SubCategoria, Transfer, TransferOrdemServico,
+)
+from .pricing import parse_idades
+from .resumo import agendar_atualizacao, resumo_adiado
+from .roteiro import descartar_itinerario, montar_itinerario, renderizar_whatsapp
+from .schema import capabilities
+
+# Campos comparados na edição. Os valores unitários são snapshot: um item já
+# gravado mantém os seus enquanto o serviço (subcategoria) não muda (ver
+# OrdemServicoWriter.montar_lancamento)
+CAMPOS_VALOR_LANCAMENTO = ('valor_unit_inteira', 'valor_unit_meia', 'valor_unit_infantil')
+CAMPOS_LANCAMENTO = (
+    'categoria_id', 'subcategoria_id', 'data_servico', 'obs_publica',
+    'qtd_inteira', 'qtd_meia', 'qtd_infantil', 'idades_criancas', 'tipos_meia_entrada',
+) + CAMPOS_VALOR_LANCAMENTO
+CAMPOS_TRANSFER = ('transfer_id', 'nome_personalizado', 'valor', 'data_transfer')
+
+# Id dos transfers avulsos serializados na tela de edição
+_ID_TRANSFER_AVULSO = re.compile(r'^transfer_avulso_(\d+)$')
+
+
+class PayloadOrdemServicoInvalido(Exception):
+    """Payload referencia registros inexistentes; nada é gravado"""
+
+    def __init__(self, mensagem, **detalhes):
+        super().__init__(mensagem)
+        self.mensagem = mensagem
+        self.detalhes = detalhes
+
+    def as_json(self):
+        return {'error': self.mensagem, **self.detalhes}
+
+
+def _decimal(valor):
+    try:
+        return Decimal(str(valor if valor not in (None, '') else 0))
+    except (InvalidOperation, ValueError):
+        return Decimal('0.00')
+
+
+def _inteiro(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _copiar_diferencas(atual, novo, campos):
+    """Copia para ``atual`` os campos que diferem em ``novo`` e retorna seus nomes"""
+    alterados = []
+    for campo in campos:
+        valor = getattr(novo, campo)
+        if getattr(atual, campo) != valor:
+            setattr(atual, campo, valor)
+            alterados.append(campo)
+    return alterados
+
+
+def _diferencas_lancamento(atual, novo):
+    alterados = _copiar_diferencas(atual, novo, CAMPOS_LANCAMENTO)
+    if alterados:
+        # bulk_update não aplica auto_now
+        atual.atualizado_em = timezone.now()
+        alterados.append('atualizado_em')
+    return alterados
+
+
+def _diferencas_transfer(atual, novo):
+    return _copiar_diferencas(atual, novo, CAMPOS_TRANSFER)
+
+
+def aplicar_diff(model, existentes, itens, diferencas):
+    """
+    Sincroniza os registros gravados com os itens do payload.
+
+    ``existentes`` é {pk: instância gravada} e ``itens`` a lista de
+    (pk informado ou None, instância montada a partir do payload). Itens cujo
+    pk está em ``existentes`` são comparados por ``diferencas(atual, novo)`` e
+    só entram no bulk_update se algo mudou; os demais são inseridos com
+    bulk_create e os gravados que não vieram no payload são removidos com um
+    único DELETE filtrado. As escritas em lote são informadas à auditoria.
+    Retorna True se algo foi gravado.
+    """
+    restantes = dict(existentes)
+    criar, atualizar, campos = [], [], set()
+    for pk, novo in itens:
+        atual = restantes.pop(pk, None)
+        if atual is None:
+            criar.append(novo)
+            continue
+        alterados = diferencas(atual, novo)
+        if alterados:
+            atualizar.append(atual)
+            campos.update(alterados)
+
+    if restantes:
+        model.objects.filter(pk__in=list(restantes)).delete()
+    if atualizar:
+        model.objects.bulk_update(atualizar, sorted(campos))
+    if criar:
+        model.objects.bulk_create(criar)
+    auditoria.registrar_lote(model, criados=criar, alterados=atualizar)
+    return bool(restantes or atualizar or criar)
+
+
+class OrdemServicoWriter:
+    """
+    Grava uma OS e seus itens a partir do payload JSON do formulário.
+
+    Uso:
+        ordem = form.save(commit=False)
+        OrdemServicoWriter(ordem, user=request.user).salvar(data.get('servicos', []))
+    """
+
+    def __init__(self, ordem, user=None):
+        self.ordem = ordem
+        self.user = user
+
+    # ------------------------------------------------------------------ payload
+
+    @staticmethod
+    def separar_itens(servicos):
+        """
+        Divide o payload em lançamentos e transfers, descartando itens incompletos.
+
+        Retorna (lancamentos, transfers); cada transfer é uma tupla
+        (transfer_id, dados, id do TransferOrdemServico gravado ou None).
+        """
+        lancamentos = []
+        transfers = []
+        for item in servicos:
+            if item.get('__transfer_avulso'):
+                # Itens carregados na edição vêm como 'transfer_avulso_<pk>'
+                match = _ID_TRANSFER_AVULSO.match(str(item.get('id', '')))
+                id_item = int(match.group(1)) if match else None
+                for transfer_data in item.get('transfers', []):
+                    transfer_id = _inteiro(transfer_data.get('transfer_id'))
+                    if transfer_id is None:
+                        continue
+                    gravado_id = _inteiro(transfer_data.get('id')) or id_item
+                    id_item = None
+                    transfers.append((transfer_id, transfer_data, gravado_id))
+            elif item.get('servico_id') and item.get('categoria_id') and item.get('data'):
+                lancamentos.append(item)
+        return lancamentos, transfers
+
+    def _resolver(self, lancamentos, transfers):
+        """Carrega Transfers e SubCategorias referenciados (uma query cada)"""
+        transfer_ids = {transfer_id for transfer_id, _, _ in transfers}
+        transfers_por_id = Transfer.objects.in_bulk(transfer_ids) if transfer_ids else {}
+        for transfer_id in transfer_ids:
+            if transfer_id not in transfers_por_id:
+                raise PayloadOrdemServicoInvalido('Transfer não encontrado', transfer_id=transfer_id)
+
+        subcategoria_ids = {_inteiro(item.get('servico_id')) for item in lancamentos}
+        subcategorias_por_id = SubCategoria.objects.in_bulk(subcategoria_ids) if subcategoria_ids else {}
+        for subcategoria_id in subcategoria_ids:
+            if subcategoria_id not in subcategorias_por_id:
+                raise PayloadOrdemServicoInvalido('Serviço não encontrado', servico_id=subcategoria_id)
+
+        return transfers_por_id, subcategorias_por_id
+
+    def montar_lancamento(self, item, subcategoria, gravado=None):
+        """
+        Cria (sem salvar) o LancamentoServico de um item do payload.
+
+        Os valores unitários vêm do serviço (snapshot, como em
+        LancamentoServico.save()), exceto quando ``gravado``, o registro que o
+        item representa, é do mesmo serviço: aí ficam os valores gravados,
+        mesmo que outros campos do item tenham mudado.
+        """
+        precos = gravado if gravado is not None and gravado.subcategoria_id == subcategoria.pk else None
+        return LancamentoServico(
+            ordem_servico=self.ordem,
+            categoria_id=_inteiro(item.get('categoria_id')),
+            subcategoria=subcategoria,
+            data_servico=parse_date(str(item.get('data'))),
+            obs_publica=item.get('descricao', '') or '',
+            qtd_inteira=_inteiro(item.get('qtd_inteira')) or 0,
+            qtd_meia=_inteiro(item.get('qtd_meia')) or 0,
+            qtd_infantil=_inteiro(item.get('qtd_infantil')) or 0,
+            idades_criancas=list(parse_idades(item.get('idades'))),
+            tipos_meia_entrada='\n'.join(str(tm.get('tipo')) for tm in item.get('tipos_meia', [])),
+            valor_unit_inteira=precos.valor_unit_inteira if precos else subcategoria.valor_inteira,
+            valor_unit_meia=precos.valor_unit_meia if precos else subcategoria.valor_meia,
+            valor_unit_infantil=precos.valor_unit_infantil if precos else subcategoria.valor_infantil,
+            criado_por=self.user,
+        )
+
+    def montar_transfer(self, transfer_data, transfer):
+        """Cria (sem salvar) o TransferOrdemServico de um transfer do payload"""
+        valor = _decimal(transfer_data.get('valor', 0))
+        if valor == Decimal('0.00'):
+            # Mesmo padrão de TransferOrdemServico.save(): valor do cadastro
+            valor = transfer.valor
+        data_transfer = transfer_data.get('data_transfer')
+        return TransferOrdemServico(
+            ordem_servico=self.ordem,
+            transfer=transfer,
+            nome_personalizado=transfer_data.get('nome_personalizado', '') or '',
+            valor=valor,
+            data_transfer=parse_date(data_transfer) if data_transfer else None,
+        )
+
+    # ------------------------------------------------------------------ gravação
+
+    def salvar(self, servicos):
+        """
+        Grava a OS e sincroniza seus itens com os do payload.
+
+        Na criação todos os itens são inseridos em lote. Na edição, itens que
+        trazem o id de um registro da OS (``id`` do lançamento; ``id`` do
+        transfer ou ``transfer_avulso_<pk>`` no item) são atualizados só se
+        algo mudou, os demais são inseridos e os ausentes removidos.
+
+        Levanta PayloadOrdemServicoInvalido (sem gravar nada) se o payload
+        referenciar transfers ou serviços inexistentes.
+        """
+        lancamentos_payload, transfers_payload = self.separar_itens(servicos)
+        transfers_por_id, subcategorias_por_id = self._resolver(lancamentos_payload, transfers_payload)
+
+        # Um único log de auditoria com as alterações da OS e dos itens
+        with transaction.atomic(), resumo_adiado(), auditoria.agrupar(self.ordem):
+            editando = not self.ordem._state.adding
+            self.ordem.save()
+
+            lancamentos_gravados = {l.pk: l for l in self.ordem.lancamentos.all()} if editando else {}
+            lancamentos = []
+            for item in lancamentos_payload:
+                pk = _inteiro(item.get('id'))
+                subcategoria = subcategorias_por_id[_inteiro(item.get('servico_id'))]
+                lancamentos.append((pk, self.montar_lancamento(item, subcategoria, lancamentos_gravados.get(pk))))
+            transfers = [
+                (gravado_id, self.montar_transfer(transfer_data, transfers_por_id[transfer_id]))
+                for transfer_id, transfer_data, gravado_id in transfers_payload
+            ]
+
+            if editando:
+                alterou = aplicar_diff(
+                    LancamentoServico,
+                    lancamentos_gravados,
+                    lancamentos,
+                    _diferencas_lancamento,
+                )
+                alterou = aplicar_diff(
+                    TransferOrdemServico,
+                    {t.pk: t for t in self.ordem.transfers.all()},
+                    transfers,
+                    _diferencas_transfer,
+                ) or alterou
+            else:
+                novos_lancamentos = LancamentoServico.objects.bulk_create([novo for _, novo in lancamentos])
+                novos_transfers = TransferOrdemServico.objects.bulk_create([novo for _, novo in transfers])
+                auditoria.registrar_lote(LancamentoServico, criados=novos_lancamentos)
+                auditoria.registrar_lote(TransferOrdemServico, criados=novos_transfers)
+                alterou = True
+
+            if alterou:
+                # Escritas em lote não disparam signals: resumo (e versão do roteiro) e total uma única vez
+                agendar_atualizacao(self.ordem.pk)
+                self.ordem.calcular_total()
+                descartar_itinerario(self.ordem)
+
+        return self.ordem
+
+
+# ---------------------------------------------------------------------- leitura
+
+
+def _serializar_lancamento(l, tipos_meia_por_nome):
+    subcategoria = l.subcategoria
+    return {
+        'id': l.id,
+        'data': l.data_servico.strftime('%Y-%m-%d'),
+        'categoria_id': l.categoria_id,
+        'servico_id': l.subcategoria_id,
+        'servico_nome': subcategoria.nome,
+        'qtd_inteira': l.qtd_inteira,
+        'qtd_meia': l.qtd_meia,
+        'qtd_infantil': l.qtd_infantil,
+        'idades': l.get_idades_lista(),
+        'tipos_meia': [
+            {'tipo': t, 'id': tipos_meia_por_nome.get(t.strip().lower())}
+            for t in l.tipos_meia_entrada.split('\n') if t.strip()
+        ],
+        'descricao': l.obs_publica,
+        'valor_transfer_ida': float(l.valor_transfer_ida),
+        'valor_transfer_volta': float(l.valor_transfer_volta),
+        'transfers': [],
+        'info': {
+            'id': l.subcategoria_id,
+            'nome': subcategoria.nome,
+            'descricao': subcategoria.descricao,
+            'categoria_nome': l.categoria.nome,
+            'valor_inteira': float(l.valor_unit_inteira),
+            'valor_meia': float(l.valor_unit_meia),
+            'valor_infantil': float(l.valor_unit_infantil),
+            'aceita_meia_entrada': subcategoria.aceita_meia_entrada,
+            'regras_meia_entrada': subcategoria.regras_meia_entrada,
+            'permite_infantil': subcategoria.permite_infantil,
+            'idade_minima_infantil': subcategoria.idade_minima_infantil,
+            'idade_maxima_infantil': subcategoria.idade_maxima_infantil,
+            'possui_isencao': subcategoria.possui_isencao,
+            'idade_isencao_min': subcategoria.idade_isencao_min,
+            'idade_isencao_max': subcategoria.idade_isencao_max,
+            'texto_isencao': subcategoria.texto_isencao,
+            'tem_idade_minima': subcategoria.tem_idade_minima,
+            'idade_minima': subcategoria.idade_minima,
+        },
+    }
+
+
+def _serializar_transfer(t, menor_data):
+    """Transfer avulso no formato do editor: (dados do transfer, item __transfer_avulso)"""
+    nome_exibicao = t.nome_exibicao
+    data_transfer = t.data_transfer.strftime('%Y-%m-%d') if t.data_transfer else ''
+    transfer_dict = {
+        'id': t.id,
+        'transfer_id': str(t.transfer_id),
+        'nome': t.transfer.nome,
+        'nome_personalizado': t.nome_personalizado,
+        'nome_exibicao': nome_exibicao,
+        'valor': float(t.valor),
+        'data_transfer': data_transfer,
+    }
+    item = {
+        'id': f'transfer_avulso_{t.id}',
+        'data': data_transfer or menor_data,
+        'data_transfer': data_transfer,
+        'servico_nome': nome_exibicao,
+        'descricao': nome_exibicao,
+        'qtd_inteira': 0,
+        'qtd_meia': 0,
+        'qtd_infantil': 0,
+        'idades': [],
+        'tipos_meia': [],
+        'transfers': [transfer_dict],
+        'valor_transfer_ida': float(t.valor),
+        'valor_transfer_volta': 0,
+        'info': {},
+        '__transfer_avulso': True,
+        '__nao_exibir_card': True,
+    }
+    return transfer_dict, item
+
+
+def payload_editor(ordem_id):
+    """
+    Payload que o editor de OS carrega na edição, ou None se a OS não existe.
+
+    Mesmo formato que ``OrdemServicoWriter.salvar`` recebe: ``lancamentos``
+    (transfers avulsos incluídos como itens ``__transfer_avulso``),
+    ``transfers`` e o ``roteiro`` do preview. Usa no máximo três queries:
+    lançamentos (com categoria e serviço), transfers e, só para uma OS sem
+    itens, a checagem de existência. Os ids dos tipos de meia-entrada vêm do
+    snapshot do catálogo.
+    """
+    lancamentos = list(
+        LancamentoServico.objects.filter(ordem_servico_id=ordem_id).select_related('categoria', 'subcategoria')
+    )
+    transfers = []
+    if capabilities.transfer_nome_personalizado:
+        transfers = list(TransferOrdemServico.objects.filter(ordem_servico_id=ordem_id).select_related('transfer'))
+    if not lancamentos and not transfers and not OrdemServico.objects.filter(pk=ordem_id).exists():
+        return None
+
+    tipos_meia_por_nome = {}
+    if any(l.tipos_meia_entrada for l in lancamentos):
+        tipos_meia_por_nome = {tipo.nome.strip().lower(): tipo.id for tipo in catalogo().tipos_meia}
+
+    itens = [_serializar_lancamento(l, tipos_meia_por_nome) for l in lancamentos]
+    menor_data = min((l.data_servico for l in lancamentos), default=None)
+    menor_data = menor_data.strftime('%Y-%m-%d') if menor_data else ''
+    transfers_data = []
+    for t in transfers:
+        transfer_dict, item = _serializar_transfer(t, menor_data)
+        transfers_data.append(transfer_dict)
+        itens.append(item)
+
+    itinerario = montar_itinerario(None, lancamentos, transfers)
+    return {
+        'lancamentos': itens,
+        'transfers': transfers_data,
+        'roteiro': renderizar_whatsapp(itinerario),
+    }
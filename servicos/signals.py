@@ -0,0 +1,71 @@
+"""
+Signals do app de serviços.
+
+Mantém o resumo desnormalizado das Ordens de Serviço (servicos/resumo.py)
+sempre que lançamentos ou transfers da OS são gravados ou removidos; a
+atualização do resumo avança a versão da OS usada pelo roteiro em cache
+(servicos/cache_roteiro.py). Alterações no
+catálogo avançam sua revisão (servicos/catalog.py). No final, os modelos
+auditados (audit_system/registry.py).
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from audit_system import registry as auditoria
+
+from .models import (
+    Categoria, LancamentoServico, OrdemServico, SubCategoria, TipoMeiaEntrada, Transfer, TransferOrdemServico,
+)
+from .catalog import cache_catalogo, incrementar_revisao
+from .resumo import CAMPOS_RESUMO, agendar_atualizacao
+
+
+@receiver(post_save, sender=LancamentoServico)
+@receiver(post_save, sender=TransferOrdemServico)
+def atualizar_resumo_ao_salvar(sender, instance, raw=False, **kwargs):
+    """Atualiza o resumo da OS após criar/alterar um item"""
+    if raw or not instance.ordem_servico_id:
+        return
+    agendar_atualizacao(instance.ordem_servico_id)
+
+
+@receiver(post_delete, sender=LancamentoServico)
+@receiver(post_delete, sender=TransferOrdemServico)
+def atualizar_resumo_ao_remover(sender, instance, origin=None, **kwargs):
+    """Atualiza o resumo da OS após remover um item"""
+    if not instance.ordem_servico_id:
+        return
+    # Exclusão em cascata da própria OS: não há resumo nem roteiro para manter
+    if isinstance(origin, OrdemServico):
+        return
+    agendar_atualizacao(instance.ordem_servico_id)
+
+
+@receiver(post_save, sender=Categoria)
+@receiver(post_save, sender=SubCategoria)
+@receiver(post_save, sender=TipoMeiaEntrada)
+@receiver(post_save, sender=Transfer)
+@receiver(post_delete, sender=Categoria)
+@receiver(post_delete, sender=SubCategoria)
+@receiver(post_delete, sender=TipoMeiaEntrada)
+@receiver(post_delete, sender=Transfer)
+def atualizar_revisao_catalogo(sender, **kwargs):
+    """Nova revisão do catálogo a cada alteração de categoria, serviço, tipo de meia ou transfer"""
+    incrementar_revisao()
+    # Este processo confere a revisão já no próximo acesso (e de novo após o commit)
+    cache_catalogo.expirar()
+    transaction.on_commit(cache_catalogo.expirar)
+
+
+# Auditoria: uma gravação da OS (OrdemServicoWriter) gera um único log com
+# as alterações da OS e dos seus itens
+auditoria.register(OrdemServico, exclude=CAMPOS_RESUMO, rotulo=lambda ordem: f'OS {ordem.numero_os}')
+auditoria.register(LancamentoServico, exclude=['criado_por'], parent='ordem_servico')
+auditoria.register(TransferOrdemServico, parent='ordem_servico')
+auditoria.register(
+    SubCategoria,
+    fields=['nome', 'valor_inteira', 'valor_meia', 'valor_infantil', 'ativo'],
+    rotulo=lambda subcategoria: subcategoria.nome,
+)
+auditoria.register(Transfer, fields=['nome', 'valor', 'ativo'], rotulo=lambda transfer: transfer.nome)
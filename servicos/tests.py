@@ -1,3 +1,1538 @@
-from django.test import TestCase
+import json
+import os
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from audit_system.models import AuditLog
+
+from .models import (
+    Categoria, SubCategoria, Transfer, OrdemServico, LancamentoServico, TransferOrdemServico,
+    SegmentoTraducao, SequenciaOrdemServico, TrabalhoTraducao,
+)
+from .cache_roteiro import estatisticas as estatisticas_cache_roteiro, obter_roteiro
+from .catalog import cache_catalogo, catalogo, revisao_atual
+from .importacao import ImportadorCatalogo, _ler_array_json, ler_linhas
+from .management.commands.benchmark_precificacao import _LancamentoLegado, gerar_lancamentos
+from .management.commands.benchmark_roteiro import _preview_legado, _texto_legado, criar_ordem_sintetica
+from .management.commands.estressar_numeracao_os import executar_estresse
+from .numeracao import proximo_numero_os, reservar_bloco_os
+from .pricing import calcular_lote
+from .roteiro import RENDERIZADORES, itinerario_da_ordem, renderizar
+from .schema import capabilities
+from .services import OrdemServicoWriter, PayloadOrdemServicoInvalido
+from .translation import ETAPAS, GLOSSARIO, MotorTraducao
+from .translation_dictionary import DicionarioTraducao
+from .translation_memory import MemoriaTraducao
+from .translation_jobs import (
+    ABANDONADO_APOS, MAX_TENTATIVAS, enfileirar, processar_proximo, recuperar_abandonados, reservar,
+)
+from . import views
+
+# Cache de outro processo (LocMemCache é local a cada worker)
+CACHE_OUTRO_WORKER = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'outro-worker'},
+}
+
+
+class OrdemServicoFixturesMixin:
+    """Dados básicos de catálogo usados pelos testes de Ordem de Serviço"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'senha-forte-123')
+        cls.categoria = Categoria.objects.create(nome='Atrativos')
+        cls.subcategoria = SubCategoria.objects.create(
+            categoria=cls.categoria,
+            nome='Cataratas BR',
+            valor_inteira=Decimal('100.00'),
+            valor_meia=Decimal('50.00'),
+            valor_infantil=Decimal('25.00'),
+        )
+        cls.transfer = Transfer.objects.create(nome='Aeroporto x Hotel', valor=Decimal('80.00'))
+
+    def criar_ordens(self, quantidade, lancamentos_por_ordem=2, transfers_por_ordem=1):
+        ordens = []
+        for _ in range(quantidade):
+            ordem = OrdemServico.objects.create(criado_por=self.user)
+            for _ in range(lancamentos_por_ordem):
+                LancamentoServico.objects.create(
+                    ordem_servico=ordem,
+                    data_servico=date(2025, 1, 10),
+                    categoria=self.categoria,
+                    subcategoria=self.subcategoria,
+                    qtd_inteira=2,
+                )
+            for _ in range(transfers_por_ordem):
+                TransferOrdemServico.objects.create(ordem_servico=ordem, transfer=self.transfer)
+            ordem.calcular_total()
+            ordens.append(ordem)
+        return ordens
+
+
+class OrdemServicoListAnnotationsTests(OrdemServicoFixturesMixin, TestCase):
+
+    def test_anotacoes_da_listagem(self):
+        self.criar_ordens(2, lancamentos_por_ordem=3, transfers_por_ordem=2)
+
+        ordens = list(OrdemServico.objects.with_list_annotations())
+
+        self.assertEqual(len(ordens), 2)
+        for ordem in ordens:
+            self.assertEqual(ordem.qtd_lancamentos, 3)
+            self.assertEqual(ordem.qtd_transfers, 2)
+            self.assertEqual(ordem.total_itens, 5)
+            self.assertEqual(ordem.valor_transfers, Decimal('160.00'))
+
+    def test_totais_da_listagem(self):
+        self.criar_ordens(3, lancamentos_por_ordem=2, transfers_por_ordem=1)
+
+        totais = OrdemServico.objects.all().list_totals()
+
+        self.assertEqual(totais['total_ordens'], 3)
+        self.assertEqual(totais['total_servicos'], 9)
+        self.assertEqual(totais['valor_total'], Decimal('1440.00'))
+
+    def test_iteracao_com_numero_fixo_de_queries(self):
+        self.criar_ordens(5)
+
+        with self.assertNumQueries(3):
+            for ordem in OrdemServico.objects.with_list_annotations():
+                for lancamento in ordem.lancamentos.all():
+                    lancamento.subcategoria.nome
+                    lancamento.categoria.nome
+                for transfer_ordem in ordem.transfers.all():
+                    transfer_ordem.nome_exibicao
+                ordem.criado_por.username
+
+    def _queries_da_listagem(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(reverse('servicos:ordem_servico_list'))
+        self.assertEqual(response.status_code, 200)
+        return len(contexto.captured_queries)
+
+    def test_listagem_com_queries_constantes(self):
+        self.criar_ordens(2)
+        # Primeira requisição aquece caches de processo (SMTP, content types)
+        self._queries_da_listagem()
+        queries_poucas_ordens = self._queries_da_listagem()
+
+        self.criar_ordens(30)
+        queries_muitas_ordens = self._queries_da_listagem()
+
+        self.assertEqual(queries_poucas_ordens, queries_muitas_ordens)
+
+
+class SchemaCapabilitiesTests(TestCase):
+
+    def test_flags_sem_query_apos_primeiro_uso(self):
+        capabilities.invalidate()
+        self.assertTrue(capabilities.transfer_nome_personalizado)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(capabilities.transfer_nome_personalizado)
+            self.assertTrue(capabilities.transfer_data_transfer)
+
+    def test_post_migrate_invalida_cache(self):
+        from django.db.models.signals import post_migrate
+        from django.apps import apps
+
+        capabilities.as_dict()
+        post_migrate.send(sender=apps.get_app_config('servicos'), app_config=apps.get_app_config('servicos'))
+        self.assertIsNone(capabilities._flags)
+
+    def test_flag_desconhecida(self):
+        with self.assertRaises(AttributeError):
+            capabilities.coluna_inexistente
+
+
+class OrdemServicoResumoTests(OrdemServicoFixturesMixin, TestCase):
+
+    def test_resumo_mantido_pelos_signals(self):
+        ordem, = self.criar_ordens(1, lancamentos_por_ordem=2, transfers_por_ordem=1)
+        outra_categoria = Categoria.objects.create(nome='Passeios')
+        outro_servico = SubCategoria.objects.create(categoria=outra_categoria, nome='Macuco Safari')
+        LancamentoServico.objects.create(
+            ordem_servico=ordem,
+            data_servico=date(2025, 1, 15),
+            categoria=outra_categoria,
+            subcategoria=outro_servico,
+            qtd_inteira=1,
+        )
+
+        ordem.refresh_from_db()
+        self.assertEqual(ordem.primeira_data_servico, date(2025, 1, 10))
+        self.assertEqual(ordem.ultima_data_servico, date(2025, 1, 15))
+        self.assertEqual(ordem.num_lancamentos, 3)
+        self.assertEqual(ordem.num_transfers, 1)
+        self.assertEqual(set(ordem.categorias.values_list('pk', flat=True)), {self.categoria.pk, outra_categoria.pk})
+
+        ordem.lancamentos.filter(subcategoria=outro_servico).delete()
+        ordem.transfers.all().delete()
+        ordem.refresh_from_db()
+        self.assertEqual(ordem.ultima_data_servico, date(2025, 1, 10))
+        self.assertEqual(ordem.num_lancamentos, 2)
+        self.assertEqual(ordem.num_transfers, 0)
+        self.assertEqual(set(ordem.categorias.values_list('pk', flat=True)), {self.categoria.pk})
+
+    def test_save_da_os_nao_sobrescreve_resumo(self):
+        ordem = OrdemServico.objects.create(criado_por=self.user)
+        LancamentoServico.objects.create(
+            ordem_servico=ordem,
+            data_servico=date(2025, 1, 10),
+            categoria=self.categoria,
+            subcategoria=self.subcategoria,
+            qtd_inteira=1,
+        )
+        ordem.hospedagem = 'Hotel Cataratas'
+        ordem.save()
+
+        ordem.refresh_from_db()
+        self.assertEqual(ordem.num_lancamentos, 1)
+        self.assertEqual(ordem.hospedagem, 'Hotel Cataratas')
+
+    def test_save_completo_grava_so_o_resumo_alterado_pelo_chamador(self):
+        ordem = OrdemServico.objects.get(pk=OrdemServico.objects.create(criado_por=self.user).pk)
+        LancamentoServico.objects.create(
+            ordem_servico=ordem,
+            data_servico=date(2025, 1, 10),
+            categoria=self.categoria,
+            subcategoria=self.subcategoria,
+            qtd_inteira=1,
+        )
+        # Instância carregada antes do lançamento: o resumo em memória está velho
+        ordem.hospedagem = 'Hotel Cataratas'
+        ordem.save()
+        ordem.refresh_from_db()
+        self.assertEqual((ordem.num_lancamentos, ordem.primeira_data_servico), (1, date(2025, 1, 10)))
+
+        ordem.num_transfers = 4
+        ordem.save()
+
+        ordem.refresh_from_db()
+        self.assertEqual((ordem.num_lancamentos, ordem.num_transfers), (1, 4))
+
+    def test_filtros_da_listagem_usam_resumo(self):
+        ordem, = self.criar_ordens(1)
+        self.client.force_login(self.user)
+        url = reverse('servicos:ordem_servico_list')
+
+        response = self.client.get(url, {'categoria': self.categoria.pk, 'data_inicio': '2025-01-10', 'data_fim': '2025-01-10'})
+        self.assertEqual([o.pk for o in response.context['ordens']], [ordem.pk])
+
+        response = self.client.get(url, {'data_inicio': '2025-01-11'})
+        self.assertEqual(len(response.context['ordens']), 0)
+
+    def test_comando_verifica_e_corrige_resumo(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        ordem, = self.criar_ordens(1)
+        OrdemServico.objects.filter(pk=ordem.pk).update(num_lancamentos=0)
+        ordem.categorias.clear()
+
+        with self.assertRaises(CommandError):
+            call_command('atualizar_resumo_os', '--verificar', stdout=StringIO())
+
+        call_command('atualizar_resumo_os', stdout=StringIO())
+        call_command('atualizar_resumo_os', '--verificar', stdout=StringIO())
+        ordem.refresh_from_db()
+        self.assertEqual(ordem.num_lancamentos, 2)
+        self.assertEqual(list(ordem.categorias.values_list('pk', flat=True)), [self.categoria.pk])
+
+
+class OrdemServicoWriterTests(OrdemServicoFixturesMixin, TestCase):
+
+    def payload(self, qtd_lancamentos, transfer_id=None):
+        servicos = [
+            {
+                'servico_id': self.subcategoria.pk,
+                'categoria_id': self.categoria.pk,
+                'data': f'2025-01-{(i % 28) + 1:02d}',
+                'qtd_inteira': 2,
+                'qtd_meia': 1,
+            }
+            for i in range(qtd_lancamentos)
+        ]
+        servicos.append({
+            '__transfer_avulso': True,
+            'transfers': [{'transfer_id': transfer_id or self.transfer.pk, 'valor': 0, 'data_transfer': '2025-01-01'}],
+        })
+        return servicos
+
+    def test_grava_itens_em_lote_com_numero_fixo_de_queries(self):
+        ordem = OrdemServico(criado_por=self.user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            OrdemServicoWriter(ordem, user=self.user).salvar(self.payload(60))
+
+        # Savepoints não contam; no SQLite o bulk_create pode ser dividido em lotes
+        # e a primeira OS do ano ainda cria a sequência de numeração. O resumo
+        # lê e grava a tabela de ligação das categorias (2 queries)
+        auditoria = [q['sql'] for q in ctx.captured_queries if 'audit_system_auditlog' in q['sql']]
+        queries = [
+            q for q in ctx.captured_queries
+            if 'SAVEPOINT' not in q['sql'] and q['sql'] not in auditoria and 'django_content_type' not in q['sql']
+        ]
+        self.assertLessEqual(len(queries), 18)
+        # Fora de uma requisição o log de auditoria (um só, com os itens) é gravado na hora
+        self.assertEqual(len(auditoria), 1)
+        ordem.refresh_from_db()
+        self.assertEqual(ordem.num_lancamentos, 60)
+        self.assertEqual(ordem.num_transfers, 1)
+        self.assertEqual(ordem.valor_total, Decimal('250.00') * 60 + Decimal('80.00'))
+        lancamento = ordem.lancamentos.first()
+        self.assertEqual(lancamento.valor_unit_inteira, Decimal('100.00'))
+        self.assertEqual(lancamento.criado_por, self.user)
+
+    def test_edicao_substitui_itens(self):
+        ordem = self.criar_ordens(1, lancamentos_por_ordem=5)[0]
+
+        OrdemServicoWriter(ordem, user=self.user).salvar(self.payload(2))
+
+        ordem.refresh_from_db()
+        self.assertEqual(ordem.lancamentos.count(), 2)
+        self.assertEqual(ordem.num_lancamentos, 2)
+        self.assertEqual(ordem.valor_total, Decimal('580.00'))
+
+    def test_transfer_inexistente_nao_grava_nada(self):
+        ordem = OrdemServico(criado_por=self.user)
+
+        with self.assertRaises(PayloadOrdemServicoInvalido) as ctx:
+            OrdemServicoWriter(ordem, user=self.user).salvar(self.payload(3, transfer_id=999999))
+
+        self.assertEqual(ctx.exception.as_json(), {'error': 'Transfer não encontrado', 'transfer_id': 999999})
+        self.assertFalse(OrdemServico.objects.exists())
+        self.assertFalse(LancamentoServico.objects.exists())
+
+    def test_edicao_com_transfer_inexistente_preserva_itens(self):
+        ordem = self.criar_ordens(1, lancamentos_por_ordem=3)[0]
+        self.client.force_login(self.user)
+
+        response = self.client.post(
+            reverse('servicos:ordem_servico_edit', args=[ordem.pk]),
+            data=json.dumps({'clientes': 'Fulano', 'servicos': self.payload(1, transfer_id=999999)}),
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['transfer_id'], 999999)
+        self.assertEqual(ordem.lancamentos.count(), 3)
+        self.assertEqual(ordem.transfers.count(), 1)
+
+
+class OrdemServicoWriterDiffTests(OrdemServicoFixturesMixin, TestCase):
+    """Edição da OS aplica apenas a diferença entre o payload e os itens gravados"""
+
+    def setUp(self):
+        self.ordem = self.criar_ordens(1, lancamentos_por_ordem=3, transfers_por_ordem=1)[0]
+
+    def payload_atual(self):
+        servicos = [
+            {
+                'id': l.pk,
+                'servico_id': l.subcategoria_id,
+                'categoria_id': str(l.categoria_id),
+                'data': l.data_servico.isoformat(),
+                'qtd_inteira': l.qtd_inteira,
+                'qtd_meia': l.qtd_meia,
+                'qtd_infantil': l.qtd_infantil,
+            }
+            for l in self.ordem.lancamentos.order_by('pk')
+        ]
+        for t in self.ordem.transfers.all():
+            servicos.append({
+                'id': f'transfer_avulso_{t.pk}',
+                '__transfer_avulso': True,
+                'transfers': [{'transfer_id': str(t.transfer_id), 'valor': float(t.valor)}],
+            })
+        return servicos
+
+    def escritas_em_itens(self, ctx):
+        tabelas = ('servicos_lancamentoservico', 'servicos_transferordemservico')
+        return [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE')) and any(t in q['sql'] for t in tabelas)
+        ]
+
+    def test_payload_inalterado_nao_grava_itens(self):
+        ids = set(self.ordem.lancamentos.values_list('pk', flat=True))
+
+        with CaptureQueriesContext(connection) as ctx:
+            OrdemServicoWriter(self.ordem, user=self.user).salvar(self.payload_atual())
+
+        self.assertEqual(self.escritas_em_itens(ctx), [])
+        self.assertEqual(set(self.ordem.lancamentos.values_list('pk', flat=True)), ids)
+
+    def test_alteracao_pontual_atualiza_apenas_o_item(self):
+        servicos = self.payload_atual()
+        servicos[0]['qtd_inteira'] = 5
+        alterado_id = servicos[0]['id']
+
+        with CaptureQueriesContext(connection) as ctx:
+            OrdemServicoWriter(self.ordem, user=self.user).salvar(servicos)
+
+        escritas = self.escritas_em_itens(ctx)
+        self.assertEqual(len(escritas), 1)
+        self.assertTrue(escritas[0].startswith('UPDATE'))
+        self.assertEqual(LancamentoServico.objects.get(pk=alterado_id).qtd_inteira, 5)
+        self.ordem.refresh_from_db()
+        self.assertEqual(self.ordem.valor_total, Decimal('980.00'))
+
+    def test_insere_novos_e_remove_ausentes_preservando_ids(self):
+        servicos = self.payload_atual()
+        removido_id = servicos.pop(1)['id']
+        mantidos = {servicos[0]['id'], servicos[1]['id']}
+        servicos.insert(0, {
+            'id': 1700000000000,  # id temporário gerado pelo formulário
+            'servico_id': self.subcategoria.pk,
+            'categoria_id': self.categoria.pk,
+            'data': '2025-02-01',
+            'qtd_inteira': 1,
+        })
+        transfer_id = self.ordem.transfers.get().pk
+        servicos[-1]['transfers'][0]['valor'] = 90
+
+        OrdemServicoWriter(self.ordem, user=self.user).salvar(servicos)
+
+        ids = set(self.ordem.lancamentos.values_list('pk', flat=True))
+        self.assertEqual(len(ids), 3)
+        self.assertTrue(mantidos <= ids)
+        self.assertNotIn(removido_id, ids)
+        self.assertEqual(self.ordem.transfers.get().pk, transfer_id)
+        self.assertEqual(self.ordem.transfers.get().valor, Decimal('90.00'))
+        self.ordem.refresh_from_db()
+        self.assertEqual(self.ordem.num_lancamentos, 3)
+        self.assertEqual(self.ordem.ultima_data_servico, date(2025, 2, 1))
+
+    def test_troca_de_servico_atualiza_snapshot_de_valores(self):
+        outro = SubCategoria.objects.create(
+            categoria=self.categoria, nome='Macuco Safari',
+            valor_inteira=Decimal('300.00'), valor_meia=Decimal('150.00'), valor_infantil=Decimal('75.00'),
+        )
+        SubCategoria.objects.filter(pk=self.subcategoria.pk).update(valor_inteira=Decimal('999.00'))
+        servicos = self.payload_atual()
+        servicos[0]['servico_id'] = outro.pk
+
+        OrdemServicoWriter(self.ordem, user=self.user).salvar(servicos)
+
+        valores = dict(self.ordem.lancamentos.values_list('subcategoria_id', 'valor_unit_inteira').distinct())
+        # Itens sem troca mantêm o valor do momento do lançamento
+        self.assertEqual(valores, {outro.pk: Decimal('300.00'), self.subcategoria.pk: Decimal('100.00')})
+
+    def test_item_alterado_mantem_valores_gravados_e_novo_usa_o_catalogo(self):
+        SubCategoria.objects.filter(pk=self.subcategoria.pk).update(
+            valor_inteira=Decimal('999.00'), valor_meia=Decimal('500.00'),
+        )
+        servicos = self.payload_atual()
+        servicos[0]['qtd_inteira'] = 3
+        alterado_id = servicos[0]['id']
+        servicos.append({
+            'servico_id': self.subcategoria.pk,
+            'categoria_id': self.categoria.pk,
+            'data': '2025-02-01',
+            'qtd_inteira': 1,
+        })
+
+        OrdemServicoWriter(self.ordem, user=self.user).salvar(servicos)
+
+        alterado = LancamentoServico.objects.get(pk=alterado_id)
+        self.assertEqual(alterado.qtd_inteira, 3)
+        self.assertEqual((alterado.valor_unit_inteira, alterado.valor_unit_meia), (Decimal('100.00'), Decimal('50.00')))
+        novo = self.ordem.lancamentos.get(data_servico=date(2025, 2, 1))
+        self.assertEqual(novo.valor_unit_inteira, Decimal('999.00'))
+        # O total usa os valores gravados de cada item
+        self.ordem.refresh_from_db()
+        self.assertEqual(
+            self.ordem.valor_total,
+            sum(l.valor_total for l in self.ordem.lancamentos.all()) + sum(t.valor for t in self.ordem.transfers.all()),
+        )
+        self.assertNotIn(Decimal('999.00'), set(
+            self.ordem.lancamentos.exclude(pk=novo.pk).values_list('valor_unit_inteira', flat=True)
+        ))
+
+
+class AuditoriaOrdemServicoTests(OrdemServicoFixturesMixin, TestCase):
+    """Alterações da OS e dos itens registradas pela auditoria (audit_system/registry.py)"""
+
+    payload_atual = OrdemServicoWriterDiffTests.payload_atual
+
+    def setUp(self):
+        self.ordem = self.criar_ordens(1, lancamentos_por_ordem=2, transfers_por_ordem=1)[0]
+        self.ordem = OrdemServico.objects.get(pk=self.ordem.pk)
+        AuditLog.objects.all().delete()
+
+    def test_edicao_gera_um_unico_log_com_os_itens(self):
+        servicos = self.payload_atual()
+        servicos[0]['qtd_inteira'] = 5
+        alterado_id = servicos[0]['id']
+        removido_id = servicos.pop(1)['id']
+        self.client.force_login(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('servicos:ordem_servico_edit', args=[self.ordem.pk]),
+                data=json.dumps({'clientes': 'Fulano', 'servicos': servicos}),
+                content_type='application/json',
+            )
+
+        self.assertEqual(response.status_code, 200)
+        log = AuditLog.objects.exclude(action='USER_LOGIN').get()
+        self.assertEqual(log.action, 'OBJECT_UPDATED')
+        self.assertEqual(log.object_id, str(self.ordem.pk))
+        self.assertEqual(log.object_repr, f'OS {self.ordem.numero_os}')
+        self.assertEqual(log.user, self.user)
+        self.assertEqual(log.changes['clientes'], {'old': '', 'new': 'Fulano'})
+        self.assertEqual(
+            log.changes[f'Lançamento de Serviço #{alterado_id} qtd_inteira'], {'old': '2', 'new': '5'}
+        )
+        self.assertEqual(log.changes[f'Lançamento de Serviço #{removido_id}'], {'old': 'removido', 'new': None})
+        self.assertIn('valor_total', log.changes)
+
+    def test_edicao_sem_alteracoes_nao_gera_log(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            OrdemServicoWriter(self.ordem, user=self.user).salvar(self.payload_atual())
+
+        self.assertFalse(AuditLog.objects.exists())
+
+    def test_exclusao_da_os_nao_registra_os_itens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ordem.delete()
+
+        self.assertEqual(list(AuditLog.objects.values_list('action', flat=True)), ['OBJECT_DELETED'])
+
+    def test_alteracao_de_preco_do_catalogo(self):
+        subcategoria = SubCategoria.objects.get(pk=self.subcategoria.pk)
+        subcategoria.valor_inteira = Decimal('120.00')
+        subcategoria.descricao = 'Não auditado'
+        with self.captureOnCommitCallbacks(execute=True):
+            subcategoria.save()
+
+        log = AuditLog.objects.get()
+        self.assertEqual(log.object_repr, 'Cataratas BR')
+        self.assertEqual(log.changes, {'valor_inteira': {'old': '100.00', 'new': '120.00'}})
+
+
+class NumeracaoOrdemServicoTests(TestCase):
+
+    def test_numeros_sequenciais_por_ano(self):
+        ano = timezone.now().year
+        primeira = OrdemServico.objects.create()
+        segunda = OrdemServico.objects.create()
+
+        self.assertEqual(primeira.numero_os, f'{ano}-00001')
+        self.assertEqual(segunda.numero_os, f'{ano}-00002')
+        self.assertEqual(SequenciaOrdemServico.objects.get(ano=ano).ultimo_numero, 2)
+
+    def test_sequencia_nova_continua_a_partir_das_os_existentes(self):
+        OrdemServico.objects.create(numero_os='2031-00041')
+
+        self.assertEqual(proximo_numero_os(2031), '2031-00042')
+
+    def test_criacao_nao_varre_as_os_existentes(self):
+        OrdemServico.objects.create()
+
+        with CaptureQueriesContext(connection) as ctx:
+            OrdemServico.objects.create()
+
+        self.assertFalse(any('LIKE' in q['sql'] for q in ctx.captured_queries))
+
+    def test_reserva_de_bloco(self):
+        bloco = reservar_bloco_os(3, ano=2032)
+
+        self.assertEqual(bloco, ['2032-00001', '2032-00002', '2032-00003'])
+        self.assertEqual(proximo_numero_os(2032), '2032-00004')
+
+    def test_numero_volta_para_a_sequencia_se_a_transacao_falhar(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            proximo_numero_os(2033)
+            raise RuntimeError
+
+        self.assertEqual(proximo_numero_os(2033), '2033-00001')
+
+
+class NumeracaoConcorrenteTests(TransactionTestCase):
+    """Estresse com alocadores concorrentes: números únicos, lacunas toleradas"""
+
+    def test_threads_concorrentes_nao_repetem_numeros(self):
+        numeros = executar_estresse(2040, threads=8, por_worker=25)
+
+        self.assertEqual(len(numeros), 200)
+        self.assertEqual(len(set(numeros)), 200)
+
+    def test_blocos_concorrentes_nao_se_sobrepoem(self):
+        numeros = executar_estresse(2041, threads=6, por_worker=10, bloco=5)
+
+        self.assertEqual(len(set(numeros)), 300)
+
+    def test_processos_concorrentes_nao_repetem_numeros(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Processos não compartilham o banco SQLite em memória dos testes')
+        numeros = executar_estresse(2042, threads=4, processos=3, por_worker=20)
+
+        self.assertEqual(len(set(numeros)), 240)
+
+
+class PrecificacaoTests(OrdemServicoFixturesMixin, TestCase):
+
+    def lancamento(self, subcategoria=None, **campos):
+        subcategoria = subcategoria or self.subcategoria
+        campos.setdefault('valor_unit_inteira', subcategoria.valor_inteira)
+        campos.setdefault('valor_unit_meia', subcategoria.valor_meia)
+        campos.setdefault('valor_unit_infantil', subcategoria.valor_infantil)
+        return LancamentoServico(subcategoria=subcategoria, categoria=self.categoria, **campos)
+
+    def test_classifica_criancas_em_isenta_infantil_e_inteira(self):
+        servico = SubCategoria.objects.create(
+            categoria=self.categoria, nome='Parque das Aves',
+            valor_inteira=Decimal('100.00'), valor_meia=Decimal('50.00'), valor_infantil=Decimal('30.00'),
+            possui_isencao=True, idade_isencao_min=0, idade_isencao_max=4,
+            idade_minima_infantil=5, idade_maxima_infantil=11,
+        )
+        lancamento = self.lancamento(servico, qtd_inteira=2, qtd_infantil=3, idades_criancas=[3, 8, 14])
+
+        resultado = calcular_lote([lancamento])[0]
+
+        self.assertEqual((resultado.isentas, resultado.pagam_infantil, resultado.pagam_inteira), (1, 1, 1))
+        self.assertEqual(resultado.valor_total, Decimal('330.00'))
+        self.assertEqual(lancamento.valor_total, Decimal('330.00'))
+        self.assertEqual(lancamento.qtd_infantil_isentas, 1)
+        self.assertEqual(lancamento.qtd_infantil_pagas, 2)
+
+    def test_servico_sem_infantil_cobra_inteira_das_nao_isentas(self):
+        servico = SubCategoria.objects.create(
+            categoria=self.categoria, nome='Helicóptero',
+            valor_inteira=Decimal('500.00'), permite_infantil=False,
+            idade_isencao_min=0, idade_isencao_max=2,
+        )
+        lancamento = self.lancamento(servico, qtd_infantil=3, idades_criancas=[1, 9])
+
+        self.assertEqual(lancamento.qtd_infantil_pagam_inteira, 2)
+        self.assertEqual(lancamento.qtd_infantil_pagam_infantil, 0)
+        self.assertEqual(lancamento.valor_total, Decimal('1000.00'))
+
+    def test_lote_equivale_as_regras_antigas(self):
+        lancamentos = gerar_lancamentos(2000, servicos=20, semente=7)
+
+        totais = [resultado.valor_total for resultado in calcular_lote(lancamentos)]
+
+        self.assertEqual(totais, [_LancamentoLegado(l).valor_total for l in lancamentos])
+
+    def test_calcular_total_com_numero_fixo_de_queries(self):
+        ordem = self.criar_ordens(1, lancamentos_por_ordem=10)[0]
+
+        with self.assertNumQueries(3):
+            ordem.calcular_total()
+
+        self.assertEqual(ordem.valor_total, Decimal('2080.00'))
+
+
+class IdadesCriancasTests(OrdemServicoFixturesMixin, TestCase):
+
+    def setUp(self):
+        self.servico = SubCategoria.objects.create(
+            categoria=self.categoria, nome='Arvorismo',
+            valor_inteira=Decimal('120.00'), valor_infantil=Decimal('60.00'),
+            tem_idade_minima=True, idade_minima=6,
+        )
+
+    def lancamento(self, idades):
+        return LancamentoServico(
+            data_servico=date(2025, 1, 10), categoria=self.categoria, subcategoria=self.servico,
+            qtd_infantil=len(idades), idades_criancas=idades,
+        )
+
+    def test_clean_valida_idade_minima_do_servico(self):
+        with self.assertRaises(ValidationError) as ctx:
+            self.lancamento([8, 4]).clean()
+
+        self.assertIn('idade mínima de 6 anos', str(ctx.exception))
+        self.lancamento([8, 6]).clean()
+
+    def test_idades_gravadas_como_lista(self):
+        ordem = OrdemServico(criado_por=self.user)
+        OrdemServicoWriter(ordem, user=self.user).salvar([{
+            'servico_id': self.servico.pk,
+            'categoria_id': self.categoria.pk,
+            'data': '2025-01-10',
+            'qtd_infantil': 2,
+            'idades': ['7', 9],
+        }])
+
+        lancamento = LancamentoServico.objects.get(ordem_servico=ordem)
+        self.assertEqual(lancamento.idades_criancas, [7, 9])
+        self.assertEqual(lancamento.valor_total, Decimal('120.00'))
+
+
+class MigracaoIdadesCriancasTests(TestCase):
+
+    def test_texto_fora_do_formato_nao_perde_as_idades(self):
+        from importlib import import_module
+        para_lista = import_module('servicos.migrations.0019_idades_criancas_json')._para_lista
+
+        self.assertEqual(para_lista('3, 5'), ([3, 5], True))
+        self.assertEqual(para_lista('[3, 5]'), ([3, 5], True))
+        self.assertEqual(para_lista(''), ([], True))
+        # Extraídas do texto e marcadas para conferência
+        self.assertEqual(para_lista('3 anos'), ([3], False))
+        self.assertEqual(para_lista('3;5'), ([3, 5], False))
+        self.assertEqual(para_lista('["3 anos"]'), ([3], False))
+        self.assertEqual(para_lista('não informado'), ([], False))
+
+
+class RoteiroCacheTests(OrdemServicoFixturesMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.ordem = self.criar_ordens(1, lancamentos_por_ordem=2)[0]
+        self.client.force_login(self.user)
+        self.url = reverse('servicos:ordem_servico_detail', args=[self.ordem.pk])
+
+    def test_segunda_visualizacao_usa_o_cache(self):
+        self.client.get(self.url)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+
+        self.assertContains(response, 'ROTEIRO')
+        self.assertFalse(any('servicos_transferordemservico' in q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(estatisticas_cache_roteiro()['acertos'], 1)
+        self.assertEqual(estatisticas_cache_roteiro()['falhas'], 1)
+
+    def test_alteracao_de_item_invalida_o_roteiro(self):
+        antes, _ = obter_roteiro(self.ordem, lambda ordem: ('v1', []))
+
+        lancamento = self.ordem.lancamentos.first()
+        lancamento.qtd_inteira = 9
+        lancamento.save()
+
+        self.ordem.refresh_from_db()
+        depois, _ = obter_roteiro(self.ordem, lambda ordem: ('v2', []))
+        self.assertEqual((antes, depois), ('v1', 'v2'))
+
+    def test_writer_invalida_o_roteiro(self):
+        obter_roteiro(self.ordem, lambda ordem: ('v1', []))
+
+        OrdemServicoWriter(self.ordem, user=self.user).salvar([])
+
+        self.ordem.refresh_from_db()
+        self.assertEqual(obter_roteiro(self.ordem, lambda ordem: ('v2', [])), ('v2', []))
+
+    def test_alteracao_do_catalogo_invalida_o_roteiro(self):
+        obter_roteiro(self.ordem, lambda ordem: ('v1', []))
+
+        self.subcategoria.descricao = 'Novo ponto de encontro'
+        self.subcategoria.save()
+
+        self.ordem.refresh_from_db()
+        self.assertEqual(obter_roteiro(self.ordem, lambda ordem: ('v2', [])), ('v2', []))
+
+    def test_alteracao_em_outro_processo_invalida_o_roteiro(self):
+        # Cada worker do gunicorn tem o seu LocMemCache
+        obter_roteiro(self.ordem, lambda ordem: ('v1', []))
+
+        with override_settings(CACHES=CACHE_OUTRO_WORKER):
+            lancamento = self.ordem.lancamentos.first()
+            lancamento.qtd_inteira = 9
+            lancamento.save()
+
+        self.ordem.refresh_from_db()
+        self.assertEqual(obter_roteiro(self.ordem, lambda ordem: ('v2', [])), ('v2', []))
+
+    def test_estatisticas_apenas_para_equipe(self):
+        url = reverse('servicos:roteiro_cache_stats')
+        comum = User.objects.create_user('agente', password='senha-forte-123')
+
+        self.assertEqual(self.client.get(url).json()['falhas'], 0)
+        self.client.force_login(comum)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+
+class RoteiroTests(OrdemServicoFixturesMixin, TestCase):
+
+    def setUp(self):
+        self.ordem = criar_ordem_sintetica(dias=5, itens=20, transfers=5)
+
+    def test_preview_identico_ao_formato_antigo(self):
+        self.assertEqual(renderizar(self.ordem, 'whatsapp'), _preview_legado(self.ordem))
+
+    def test_texto_tem_as_mesmas_linhas_do_formato_antigo(self):
+        texto = OrdemServico.objects.get(pk=self.ordem.pk).gerar_roteiro()
+
+        self.assertEqual(sorted(texto.split('\n')), sorted(_texto_legado(self.ordem).split('\n')))
+
+    def test_modelo_reaproveitado_entre_formatos(self):
+        ordem = OrdemServico.objects.get(pk=self.ordem.pk)
+
+        with self.assertNumQueries(2):
+            for formato in RENDERIZADORES:
+                renderizar(ordem, formato)
+
+        dados = renderizar(ordem, 'json')
+        self.assertEqual(len(dados['dias']), 5)
+        self.assertEqual(Decimal(str(dados['total'])), itinerario_da_ordem(ordem).total)
+
+    def test_html_escapa_textos(self):
+        LancamentoServico.objects.create(
+            ordem_servico=self.ordem, data_servico=date(2030, 1, 1), categoria=self.categoria,
+            subcategoria=self.subcategoria, qtd_inteira=1, obs_publica='<b>VIP</b>',
+        )
+
+        html = renderizar(OrdemServico.objects.get(pk=self.ordem.pk), 'html')
+
+        self.assertIn('&lt;b&gt;VIP&lt;/b&gt;', html)
+        self.assertNotIn('<b>VIP</b>', html)
+
+
+class EditorPayloadTests(OrdemServicoFixturesMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.ordem = self.criar_ordens(1, lancamentos_por_ordem=5, transfers_por_ordem=2)[0]
+        self.client.force_login(self.user)
+        self.url = reverse('servicos:ordem_servico_editor_payload', args=[self.ordem.pk])
+
+    def _queries_servicos(self, ctx):
+        # A leitura da revisão do catálogo faz parte do ETag, não do payload
+        return [
+            q for q in ctx.captured_queries
+            if 'servicos_' in q['sql'] and 'servicos_revisaocatalogo' not in q['sql']
+        ]
+
+    def test_payload_em_no_maximo_tres_queries(self):
+        LancamentoServico.objects.filter(ordem_servico=self.ordem).update(tipos_meia_entrada='Estudante')
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+
+        dados = response.json()
+        self.assertLessEqual(len(self._queries_servicos(ctx)), 3)
+        self.assertEqual(len(dados['lancamentos']), 7)
+        self.assertEqual(len(dados['transfers']), 2 if capabilities.transfer_nome_personalizado else 0)
+        self.assertIn('ROTEIRO', dados['roteiro'])
+        self.assertEqual(dados['lancamentos'][0]['tipos_meia'][0]['tipo'], 'Estudante')
+
+    def test_if_none_match_retorna_304_sem_consultar_itens(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any(
+            'servicos_lancamentoservico' in q['sql'] or 'servicos_transferordemservico' in q['sql']
+            for q in ctx.captured_queries
+        ))
+
+    def test_alteracao_de_item_muda_o_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lancamento = self.ordem.lancamentos.first()
+            lancamento.qtd_inteira = 9
+            lancamento.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_alteracao_em_outro_processo_muda_o_etag(self):
+        # O worker que respondeu antes não participa da edição (caches separados)
+        etag = self.client.get(self.url)['ETag']
+
+        with override_settings(CACHES=CACHE_OUTRO_WORKER):
+            lancamento = self.ordem.lancamentos.first()
+            lancamento.qtd_inteira = 9
+            lancamento.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['lancamentos'][0]['qtd_inteira'], 9)
+
+    def test_pagina_de_edicao_nao_embute_os_itens(self):
+        response = self.client.get(reverse('servicos:ordem_servico_edit', args=[self.ordem.pk]))
+
+        self.assertContains(response, self.url)
+        self.assertNotContains(response, 'transfer_avulso_')
+
+    def test_os_inexistente(self):
+        url = reverse('servicos:ordem_servico_editor_payload', args=[self.ordem.pk + 1000])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class CatalogoTests(OrdemServicoFixturesMixin, TestCase):
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse('servicos:catalogo_json')
+
+    def test_catalogo_completo_em_uma_resposta(self):
+        SubCategoria.objects.create(categoria=self.categoria, nome='Inativo', ativo=False)
+
+        dados = self.client.get(self.url).json()
+
+        self.assertEqual(dados['revisao'], revisao_atual())
+        self.assertEqual([c['nome'] for c in dados['categorias']], ['Atrativos'])
+        self.assertEqual([s['nome'] for s in dados['servicos']], ['Cataratas BR'])
+        self.assertEqual(dados['servicos'][0]['valor_inteira'], 100.0)
+        self.assertEqual(dados['servicos'][0]['categoria_nome'], 'Atrativos')
+        self.assertEqual([t['nome'] for t in dados['transfers']], ['Aeroporto x Hotel'])
+
+    def test_alteracoes_do_catalogo_avancam_a_revisao(self):
+        revisao = revisao_atual()
+
+        self.subcategoria.valor_inteira = Decimal('120.00')
+        self.subcategoria.save()
+        self.assertEqual(revisao_atual(), revisao + 1)
+
+        self.transfer.delete()
+        self.assertEqual(revisao_atual(), revisao + 2)
+
+    def test_revisao_desfeita_junto_com_a_transacao(self):
+        revisao = revisao_atual()
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Categoria.objects.create(nome='Passeios')
+            raise RuntimeError
+
+        self.assertEqual(revisao_atual(), revisao)
+
+    def test_url_versionada_tem_cache_longo_e_etag(self):
+        revisao = revisao_atual()
+
+        response = self.client.get(self.url, {'v': revisao})
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('no-cache', self.client.get(self.url)['Cache-Control'])
+
+        response = self.client.get(self.url, {'v': revisao}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_formulario_informa_a_revisao(self):
+        response = self.client.get(reverse('servicos:ordem_servico_create'))
+
+        self.assertContains(response, f'"catalogoRevisao": {revisao_atual()}')
+
+
+class CatalogoSnapshotTests(OrdemServicoFixturesMixin, TestCase):
+
+    def setUp(self):
+        cache_catalogo.limpar()
+
+    def test_snapshot_reaproveitado_enquanto_a_revisao_nao_muda(self):
+        primeiro = catalogo()
+
+        # Dentro de transação só a revisão é conferida
+        with self.assertNumQueries(1):
+            self.assertIs(catalogo(), primeiro)
+
+        self.subcategoria.nome = 'Cataratas Lado Brasileiro'
+        self.subcategoria.save()
+
+        atualizado = catalogo()
+        self.assertIsNot(atualizado, primeiro)
+        self.assertEqual(atualizado.servico(self.subcategoria.pk).nome, 'Cataratas Lado Brasileiro')
+
+    def test_snapshots_sao_imutaveis(self):
+        servico = catalogo().servico(self.subcategoria.pk)
+
+        with self.assertRaises(AttributeError):
+            servico.nome = 'Outro'
+        self.assertEqual(str(servico), 'Atrativos - Cataratas BR')
+
+    def test_ajax_le_do_snapshot(self):
+        self.client.force_login(self.user)
+        catalogo()
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('servicos:ajax_get_servico_info'), {'servico_id': self.subcategoria.pk})
+
+        self.assertEqual(response.json()['valor_inteira'], 100.0)
+        self.assertFalse(any('servicos_subcategoria' in q['sql'] for q in ctx.captured_queries))
+
+    def test_indicador_no_admin(self):
+        self.client.force_login(self.user)
+        catalogo()
+
+        response = self.client.get(reverse('admin:servicos_revisaocatalogo_changelist'))
+
+        self.assertContains(response, 'Revisão em memória')
+
+
+class CatalogoIntervaloTests(TransactionTestCase):
+
+    def setUp(self):
+        cache_catalogo.limpar()
+
+    def test_fora_de_transacao_confere_a_revisao_por_intervalo(self):
+        primeiro = catalogo()
+
+        with self.assertNumQueries(0):
+            self.assertIs(catalogo(), primeiro)
+
+        Categoria.objects.create(nome='Passeios')
+        self.assertEqual([c.nome for c in catalogo().categorias_ativas()], ['Passeios'])
+
+
+class ImportarCatalogoTests(TestCase):
+    CSV = (
+        'categoria,nome,valor_inteira,valor_meia,aceita_meia_entrada,texto_isencao,possui_isencao\n'
+        'Atrativos,CATARATAS BR,"105,00",0,não,CRIANÇA DE 0 A 6 ANOS,sim\n'
+        'Atrativos,PARQUE DAS AVES,90,45.00,sim,,false\n'
+        'Passeios,Macuco Safari,450.5,225,true,,0\n'
+    )
+
+    def importar(self, conteudo, *args, formato='csv'):
+        from io import StringIO
+        from tempfile import NamedTemporaryFile
+        from django.core.management import call_command
+
+        with NamedTemporaryFile('w', suffix=f'.{formato}', encoding='utf-8', delete=False) as arquivo:
+            arquivo.write(conteudo)
+        self.addCleanup(os.unlink, arquivo.name)
+        saida = StringIO()
+        call_command('importar_catalogo', arquivo.name, *args, stdout=saida, stderr=StringIO())
+        return saida.getvalue()
+
+    def test_cria_e_reimportacao_sem_alteracao_nao_grava(self):
+        revisao = revisao_atual()
+        self.importar(self.CSV)
+
+        cataratas = SubCategoria.objects.get(nome='CATARATAS BR')
+        self.assertEqual(cataratas.categoria.nome, 'Atrativos')
+        self.assertEqual(cataratas.valor_inteira, Decimal('105.00'))
+        self.assertFalse(cataratas.aceita_meia_entrada)
+        self.assertEqual((cataratas.idade_isencao_min, cataratas.idade_isencao_max), (0, 6))
+        self.assertEqual(SubCategoria.objects.count(), 3)
+        self.assertEqual(Categoria.objects.count(), 2)
+        self.assertEqual(revisao_atual(), revisao + 3)  # 2 categorias + 1 importação
+
+        with CaptureQueriesContext(connection) as queries:
+            saida = self.importar(self.CSV)
+        self.assertIn('Sem alteração: 3', saida)
+        self.assertFalse([q for q in queries if q['sql'].startswith(('INSERT', 'UPDATE'))])
+
+    def test_atualiza_so_as_colunas_presentes(self):
+        self.importar(self.CSV)
+        SubCategoria.objects.filter(nome='Macuco Safari').update(descricao='Barco nas cataratas')
+
+        saida = self.importar('categoria,nome,valor_meia\nPasseios,Macuco Safari,200\n')
+
+        macuco = SubCategoria.objects.get(nome='Macuco Safari')
+        self.assertIn('Atualizados: 1', saida)
+        self.assertEqual(macuco.valor_meia, Decimal('200.00'))
+        self.assertEqual(macuco.valor_inteira, Decimal('450.50'))
+        self.assertEqual(macuco.descricao, 'Barco nas cataratas')
+
+    def test_alteracoes_de_preco_vao_para_a_auditoria(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.importar(self.CSV)
+        criados = AuditLog.objects.filter(action='OBJECT_CREATED', object_repr='CATARATAS BR')
+        self.assertEqual(criados.count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.importar('categoria,nome,valor_inteira,descricao\nAtrativos,CATARATAS BR,120,Lado brasileiro\n'
+                          'Atrativos,PARQUE DAS AVES,90,\n')
+
+        cataratas = SubCategoria.objects.get(nome='CATARATAS BR')
+        log = AuditLog.objects.get(action='OBJECT_UPDATED')
+        self.assertEqual((log.object_id, log.object_repr), (str(cataratas.pk), 'CATARATAS BR'))
+        self.assertEqual(log.changes, {'valor_inteira': {'old': '105.00', 'new': '120.00'}})
+
+    def test_dry_run_mostra_as_diferencas_sem_gravar(self):
+        self.importar(self.CSV)
+
+        saida = self.importar(
+            'categoria,nome,valor_inteira\nAtrativos,CATARATAS BR,120\nAtrativos,ITAIPU,80\n', '--dry-run'
+        )
+
+        self.assertIn('+ Atrativos / ITAIPU', saida)
+        self.assertIn("valor_inteira: Decimal('105.00') → Decimal('120.00')", saida)
+        self.assertEqual(SubCategoria.objects.get(nome='CATARATAS BR').valor_inteira, Decimal('105.00'))
+        self.assertFalse(SubCategoria.objects.filter(nome='ITAIPU').exists())
+
+    def test_linha_invalida_desfaz_a_importacao(self):
+        from django.core.management.base import CommandError
+
+        conteudo = self.CSV + 'Passeios,Rafting,-5,0,sim,,0\nPasseios,,10,0,sim,,0\n'
+        with self.assertRaises(CommandError):
+            self.importar(conteudo)
+        self.assertFalse(SubCategoria.objects.exists())
+
+        saida = self.importar(conteudo, '--ignorar-invalidas')
+        self.assertIn('Inválidas: 2', saida)
+        self.assertEqual(SubCategoria.objects.count(), 3)
+
+    def test_json_em_blocos_e_ndjson(self):
+        from io import StringIO
+
+        servicos = [{'nome': f'Serviço {n}', 'valor_inteira': n + 1, 'permite_infantil': n % 2 == 0} for n in range(50)]
+        importador = ImportadorCatalogo(categoria_padrao='Atrativos', tamanho_lote=7)
+        # Blocos pequenos: itens cortados entre leituras do arquivo
+        linhas = enumerate(_ler_array_json(StringIO(json.dumps(servicos, indent=2)), tamanho_bloco=64), 1)
+        resultado = importador.importar(linhas)
+
+        self.assertEqual((resultado.lidas, resultado.criados), (50, 50))
+        self.assertFalse(SubCategoria.objects.get(nome='Serviço 1').permite_infantil)
+
+        ndjson = '\n'.join(json.dumps(servico) for servico in servicos[:3]) + '\n{quebrado\n'
+        resultado = ImportadorCatalogo(categoria_padrao='Atrativos').importar(ler_linhas(StringIO(ndjson), 'ndjson'))
+        self.assertEqual((resultado.inalterados, len(resultado.invalidas)), (3, 1))
+
+    def test_importar_servicos_foz_usa_a_importacao_em_lote(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        call_command('importar_servicos_foz', stdout=StringIO())
+        total = SubCategoria.objects.filter(categoria__nome='Atrativos').count()
+        call_command('importar_servicos_foz', stdout=StringIO())
+
+        self.assertGreater(total, 0)
+        self.assertEqual(SubCategoria.objects.count(), total)
+        cataratas = SubCategoria.objects.get(nome='CATARATAS BR')
+        self.assertEqual(cataratas.texto_isencao, 'CRIANÇA DE 0 A 6 ANOS')
+        self.assertEqual(cataratas.idade_isencao_max, 6)
+
+
+class ImportarCatalogoAuditoriaTests(TransactionTestCase):
+    """Os comandos gravam a auditoria em um único lote depois do commit (TestCase não faz commit)"""
+
+    def test_importar_catalogo_grava_os_logs_em_um_lote(self):
+        from io import StringIO
+        from tempfile import NamedTemporaryFile
+        from django.core.management import call_command
+        from audit_system.writer import gravador
+
+        with NamedTemporaryFile('w', suffix='.csv', encoding='utf-8', delete=False) as arquivo:
+            arquivo.write(ImportarCatalogoTests.CSV)
+        self.addCleanup(os.unlink, arquivo.name)
+
+        with mock.patch.object(gravador, 'gravar', wraps=gravador.gravar) as gravar:
+            call_command('importar_catalogo', arquivo.name, stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual(gravar.call_count, 1)
+        self.assertGreaterEqual(len(gravar.call_args.args[0]), 3)
+        self.assertEqual(AuditLog.objects.count(), len(gravar.call_args.args[0]))
+
+    def test_importar_servicos_foz_grava_os_logs_em_um_lote(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from audit_system.writer import gravador
+
+        with mock.patch.object(gravador, 'gravar', wraps=gravador.gravar) as gravar:
+            call_command('importar_servicos_foz', stdout=StringIO())
+
+        self.assertEqual(gravar.call_count, 1)
+        self.assertGreater(AuditLog.objects.count(), 1)
+
+
+class MotorContador(MotorTraducao):
+    """Motor com "modelos" que só marcam o par usado, contando os carregamentos"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.carregamentos = []
+
+    def _carregar_modelo(self, origem, destino):
+        self.carregamentos.append((origem, destino))
+        return lambda texto: f'[{origem}>{destino}]{texto}'
+
+
+class MotorTraducaoTests(TestCase):
+
+    def identidade(self, texto, origem, destino):
+        return texto
+
+    def test_glossario_prefere_o_termo_mais_longo(self):
+        motor = MotorTraducao(tradutor=self.identidade)
+
+        resultado = motor.traduzir('CATARATAS BR: 2x Inteira(s) e 1x Inteira', 'en')
+
+        self.assertEqual(resultado.texto, 'WATERFALLS BR: 2x Full e 1x Full')
+
+    def test_formatacao_preservada_e_fora_do_modelo(self):
+        enviados = []
+
+        def tradutor(texto, origem, destino):
+            enviados.append(texto)
+            return texto.upper()
+
+        texto = '✨ *dia* ✨\n\n───────\n  • passeio (2 pax) 12/03/2030: R$ 1.200,00\n  - \nfim'
+        resultado = MotorTraducao(glossario={}, tradutor=tradutor).traduzir(texto, 'es')
+
+        self.assertEqual(resultado.texto, '✨ *DIA* ✨\n\n───────\n  • PASSEIO (2 pax) 12/03/2030: R$ 1.200,00\n  - \nFIM')
+        for trecho in ('✨', '───', '•', '2 pax', '12/03/2030', 'R$'):
+            self.assertNotIn(trecho, enviados[0])
+
+    def test_glossario_espanhol_e_frances_separados(self):
+        motor = MotorTraducao(tradutor=self.identidade)
+
+        self.assertEqual(motor.traduzir('Inteira', 'es').texto, 'Entera')
+        self.assertEqual(motor.traduzir('Inteira', 'fr').texto, 'Plein')
+        self.assertEqual(motor.traduzir('Mesquita Mulçumana', 'es').texto, 'Mezquita Musulmana')
+        self.assertEqual(set(GLOSSARIO['es']), set(GLOSSARIO['en']))
+        self.assertEqual(set(GLOSSARIO['fr']), set(GLOSSARIO['en']))
+
+    def test_modelos_carregados_uma_vez_e_frances_via_ingles(self):
+        motor = MotorContador(glossario={})
+
+        self.assertEqual(motor.traduzir('olá', 'fr').texto, '[en>fr][pt>en]olá')
+        motor.traduzir('olá', 'en')
+        motor.traduzir('olá', 'xx')
+
+        self.assertEqual(motor.carregamentos, [('pt', 'en'), ('en', 'fr')])
+        estatisticas = motor.estatisticas()
+        self.assertEqual(estatisticas['traducoes'], 3)
+        self.assertEqual(estatisticas['modelos_em_memoria'], ['en-fr', 'pt-en'])
+
+    def test_aquecer_carrega_todos_os_idiomas(self):
+        motor = MotorContador()
+
+        motor.aquecer()
+
+        self.assertEqual(sorted(motor.carregamentos), [('en', 'fr'), ('pt', 'en'), ('pt', 'es')])
+        self.assertEqual(motor.estatisticas()['traducoes'], 0)
+
+
+class MemoriaTraducaoTests(TestCase):
+
+    def setUp(self):
+        self.enviados = []
+        self.motor = MotorTraducao(glossario=GLOSSARIO, tradutor=self.tradutor, memoria=MemoriaTraducao())
+
+    def tradutor(self, texto, origem, destino):
+        self.enviados.append(texto)
+        return texto.upper()
+
+    def test_so_segmentos_novos_vao_ao_modelo(self):
+        primeiro = self.motor.traduzir('  • passeio de barco 10/01: R$ 100,00\n\nsaída do hotel', 'en')
+        self.enviados.clear()
+
+        segundo = self.motor.traduzir('• passeio de barco  22/02: R$ 250,00\nsaída do hotel\nalmoço livre', 'en')
+
+        self.assertEqual(primeiro.texto, '  • PASSEIO DE BARCO 10/01: R$ 100,00\n\nSAÍDA DO HOTEL')
+        self.assertEqual(segundo.texto, '• PASSEIO DE BARCO 22/02: R$ 250,00\nSAÍDA DO HOTEL\nALMOÇO LIVRE')
+        self.assertEqual(self.enviados, ['almoço livre'])
+        self.assertEqual(segundo.segmentos, {'unicos': 3, 'do_dicionario': 0, 'da_memoria': 2, 'traduzidos': 1})
+
+    def test_memoria_persistente_entre_processos(self):
+        self.motor.traduzir('Roteiro do dia\nguia bilíngue', 'es')
+        self.assertEqual(SegmentoTraducao.objects.filter(idioma='es').count(), 2)
+
+        def sem_modelo(texto, origem, destino):
+            raise AssertionError('modelo não deveria ser usado')
+
+        memoria = MemoriaTraducao()
+        outro = MotorTraducao(tradutor=sem_modelo, memoria=memoria)
+
+        self.assertEqual(outro.traduzir('Roteiro do dia\nguia bilíngue', 'es').texto, 'Itinerario DO DIA\nGUIA BILÍNGUE')
+        self.assertEqual(memoria.estatisticas()['acertos_banco'], 2)
+        self.assertEqual(SegmentoTraducao.objects.filter(idioma='en').count(), 0)
+
+    def test_lru_limitado(self):
+        memoria = MemoriaTraducao(tamanho=2, persistente=False)
+        memoria.guardar('en', {'a': ('a', 'A'), 'b': ('b', 'B'), 'c': ('c', 'C')})
+
+        self.assertEqual(memoria.buscar('en', {'a': 'a', 'b': 'b', 'c': 'c'}), {'b': 'B', 'c': 'C'})
+        self.assertEqual(memoria.estatisticas()['segmentos_em_memoria'], 2)
+
+    def test_modelo_que_junta_linhas_traduz_um_a_um(self):
+        motor = MotorTraducao(glossario={}, tradutor=lambda texto, origem, destino: texto.replace('\n', ' ').upper())
+
+        self.assertEqual(motor.traduzir('primeira linha\nsegunda linha', 'en').texto, 'PRIMEIRA LINHA\nSEGUNDA LINHA')
+
+
+class DicionarioTraducaoTests(TestCase):
+
+    def setUp(self):
+        self.enviados = []
+        self.motor = MotorTraducao(tradutor=self.tradutor, memoria=MemoriaTraducao(), dicionario=DicionarioTraducao())
+
+    def tradutor(self, texto, origem, destino):
+        self.enviados.append(texto)
+        return texto.upper()
+
+    def test_linhas_cobertas_nao_vao_ao_modelo(self):
+        texto = (
+            '💼 *RESUMO FINANCEIRO*\n'
+            '  • CATARATAS BR (2x Inteira, 1x Meia)\n'
+            '  _*Subtotal Transporte: R$ 150,00*_\n'
+            'passeio de barco'
+        )
+
+        resultado = self.motor.traduzir(texto, 'en')
+
+        self.assertEqual(resultado.texto, (
+            '💼 *FINANCIAL SUMMARY*\n'
+            '  • WATERFALLS BR (2x Full, 1x Half)\n'
+            '  _*Transport Subtotal: R$ 150,00*_\n'
+            'PASSEIO DE BARCO'
+        ))
+        self.assertEqual(self.enviados, ['passeio de barco'])
+        self.assertEqual(resultado.segmentos, {'unicos': 4, 'do_dicionario': 3, 'da_memoria': 0, 'traduzidos': 1})
+        self.assertEqual(SegmentoTraducao.objects.count(), 1)
+
+    def test_frase_nao_e_montada_palavra_a_palavra(self):
+        dicionario = DicionarioTraducao()
+
+        self.assertEqual(dicionario.traduzir('en', 'Valor'), 'Value')
+        self.assertIsNone(dicionario.traduzir('en', 'Valor Total'))
+        self.assertEqual(dicionario.palavras_faltando('en', 'Valor Total: PROTECT0PROTECT'), ['Valor Total'])
+
+    def test_roteiro_coberto_responde_sem_fila(self):
+        resultado = self.motor.traduzir('✨ *ROTEIRO* ✨\n🎟️ *Atividades & Ingressos:*', 'fr', somente_memoria=True)
+
+        self.assertEqual(resultado.texto, '✨ *ITINÉRAIRE* ✨\n🎟️ *Activités & Billets:*')
+        self.assertEqual(self.enviados, [])
+
+    def test_relatorio_de_cobertura(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        User.objects.create_user('relatorio', password='x')
+        criar_ordem_sintetica(2, 6, transfers=2)
+        saida = StringIO()
+
+        call_command('cobertura_dicionario', '--idiomas', 'en', stdout=saida)
+
+        self.assertIn('1 roteiro(s)', saida.getvalue())
+        self.assertIn('Serviço benchmark', saida.getvalue())
+
+
+class TraducaoLoteTests(OrdemServicoFixturesMixin, TestCase):
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.chamadas = []
+        self.motor = MotorTraducao(tradutor=self.tradutor, memoria=MemoriaTraducao())
+
+    def tradutor(self, texto, origem, destino):
+        self.chamadas.append((origem, destino))
+        return f'[{destino}]{texto}'
+
+    def traduzir_lote(self, texto, idiomas):
+        with mock.patch.object(views, 'motor_traducao', self.motor):
+            return self.client.post(
+                reverse('servicos:translate_batch'),
+                json.dumps({'text': texto, 'target_langs': idiomas}),
+                content_type='application/json',
+            )
+
+    def test_ingles_traduzido_uma_vez_e_pivo_do_frances(self):
+        # O tradutor marca a chamada inteira (os segmentos vão juntos, um por linha)
+        lote = self.motor.traduzir_varios('Roteiro do dia\npasseio de barco', ['en', 'fr', 'es'])
+
+        self.assertEqual(sorted(self.chamadas), [('en', 'fr'), ('pt', 'en'), ('pt', 'es')])
+        self.assertEqual(lote['en'].texto, '[en]Itinerary do dia\npasseio de barco')
+        self.assertEqual(lote['fr'].texto, '[fr][en]Itinéraire do dia\npasseio de barco')
+        self.assertEqual(lote['es'].texto, '[es]Itinerario do dia\npasseio de barco')
+        self.assertEqual(lote['es'].segmentos, {'unicos': 2, 'do_dicionario': 0, 'da_memoria': 0, 'traduzidos': 2})
+        for idioma in ('en', 'fr', 'es'):
+            self.assertEqual(set(lote[idioma].tempos), set(ETAPAS))
+
+    def test_frances_sozinho_guarda_o_ingles_na_memoria(self):
+        self.motor.traduzir('passeio de barco', 'fr')
+        self.chamadas.clear()
+
+        resultado = self.motor.traduzir('passeio de barco', 'en')
+
+        self.assertEqual(resultado.texto, '[en]passeio de barco')
+        self.assertEqual(self.chamadas, [])
+        self.assertEqual(SegmentoTraducao.objects.filter(idioma='en').count(), 1)
+
+    def test_frances_usa_o_ingles_da_memoria(self):
+        self.motor.traduzir('passeio de barco', 'en')
+        self.chamadas.clear()
+
+        resultado = self.motor.traduzir('passeio de barco', 'fr')
+
+        self.assertEqual(resultado.texto, '[fr][en]passeio de barco')
+        self.assertEqual(self.chamadas, [('en', 'fr')])
+
+    @override_settings(TRADUCAO_ASSINCRONA=False)
+    def test_endpoint_sincrono_com_tempos_por_idioma(self):
+        response = self.traduzir_lote('passeio de barco', ['fr', 'en'])
+
+        self.assertEqual(response.status_code, 200)
+        dados = response.json()
+        self.assertEqual(dados['translations']['en']['translated_text'], '[en]passeio de barco')
+        self.assertEqual(dados['translations']['fr']['translated_text'], '[fr][en]passeio de barco')
+        self.assertEqual(set(dados['translations']['fr']['tempos']), set(ETAPAS))
+        self.assertIn('fr;dur=', response['Server-Timing'])
+        self.assertEqual(self.chamadas.count(('pt', 'en')), 1)
+
+    @override_settings(TRADUCAO_ASSINCRONA=True)
+    def test_endpoint_enfileira_e_trabalhador_conclui(self):
+        response = self.traduzir_lote('passeio de barco', ['fr', 'en', 'fr'])
+
+        self.assertEqual(response.status_code, 202)
+        dados = response.json()
+        self.assertEqual(dados['target_langs'], ['en', 'fr'])
+        self.assertEqual(self.traduzir_lote('passeio de barco', ['en', 'fr']).json()['job_id'], dados['job_id'])
+
+        processar_proximo(self.motor, 'teste')
+
+        dados = self.client.get(dados['status_url']).json()
+        self.assertEqual(dados['status'], 'concluido')
+        self.assertEqual(dados['translations']['fr']['translated_text'], '[fr][en]passeio de barco')
+        self.assertIn('fila', dados['tempos'])
+
+        # Agora tudo está na memória: resposta imediata
+        self.assertEqual(self.traduzir_lote('passeio de barco', ['en', 'fr']).status_code, 200)
+
+    def test_idiomas_invalidos(self):
+        self.assertEqual(self.traduzir_lote('passeio', []).status_code, 400)
+        self.assertEqual(self.traduzir_lote('passeio', 'en').status_code, 400)
+        response = self.traduzir_lote('passeio', ['en', 'de'])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('de', response.json()['error'])
+
+
+class TranslateTextViewTests(OrdemServicoFixturesMixin, TestCase):
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.motor = MotorTraducao(tradutor=lambda texto, origem, destino: texto)
+
+    @override_settings(TRADUCAO_ASSINCRONA=False)
+    def test_resposta_com_tempos_por_etapa(self):
+        with mock.patch.object(views, 'motor_traducao', self.motor):
+            response = self.client.post(
+                reverse('servicos:translate_text'),
+                json.dumps({'text': 'ROTEIRO', 'target_lang': 'fr'}),
+                content_type='application/json',
+            )
+
+        dados = response.json()
+        self.assertEqual(dados['translated_text'], 'ITINÉRAIRE')
+        self.assertEqual(dados['target_lang'], 'fr')
+        self.assertEqual(set(dados['tempos']), set(ETAPAS))
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+    def test_texto_vazio(self):
+        response = self.client.post(
+            reverse('servicos:translate_text'), json.dumps({'text': ''}), content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(TRADUCAO_ASSINCRONA=True)
+class TrabalhoTraducaoTests(OrdemServicoFixturesMixin, TestCase):
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.motor = MotorTraducao(
+            glossario={}, tradutor=lambda texto, origem, destino: texto.upper(), memoria=MemoriaTraducao()
+        )
+        self.patch = mock.patch.object(views, 'motor_traducao', self.motor)
+        self.patch.start()
+        self.addCleanup(self.patch.stop)
+
+    def traduzir(self, texto, idioma='en'):
+        return self.client.post(
+            reverse('servicos:translate_text'),
+            json.dumps({'text': texto, 'target_lang': idioma}),
+            content_type='application/json',
+        )
+
+    def test_traducao_nova_vai_para_a_fila(self):
+        response = self.traduzir('passeio de barco')
+
+        self.assertEqual(response.status_code, 202)
+        dados = response.json()
+        self.assertEqual(dados['status'], 'pendente')
+        self.assertEqual(dados['posicao'], 0)
+        self.assertEqual(dados['status_url'], reverse('servicos:translate_job_status', args=[dados['job_id']]))
+
+    def test_pedidos_identicos_viram_um_trabalho(self):
+        primeiro = self.traduzir('passeio de barco').json()
+        segundo = self.traduzir('passeio de barco').json()
+        outro_idioma = self.traduzir('passeio de barco', 'es').json()
+
+        self.assertEqual(primeiro['job_id'], segundo['job_id'])
+        self.assertNotEqual(primeiro['job_id'], outro_idioma['job_id'])
+        self.assertEqual(TrabalhoTraducao.objects.get(pk=primeiro['job_id']).solicitacoes, 2)
+
+    def test_trabalhador_conclui_e_consulta_devolve_o_texto(self):
+        job_id = self.traduzir('passeio de barco\nR$ 100,00').json()['job_id']
+
+        trabalho = processar_proximo(self.motor, 'teste')
+        self.assertEqual(trabalho.pk, job_id)
+        self.assertIsNone(processar_proximo(self.motor, 'teste'))
+
+        dados = self.client.get(reverse('servicos:translate_job_status', args=[job_id])).json()
+        self.assertEqual(dados['status'], 'concluido')
+        self.assertEqual(dados['translated_text'], 'PASSEIO DE BARCO\nR$ 100,00')
+        self.assertIn('fila', dados['tempos'])
+
+        # Concluído o trabalho, um pedido igual cria outro (e já vem da memória)
+        response = self.traduzir('passeio de barco\nR$ 100,00')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['translated_text'], 'PASSEIO DE BARCO\nR$ 100,00')
+        self.assertEqual(TrabalhoTraducao.objects.count(), 1)
+
+    def test_erro_do_modelo_fica_no_trabalho(self):
+        def falhar(texto, origem, destino):
+            raise RuntimeError('modelo indisponível')
+
+        trabalho, criado = enfileirar('passeio de barco', 'fr', self.user)
+        processar_proximo(MotorTraducao(tradutor=falhar), 'teste')
+
+        dados = self.client.get(reverse('servicos:translate_job_status', args=[trabalho.pk])).json()
+        self.assertTrue(criado)
+        self.assertEqual(dados['status'], 'erro')
+        self.assertIn('modelo indisponível', dados['error'])
+        self.assertFalse(enfileirar('passeio de barco', 'fr')[0].pk == trabalho.pk)
+
+    def test_consulta_apenas_de_quem_pediu(self):
+        agente = User.objects.create_user('agente', password='senha-forte-123')
+        agente.user_permissions.add(Permission.objects.get(codename='view_ordemservico'))
+        trabalho, _ = enfileirar('roteiro de outro cliente', 'en', self.user)
+        url = reverse('servicos:translate_job_status', args=[trabalho.pk])
+
+        self.client.force_login(agente)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        # Pedido idêntico juntado ao trabalho existente: a sessão pode consultá-lo
+        job_id = self.traduzir('roteiro de outro cliente').json()['job_id']
+        self.assertEqual(job_id, trabalho.pk)
+        self.assertEqual(self.client.get(url).json()['status'], 'pendente')
+
+    def test_trabalho_que_derruba_o_trabalhador_desiste_apos_o_limite(self):
+        trabalho, _ = enfileirar('passeio de barco', 'en')
+        for _ in range(MAX_TENTATIVAS):
+            reservar('teste')
+            TrabalhoTraducao.objects.filter(pk=trabalho.pk).update(iniciado_em=timezone.now() - ABANDONADO_APOS * 2)
+            recuperar_abandonados(ABANDONADO_APOS)
+
+        trabalho.refresh_from_db()
+        self.assertEqual(trabalho.status, TrabalhoTraducao.ERRO)
+        self.assertEqual(trabalho.tentativas, MAX_TENTATIVAS)
+        self.assertIsNone(reservar('teste'))
+
+
+class ProcessarTraducoesCommandTests(TransactionTestCase):
+
+    def test_uma_vez_esvazia_a_fila(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        for texto in ('primeiro', 'segundo', 'terceiro'):
+            enfileirar(texto, 'en')
+
+        call_command('processar_traducoes', '--uma-vez', '--sem-aquecer', stdout=StringIO(), stderr=StringIO())
+
+        self.assertFalse(TrabalhoTraducao.objects.filter(status__in=TrabalhoTraducao.EM_ANDAMENTO).exists())
+        self.assertEqual(TrabalhoTraducao.objects.filter(tentativas=1).count(), 3)
 
-# Create your tests here.
@@ -0,0 +1,770 @@
+"""
+Motor de tradução dos roteiros (Argos Translate) com glossário turístico.
+
+O endpoint ``translate_text`` importava o Argos, remontava o glossário e
+fazia um ``str.replace`` por termo a cada requisição; como
+``argostranslate.translate.translate`` relê os pacotes instalados a cada
+chamada, o modelo era recarregado em toda tradução. Agora cada processo
+mantém um único ``MotorTraducao``:
+
+    from servicos.translation import motor
+
+    resultado = motor.traduzir(texto, 'en')
+    resultado.texto, resultado.tempos
+
+- os modelos são carregados uma vez por processo (no primeiro uso ou no
+  aquecimento) e reaproveitados;
+- proteções (linhas decorativas, emojis, valores, datas...) e termos do
+  glossário viram uma única regex compilada: o texto é percorrido uma vez,
+  e o termo mais longo ganha (``Inteira(s)`` antes de ``Inteira``);
+- os placeholders são restaurados com outra passada única, já com os
+  termos do glossário do idioma;
+- o texto protegido é dividido em segmentos (linhas normalizadas) e só os
+  que o dicionário (servicos/translation_dictionary.py) não cobre e que não
+  estão na memória de tradução (servicos/translation_memory.py) vão ao
+  modelo, todos em uma chamada;
+- cada tradução informa o tempo de cada etapa, e o motor acumula contadores
+  do processo (``motor.estatisticas()``).
+
+Com ``TRADUCAO_AQUECER=True`` no ambiente, cada worker carrega os modelos em
+segundo plano assim que sobe (webreceptivo/wsgi.py), e a primeira tradução
+não paga o carregamento.
+
+Francês não tem modelo direto: a rota é PT → EN → FR (ver translation_setup.py).
+``motor.traduzir_varios(texto, ['en', 'fr'])`` protege o texto uma vez,
+traduz PT → EN uma vez e usa esse inglês como pivô do francês.
+"""
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .translation_dictionary import DicionarioTraducao
+from .translation_memory import MemoriaTraducao, hash_segmento
+
+IDIOMA_ORIGEM = 'pt'
+IDIOMA_PADRAO = 'en'
+
+# Idioma de destino -> pares (origem, destino) aplicados em sequência
+ROTAS = {
+    'en': (('pt', 'en'),),
+    'es': (('pt', 'es'),),
+    'fr': (('pt', 'en'), ('en', 'fr')),
+}
+
+# Termos turísticos traduzidos pelo glossário antes da tradução automática
+GLOSSARIO = {
+    'en': {
+        'CATARATAS': 'WATERFALLS',
+        'Cataratas': 'Waterfalls',
+        'cataratas': 'waterfalls',
+        'Inteira': 'Full',
+        'Inteira(s)': 'Full',
+        'Meia': 'Half',
+        'Meia(s)': 'Half',
+        'Infantil': 'Child',
+        'Transfer': 'Transfer',
+        'Transfers': 'Transfers',
+        'Ingresso': 'Ticket',
+        'Ingressos': 'Tickets',
+        'Roteiro': 'Itinerary',
+        'ROTEIRO': 'ITINERARY',
+        'Opção': 'Option',
+        'OPÇÃO': 'OPTION',
+        'RESUMO DOS VALORES': 'SUMMARY OF VALUES',
+        'Resumo dos Valores': 'Summary of Values',
+        'leva e trás': 'round trip',
+        'leva e traz': 'round trip',
+        'horário livre': 'flexible schedule',
+        'CATARATAS BR': 'WATERFALLS BR',
+        'Cataratas BR': 'Waterfalls BR',
+        'PARQUE DAS AVES': 'BIRD PARK',
+        'Parque das Aves': 'Bird Park',
+        'ITAIPU PANORAMICA': 'ITAIPU PANORAMIC',
+        'Itaipu Panoramica': 'Itaipu Panoramic',
+        'ITAIPU ESPECIAL': 'ITAIPU SPECIAL',
+        'Itaipu Especial': 'Itaipu Special',
+        'REFUGIO BIOLÓGICO': 'BIOLOGICAL REFUGE',
+        'Refugio Biológico': 'Biological Refuge',
+        'ILUMINADA ESPECIAL': 'ILLUMINATED SPECIAL',
+        'Iluminada Especial': 'Illuminated Special',
+        'ILUMINADA': 'ILLUMINATED',
+        'Iluminada': 'Illuminated',
+        'MARCO DAS TRÊS FRONTEIRAS': 'THREE BORDERS LANDMARK',
+        'Marco das Três Fronteiras': 'Three Borders Landmark',
+        'RODA GIGANTE': 'FERRIS WHEEL',
+        'Roda Gigante': 'Ferris Wheel',
+        'DREAMLAND COMBO 6': 'DREAMLAND COMBO 6',
+        'DREAMLAND COMBO 5': 'DREAMLAND COMBO 5',
+        'DREAMLAND QUARTETO': 'DREAMLAND QUARTET',
+        'Dreamland Quarteto': 'Dreamland Quartet',
+        'DREAMLAND TRIO NATUREZA': 'DREAMLAND NATURE TRIO',
+        'Dreamland Trio Natureza': 'Dreamland Nature Trio',
+        'TRIO BY NIGHT': 'TRIO BY NIGHT',
+        'TRIO AVENTURA': 'ADVENTURE TRIO',
+        'Trio Aventura': 'Adventure Trio',
+        'MUSEU': 'MUSEUM',
+        'Museu': 'Museum',
+        'DREAM ECO PARK': 'DREAM ECO PARK',
+        'TIROLEZA': 'ZIPLINE',
+        'Tiroleza': 'Zipline',
+        'MOVIE CARS': 'MOVIE CARS',
+        'SHOW DAS ÁGUAS': 'WATER SHOW',
+        'Show das Águas': 'Water Show',
+        'COMBO MOVIE E SHOW': 'MOVIE AND SHOW COMBO',
+        'Combo Movie e Show': 'Movie and Show Combo',
+        'RAFAIN CHURRASCARIA SHOW': 'RAFAIN STEAKHOUSE SHOW',
+        'Rafain Churrascaria Show': 'Rafain Steakhouse Show',
+        'KATTAMARAM': 'CATAMARAN',
+        'Kattamaram': 'Catamaran',
+        'MACUCO SAFARI': 'MACUCO SAFARI',
+        'IGUASSU SECRET FALLS ALL DAY': 'IGUASSU SECRET FALLS ALL DAY',
+        'Iguassu Secret Falls All Day': 'Iguassu Secret Falls All Day',
+        'IGUASSU SECRET MEIO PERIODO': 'IGUASSU SECRET HALF DAY',
+        'Iguassu Secret Meio Periodo': 'Iguassu Secret Half Day',
+        'IGUASSU SECRET TRILHA ÚNICA': 'IGUASSU SECRET SINGLE TRAIL',
+        'Iguassu Secret Trilha Única': 'Iguassu Secret Single Trail',
+        'LA ARIPUCA': 'LA ARIPUCA',
+        'RUINAS SAN IGNACIO': 'SAN IGNACIO RUINS',
+        'Ruinas San Ignacio': 'San Ignacio Ruins',
+        'MINAS DE WANDA': 'WANDA MINES',
+        'Minas de Wanda': 'Wanda Mines',
+        'MESQUITA MULÇUMANA': 'MUSLIM MOSQUE',
+        'Mesquita Mulçumana': 'Muslim Mosque',
+    },
+    'es': {
+        'CATARATAS': 'CATARATAS',
+        'Cataratas': 'Cataratas',
+        'cataratas': 'cataratas',
+        'Inteira': 'Entera',
+        'Inteira(s)': 'Entera(s)',
+        'Meia': 'Media',
+        'Meia(s)': 'Media(s)',
+        'Infantil': 'Infantil',
+        'Transfer': 'Transfer',
+        'Transfers': 'Transfers',
+        'Ingresso': 'Entrada',
+        'Ingressos': 'Entradas',
+        'Roteiro': 'Itinerario',
+        'ROTEIRO': 'ITINERARIO',
+        'Opção': 'Opción',
+        'OPÇÃO': 'OPCIÓN',
+        'RESUMO DOS VALORES': 'RESUMEN DE VALORES',
+        'Resumo dos Valores': 'Resumen de Valores',
+        'leva e trás': 'ida y vuelta',
+        'leva e traz': 'ida y vuelta',
+        'horário livre': 'horario libre',
+        'CATARATAS BR': 'CATARATAS BR',
+        'Cataratas BR': 'Cataratas BR',
+        'PARQUE DAS AVES': 'PARQUE DE LAS AVES',
+        'Parque das Aves': 'Parque de las Aves',
+        'ITAIPU PANORAMICA': 'ITAIPU PANORÁMICA',
+        'Itaipu Panoramica': 'Itaipu Panorámica',
+        'ITAIPU ESPECIAL': 'ITAIPU ESPECIAL',
+        'Itaipu Especial': 'Itaipu Especial',
+        'REFUGIO BIOLÓGICO': 'REFUGIO BIOLÓGICO',
+        'Refugio Biológico': 'Refugio Biológico',
+        'ILUMINADA ESPECIAL': 'ILUMINADA ESPECIAL',
+        'Iluminada Especial': 'Iluminada Especial',
+        'ILUMINADA': 'ILUMINADA',
+        'Iluminada': 'Iluminada',
+        'MARCO DAS TRÊS FRONTEIRAS': 'HITO DE LAS TRES FRONTERAS',
+        'Marco das Três Fronteiras': 'Hito de las Tres Fronteras',
+        'RODA GIGANTE': 'RUEDA GIGANTE',
+        'Roda Gigante': 'Rueda Gigante',
+        'DREAMLAND COMBO 6': 'DREAMLAND COMBO 6',
+        'DREAMLAND COMBO 5': 'DREAMLAND COMBO 5',
+        'DREAMLAND QUARTETO': 'DREAMLAND CUARTETO',
+        'Dreamland Quarteto': 'Dreamland Cuarteto',
+        'DREAMLAND TRIO NATUREZA': 'DREAMLAND TRÍO NATURALEZA',
+        'Dreamland Trio Natureza': 'Dreamland Trío Naturaleza',
+        'TRIO BY NIGHT': 'TRÍO BY NIGHT',
+        'TRIO AVENTURA': 'TRÍO AVENTURA',
+        'Trio Aventura': 'Trío Aventura',
+        'MUSEU': 'MUSEO',
+        'Museu': 'Museo',
+        'DREAM ECO PARK': 'DREAM ECO PARK',
+        'TIROLEZA': 'TIROLESA',
+        'Tiroleza': 'Tirolesa',
+        'MOVIE CARS': 'MOVIE CARS',
+        'SHOW DAS ÁGUAS': 'SHOW DE LAS AGUAS',
+        'Show das Águas': 'Show de las Aguas',
+        'COMBO MOVIE E SHOW': 'COMBO MOVIE Y SHOW',
+        'Combo Movie e Show': 'Combo Movie y Show',
+        'RAFAIN CHURRASCARIA SHOW': 'RAFAIN PARRILLA SHOW',
+        'Rafain Churrascaria Show': 'Rafain Parrilla Show',
+        'KATTAMARAM': 'CATAMARÁN',
+        'Kattamaram': 'Catamarán',
+        'MACUCO SAFARI': 'MACUCO SAFARI',
+        'IGUASSU SECRET FALLS ALL DAY': 'IGUASSU SECRET FALLS TODO EL DÍA',
+        'Iguassu Secret Falls All Day': 'Iguassu Secret Falls Todo el Día',
+        'IGUASSU SECRET MEIO PERIODO': 'IGUASSU SECRET MEDIO DÍA',
+        'Iguassu Secret Meio Periodo': 'Iguassu Secret Medio Día',
+        'IGUASSU SECRET TRILHA ÚNICA': 'IGUASSU SECRET SENDERO ÚNICO',
+        'Iguassu Secret Trilha Única': 'Iguassu Secret Sendero Único',
+        'LA ARIPUCA': 'LA ARIPUCA',
+        'RUINAS SAN IGNACIO': 'RUINAS SAN IGNACIO',
+        'Ruinas San Ignacio': 'Ruinas San Ignacio',
+        'MINAS DE WANDA': 'MINAS DE WANDA',
+        'Minas de Wanda': 'Minas de Wanda',
+        'MESQUITA MULÇUMANA': 'MEZQUITA MUSULMANA',
+        'Mesquita Mulçumana': 'Mezquita Musulmana',
+    },
+    'fr': {
+        'CATARATAS': "CHUTES D'EAU",
+        'Cataratas': "Chutes d'eau",
+        'cataratas': "chutes d'eau",
+        'Inteira(s)': 'Plein(s)',
+        'Meia': 'Demi',
+        'Meia(s)': 'Demi(s)',
+        'Infantil': 'Enfant',
+        'Transfer': 'Transfert',
+        'Transfers': 'Transferts',
+        'Ingresso': 'Billet',
+        'Ingressos': 'Billets',
+        'Roteiro': 'Itinéraire',
+        'ROTEIRO': 'ITINÉRAIRE',
+        'Opção': 'Option',
+        'OPÇÃO': 'OPTION',
+        'RESUMO DOS VALORES': 'RÉSUMÉ DES VALEURS',
+        'Resumo dos Valores': 'Résumé des Valeurs',
+        'leva e trás': 'aller-retour',
+        'leva e traz': 'aller-retour',
+        'horário livre': 'horaire libre',
+        'Inteira': 'Plein',
+        'CATARATAS BR': "CHUTES D'EAU BR",
+        'Cataratas BR': "Chutes d'eau BR",
+        'PARQUE DAS AVES': 'PARC DES OISEAUX',
+        'Parque das Aves': 'Parc des Oiseaux',
+        'ITAIPU PANORAMICA': 'ITAIPU PANORAMIQUE',
+        'Itaipu Panoramica': 'Itaipu Panoramique',
+        'ITAIPU ESPECIAL': 'ITAIPU SPÉCIAL',
+        'Itaipu Especial': 'Itaipu Spécial',
+        'REFUGIO BIOLÓGICO': 'REFUGE BIOLOGIQUE',
+        'Refugio Biológico': 'Refuge Biologique',
+        'ILUMINADA ESPECIAL': 'ILLUMINÉE SPÉCIALE',
+        'Iluminada Especial': 'Illuminée Spéciale',
+        'ILUMINADA': 'ILLUMINÉE',
+        'Iluminada': 'Illuminée',
+        'MARCO DAS TRÊS FRONTEIRAS': 'BORNE DES TROIS FRONTIÈRES',
+        'Marco das Três Fronteiras': 'Borne des Trois Frontières',
+        'RODA GIGANTE': 'GRANDE ROUE',
+        'Roda Gigante': 'Grande Roue',
+        'DREAMLAND COMBO 6': 'DREAMLAND COMBO 6',
+        'DREAMLAND COMBO 5': 'DREAMLAND COMBO 5',
+        'DREAMLAND QUARTETO': 'DREAMLAND QUATUOR',
+        'Dreamland Quarteto': 'Dreamland Quatuor',
+        'DREAMLAND TRIO NATUREZA': 'DREAMLAND TRIO NATURE',
+        'Dreamland Trio Natureza': 'Dreamland Trio Nature',
+        'TRIO BY NIGHT': 'TRIO BY NIGHT',
+        'TRIO AVENTURA': 'TRIO AVENTURE',
+        'Trio Aventura': 'Trio Aventure',
+        'MUSEU': 'MUSÉE',
+        'Museu': 'Musée',
+        'DREAM ECO PARK': 'DREAM ECO PARK',
+        'TIROLEZA': 'TYROLIENNE',
+        'Tiroleza': 'Tyrolienne',
+        'MOVIE CARS': 'MOVIE CARS',
+        'SHOW DAS ÁGUAS': 'SPECTACLE DES EAUX',
+        'Show das Águas': 'Spectacle des Eaux',
+        'COMBO MOVIE E SHOW': 'COMBO MOVIE ET SHOW',
+        'Combo Movie e Show': 'Combo Movie et Show',
+        'RAFAIN CHURRASCARIA SHOW': 'RAFAIN RESTAURANT SHOW',
+        'Rafain Churrascaria Show': 'Rafain Restaurant Show',
+        'KATTAMARAM': 'CATAMARAN',
+        'Kattamaram': 'Catamaran',
+        'MACUCO SAFARI': 'MACUCO SAFARI',
+        'IGUASSU SECRET FALLS ALL DAY': 'IGUASSU SECRET FALLS JOURNÉE COMPLÈTE',
+        'Iguassu Secret Falls All Day': 'Iguassu Secret Falls Journée Complète',
+        'IGUASSU SECRET MEIO PERIODO': 'IGUASSU SECRET DEMI-JOURNÉE',
+        'Iguassu Secret Meio Periodo': 'Iguassu Secret Demi-Journée',
+        'IGUASSU SECRET TRILHA ÚNICA': 'IGUASSU SECRET SENTIER UNIQUE',
+        'Iguassu Secret Trilha Única': 'Iguassu Secret Sentier Unique',
+        'LA ARIPUCA': 'LA ARIPUCA',
+        'RUINAS SAN IGNACIO': 'RUINES SAN IGNACIO',
+        'Ruinas San Ignacio': 'Ruines San Ignacio',
+        'MINAS DE WANDA': 'MINES DE WANDA',
+        'Minas de Wanda': 'Mines de Wanda',
+        'MESQUITA MULÇUMANA': 'MOSQUÉE MUSULMANE',
+        'Mesquita Mulçumana': 'Mosquée Musulmane',
+    },
+}
+
+# Trechos preservados como estão (na ordem de prioridade)
+PADROES_PROTEGIDOS = (
+    r'^[^\S\n]*$',                      # linhas em branco
+    r'^[^\S\n]*[─═•\-](?:[─═•\-]|[^\S\n])*$',  # linhas só com símbolos
+    r'[─═]{3,}',                        # linhas decorativas
+    r'[📅🚌💰🎫📍⏰✈️🏨🍽️🎭🎨🏛️🌊🌲🦋🐦🌅🌄🎢🎡🎪🚁🚢⛵🏖️🗿🏰🎭📸🎬🎵🎸🎹🎺🎻🎤🎧🎮🎯🎲🎰🎳🏀⚽🏈🏉🎾🏐🏓🏸🥊🥋⛳🏹🎣🥅🥌🛷🎿⛷️🏂🏋️🤸🤼🤽🤾🤺🏇🏌️🧘🏃🚴🏊🤹✨]',
+    r'[•◦▪▫]',                          # bullets
+    r'R\$\s*[\d.,]+',                   # valores
+    r'\d{2}/\d{2}(?:/\d{4})?',          # datas
+    r'\(\d+\s*pax\)',                   # quantidade de pessoas
+)
+
+# Placeholders não são alterados pelos modelos (mesmo formato de antes)
+PLACEHOLDER = 'PROTECT{}PROTECT'
+PLACEHOLDER_TERMO = 'XYZTERM{}XYZ'
+_RE_PLACEHOLDER = re.compile(r'PROTECT(\d+)PROTECT|XYZTERM(\d+)XYZ')
+
+_RE_BORDAS = re.compile(r'(\s*)(.*?)(\s*)', re.S)
+_RE_LETRA = re.compile(r'[^\W\d_]')
+
+ETAPAS = ('protecao', 'dicionario', 'memoria', 'modelo', 'traducao', 'restauracao', 'total')
+
+
+class TraducaoIndisponivel(Exception):
+    """Argos Translate ou o modelo de um par de idiomas não está instalado"""
+
+
+def compilar_padrao(termos):
+    """
+    Regex única com as proteções seguidas dos termos do glossário.
+
+    Os termos vão do mais longo para o mais curto: na mesma posição a
+    alternativa mais longa é tentada primeiro, e um termo nunca é trocado
+    dentro de outro já substituído.
+    """
+    termos = sorted(set(termos), key=lambda termo: (-len(termo), termo))
+    protegidos = '|'.join(f'(?:{padrao})' for padrao in PADROES_PROTEGIDOS)
+    if not termos:
+        return re.compile(f'(?P<protegido>{protegidos})', re.M)
+    alternativas = '|'.join(re.escape(termo) for termo in termos)
+    return re.compile(f'(?P<protegido>{protegidos})|(?P<termo>{alternativas})', re.M)
+
+
+def proteger(texto, padrao):
+    """
+    Troca proteções e termos do glossário por placeholders, em uma passada.
+
+    Retorna o texto protegido e a lista de trechos originais (o índice é o
+    número do placeholder). O texto protegido não depende do idioma de
+    destino: os termos só são traduzidos na restauração.
+    """
+    valores = []
+
+    def substituir(match):
+        valores.append(match.group())
+        modelo = PLACEHOLDER if match.lastgroup == 'protegido' else PLACEHOLDER_TERMO
+        return modelo.format(len(valores) - 1)
+
+    return padrao.sub(substituir, texto), valores
+
+
+def restaurar(texto, valores, glossario):
+    """Devolve ao texto traduzido os trechos de ``proteger`` (termos pelo ``glossario``)"""
+    def substituir(match):
+        indice = int(match.group(1) or match.group(2))
+        if indice >= len(valores):
+            return match.group()
+        if match.group(2) is not None:
+            return glossario.get(valores[indice], valores[indice])
+        return valores[indice]
+    return _RE_PLACEHOLDER.sub(substituir, texto)
+
+
+def _renumerar(texto, numeros):
+    """Troca o número de cada placeholder por ``numeros[n]`` (mantendo o tipo)"""
+    def substituir(match):
+        protegido = match.group(1) is not None
+        indice = int(match.group(1) if protegido else match.group(2))
+        if indice >= len(numeros):
+            return match.group()
+        return (PLACEHOLDER if protegido else PLACEHOLDER_TERMO).format(numeros[indice])
+    return _RE_PLACEHOLDER.sub(substituir, texto)
+
+
+class Segmento:
+    """
+    Linha do texto protegido, normalizada para a memória de tradução.
+
+    ``chave`` é a linha sem os espaços das bordas, com espaços internos
+    colapsados e placeholders renumerados a partir de 0: a mesma linha de
+    atrativo tem a mesma chave em qualquer roteiro. ``chave`` é None quando
+    a linha não tem texto a traduzir (só placeholders, números, símbolos).
+    """
+
+    __slots__ = ('linha', 'prefixo', 'chave', 'hash', 'sufixo', 'placeholders')
+
+    def __init__(self, linha):
+        self.linha = linha
+        prefixo, corpo, sufixo = _RE_BORDAS.fullmatch(linha).groups()
+        self.prefixo = prefixo
+        self.sufixo = sufixo
+        self.chave = self.hash = None
+        self.placeholders = []
+        if _RE_LETRA.search(_RE_PLACEHOLDER.sub('', corpo)):
+            self.chave = _RE_PLACEHOLDER.sub(self._renumerar_local, ' '.join(corpo.split()))
+            self.hash = hash_segmento(self.chave)
+
+    def _renumerar_local(self, match):
+        protegido = match.group(1) is not None
+        self.placeholders.append(int(match.group(1) if protegido else match.group(2)))
+        return (PLACEHOLDER if protegido else PLACEHOLDER_TERMO).format(len(self.placeholders) - 1)
+
+    def montar(self, traducao):
+        """Linha traduzida, com os placeholders e espaços originais"""
+        if self.chave is None:
+            return self.linha
+        return self.prefixo + _renumerar(traducao, self.placeholders) + self.sufixo
+
+
+def segmentar(texto):
+    return [Segmento(linha) for linha in texto.split('\n')]
+
+
+class ResultadoTraducao:
+    """Texto traduzido, tempos (ms) de cada etapa e uso da memória de tradução"""
+
+    __slots__ = ('texto', 'idioma', 'tempos', 'segmentos')
+
+    def __init__(self, texto, idioma, tempos, segmentos=None):
+        self.texto = texto
+        self.idioma = idioma
+        self.tempos = tempos
+        self.segmentos = segmentos or {}
+
+    def server_timing(self):
+        """Valor do header Server-Timing"""
+        return ', '.join(f'{etapa};dur={self.tempos[etapa]}' for etapa in ETAPAS)
+
+    def as_dict(self):
+        return {
+            'translated_text': self.texto,
+            'target_lang': self.idioma,
+            'tempos': self.tempos,
+            'segmentos': self.segmentos,
+        }
+
+
+class ResultadoLote:
+    """Resultados por idioma de ``traduzir_varios`` e tempos (ms) do lote"""
+
+    __slots__ = ('resultados', 'tempos')
+
+    def __init__(self, resultados, tempos):
+        self.resultados = resultados
+        self.tempos = tempos
+
+    def __getitem__(self, idioma):
+        return self.resultados[idioma]
+
+    def as_dict(self):
+        return {
+            'translations': {idioma: resultado.as_dict() for idioma, resultado in self.resultados.items()},
+            'tempos': self.tempos,
+        }
+
+    def server_timing(self):
+        """Header Server-Timing: tempo até cada idioma ficar pronto e o total"""
+        partes = [f'{idioma};dur={resultado.tempos["total"]}' for idioma, resultado in self.resultados.items()]
+        return ', '.join(partes + [f'total;dur={self.tempos["total"]}'])
+
+
+class MotorTraducao:
+    """
+    Traduções do processo: modelos carregados uma vez e regex de proteção e
+    glossário compilada uma vez.
+
+    ``tradutor`` é opcional: uma função ``(texto, origem, destino) -> texto``
+    usada no lugar do Argos (ex.: outro provedor, ou testes sem modelos).
+    ``dicionario`` (DicionarioTraducao) e ``memoria`` (MemoriaTraducao) são
+    consultados, nessa ordem, antes do modelo; sem eles, todos os segmentos
+    vão ao modelo.
+    """
+
+    def __init__(self, glossario=GLOSSARIO, rotas=ROTAS, tradutor=None, memoria=None, dicionario=None):
+        self._glossario = glossario
+        self._rotas = rotas
+        self._tradutor = tradutor
+        self.memoria = memoria
+        self.dicionario = dicionario
+        self._padrao = None
+        self._modelos = {}
+        self._lock = threading.Lock()
+        self._contadores = {
+            'traducoes': 0, 'erros': 0, 'caracteres': 0, 'segmentos': 0, 'segmentos_dicionario': 0,
+            'segmentos_traduzidos': 0, 'modelos_carregados': 0,
+        }
+        self._tempos = dict.fromkeys(ETAPAS, 0.0)
+
+    @property
+    def idiomas(self):
+        return tuple(self._rotas)
+
+    def padrao(self):
+        """
+        Regex compilada de proteção + termos do glossário (de todos os idiomas).
+
+        Os glossários têm os mesmos termos em português; um termo que falte
+        em algum idioma volta no original.
+        """
+        if self._padrao is None:
+            self._padrao = compilar_padrao(termo for glossario in self._glossario.values() for termo in glossario)
+        return self._padrao
+
+    # Modelos
+
+    def _carregar_modelo(self, origem, destino):
+        try:
+            import argostranslate.translate
+        except ImportError as exc:
+            raise TraducaoIndisponivel('Argos Translate não está instalado') from exc
+
+        idiomas = {idioma.code: idioma for idioma in argostranslate.translate.get_installed_languages()}
+        traducao = None
+        if origem in idiomas and destino in idiomas:
+            traducao = idiomas[origem].get_translation(idiomas[destino])
+        if traducao is None:
+            raise TraducaoIndisponivel(
+                f'Modelo {origem} → {destino} não instalado (execute servicos/translation_setup.py)'
+            )
+        return traducao.translate
+
+    def modelo(self, origem, destino):
+        """Função de tradução do par, carregada uma vez por processo"""
+        if self._tradutor is not None:
+            return lambda texto: self._tradutor(texto, origem, destino)
+        traduzir = self._modelos.get((origem, destino))
+        if traduzir is None:
+            with self._lock:
+                traduzir = self._modelos.get((origem, destino))
+                if traduzir is None:
+                    traduzir = self._modelos[(origem, destino)] = self._carregar_modelo(origem, destino)
+                    self._contadores['modelos_carregados'] += 1
+        return traduzir
+
+    def aquecer(self, idiomas=None):
+        """
+        Compila as regex e carrega os modelos dos idiomas (todos por padrão).
+
+        O Argos só lê o modelo do disco na primeira tradução, então cada par
+        traduz uma palavra. Retorna os segundos gastos.
+        """
+        inicio = time.perf_counter()
+        self.padrao()
+        for idioma in idiomas or self.idiomas:
+            for origem, destino in self._rotas[idioma]:
+                self.modelo(origem, destino)('Olá')
+        return time.perf_counter() - inicio
+
+    def aquecer_em_segundo_plano(self, idiomas=None):
+        """Aquece em uma thread daemon (não atrasa a subida do worker)"""
+        def aquecer():
+            try:
+                self.aquecer(idiomas)
+            except TraducaoIndisponivel:
+                pass
+
+        thread = threading.Thread(target=aquecer, name='aquecer-traducao', daemon=True)
+        thread.start()
+        return thread
+
+    # Tradução
+
+    def idioma(self, codigo):
+        """Idioma de destino suportado (o padrão para códigos desconhecidos)"""
+        return codigo if codigo in self._rotas else IDIOMA_PADRAO
+
+    def pivo(self, idioma):
+        """
+        (idioma intermediário, passos restantes) quando a rota de ``idioma``
+        começa pela rota completa de outro idioma (FR = rota do EN + EN → FR),
+        ou (None, rota) se não houver pivô.
+        """
+        rota = self._rotas[idioma]
+        for outro, rota_outro in self._rotas.items():
+            if outro != idioma and len(rota_outro) < len(rota) and rota[:len(rota_outro)] == rota_outro:
+                return outro, rota[len(rota_outro):]
+        return None, rota
+
+    def traduzir(self, texto, idioma, somente_memoria=False):
+        """
+        Traduz ``texto`` (português) para ``idioma``, preservando a formatação.
+
+        Com ``somente_memoria=True`` o modelo não é usado: retorna None se
+        algum segmento não estiver no dicionário nem na memória de tradução.
+        """
+        idioma = self.idioma(idioma)
+        lote = self.traduzir_varios(texto, [idioma], somente_memoria)
+        return None if lote is None else lote[idioma]
+
+    def traduzir_varios(self, texto, idiomas, somente_memoria=False):
+        """
+        Traduz ``texto`` para vários idiomas de uma vez (ver ``traduzir``).
+
+        Proteção e segmentação são feitas uma vez só. O inglês serve de pivô
+        para o francês: os segmentos que faltam em francês usam o inglês da
+        memória ou o traduzido agora (que também vai para a memória, mesmo
+        sem ter sido pedido). Idiomas independentes são traduzidos em
+        paralelo, e o francês começa assim que o inglês fica pronto.
+        """
+        idiomas = list(dict.fromkeys(self.idioma(idioma) for idioma in idiomas))
+        inicio = time.perf_counter()
+        tempos = {}
+        try:
+            protegido, valores = proteger(texto, self.padrao())
+            segmentos = segmentar(protegido)
+            unicos = {segmento.hash: segmento.chave for segmento in segmentos if segmento.chave is not None}
+            protecao = time.perf_counter() - inicio
+
+            # Dicionário e memória: idiomas pedidos e, para o que faltar, o idioma pivô
+            do_dicionario, da_memoria, faltando = {}, {}, {}
+            for idioma in idiomas:
+                tempos[idioma] = dict.fromkeys(ETAPAS, 0.0)
+                do_dicionario[idioma], da_memoria[idioma], faltando[idioma] = self._consultar(
+                    idioma, unicos, tempos[idioma])
+            if somente_memoria and any(faltando.values()):
+                return None
+            dependentes = {}
+            for idioma in idiomas:
+                pivo, passos = self.pivo(idioma)
+                if pivo is None or not faltando[idioma]:
+                    continue
+                dependentes[idioma] = (pivo, passos)
+                if pivo not in faltando:
+                    tempos[pivo] = dict.fromkeys(ETAPAS, 0.0)
+                    precisa = {chave: unicos[chave] for chave in faltando[idioma]}
+                    do_dicionario[pivo], da_memoria[pivo], faltando[pivo] = self._consultar(
+                        pivo, precisa, tempos[pivo])
+            memoria_ok = time.perf_counter()
+
+            traducoes = {idioma: {**do_dicionario[idioma], **da_memoria[idioma]} for idioma in faltando}
+            novos, prontos_em = {}, {}
+            futuros = {}
+
+            def traduzir_idioma(idioma):
+                if idioma in dependentes:
+                    pivo, passos = dependentes[idioma]
+                    if pivo in futuros:
+                        futuros[pivo].result()
+                    origem = {chave: traducoes[pivo][chave] for chave in faltando[idioma]}
+                else:
+                    passos, origem = self._rotas[idioma], faltando[idioma]
+                etapa = time.perf_counter()
+                modelos = [self.modelo(de, para) for de, para in passos]
+                tempos[idioma]['modelo'] = time.perf_counter() - etapa
+                etapa = time.perf_counter()
+                novos[idioma] = self._traduzir_segmentos(origem, modelos)
+                traducoes[idioma].update(novos[idioma])
+                prontos_em[idioma] = time.perf_counter()
+                tempos[idioma]['traducao'] = prontos_em[idioma] - etapa
+
+            # Pivôs primeiro: os dependentes esperam por eles
+            pendentes = sorted((idioma for idioma in faltando if faltando[idioma]), key=lambda i: i in dependentes)
+            if len(pendentes) == 1:
+                traduzir_idioma(pendentes[0])
+            elif pendentes:
+                with ThreadPoolExecutor(max_workers=len(pendentes), thread_name_prefix='traducao') as executor:
+                    for idioma in pendentes:
+                        futuros[idioma] = executor.submit(traduzir_idioma, idioma)
+                    for futuro in futuros.values():
+                        futuro.result()
+
+            if self.memoria is not None:
+                for idioma, traduzidos in novos.items():
+                    etapa = time.perf_counter()
+                    self.memoria.guardar(
+                        idioma, {chave: (unicos[chave], traducao) for chave, traducao in traduzidos.items()})
+                    tempos[idioma]['memoria'] += time.perf_counter() - etapa
+
+            resultados = {}
+            for idioma in idiomas:
+                etapa = time.perf_counter()
+                traduzido = '\n'.join(segmento.montar(traducoes[idioma].get(segmento.hash)) for segmento in segmentos)
+                traduzido = restaurar(traduzido, valores, self._glossario.get(idioma, {}))
+                tempos[idioma]['restauracao'] = time.perf_counter() - etapa
+                tempos[idioma]['protecao'] = protecao
+                # Tempo até o idioma ficar pronto (inclui esperar pelo pivô)
+                tempos[idioma]['total'] = (
+                    prontos_em.get(idioma, memoria_ok) - inicio + tempos[idioma]['restauracao']
+                )
+                resultados[idioma] = ResultadoTraducao(
+                    traduzido, idioma,
+                    {nome: round(s * 1000, 2) for nome, s in tempos[idioma].items()},
+                    {
+                        'unicos': len(unicos),
+                        'do_dicionario': len(do_dicionario[idioma]),
+                        'da_memoria': len(da_memoria[idioma]),
+                        'traduzidos': len(novos.get(idioma, ())),
+                    },
+                )
+        except Exception:
+            with self._lock:
+                self._contadores['erros'] += 1
+            raise
+        total = time.perf_counter() - inicio
+
+        with self._lock:
+            for idioma in idiomas:
+                self._contadores['traducoes'] += 1
+                self._contadores['caracteres'] += len(texto)
+                self._contadores['segmentos'] += len(unicos)
+                self._contadores['segmentos_dicionario'] += len(do_dicionario[idioma])
+                for nome, segundos in tempos[idioma].items():
+                    self._tempos[nome] += segundos
+            for traduzidos in novos.values():
+                self._contadores['segmentos_traduzidos'] += len(traduzidos)
+        return ResultadoLote(resultados, {'protecao': round(protecao * 1000, 2), 'total': round(total * 1000, 2)})
+
+    def _consultar(self, idioma, segmentos, tempos):
+        """
+        (do dicionário, da memória, faltando) de {hash: segmento} no idioma,
+        somando o tempo de cada consulta em ``tempos``.
+        """
+        inicio = time.perf_counter()
+        do_dicionario = self.dicionario.buscar(idioma, segmentos) if self.dicionario is not None else {}
+        restantes = {chave: segmento for chave, segmento in segmentos.items() if chave not in do_dicionario}
+        meio = time.perf_counter()
+        da_memoria = self.memoria.buscar(idioma, restantes) if self.memoria is not None and restantes else {}
+        faltando = {chave: segmento for chave, segmento in restantes.items() if chave not in da_memoria}
+        tempos['dicionario'] += meio - inicio
+        tempos['memoria'] += time.perf_counter() - meio
+        return do_dicionario, da_memoria, faltando
+
+    def _traduzir_segmentos(self, segmentos, modelos):
+        """
+        Traduz {hash: segmento} em uma chamada por modelo (uma linha por segmento).
+
+        Se o modelo não devolver o mesmo número de linhas, traduz um a um.
+        """
+        if not segmentos:
+            return {}
+        textos = list(segmentos.values())
+        traduzido = '\n'.join(textos)
+        for traduzir in modelos:
+            traduzido = traduzir(traduzido)
+        linhas = traduzido.split('\n')
+        if len(linhas) != len(textos):
+            linhas = []
+            for texto in textos:
+                for traduzir in modelos:
+                    texto = traduzir(texto)
+                linhas.append(texto.replace('\n', ' '))
+        return {chave: linha.strip() for chave, linha in zip(segmentos, linhas)}
+
+    def estatisticas(self):
+        """Contadores do processo e tempo médio (ms) de cada etapa"""
+        with self._lock:
+            contadores = dict(self._contadores)
+            tempos = dict(self._tempos)
+        traducoes = contadores['traducoes']
+        contadores['modelos_em_memoria'] = sorted(f'{origem}-{destino}' for origem, destino in self._modelos)
+        contadores['tempo_medio_ms'] = {
+            nome: round(segundos * 1000 / traducoes, 2) if traducoes else None for nome, segundos in tempos.items()
+        }
+        if self.memoria is not None:
+            contadores['memoria'] = self.memoria.estatisticas()
+        return contadores
+
+    def zerar_estatisticas(self):
+        with self._lock:
+            self._contadores.update(
+                traducoes=0, erros=0, caracteres=0, segmentos=0, segmentos_dicionario=0, segmentos_traduzidos=0,
+            )
+            self._tempos = dict.fromkeys(ETAPAS, 0.0)
+        if self.memoria is not None:
+            self.memoria.zerar_estatisticas()
+
+
+motor = MotorTraducao(memoria=MemoriaTraducao(), dicionario=DicionarioTraducao())
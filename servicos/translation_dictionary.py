@@ -0,0 +1,77 @@
+"""
+Tradução por dicionário (servicos/translations.py) dos segmentos de roteiro.
+
+Boa parte das linhas de um roteiro é fixa ou montada só com termos
+conhecidos: títulos (``*RESUMO FINANCEIRO*``), quantidades
+(``(2x Inteira, 1x Meia)``), atrativos do glossário, valores e datas.
+Essas linhas não precisam do modelo: o motor (servicos/translation.py)
+consulta o dicionário antes da memória de tradução e só manda ao Argos os
+segmentos que ele não cobre.
+
+Um segmento (já protegido, ver ``Segmento``) é dividido em placeholders,
+quantidades (``2x``), sequências de palavras e o resto (números,
+pontuação, símbolos). Ele é coberto quando cada sequência de palavras é
+uma entrada inteira do dicionário: frases não são montadas palavra a
+palavra, o que trocaria a ordem das palavras (``Valor Total`` não vira
+``Value Total``). Para cobrir uma linha nova, cadastre a frase inteira em
+``TRANSLATIONS``.
+
+``python manage.py cobertura_dicionario`` mostra quanto dos roteiros
+reais o dicionário cobre e quais linhas mais aparecem fora dele.
+"""
+import re
+
+from .translations import TRANSLATIONS
+
+_PALAVRA = r'(?!PROTECT\d|XYZTERM\d)[^\W\d_]+(?:\([^\W\d_]+\))?'
+_RE_TOKEN = re.compile(
+    r'(?P<placeholder>PROTECT\d+PROTECT|XYZTERM\d+XYZ)'
+    r'|(?P<quantidade>\d+x(?![^\W\d_]))'
+    rf'|(?P<palavras>{_PALAVRA}(?: {_PALAVRA})*)'
+    r'|(?P<outro>.)',
+    re.S,
+)
+
+
+class DicionarioTraducao:
+    """Traduções exatas de ``TRANSLATIONS`` aplicadas a segmentos inteiros"""
+
+    def __init__(self, traducoes=TRANSLATIONS):
+        self._traducoes = traducoes
+
+    @property
+    def idiomas(self):
+        return tuple(self._traducoes)
+
+    def traduzir(self, idioma, segmento):
+        """Tradução do segmento só com o dicionário, ou None se ele não cobrir tudo"""
+        entradas = self._traducoes.get(idioma)
+        if not entradas:
+            return None
+        partes = []
+        for match in _RE_TOKEN.finditer(segmento):
+            if match.lastgroup != 'palavras':
+                partes.append(match.group())
+                continue
+            traducao = entradas.get(match.group())
+            if traducao is None:
+                return None
+            partes.append(traducao)
+        return ''.join(partes)
+
+    def buscar(self, idioma, segmentos):
+        """{hash: tradução} dos segmentos ({hash: segmento}) cobertos pelo dicionário"""
+        encontrados = {}
+        for chave, segmento in segmentos.items():
+            traducao = self.traduzir(idioma, segmento)
+            if traducao is not None:
+                encontrados[chave] = traducao
+        return encontrados
+
+    def palavras_faltando(self, idioma, segmento):
+        """Sequências de palavras do segmento sem entrada no dicionário"""
+        entradas = self._traducoes.get(idioma, {})
+        return [
+            match.group() for match in _RE_TOKEN.finditer(segmento)
+            if match.lastgroup == 'palavras' and match.group() not in entradas
+        ]
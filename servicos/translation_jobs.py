@@ -0,0 +1,216 @@
+"""
+Fila de traduções de roteiro (tabela TrabalhoTraducao).
+
+Uma tradução pelo Argos ocupa CPU por segundos (o dobro em francês, que
+passa pelo inglês) e prendia um dos workers síncronos do gunicorn. Agora:
+
+1. ``translate_text`` responde na hora se todos os segmentos já estão na
+   memória de tradução; senão chama ``enfileirar`` e devolve o id do
+   trabalho (HTTP 202);
+2. o navegador consulta ``translate_job_status`` até o trabalho terminar;
+3. o comando ``processar_traducoes`` (um serviço à parte) reserva os
+   trabalhos pendentes e os executa com o motor do processo, no máximo
+   ``TRADUCAO_MAX_SIMULTANEAS`` ao mesmo tempo.
+
+Pedidos idênticos (mesmo texto e idioma) com um trabalho pendente ou em
+processamento são juntados nele: o índice único parcial
+``trabalho_traducao_em_andamento`` garante isso mesmo com requisições
+simultâneas. A situação do trabalho só é mostrada a quem o pediu (veja
+``pode_consultar``).
+
+Um trabalho que derruba o trabalhador volta para a fila por
+``recuperar_abandonados`` até ``MAX_TENTATIVAS`` vezes; depois termina com
+erro.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import TrabalhoTraducao
+
+# Trabalho em processamento há mais tempo que isso é considerado abandonado
+ABANDONADO_APOS = timedelta(minutes=10)
+# Trabalhos terminados ficam disponíveis para consulta por esse tempo
+RETER_TERMINADOS = timedelta(days=1)
+# Reservas de um mesmo trabalho antes de desistir dele (trabalhador caiu em todas)
+MAX_TENTATIVAS = 3
+# Trabalhos pedidos nesta sessão (pedidos idênticos de outros usuários são juntados)
+CHAVE_SESSAO = 'trabalhos_traducao'
+
+
+def chave_trabalho(texto, idioma):
+    return hashlib.sha256(f'{idioma}\0{texto}'.encode('utf-8')).hexdigest()
+
+
+def em_andamento():
+    return TrabalhoTraducao.objects.filter(status__in=TrabalhoTraducao.EM_ANDAMENTO)
+
+
+def enfileirar(texto, idioma, usuario=None):
+    """
+    Trabalho que vai traduzir ``texto`` para ``idioma`` (ou para a lista de
+    idiomas, em um trabalho de lote).
+
+    Retorna (trabalho, criado): se já houver um trabalho idêntico pendente ou
+    em processamento, ele é reaproveitado (``criado`` False).
+    """
+    if not isinstance(idioma, str):
+        idioma = ','.join(sorted(set(idioma)))
+    chave = chave_trabalho(texto, idioma)
+    for _ in range(2):
+        existente = em_andamento().filter(chave=chave).first()
+        if existente is not None:
+            TrabalhoTraducao.objects.filter(pk=existente.pk).update(solicitacoes=F('solicitacoes') + 1)
+            return existente, False
+        try:
+            with transaction.atomic():
+                trabalho = TrabalhoTraducao.objects.create(
+                    chave=chave, idioma=idioma, texto=texto,
+                    solicitado_por=usuario if usuario is not None and usuario.is_authenticated else None,
+                )
+            return trabalho, True
+        except IntegrityError:
+            # Criado por uma requisição simultânea: reaproveita o dela
+            continue
+    raise RuntimeError('Não foi possível enfileirar a tradução')
+
+
+def reservar(trabalhador):
+    """
+    Marca o trabalho pendente mais antigo como em processamento e o retorna.
+
+    A troca de status é condicional: se dois trabalhadores escolherem o
+    mesmo registro, só um consegue (o outro tenta o próximo).
+    """
+    while True:
+        with transaction.atomic():
+            trabalho = (
+                TrabalhoTraducao.objects.select_for_update(skip_locked=True)
+                .filter(status=TrabalhoTraducao.PENDENTE)
+                .order_by('pk')
+                .first()
+            )
+            if trabalho is None:
+                return None
+            agora = timezone.now()
+            reservado = TrabalhoTraducao.objects.filter(pk=trabalho.pk, status=TrabalhoTraducao.PENDENTE).update(
+                status=TrabalhoTraducao.PROCESSANDO, iniciado_em=agora, trabalhador=trabalhador,
+                tentativas=F('tentativas') + 1,
+            )
+        if reservado:
+            trabalho.status = TrabalhoTraducao.PROCESSANDO
+            trabalho.iniciado_em = agora
+            trabalho.trabalhador = trabalhador
+            return trabalho
+
+
+def executar(trabalho, motor):
+    """Traduz o trabalho reservado e grava o resultado (ou o erro)"""
+    try:
+        if trabalho.lote:
+            resultado = motor.traduzir_varios(trabalho.texto, trabalho.idiomas)
+        else:
+            resultado = motor.traduzir(trabalho.texto, trabalho.idioma)
+    except Exception as exc:
+        trabalho.status = TrabalhoTraducao.ERRO
+        trabalho.erro = str(exc) or exc.__class__.__name__
+    else:
+        trabalho.status = TrabalhoTraducao.CONCLUIDO
+        if trabalho.lote:
+            trabalho.traducoes = resultado.as_dict()['translations']
+        else:
+            trabalho.resultado = resultado.texto
+            trabalho.segmentos = resultado.segmentos
+        trabalho.tempos = dict(
+            resultado.tempos, fila=round((trabalho.iniciado_em - trabalho.criado_em).total_seconds() * 1000, 2)
+        )
+    trabalho.concluido_em = timezone.now()
+    trabalho.save(update_fields=['status', 'resultado', 'traducoes', 'erro', 'tempos', 'segmentos', 'concluido_em'])
+    return trabalho
+
+
+def processar_proximo(motor, trabalhador):
+    """Reserva e executa um trabalho; retorna o trabalho ou None se a fila estiver vazia"""
+    trabalho = reservar(trabalhador)
+    if trabalho is not None:
+        executar(trabalho, motor)
+    return trabalho
+
+
+def recuperar_abandonados(limite):
+    """
+    Volta para a fila os trabalhos em processamento há mais de ``limite``
+    (trabalhador caiu). Os que já foram reservados ``MAX_TENTATIVAS`` vezes
+    terminam com erro: provavelmente são eles que derrubam o trabalhador.
+    """
+    agora = timezone.now()
+    abandonados = TrabalhoTraducao.objects.filter(
+        status=TrabalhoTraducao.PROCESSANDO, iniciado_em__lt=agora - limite,
+    )
+    abandonados.filter(tentativas__gte=MAX_TENTATIVAS).update(
+        status=TrabalhoTraducao.ERRO, trabalhador='', concluido_em=agora,
+        erro=f'Trabalho abandonado após {MAX_TENTATIVAS} tentativas',
+    )
+    return abandonados.update(status=TrabalhoTraducao.PENDENTE, trabalhador='')
+
+
+def remover_antigos(limite):
+    """Apaga trabalhos terminados há mais de ``limite``"""
+    apagados, _ = TrabalhoTraducao.objects.filter(
+        status__in=(TrabalhoTraducao.CONCLUIDO, TrabalhoTraducao.ERRO),
+        concluido_em__lt=timezone.now() - limite,
+    ).delete()
+    return apagados
+
+
+def lembrar_na_sessao(request, trabalho):
+    """Permite a esta sessão consultar o trabalho (mesmo se criado por outro pedido idêntico)"""
+    ids = request.session.get(CHAVE_SESSAO, [])
+    if trabalho.pk not in ids:
+        request.session[CHAVE_SESSAO] = (ids + [trabalho.pk])[-50:]
+
+
+def pode_consultar(request, trabalho):
+    """Quem pediu o trabalho (usuário ou sessão) e a equipe"""
+    usuario = request.user
+    return (
+        usuario.is_staff
+        or usuario.is_superuser
+        or (trabalho.solicitado_por_id is not None and trabalho.solicitado_por_id == usuario.pk)
+        or trabalho.pk in request.session.get(CHAVE_SESSAO, [])
+    )
+
+
+def posicao_na_fila(trabalho):
+    """Quantos trabalhos pendentes estão na frente (0 = é o próximo)"""
+    return TrabalhoTraducao.objects.filter(status=TrabalhoTraducao.PENDENTE, pk__lt=trabalho.pk).count()
+
+
+def situacao(trabalho):
+    """Resposta JSON da consulta de um trabalho"""
+    dados = {'job_id': trabalho.pk, 'status': trabalho.status}
+    if trabalho.lote:
+        dados['target_langs'] = trabalho.idiomas
+    else:
+        dados['target_lang'] = trabalho.idioma
+    if trabalho.status == TrabalhoTraducao.CONCLUIDO and trabalho.lote:
+        dados.update(success=True, source_lang='pt', translations=trabalho.traducoes, tempos=trabalho.tempos)
+    elif trabalho.status == TrabalhoTraducao.CONCLUIDO:
+        dados.update(
+            success=True,
+            translated_text=trabalho.resultado,
+            source_lang='pt',
+            tempos=trabalho.tempos,
+            segmentos=trabalho.segmentos,
+        )
+    elif trabalho.status == TrabalhoTraducao.ERRO:
+        dados.update(success=False, error=f'Erro na tradução: {trabalho.erro}')
+    else:
+        dados['success'] = False
+        if trabalho.status == TrabalhoTraducao.PENDENTE:
+            dados['posicao'] = posicao_na_fila(trabalho)
+    return dados
+
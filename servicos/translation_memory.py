@@ -0,0 +1,113 @@
+"""
+Memória de tradução dos roteiros.
+
+Os roteiros repetem as mesmas linhas (atrativos, transfers, títulos) em
+quase toda OS. O motor (servicos/translation.py) divide o texto protegido em
+segmentos normalizados e só manda ao modelo os que ainda não foram
+traduzidos. Cada segmento traduzido fica:
+
+- em um LRU limitado por processo (``TAMANHO_LRU`` segmentos);
+- na tabela ``SegmentoTraducao``, compartilhada entre workers e reinícios.
+
+A chave é (idioma de destino, hash do segmento). Correções feitas no admin
+valem para novos processos e para o processo que gravou; os demais só as
+veem quando o segmento sai do LRU (ou reiniciam).
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .models import SegmentoTraducao
+
+TAMANHO_LRU = 5000
+
+
+def hash_segmento(segmento):
+    return hashlib.sha256(segmento.encode('utf-8')).hexdigest()
+
+
+class MemoriaTraducao:
+    """LRU do processo na frente da tabela SegmentoTraducao"""
+
+    def __init__(self, tamanho=TAMANHO_LRU, persistente=True):
+        self._tamanho = tamanho
+        self._persistente = persistente
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._contadores = {'acertos_lru': 0, 'acertos_banco': 0, 'falhas': 0}
+
+    def buscar(self, idioma, segmentos):
+        """
+        Traduções já conhecidas de ``segmentos`` ({hash: segmento}).
+
+        Consulta o LRU e, para o que faltar, a tabela (uma query).
+        Retorna {hash: tradução} só com os encontrados.
+        """
+        encontrados = {}
+        with self._lock:
+            for chave in segmentos:
+                traducao = self._lru.get((idioma, chave))
+                if traducao is not None:
+                    self._lru.move_to_end((idioma, chave))
+                    encontrados[chave] = traducao
+            self._contadores['acertos_lru'] += len(encontrados)
+
+        faltando = [chave for chave in segmentos if chave not in encontrados]
+        if faltando and self._persistente:
+            do_banco = dict(
+                SegmentoTraducao.objects.filter(idioma=idioma, hash__in=faltando).values_list('hash', 'traducao')
+            )
+            self._lembrar(idioma, do_banco)
+            encontrados.update(do_banco)
+            with self._lock:
+                self._contadores['acertos_banco'] += len(do_banco)
+
+        with self._lock:
+            self._contadores['falhas'] += len(segmentos) - len(encontrados)
+        return encontrados
+
+    def guardar(self, idioma, traducoes):
+        """Guarda novas traduções ({hash: (segmento, tradução)}) no LRU e na tabela"""
+        if not traducoes:
+            return
+        self._lembrar(idioma, {chave: traducao for chave, (_, traducao) in traducoes.items()})
+        if self._persistente:
+            SegmentoTraducao.objects.bulk_create(
+                [
+                    SegmentoTraducao(idioma=idioma, hash=chave, origem=segmento, traducao=traducao)
+                    for chave, (segmento, traducao) in traducoes.items()
+                ],
+                ignore_conflicts=True,
+            )
+
+    def _lembrar(self, idioma, traducoes):
+        with self._lock:
+            for chave, traducao in traducoes.items():
+                self._lru[(idioma, chave)] = traducao
+                self._lru.move_to_end((idioma, chave))
+            while len(self._lru) > self._tamanho:
+                self._lru.popitem(last=False)
+
+    def esquecer(self, idioma, chave):
+        """Remove um segmento do LRU deste processo (tradução corrigida)"""
+        with self._lock:
+            self._lru.pop((idioma, chave), None)
+
+    def limpar(self):
+        with self._lock:
+            self._lru.clear()
+
+    def estatisticas(self):
+        """Acertos (LRU/banco), falhas e taxa de acerto por segmento"""
+        with self._lock:
+            dados = dict(self._contadores)
+            dados['segmentos_em_memoria'] = len(self._lru)
+        total = dados['acertos_lru'] + dados['acertos_banco'] + dados['falhas']
+        dados['taxa_acerto'] = (
+            round((dados['acertos_lru'] + dados['acertos_banco']) / total, 4) if total else None
+        )
+        return dados
+
+    def zerar_estatisticas(self):
+        with self._lock:
+            self._contadores = dict.fromkeys(self._contadores, 0)
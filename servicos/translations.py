@@ -128,6 +128,18 @@ TRANSLATIONS = {
         'show das águas': 'water show',
         'Show das Águas': 'Water Show',
         'SHOW DAS ÁGUAS': 'WATER SHOW',
+
+        # Textos fixos do roteiro (servicos/roteiro.py)
+        'DIA': 'DAY',
+        'Atividades': 'Activities',
+        'Transporte Privativo': 'Private Transport',
+        'RESUMO FINANCEIRO': 'FINANCIAL SUMMARY',
+        'Investimento em Transporte': 'Transport Investment',
+        'Investimento em': 'Investment in',
+        'Subtotal Transporte': 'Transport Subtotal',
+        'Subtotal': 'Subtotal',
+        'VALOR TOTAL DO PACOTE': 'TOTAL PACKAGE PRICE',
+        'Ficamos à disposição para esclarecer qualquer dúvida ou realizar ajustes no roteiro': 'We are available to answer any questions or make adjustments to the itinerary',
     },
     'es': {
         # Português para Español
@@ -254,6 +266,18 @@ TRANSLATIONS = {
         'show das águas': 'show de las aguas',
         'Show das Águas': 'Show de las Aguas',
         'SHOW DAS ÁGUAS': 'SHOW DE LAS AGUAS',
+
+        # Textos fixos do roteiro (servicos/roteiro.py)
+        'DIA': 'DÍA',
+        'Atividades': 'Actividades',
+        'Transporte Privativo': 'Transporte Privado',
+        'RESUMO FINANCEIRO': 'RESUMEN FINANCIERO',
+        'Investimento em Transporte': 'Inversión en Transporte',
+        'Investimento em': 'Inversión en',
+        'Subtotal Transporte': 'Subtotal Transporte',
+        'Subtotal': 'Subtotal',
+        'VALOR TOTAL DO PACOTE': 'VALOR TOTAL DEL PAQUETE',
+        'Ficamos à disposição para esclarecer qualquer dúvida ou realizar ajustes no roteiro': 'Quedamos a disposición para aclarar cualquier duda o realizar ajustes en el itinerario',
     },
     'fr': {
         # Português para Français
@@ -380,5 +404,17 @@ TRANSLATIONS = {
         'show das águas': 'spectacle des eaux',
         'Show das Águas': 'Spectacle des Eaux',
         'SHOW DAS ÁGUAS': 'SPECTACLE DES EAUX',
+
+        # Textos fixos do roteiro (servicos/roteiro.py)
+        'DIA': 'JOUR',
+        'Atividades': 'Activités',
+        'Transporte Privativo': 'Transport Privé',
+        'RESUMO FINANCEIRO': 'RÉSUMÉ FINANCIER',
+        'Investimento em Transporte': 'Investissement en Transport',
+        'Investimento em': 'Investissement en',
+        'Subtotal Transporte': 'Sous-total Transport',
+        'Subtotal': 'Sous-total',
+        'VALOR TOTAL DO PACOTE': 'VALEUR TOTALE DU FORFAIT',
+        'Ficamos à disposição para esclarecer qualquer dúvida ou realizar ajustes no roteiro': "Nous restons à votre disposition pour toute question ou ajustement de l'itinéraire",
     }
 }
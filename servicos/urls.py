@@ -36,6 +36,7 @@ urlpatterns = [
     path('ordens-servico/criar/', views.ordem_servico_create, name='ordem_servico_create'),
     path('ordens-servico/<int:pk>/', views.ordem_servico_detail, name='ordem_servico_detail'),
     path('ordens-servico/<int:pk>/editar/', views.ordem_servico_edit, name='ordem_servico_edit'),
+    path('ordens-servico/<int:pk>/editor/', views.ordem_servico_editor_payload, name='ordem_servico_editor_payload'),
     path('ordens-servico/<int:pk>/deletar/', views.ordem_servico_delete, name='ordem_servico_delete'),
     
     # URLs antigas (retrocompatibilidade) - redirecionar para as novas
@@ -50,5 +51,10 @@ urlpatterns = [
     path('ajax/valores/', views.ajax_get_subcategoria_valores, name='ajax_get_subcategoria_valores'),
     path('ajax/tipos-meia/', views.ajax_load_tipos_meia, name='ajax_load_tipos_meia'),
     path('ajax/servico-info/', views.ajax_get_servico_info, name='ajax_get_servico_info'),
+    path('ajax/catalog.json', views.catalogo_json, name='catalogo_json'),
     path('ajax/translate/', views.translate_text, name='translate_text'),
+    path('ajax/translate/batch/', views.translate_batch, name='translate_batch'),
+    path('ajax/translate/jobs/<int:pk>/', views.translate_job_status, name='translate_job_status'),
+    path('ajax/translate/stats/', views.traducao_stats, name='traducao_stats'),
+    path('ajax/roteiro-cache/stats/', views.roteiro_cache_stats, name='roteiro_cache_stats'),
 ]
@@ -1,142 +1,42 @@
 """
 Views para gerenciamento de serviços turísticos
 """
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
+from django.urls import reverse
+from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.core.paginator import Paginator
-from django.db import connection
+from core.pagination import KeysetPaginator
 from django.db.models import Q, Sum, Count
-from django.utils.dateparse import parse_date
-from django.views.decorators.http import require_http_methods
-from .models import Categoria, SubCategoria, TipoMeiaEntrada, LancamentoServico, Transfer, OrdemServico, TransferOrdemServico
+from django.views.decorators.http import condition, require_http_methods
+from .models import (
+    Categoria, SubCategoria, TipoMeiaEntrada, LancamentoServico, Transfer, OrdemServico, TrabalhoTraducao,
+)
 from .forms import CategoriaForm, SubCategoriaForm, TipoMeiaEntradaForm, LancamentoServicoForm, TransferForm, OrdemServicoForm
 from .permissions import require_permission
+from .catalog import catalogo
+from .cache_roteiro import estatisticas as estatisticas_cache_roteiro, etag_itens, obter_roteiro
+from .roteiro import itinerario_da_ordem, renderizar_whatsapp
+from .resumo import filtro_categoria
+from .schema import capabilities
+from .services import OrdemServicoWriter, PayloadOrdemServicoInvalido, payload_editor
+from .translation import TraducaoIndisponivel, motor as motor_traducao
+from .translation_jobs import enfileirar, lembrar_na_sessao, pode_consultar, situacao
 
 
-def _transfer_nome_personalizado_disponivel():
-    try:
-        with connection.cursor() as cursor:
-            columns = [column.name for column in connection.introspection.get_table_description(cursor, TransferOrdemServico._meta.db_table)]
-        return 'nome_personalizado' in columns
-    except Exception:
-        return False
+def _gerar_preview_roteiro_ordem(ordem):
+    """Gera o preview no mesmo formato visual usado no cadastro e o resumo de transfers"""
+    itinerario = itinerario_da_ordem(ordem)
+    return renderizar_whatsapp(itinerario), itinerario.resumo_transfers()
 
 
-def _formatar_moeda_br(valor):
-    return f'R$ {float(valor):.2f}'.replace('.', ',')
+def _preview_roteiro_ordem(ordem):
+    """Preview do roteiro e resumo de transfers, via cache versionado (servicos/cache_roteiro.py)"""
+    return obter_roteiro(ordem, _gerar_preview_roteiro_ordem)
 
 
-def _gerar_preview_roteiro_ordem(ordem):
-    """Gera o preview no mesmo formato visual usado no cadastro."""
-    lancamentos = list(ordem.lancamentos.select_related('categoria', 'subcategoria').all())
-    transfer_nome_personalizado_disponivel = _transfer_nome_personalizado_disponivel()
-    transfers = list(ordem.transfers.select_related('transfer').all()) if transfer_nome_personalizado_disponivel else []
-
-    por_data = {}
-    for lancamento in lancamentos:
-        data = lancamento.data_servico.strftime('%Y-%m-%d')
-        por_data.setdefault(data, []).append(lancamento)
-
-    transfers_por_data = {}
-    if transfers:
-        for transfer_ordem in transfers:
-            data_transfer = transfer_ordem.data_transfer.strftime('%Y-%m-%d') if getattr(transfer_ordem, 'data_transfer', None) else ''
-            transfers_por_data.setdefault(data_transfer, []).append(transfer_ordem)
-
-    datas_ordenadas = sorted(set(por_data.keys()) | set(transfers_por_data.keys()))
-
-    roteiro = '✨ *ROTEIRO* ✨\n'
-    roteiro += '\n\n'
-
-    resumo_servicos = []
-    resumo_transfers = []
-    total_tickets = 0.0
-    total_transfers = 0.0
-    total_geral = 0.0
-
-    for data in datas_ordenadas:
-        tem_servicos = data in por_data and por_data[data]
-        tem_transfers = data in transfers_por_data and transfers_por_data[data]
-
-        if data:
-            roteiro += f'🗓️ *DIA | {data[8:10]}/{data[5:7]}/{data[0:4]}*\n'
-            roteiro += '───────────────────\n'
-
-        if tem_servicos:
-            roteiro += '🎟️ *Atividades & Ingressos:*\n'
-            for lancamento in por_data[data]:
-                qtds = []
-                if lancamento.qtd_inteira > 0:
-                    qtds.append(f'{lancamento.qtd_inteira}x Inteira')
-                if lancamento.qtd_meia > 0:
-                    qtds.append(f'{lancamento.qtd_meia}x Meia')
-                if lancamento.qtd_infantil > 0:
-                    qtds.append(f'{lancamento.qtd_infantil}x Infantil')
-                
-                desc_quantidades = ', '.join(qtds)
-                nome_atividade = lancamento.obs_publica or lancamento.subcategoria.nome
-                roteiro += f'  • {nome_atividade} ({desc_quantidades})\n'
-
-                info = lancamento.subcategoria
-                valor_inteira = float(getattr(info, 'valor_inteira', 0))
-                valor_meia = float(getattr(info, 'valor_meia', 0))
-                valor_infantil = float(getattr(info, 'valor_infantil', 0))
-                subtotal_ingressos = (
-                    (lancamento.qtd_inteira * valor_inteira)
-                    + (lancamento.qtd_meia * valor_meia)
-                    + (lancamento.qtd_infantil * valor_infantil)
-                )
-                resumo_servicos.append({
-                    'nome': nome_atividade,
-                    'valorIngressos': subtotal_ingressos,
-                })
-                total_tickets += subtotal_ingressos
-                total_geral += subtotal_ingressos
-            roteiro += '\n'
-
-        if tem_transfers:
-            roteiro += '🚘 *Transporte Privativo:*\n'
-            for transfer_ordem in transfers_por_data[data]:
-                nome_exibicao = getattr(transfer_ordem, 'nome_exibicao', '') or transfer_ordem.transfer.nome
-                roteiro += f'  • {nome_exibicao}\n'
-                
-                valor_t = float(transfer_ordem.valor)
-                resumo_transfers.append({
-                    'nome': nome_exibicao,
-                    'valor': valor_t,
-                    'data_transfer': transfer_ordem.data_transfer.strftime('%Y-%m-%d') if getattr(transfer_ordem, 'data_transfer', None) else '',
-                    'data_transfer_br': transfer_ordem.data_transfer.strftime('%d/%m/%Y') if getattr(transfer_ordem, 'data_transfer', None) else '',
-                })
-                total_transfers += valor_t
-                total_geral += valor_t
-            roteiro += '\n'
-
-    roteiro += '═══════════════════\n'
-    roteiro += '💼 *RESUMO FINANCEIRO*\n'
-    roteiro += '═══════════════════\n'
-
-    if resumo_transfers:
-        roteiro += '\n🚘 *Investimento em Transporte:*\n'
-        for item in resumo_transfers:
-            roteiro += f'  • {item["nome"]}: {_formatar_moeda_br(item["valor"])}\n'
-        roteiro += f'  _*Subtotal Transporte: {_formatar_moeda_br(total_transfers)}*_\n'
-
-    if resumo_servicos:
-        roteiro += '\n🎟️ *Investimento em Ingressos:*\n'
-        for item in resumo_servicos:
-            if item['valorIngressos'] > 0:
-                roteiro += f'  • {item["nome"]}: {_formatar_moeda_br(item["valorIngressos"])}\n'
-        roteiro += f'  _*Subtotal Ingressos: {_formatar_moeda_br(total_tickets)}*_\n'
-
-    roteiro += '\n───────────────────\n'
-    roteiro += f'💎 *VALOR TOTAL DO PACOTE: {_formatar_moeda_br(total_geral)}*\n'
-    roteiro += '───────────────────\n\n'
-    roteiro += 'Ficamos à disposição para esclarecer qualquer dúvida ou realizar ajustes no roteiro!'
-
-    return roteiro, resumo_transfers, transfers
-
 def formatar_data_br(data_iso):
     if not data_iso:
         return ''
@@ -256,7 +156,7 @@ def servico_list(request):
     page = request.GET.get('page')
     servicos = paginator.get_page(page)
     
-    categorias = Categoria.objects.filter(ativo=True)
+    categorias = catalogo().categorias_ativas()
     
     context = {
         'servicos': servicos,
@@ -422,7 +322,7 @@ def ordem_servico_list(request):
     categoria_id = request.GET.get('categoria', '')
     data_inicio = request.GET.get('data_inicio', '')
     data_fim = request.GET.get('data_fim', '')
-    transfer_nome_personalizado_disponivel = _transfer_nome_personalizado_disponivel()
+    transfer_nome_personalizado_disponivel = capabilities.transfer_nome_personalizado
 
     ordens = OrdemServico.objects.all()
 
@@ -439,43 +339,34 @@ def ordem_servico_list(request):
         else:
             filtros |= Q(transfers__transfer__nome__icontains=search)
         ordens = ordens.filter(filtros).distinct()
-    if categoria_id:
-        ordens = ordens.filter(lancamentos__subcategoria__categoria_id=categoria_id).distinct()
+    # Filtros sobre o resumo desnormalizado da OS (sem JOIN em lançamentos)
+    if categoria_id.isdigit():
+        ordens = ordens.filter(**filtro_categoria(categoria_id))
     if data_inicio:
-        ordens = ordens.filter(lancamentos__data_servico__gte=data_inicio).distinct()
+        ordens = ordens.filter(ultima_data_servico__gte=data_inicio)
     if data_fim:
-        ordens = ordens.filter(lancamentos__data_servico__lte=data_fim).distinct()
-
-    # Estatísticas
-    stats = {
-        'total_ordens': ordens.count(),
-        'total_servicos': sum(
-            os.lancamentos.count() + (os.transfers.count() if transfer_nome_personalizado_disponivel else 0)
-            for os in ordens
-        ),
-    }
+        ordens = ordens.filter(primeira_data_servico__lte=data_fim)
 
-    # Paginação
-    paginator = Paginator(ordens, 20)
-    page = request.GET.get('page')
-    ordens = paginator.get_page(page)
+    # Estatísticas (uma única query agregada)
+    stats = ordens.list_totals(incluir_transfers=transfer_nome_personalizado_disponivel)
+
+    # Paginação por keyset - contagens, transfers e lançamentos vêm anotados/pré-carregados
+    ordens = ordens.with_list_annotations(incluir_transfers=transfer_nome_personalizado_disponivel)
+    paginator = KeysetPaginator(ordens, 20, ordering=('-data_criacao', '-id'))
+    ordens = paginator.get_page(request.GET.get('cursor'))
 
     for ordem in ordens:
         ordem.transfers_resumo = []
         if transfer_nome_personalizado_disponivel:
-            try:
-                for transfer_ordem in ordem.transfers.select_related('transfer').all():
-                    nome_exibicao = getattr(transfer_ordem, 'nome_exibicao', '') or transfer_ordem.transfer.nome
-                    ordem.transfers_resumo.append({
-                        'nome': nome_exibicao,
-                        'nome_exibicao': nome_exibicao,
-                        'valor': transfer_ordem.valor,
-                    })
-            except Exception:
-                ordem.transfers_resumo = []
-        ordem.total_itens = ordem.lancamentos.count() + len(ordem.transfers_resumo)
-
-    categorias = Categoria.objects.filter(ativo=True)
+            for transfer_ordem in ordem.transfers.all():
+                nome_exibicao = transfer_ordem.nome_exibicao
+                ordem.transfers_resumo.append({
+                    'nome': nome_exibicao,
+                    'nome_exibicao': nome_exibicao,
+                    'valor': transfer_ordem.valor,
+                })
+
+    categorias = catalogo().categorias_ativas()
 
     # Debug: Verificar permissões do usuário
     has_add_perm = request.user.has_perm('servicos.add_ordemservico')
@@ -506,8 +397,9 @@ def ordem_servico_create(request):
     from django.utils import timezone
     # Inicializa variáveis para GET
     form = OrdemServicoForm()
-    categorias = Categoria.objects.filter(ativo=True)
-    transfers = Transfer.objects.filter(ativo=True) if hasattr(Transfer, 'ativo') else Transfer.objects.all()
+    snapshot = catalogo()
+    categorias = snapshot.categorias_ativas()
+    transfers = snapshot.transfers_ativos()
 
     if request.method == 'POST':
         if request.content_type == 'application/json':
@@ -536,59 +428,10 @@ def ordem_servico_create(request):
                             ordem.cliente = Cliente.objects.get(pk=cliente_id)
                         except Exception:
                             pass
-                    ordem.save()
-
-                    servicos = data.get('servicos', [])
-                    from .models import LancamentoServico
-                    # Antes de adicionar novos transfers, remover todos os transfers antigos da OS (garante remoção ao editar)
-                    ordem.transfers.all().delete()
-                    for s in servicos:
-                        if s.get('__transfer_avulso'):
-                            # Para cada transfer avulso, criar TransferOrdemServico
-                            for transfer_data in s.get('transfers', []):
-                                transfer_id = transfer_data.get('transfer_id')
-                                transfer_valor = transfer_data.get('valor', 0)
-                                nome_personalizado = transfer_data.get('nome_personalizado', '')
-                                data_transfer = parse_date(transfer_data.get('data_transfer') or '') if transfer_data.get('data_transfer') else None
-                                try:
-                                    transfer_id = int(transfer_id)
-                                except Exception:
-                                    continue
-                                try:
-                                    transfer_obj = Transfer.objects.get(pk=transfer_id)
-                                except Transfer.DoesNotExist:
-                                    return JsonResponse({
-                                        'error': 'Transfer não encontrado',
-                                        'transfer_id': transfer_id
-                                    }, status=400)
-                                TransferOrdemServico.objects.create(
-                                    ordem_servico=ordem,
-                                    transfer=transfer_obj,
-                                    nome_personalizado=nome_personalizado,
-                                    valor=transfer_valor,
-                                    data_transfer=data_transfer,
-                                )
-                        else:
-                            # Só cria lançamento se houver serviço válido
-                            if s.get('servico_id') and s.get('categoria_id') and s.get('data'):
-                                lancamento = LancamentoServico(
-                                    ordem_servico=ordem,
-                                    categoria_id=s.get('categoria_id'),
-                                    subcategoria_id=s.get('servico_id'),
-                                    data_servico=s.get('data'),
-                                    obs_publica=s.get('descricao', ''),
-                                    qtd_inteira=s.get('qtd_inteira', 0),
-                                    qtd_meia=s.get('qtd_meia', 0),
-                                    qtd_infantil=s.get('qtd_infantil', 0),
-                                    idades_criancas=','.join(str(i) for i in s.get('idades', [])),
-                                    tipos_meia_entrada='\n'.join(str(tm.get('tipo')) for tm in s.get('tipos_meia', [])),
-                                    valor_unit_inteira=s['info'].get('valor_inteira', 0) if s.get('info') else 0,
-                                    valor_unit_meia=s['info'].get('valor_meia', 0) if s.get('info') else 0,
-                                    valor_unit_infantil=s['info'].get('valor_infantil', 0) if s.get('info') else 0,
-                                )
-                                lancamento.save()
-                    ordem.calcular_total()
-                    ordem.save()
+                    try:
+                        OrdemServicoWriter(ordem, user=request.user).salvar(data.get('servicos', []))
+                    except PayloadOrdemServicoInvalido as e:
+                        return JsonResponse(e.as_json(), status=400)
                     return JsonResponse({'success': True, 'ordem_id': ordem.id})
                 else:
                     return JsonResponse({'error': 'Dados inválidos', 'form_errors': form.errors}, status=400)
@@ -608,6 +451,7 @@ def ordem_servico_create(request):
         'title': 'Nova Ordem de Serviço',
         'categorias': categorias,
         'transfers': transfers,
+        'catalogo_revisao': snapshot.revisao,
         # ...outros contextos necessários...
     })
 
@@ -632,56 +476,13 @@ def ordem_servico_edit(request, pk):
             }
             form = OrdemServicoForm(form_data, instance=ordem)
             if form.is_valid():
-                ordem = form.save()
-                # Remover todos os lançamentos e transfers antigos
-                ordem.lancamentos.all().delete()
-                ordem.transfers.all().delete()
-                servicos = data.get('servicos', [])
-                for s in servicos:
-                    if s.get('__transfer_avulso'):
-                        for transfer_data in s.get('transfers', []):
-                            transfer_id = transfer_data.get('transfer_id')
-                            transfer_valor = transfer_data.get('valor', 0)
-                            nome_personalizado = transfer_data.get('nome_personalizado', '')
-                            data_transfer = parse_date(transfer_data.get('data_transfer') or '') if transfer_data.get('data_transfer') else None
-                            try:
-                                transfer_id = int(transfer_id)
-                            except Exception:
-                                continue
-                            try:
-                                transfer_obj = Transfer.objects.get(pk=transfer_id)
-                            except Transfer.DoesNotExist:
-                                return JsonResponse({
-                                    'error': 'Transfer não encontrado',
-                                    'transfer_id': transfer_id
-                                }, status=400)
-                            TransferOrdemServico.objects.create(
-                                ordem_servico=ordem,
-                                transfer=transfer_obj,
-                                nome_personalizado=nome_personalizado,
-                                valor=transfer_valor,
-                                data_transfer=data_transfer,
-                            )
-                    else:
-                        if s.get('servico_id') and s.get('categoria_id') and s.get('data'):
-                            lancamento = LancamentoServico(
-                                ordem_servico=ordem,
-                                categoria_id=s.get('categoria_id'),
-                                subcategoria_id=s.get('servico_id'),
-                                data_servico=s.get('data'),
-                                obs_publica=s.get('descricao', ''),
-                                qtd_inteira=s.get('qtd_inteira', 0),
-                                qtd_meia=s.get('qtd_meia', 0),
-                                qtd_infantil=s.get('qtd_infantil', 0),
-                                idades_criancas=','.join(str(i) for i in s.get('idades', [])),
-                                tipos_meia_entrada='\n'.join(str(tm.get('tipo')) for tm in s.get('tipos_meia', [])),
-                                valor_unit_inteira=s['info'].get('valor_inteira', 0) if s.get('info') else 0,
-                                valor_unit_meia=s['info'].get('valor_meia', 0) if s.get('info') else 0,
-                                valor_unit_infantil=s['info'].get('valor_infantil', 0) if s.get('info') else 0,
-                            )
-                            lancamento.save()
-                ordem.calcular_total()
-                ordem.save()
+                ordem = form.save(commit=False)
+                # Sincroniza os itens com o payload: remove os ausentes, atualiza
+                # (bulk_update) só os alterados e insere (bulk_create) os novos
+                try:
+                    OrdemServicoWriter(ordem, user=request.user).salvar(data.get('servicos', []))
+                except PayloadOrdemServicoInvalido as e:
+                    return JsonResponse(e.as_json(), status=400)
                 return JsonResponse({'success': True, 'ordem_id': ordem.id})
             else:
                 return JsonResponse({'error': 'Dados inválidos', 'form_errors': form.errors}, status=400)
@@ -702,113 +503,51 @@ def ordem_servico_edit(request, pk):
             return redirect('servicos:ordem_servico_list')
     else:
         form = OrdemServicoForm(instance=ordem)
-    import json
-    categorias = Categoria.objects.filter(ativo=True)
-    transfer_nome_personalizado_disponivel = _transfer_nome_personalizado_disponivel()
-    transfers = Transfer.objects.filter(ativo=True) if hasattr(Transfer, 'ativo') else Transfer.objects.all()
-    tipos_meia_por_nome = {
-        tipo.nome.strip().lower(): tipo.id
-        for tipo in TipoMeiaEntrada.objects.all()
-    }
-    # Serializar lançamentos e transfers para o JS
-    lancamentos_data = []
-    datas_servicos = [l.data_servico for l in ordem.lancamentos.all()]
-    menor_data = min(datas_servicos).strftime('%Y-%m-%d') if datas_servicos else ''
-    for l in ordem.lancamentos.all():
-        lancamentos_data.append({
-            'id': l.id,
-            'data': l.data_servico.strftime('%Y-%m-%d'),
-            'categoria_id': l.categoria_id,
-            'servico_id': l.subcategoria_id,
-            'servico_nome': l.subcategoria.nome,
-            'qtd_inteira': l.qtd_inteira,
-            'qtd_meia': l.qtd_meia,
-            'qtd_infantil': l.qtd_infantil,
-            'idades': [int(i) for i in l.idades_criancas.split(',') if i.strip()] if l.idades_criancas else [],
-            'tipos_meia': [
-                {
-                    'tipo': t,
-                    'id': tipos_meia_por_nome.get(t.strip().lower())
-                }
-                for t in l.tipos_meia_entrada.split('\n') if t.strip()
-            ],
-            'descricao': l.obs_publica,
-            'valor_transfer_ida': float(l.valor_transfer_ida),
-            'valor_transfer_volta': float(l.valor_transfer_volta),
-            'transfers': [],
-            'info': {
-                'id': l.subcategoria_id,
-                'nome': l.subcategoria.nome,
-                'descricao': l.subcategoria.descricao,
-                'categoria_nome': l.categoria.nome,
-                'valor_inteira': float(l.valor_unit_inteira),
-                'valor_meia': float(l.valor_unit_meia),
-                'valor_infantil': float(l.valor_unit_infantil),
-                'aceita_meia_entrada': getattr(l.subcategoria, 'aceita_meia_entrada', False),
-                'regras_meia_entrada': getattr(l.subcategoria, 'regras_meia_entrada', ''),
-                'permite_infantil': getattr(l.subcategoria, 'permite_infantil', False),
-                'idade_minima_infantil': getattr(l.subcategoria, 'idade_minima_infantil', 0),
-                'idade_maxima_infantil': getattr(l.subcategoria, 'idade_maxima_infantil', 0),
-                'possui_isencao': getattr(l.subcategoria, 'possui_isencao', False),
-                'idade_isencao_min': getattr(l.subcategoria, 'idade_isencao_min', 0),
-                'idade_isencao_max': getattr(l.subcategoria, 'idade_isencao_max', 0),
-                'texto_isencao': getattr(l.subcategoria, 'texto_isencao', ''),
-                'tem_idade_minima': getattr(l.subcategoria, 'tem_idade_minima', False),
-                'idade_minima': getattr(l.subcategoria, 'idade_minima', 0),
-            }
-        })
-
-    # Transfers avulsos enviados separadamente e também como __transfer_avulso em lancamentos_json (para roteiro/resumo)
-    transfers_data = []
-    if transfer_nome_personalizado_disponivel:
-        for t in ordem.transfers.select_related('transfer').all():
-            nome_exibicao = t.nome_exibicao if hasattr(t, 'nome_exibicao') else (getattr(t, 'nome_personalizado', '') or t.transfer.nome)
-            data_transfer = t.data_transfer.strftime('%Y-%m-%d') if getattr(t, 'data_transfer', None) else ''
-            transfer_dict = {
-                'transfer_id': str(t.transfer_id),
-                'nome': t.transfer.nome,
-                'nome_personalizado': getattr(t, 'nome_personalizado', ''),
-                'nome_exibicao': nome_exibicao,
-                'valor': float(t.valor),
-                'data_transfer': data_transfer,
-            }
-            transfers_data.append(transfer_dict)
-            lancamentos_data.append({
-                'id': f'transfer_avulso_{t.id}',
-                'data': data_transfer or menor_data,
-                'data_transfer': data_transfer,
-                'servico_nome': nome_exibicao,
-                'descricao': nome_exibicao,
-                'qtd_inteira': 0,
-                'qtd_meia': 0,
-                'qtd_infantil': 0,
-                'idades': [],
-                'tipos_meia': [],
-                'transfers': [transfer_dict],
-                'valor_transfer_ida': float(t.valor),
-                'valor_transfer_volta': 0,
-                'info': {},
-                '__transfer_avulso': True,
-                '__nao_exibir_card': True
-            })
-
-    # Gerar roteiro através do método otimizado
-    roteiro, _, _ = _gerar_preview_roteiro_ordem(ordem)
+    snapshot = catalogo()
+    categorias = snapshot.categorias_ativas()
+    transfer_nome_personalizado_disponivel = capabilities.transfer_nome_personalizado
+    transfers = snapshot.transfers_ativos()
 
+    # Lançamentos, transfers e roteiro são carregados pelo JS em ordem_servico_editor_payload
     return render(request, 'servicos/os/ordem_servico_form.html', {
         'form': form,
         'editando': True,
         'title': f'Editar Ordem de Serviço #{ordem.numero_os}',
         'categorias': categorias,
         'transfers': transfers,
-        'lancamentos_json': json.dumps(lancamentos_data),
-        'transfers_json': json.dumps(transfers_data),
-        'roteiro': roteiro,
+        'catalogo_revisao': snapshot.revisao,
         'transfer_nome_personalizado_disponivel': transfer_nome_personalizado_disponivel,
         # ...outros contextos necessários...
     })
 
 
+def _etag_editor_payload(request, pk):
+    etag = etag_itens(pk)
+    if etag is None:
+        return None
+    # Os itens trazem as regras do serviço (info): o catálogo também entra na versão
+    return f'{etag}-c{catalogo().revisao}'
+
+
+@require_permission('servicos.change_ordemservico')
+@require_http_methods(['GET'])
+@condition(etag_func=_etag_editor_payload)
+def ordem_servico_editor_payload(request, pk):
+    """
+    Itens da OS para o editor (JSON carregado pelo lancamento_form.js).
+
+    O ETag vem da versão da OS gravada no banco (``atualizado_em``, avançado
+    também pelas alterações de itens) e da revisão do catálogo; com
+    If-None-Match igual a resposta é 304 sem carregar os itens.
+    """
+    payload = payload_editor(pk)
+    if payload is None:
+        raise Http404('Ordem de Serviço não encontrada')
+    response = JsonResponse(payload)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 @require_permission('servicos.delete_ordemservico')
 def ordem_servico_delete(request, pk):
     """Deleta Ordem de Serviço inteira com todos os lançamentos"""
@@ -838,14 +577,13 @@ def ordem_servico_detail(request, pk):
     from .models import OrdemServico
     ordem = get_object_or_404(OrdemServico, pk=pk)
     todos_lancamentos = ordem.lancamentos.select_related('categoria', 'subcategoria').all()
-    transfer_nome_personalizado_disponivel = _transfer_nome_personalizado_disponivel()
-    preview_roteiro, transfers_resumo, transfers = _gerar_preview_roteiro_ordem(ordem)
+    transfer_nome_personalizado_disponivel = capabilities.transfer_nome_personalizado
+    preview_roteiro, transfers_resumo = _preview_roteiro_ordem(ordem)
     context = {
         'ordem': ordem,
         'todos_lancamentos': todos_lancamentos,
         'preview_roteiro': preview_roteiro,
         'transfers_resumo': transfers_resumo,
-        'transfers': transfers,
         'transfer_nome_personalizado_disponivel': transfer_nome_personalizado_disponivel,
         'title': f'OS #{ordem.numero_os}'
     }
@@ -855,6 +593,17 @@ def ordem_servico_detail(request, pk):
 lancamento_detail = ordem_servico_detail
 
 
+def _is_staff(user):
+    return user.is_authenticated and (user.is_superuser or user.is_staff)
+
+
+@login_required
+@user_passes_test(_is_staff)
+def roteiro_cache_stats(request):
+    """Estatísticas do cache de preview do roteiro (acertos/falhas) para a equipe"""
+    return JsonResponse(estatisticas_cache_roteiro())
+
+
 # ==================== AJAX VIEWS ====================
 
 @login_required
@@ -863,15 +612,17 @@ def ajax_load_subcategorias(request):
     categoria_id = request.GET.get('categoria_id')
     
     if categoria_id:
-        subcategorias = SubCategoria.objects.filter(
-            categoria_id=categoria_id
-        ).values(
-            'id', 'nome', 
+        campos = (
+            'id', 'nome',
             'valor_inteira', 'valor_meia', 'valor_infantil',
             'aceita_meia_entrada', 'regras_meia_entrada',
-            'idade_isencao_min', 'idade_isencao_max', 'texto_isencao'
+            'idade_isencao_min', 'idade_isencao_max', 'texto_isencao',
         )
-        return JsonResponse(list(subcategorias), safe=False)
+        subcategorias = [
+            {campo: getattr(servico, campo) for campo in campos}
+            for servico in catalogo().servicos_da_categoria(categoria_id, apenas_ativos=False)
+        ]
+        return JsonResponse(subcategorias, safe=False)
     
     return JsonResponse([], safe=False)
 
@@ -882,27 +633,17 @@ def ajax_get_subcategoria_valores(request):
     subcategoria_id = request.GET.get('subcategoria_id')
     
     if subcategoria_id:
-        try:
-            subcategoria = SubCategoria.objects.get(id=subcategoria_id)
-            data = {
-                'valor_inteira': float(subcategoria.valor_inteira),
-                'valor_meia': float(subcategoria.valor_meia),
-                'valor_infantil': float(subcategoria.valor_infantil),
-                'aceita_meia_entrada': subcategoria.aceita_meia_entrada,
-                'regras_meia_entrada': subcategoria.regras_meia_entrada,
-                'permite_infantil': subcategoria.permite_infantil,
-                'idade_minima_infantil': subcategoria.idade_minima_infantil,
-                'idade_maxima_infantil': subcategoria.idade_maxima_infantil,
-                'possui_isencao': subcategoria.possui_isencao,
-                'idade_isencao_min': subcategoria.idade_isencao_min,
-                'idade_isencao_max': subcategoria.idade_isencao_max,
-                'texto_isencao': subcategoria.texto_isencao,
-                'tem_idade_minima': subcategoria.tem_idade_minima,
-                'idade_minima': subcategoria.idade_minima,
-            }
-            return JsonResponse(data)
-        except SubCategoria.DoesNotExist:
+        subcategoria = catalogo().servico(subcategoria_id)
+        if subcategoria is None:
             return JsonResponse({'error': 'Serviço não encontrado'}, status=404)
+        data = subcategoria.as_dict((
+            'valor_inteira', 'valor_meia', 'valor_infantil',
+            'aceita_meia_entrada', 'regras_meia_entrada',
+            'permite_infantil', 'idade_minima_infantil', 'idade_maxima_infantil',
+            'possui_isencao', 'idade_isencao_min', 'idade_isencao_max', 'texto_isencao',
+            'tem_idade_minima', 'idade_minima',
+        ))
+        return JsonResponse(data)
     
     return JsonResponse({'error': 'ID não fornecido'}, status=400)
 
@@ -910,8 +651,37 @@ def ajax_get_subcategoria_valores(request):
 @login_required
 def ajax_load_tipos_meia(request):
     """Retorna lista de tipos de meia entrada ativos em JSON"""
-    tipos = TipoMeiaEntrada.objects.filter(ativo=True).values('id', 'nome')
-    return JsonResponse(list(tipos), safe=False)
+    tipos = [{'id': tipo.id, 'nome': tipo.nome} for tipo in catalogo().tipos_meia_ativos()]
+    return JsonResponse(tipos, safe=False)
+
+
+def _etag_catalogo(request):
+    # URL versionada de outra revisão: confere a revisão no banco antes de responder
+    versao_pedida = request.GET.get('v')
+    snapshot = catalogo(verificar=versao_pedida is not None and versao_pedida != str(catalogo().revisao))
+    request.catalogo = snapshot
+    return f'catalogo-{snapshot.revisao}'
+
+
+@login_required
+@require_http_methods(['GET'])
+@condition(etag_func=_etag_catalogo)
+def catalogo_json(request):
+    """
+    Catálogo completo do formulário de OS (servicos/catalog.py).
+
+    A página informa a revisão atual e o JS pede ``catalog.json?v=<revisão>``:
+    essa URL nunca muda de conteúdo e pode ficar em cache no navegador por
+    tempo indeterminado. Sem ``v`` (ou com revisão antiga) a resposta exige
+    revalidação pelo ETag.
+    """
+    snapshot = getattr(request, 'catalogo', None) or catalogo()
+    response = JsonResponse(snapshot.as_json())
+    if request.GET.get('v') == str(snapshot.revisao):
+        response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 # ==================== VIEWS DE TRANSFER ====================
@@ -1012,405 +782,118 @@ def ajax_get_servico_info(request):
     if not servico_id:
         return JsonResponse({'error': 'ID do serviço não informado'}, status=400)
     
-    try:
-        servico = SubCategoria.objects.get(pk=servico_id)
-        
-        data = {
-            'id': servico.id,
-            'nome': servico.nome,
-            'descricao': servico.descricao,
-            'categoria_nome': servico.categoria.nome,
-            
-            # Valores
-            'valor_inteira': float(servico.valor_inteira),
-            'valor_meia': float(servico.valor_meia),
-            'valor_infantil': float(servico.valor_infantil),
-            
-            # Flags de meia entrada
-            'aceita_meia_entrada': servico.aceita_meia_entrada,
-            'regras_meia_entrada': servico.regras_meia_entrada,
-            
-            # Flags de infantil
-            'permite_infantil': servico.permite_infantil,
-            'idade_minima_infantil': servico.idade_minima_infantil,
-            'idade_maxima_infantil': servico.idade_maxima_infantil,
-            
-            # Flags de isenção
-            'possui_isencao': servico.possui_isencao,
-            'idade_isencao_min': servico.idade_isencao_min,
-            'idade_isencao_max': servico.idade_isencao_max,
-            'texto_isencao': servico.texto_isencao,
-            
-            # Flags de idade mínima
-            'tem_idade_minima': servico.tem_idade_minima,
-            'idade_minima': servico.idade_minima,
-        }
-        
-        return JsonResponse(data)
-        
-    except SubCategoria.DoesNotExist:
+    servico = catalogo().servico(servico_id)
+    if servico is None:
         return JsonResponse({'error': 'Serviço não encontrado'}, status=404)
 
+    # Valores, flags de meia entrada, infantil, isenção e idade mínima
+    return JsonResponse(servico.as_dict())
+
 
 # ==================== TRADUÇÃO COM ARGOS ====================
 
+def _ler_pedido_traducao(request):
+    """(texto, dados) do corpo JSON, ou (None, resposta de erro)"""
+    import json
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return None, JsonResponse({'error': 'JSON inválido'}, status=400)
+    text = data.get('text', '') if isinstance(data, dict) else ''
+    if not text:
+        return None, JsonResponse({'error': 'Texto não fornecido'}, status=400)
+    return text, data
+
+
+def _resposta_enfileirada(request, text, idioma):
+    trabalho, _ = enfileirar(text, idioma, request.user)
+    lembrar_na_sessao(request, trabalho)
+    dados = situacao(trabalho)
+    dados['status_url'] = reverse('servicos:translate_job_status', args=[trabalho.pk])
+    return JsonResponse(dados, status=202)
 
 
 @require_permission('servicos.view_ordemservico')
 @require_http_methods(["POST"])
 def translate_text(request):
-    """Endpoint para tradução usando Argos Translate com preservação de formatação"""
-    import json
-    import re
-    import argostranslate.package
-    import argostranslate.translate
-    
+    """
+    Endpoint para tradução usando Argos Translate com preservação de formatação.
+
+    Com ``TRADUCAO_ASSINCRONA``, só traduz na hora o que já está na
+    memória de tradução; o resto vira um trabalho na fila (HTTP 202 com
+    ``job_id`` e ``status_url``), processado pelo comando
+    ``processar_traducoes`` e consultado em ``translate_job_status``.
+    """
+    text, data = _ler_pedido_traducao(request)
+    if text is None:
+        return data
+    idioma = motor_traducao.idioma(data.get('target_lang', 'en'))
+
     try:
-        data = json.loads(request.body)
-        text = data.get('text', '')
-        target_lang = data.get('target_lang', 'en')
-        
-        if not text:
-            return JsonResponse({'error': 'Texto não fornecido'}, status=400)
-        
-        # Mapeamento de códigos de idioma
-        lang_map = {
-            'en': 'en',
-            'es': 'es',
-            'fr': 'fr'
-        }
-        
-        target_code = lang_map.get(target_lang, 'en')
-        
-        # Dicionário de traduções customizadas para termos turísticos
-        custom_translations = {
-            'en': {
-                # Termos gerais
-                'CATARATAS': 'WATERFALLS',
-                'Cataratas': 'Waterfalls',
-                'cataratas': 'waterfalls',
-                'Inteira': 'Full',
-                'Inteira(s)': 'Full',
-                'Meia': 'Half',
-                'Meia(s)': 'Half',
-                'Infantil': 'Child',
-                'Transfer': 'Transfer',
-                'Transfers': 'Transfers',
-                'Ingresso': 'Ticket',
-                'Ingressos': 'Tickets',
-                'Roteiro': 'Itinerary',
-                'ROTEIRO': 'ITINERARY',
-                'Opção': 'Option',
-                'OPÇÃO': 'OPTION',
-                'RESUMO DOS VALORES': 'SUMMARY OF VALUES',
-                'Resumo dos Valores': 'Summary of Values',
-                'leva e trás': 'round trip',
-                'leva e traz': 'round trip',
-                'horário livre': 'flexible schedule',
-                
-                # Atrativos específicos
-                'CATARATAS BR': 'WATERFALLS BR',
-                'Cataratas BR': 'Waterfalls BR',
-                'PARQUE DAS AVES': 'BIRD PARK',
-                'Parque das Aves': 'Bird Park',
-                'ITAIPU PANORAMICA': 'ITAIPU PANORAMIC',
-                'Itaipu Panoramica': 'Itaipu Panoramic',
-                'ITAIPU ESPECIAL': 'ITAIPU SPECIAL',
-                'Itaipu Especial': 'Itaipu Special',
-                'REFUGIO BIOLÓGICO': 'BIOLOGICAL REFUGE',
-                'Refugio Biológico': 'Biological Refuge',
-                'ILUMINADA ESPECIAL': 'ILLUMINATED SPECIAL',
-                'Iluminada Especial': 'Illuminated Special',
-                'ILUMINADA': 'ILLUMINATED',
-                'Iluminada': 'Illuminated',
-                'MARCO DAS TRÊS FRONTEIRAS': 'THREE BORDERS LANDMARK',
-                'Marco das Três Fronteiras': 'Three Borders Landmark',
-                'RODA GIGANTE': 'FERRIS WHEEL',
-                'Roda Gigante': 'Ferris Wheel',
-                'DREAMLAND COMBO 6': 'DREAMLAND COMBO 6',
-                'DREAMLAND COMBO 5': 'DREAMLAND COMBO 5',
-                'DREAMLAND QUARTETO': 'DREAMLAND QUARTET',
-                'Dreamland Quarteto': 'Dreamland Quartet',
-                'DREAMLAND TRIO NATUREZA': 'DREAMLAND NATURE TRIO',
-                'Dreamland Trio Natureza': 'Dreamland Nature Trio',
-                'TRIO BY NIGHT': 'TRIO BY NIGHT',
-                'TRIO AVENTURA': 'ADVENTURE TRIO',
-                'Trio Aventura': 'Adventure Trio',
-                'MUSEU': 'MUSEUM',
-                'Museu': 'Museum',
-                'DREAM ECO PARK': 'DREAM ECO PARK',
-                'TIROLEZA': 'ZIPLINE',
-                'Tiroleza': 'Zipline',
-                'MOVIE CARS': 'MOVIE CARS',
-                'SHOW DAS ÁGUAS': 'WATER SHOW',
-                'Show das Águas': 'Water Show',
-                'COMBO MOVIE E SHOW': 'MOVIE AND SHOW COMBO',
-                'Combo Movie e Show': 'Movie and Show Combo',
-                'RAFAIN CHURRASCARIA SHOW': 'RAFAIN STEAKHOUSE SHOW',
-                'Rafain Churrascaria Show': 'Rafain Steakhouse Show',
-                'KATTAMARAM': 'CATAMARAN',
-                'Kattamaram': 'Catamaran',
-                'MACUCO SAFARI': 'MACUCO SAFARI',
-                'IGUASSU SECRET FALLS ALL DAY': 'IGUASSU SECRET FALLS ALL DAY',
-                'Iguassu Secret Falls All Day': 'Iguassu Secret Falls All Day',
-                'IGUASSU SECRET MEIO PERIODO': 'IGUASSU SECRET HALF DAY',
-                'Iguassu Secret Meio Periodo': 'Iguassu Secret Half Day',
-                'IGUASSU SECRET TRILHA ÚNICA': 'IGUASSU SECRET SINGLE TRAIL',
-                'Iguassu Secret Trilha Única': 'Iguassu Secret Single Trail',
-                'LA ARIPUCA': 'LA ARIPUCA',
-                'RUINAS SAN IGNACIO': 'SAN IGNACIO RUINS',
-                'Ruinas San Ignacio': 'San Ignacio Ruins',
-                'MINAS DE WANDA': 'WANDA MINES',
-                'Minas de Wanda': 'Wanda Mines',
-                'MESQUITA MULÇUMANA': 'MUSLIM MOSQUE',
-                'Mesquita Mulçumana': 'Muslim Mosque',
-            },
-            'es': {
-                # Termos gerais
-                'CATARATAS': 'CATARATAS',
-                'Cataratas': 'Cataratas',
-                'cataratas': 'cataratas',
-                'Inteira': 'Entera',
-                'Inteira(s)': 'Entera(s)',
-                'Meia': 'Media',
-                'Meia(s)': 'Media(s)',
-                'Infantil': 'Infantil',
-                'Transfer': 'Transfer',
-                'Transfers': 'Transfers',
-                'Ingresso': 'Entrada',
-                'Ingressos': 'Entradas',
-                'Roteiro': 'Itinerario',
-                'ROTEIRO': 'ITINERARIO',
-                'Opção': 'Opción',
-                'OPÇÃO': 'OPCIÓN',
-                'RESUMO DOS VALORES': 'RESUMEN DE VALORES',
-                'Resumo dos Valores': 'Resumen de Valores',
-                'leva e trás': 'ida y vuelta',
-                'leva e traz': 'ida y vuelta',
-                'horário livre': 'horario libre',
-                
-                # Atrativos específicos
-                'CATARATAS BR': 'CATARATAS BR',
-                'Cataratas BR': 'Cataratas BR',
-                'PARQUE DAS AVES': 'PARQUE DE LAS AVES',
-                'Parque das Aves': 'Parque de las Aves',
-                'ITAIPU PANORAMICA': 'ITAIPU PANORÁMICA',
-                'Itaipu Panoramica': 'Itaipu Panorámica',
-                'ITAIPU ESPECIAL': 'ITAIPU ESPECIAL',
-                'Itaipu Especial': 'Itaipu Especial',
-                'REFUGIO BIOLÓGICO': 'REFUGIO BIOLÓGICO',
-                'Refugio Biológico': 'Refugio Biológico',
-                'ILUMINADA ESPECIAL': 'ILUMINADA ESPECIAL',
-                'Iluminada Especial': 'Iluminada Especial',
-                'ILUMINADA': 'ILUMINADA',
-                'Iluminada': 'Iluminada',
-                'MARCO DAS TRÊS FRONTEIRAS': 'HITO DE LAS TRES FRONTERAS',
-                'Marco das Três Fronteiras': 'Hito de las Tres Fronteras',
-                'RODA GIGANTE': 'RUEDA GIGANTE',
-                'Roda Gigante': 'Rueda Gigante',
-                'DREAMLAND COMBO 6': 'DREAMLAND COMBO 6',
-                'DREAMLAND COMBO 5': 'DREAMLAND COMBO 5',
-                'DREAMLAND QUARTETO': 'DREAMLAND CUARTETO',
-                'Dreamland Quarteto': 'Dreamland Cuarteto',
-                'DREAMLAND TRIO NATUREZA': 'DREAMLAND TRÍO NATURALEZA',
-                'Dreamland Trio Natureza': 'Dreamland Trío Naturaleza',
-                'TRIO BY NIGHT': 'TRÍO BY NIGHT',
-                'TRIO AVENTURA': 'TRÍO AVENTURA',
-                'Trio Aventura': 'Trío Aventura',
-                'MUSEU': 'MUSEO',
-                'Museu': 'Museo',
-                'DREAM ECO PARK': 'DREAM ECO PARK',
-                'TIROLEZA': 'TIROLESA',
-                'Tiroleza': 'Tirolesa',
-                'MOVIE CARS': 'MOVIE CARS',
-                'SHOW DAS ÁGUAS': 'SHOW DE LAS AGUAS',
-                'Show das Águas': 'Show de las Aguas',
-                'COMBO MOVIE E SHOW': 'COMBO MOVIE Y SHOW',
-                'Combo Movie e Show': 'Combo Movie y Show',
-                'RAFAIN CHURRASCARIA SHOW': 'RAFAIN PARRILLA SHOW',
-                'Rafain Churrascaria Show': 'Rafain Parrilla Show',
-                'KATTAMARAM': 'CATAMARÁN',
-                'Kattamaram': 'Catamarán',
-                'MACUCO SAFARI': 'MACUCO SAFARI',
-                'IGUASSU SECRET FALLS ALL DAY': 'IGUASSU SECRET FALLS TODO EL DÍA',
-                'Iguassu Secret Falls All Day': 'Iguassu Secret Falls Todo el Día',
-                'IGUASSU SECRET MEIO PERIODO': 'IGUASSU SECRET MEDIO DÍA',
-                'Iguassu Secret Meio Periodo': 'Iguassu Secret Medio Día',
-                'IGUASSU SECRET TRILHA ÚNICA': 'IGUASSU SECRET SENDERO ÚNICO',
-                'Iguassu Secret Trilha Única': 'Iguassu Secret Sendero Único',
-                'LA ARIPUCA': 'LA ARIPUCA',
-                'RUINAS SAN IGNACIO': 'RUINAS SAN IGNACIO',
-                'Ruinas San Ignacio': 'Ruinas San Ignacio',
-                'MINAS DE WANDA': 'MINAS DE WANDA',
-                'Minas de Wanda': 'Minas de Wanda',
-                'MESQUITA MULÇUMANA': 'MEZQUITA MUSULMANA',
-                'Inteira(s)': 'Plein(s)',
-                'Meia': 'Demi',
-                'Meia(s)': 'Demi(s)',
-                'Infantil': 'Enfant',
-                'Transfer': 'Transfert',
-                'Transfers': 'Transferts',
-                'Ingresso': 'Billet',
-                'Ingressos': 'Billets',
-                'Roteiro': 'Itinéraire',
-                'ROTEIRO': 'ITINÉRAIRE',
-                'Opção': 'Option',
-                'OPÇÃO': 'OPTION',
-                'RESUMO DOS VALORES': 'RÉSUMÉ DES VALEURS',
-                'Resumo dos Valores': 'Résumé des Valeurs',
-                'leva e trás': 'aller-retour',
-                'leva e traz': 'aller-retour',
-                'horário livre': 'horaire libre',
-                'Inteira': 'Plein',
-                'Inteira(s)': 'Plein(s)',
-                'Meia': 'Demi',
-                'Meia(s)': 'Demi(s)',
-                'Infantil': 'Enfant',
-                'Transfer': 'Transfert',
-                'Transfers': 'Transferts',
-                'Ingresso': 'Billet',
-                'Ingressos': 'Billets',
-                
-                # Atrativos específicos
-                'CATARATAS BR': 'CHUTES D\'EAU BR',
-                'Cataratas BR': 'Chutes d\'eau BR',
-                'PARQUE DAS AVES': 'PARC DES OISEAUX',
-                'Parque das Aves': 'Parc des Oiseaux',
-                'ITAIPU PANORAMICA': 'ITAIPU PANORAMIQUE',
-                'Itaipu Panoramica': 'Itaipu Panoramique',
-                'ITAIPU ESPECIAL': 'ITAIPU SPÉCIAL',
-                'Itaipu Especial': 'Itaipu Spécial',
-                'REFUGIO BIOLÓGICO': 'REFUGE BIOLOGIQUE',
-                'Refugio Biológico': 'Refuge Biologique',
-                'ILUMINADA ESPECIAL': 'ILLUMINÉE SPÉCIALE',
-                'Iluminada Especial': 'Illuminée Spéciale',
-                'ILUMINADA': 'ILLUMINÉE',
-                'Iluminada': 'Illuminée',
-                'MARCO DAS TRÊS FRONTEIRAS': 'BORNE DES TROIS FRONTIÈRES',
-                'Marco das Três Fronteiras': 'Borne des Trois Frontières',
-                'RODA GIGANTE': 'GRANDE ROUE',
-                'Roda Gigante': 'Grande Roue',
-                'DREAMLAND COMBO 6': 'DREAMLAND COMBO 6',
-                'DREAMLAND COMBO 5': 'DREAMLAND COMBO 5',
-                'DREAMLAND QUARTETO': 'DREAMLAND QUATUOR',
-                'Dreamland Quarteto': 'Dreamland Quatuor',
-                'DREAMLAND TRIO NATUREZA': 'DREAMLAND TRIO NATURE',
-                'Dreamland Trio Natureza': 'Dreamland Trio Nature',
-                'TRIO BY NIGHT': 'TRIO BY NIGHT',
-                'TRIO AVENTURA': 'TRIO AVENTURE',
-                'Trio Aventura': 'Trio Aventure',
-                'MUSEU': 'MUSÉE',
-                'Museu': 'Musée',
-                'DREAM ECO PARK': 'DREAM ECO PARK',
-                'TIROLEZA': 'TYROLIENNE',
-                'Tiroleza': 'Tyrolienne',
-                'MOVIE CARS': 'MOVIE CARS',
-                'SHOW DAS ÁGUAS': 'SPECTACLE DES EAUX',
-                'Show das Águas': 'Spectacle des Eaux',
-                'COMBO MOVIE E SHOW': 'COMBO MOVIE ET SHOW',
-                'Combo Movie e Show': 'Combo Movie et Show',
-                'RAFAIN CHURRASCARIA SHOW': 'RAFAIN RESTAURANT SHOW',
-                'Rafain Churrascaria Show': 'Rafain Restaurant Show',
-                'KATTAMARAM': 'CATAMARAN',
-                'Kattamaram': 'Catamaran',
-                'MACUCO SAFARI': 'MACUCO SAFARI',
-                'IGUASSU SECRET FALLS ALL DAY': 'IGUASSU SECRET FALLS JOURNÉE COMPLÈTE',
-                'Iguassu Secret Falls All Day': 'Iguassu Secret Falls Journée Complète',
-                'IGUASSU SECRET MEIO PERIODO': 'IGUASSU SECRET DEMI-JOURNÉE',
-                'Iguassu Secret Meio Periodo': 'Iguassu Secret Demi-Journée',
-                'IGUASSU SECRET TRILHA ÚNICA': 'IGUASSU SECRET SENTIER UNIQUE',
-                'Iguassu Secret Trilha Única': 'Iguassu Secret Sentier Unique',
-                'LA ARIPUCA': 'LA ARIPUCA',
-                'RUINAS SAN IGNACIO': 'RUINES SAN IGNACIO',
-                'Ruinas San Ignacio': 'Ruines San Ignacio',
-                'MINAS DE WANDA': 'MINES DE WANDA',
-                'Minas de Wanda': 'Mines de Wanda',
-                'MESQUITA MULÇUMANA': 'MOSQUÉE MUSULMANE',
-                'Mesquita Mulçumana': 'Mosquée Musulmane',
-            }
-        }
-        
-        try:
-            # Dicionário de proteção para elementos que não devem ser traduzidos
-            protected = {}
-            placeholder_counter = 0
-            
-            def protect_element(match):
-                nonlocal placeholder_counter
-                placeholder = f"PROTECT{placeholder_counter}PROTECT"
-                protected[placeholder] = match.group(0)
-                placeholder_counter += 1
-                return placeholder
-            
-            # Proteger elementos antes da tradução
-            text_protected = text
-            
-            # 1. Proteger linhas decorativas (═══, ───, etc)
-            text_protected = re.sub(r'[─═]{3,}', protect_element, text_protected)
-            
-            # 2. Proteger emojis e símbolos especiais
-            emoji_pattern = r'[📅🚌💰🎫📍⏰✈️🏨🍽️🎭🎨🏛️🌊🌲🦋🐦🌅🌄🎢🎡🎪🚁🚢⛵🏖️🗿🏰🎭📸🎬🎵🎸🎹🎺🎻🎤🎧🎮🎯🎲🎰🎳🏀⚽🏈🏉🎾🏐🏓🏸🥊🥋⛳🏹🎣🥅🥌🛷🎿⛷️🏂🏋️🤸🤼🤽🤾🤺🏇🏌️🧘🏃🚴🏊🤹✨]'
-            text_protected = re.sub(emoji_pattern, protect_element, text_protected)
-            
-            # 3. Proteger bullets e caracteres especiais de lista
-            text_protected = re.sub(r'[•◦▪▫]', protect_element, text_protected)
-            
-            # 4. Proteger valores monetários (R$ 000,00)
-            text_protected = re.sub(r'R\$\s*[\d.,]+', protect_element, text_protected)
-            
-            # 5. Proteger datas (dd/mm/aaaa ou dd/mm)
-            text_protected = re.sub(r'\d{2}/\d{2}(?:/\d{4})?', protect_element, text_protected)
-            
-            # 6. Proteger números entre parênteses (1 pax)
-            text_protected = re.sub(r'\(\d+\s*pax\)', protect_element, text_protected)
-            
-            # 7. Proteger linhas que são apenas símbolos/espaços
-            lines = text_protected.split('\n')
-            protected_lines = []
-            for line in lines:
-                if re.match(r'^[\s─═•\-]+$', line) or not line.strip():
-                    placeholder = f"PROTECTLINE{placeholder_counter}PROTECT"
-                    protected[placeholder] = line
-                    placeholder_counter += 1
-                    protected_lines.append(placeholder)
-                else:
-                    protected_lines.append(line)
-            text_protected = '\n'.join(protected_lines)
-            
-            # Aplicar traduções customizadas ANTES da tradução automática
-            if target_code in custom_translations:
-                for pt_term, translated_term in custom_translations[target_code].items():
-                    # Usar placeholder numérico único que não será traduzido
-                    placeholder = f"XYZTERM{placeholder_counter}XYZ"
-                    protected[placeholder] = translated_term
-                    placeholder_counter += 1
-                    # Substituir termo português pelo placeholder
-                    text_protected = text_protected.replace(pt_term, placeholder)
-            
-            # Traduzir texto com elementos protegidos
-            if target_code == 'fr':
-                intermediate_text = argostranslate.translate.translate(text_protected, "pt", "en")
-                translated_text = argostranslate.translate.translate(intermediate_text, "en", "fr")
-            else:
-                translated_text = argostranslate.translate.translate(text_protected, "pt", target_code)
-            
-            # Restaurar elementos protegidos
-            for placeholder, original in protected.items():
-                translated_text = translated_text.replace(placeholder, original)
-            
-            return JsonResponse({
-                'success': True,
-                'translated_text': translated_text,
-                'source_lang': 'pt',
-                'target_lang': target_code
-            })
-            
-        except Exception as e:
-            return JsonResponse({
-                'error': f'Erro na tradução: {str(e)}'
-            }, status=500)
-            
-    except json.JSONDecodeError:
-        return JsonResponse({'error': 'JSON inválido'}, status=400)
+        resultado = motor_traducao.traduzir(text, idioma, somente_memoria=settings.TRADUCAO_ASSINCRONA)
+    except TraducaoIndisponivel as e:
+        return JsonResponse({'error': str(e)}, status=503)
+    except Exception as e:
+        return JsonResponse({'error': f'Erro na tradução: {str(e)}'}, status=500)
+
+    if resultado is None:
+        return _resposta_enfileirada(request, text, idioma)
+
+    response = JsonResponse({'success': True, 'source_lang': 'pt', **resultado.as_dict()})
+    response['Server-Timing'] = resultado.server_timing()
+    return response
+
+
+@require_permission('servicos.view_ordemservico')
+@require_http_methods(["POST"])
+def translate_batch(request):
+    """
+    Traduz um texto para vários idiomas (``target_langs``) de uma vez.
+
+    A proteção é feita uma vez e o inglês é o pivô do francês (ver
+    ``MotorTraducao.traduzir_varios``). Resposta com ``translations`` por
+    idioma, cada um com seus tempos; na fila, como ``translate_text``.
+    """
+    text, data = _ler_pedido_traducao(request)
+    if text is None:
+        return data
+    idiomas = data.get('target_langs')
+    if not isinstance(idiomas, list) or not idiomas:
+        return JsonResponse({'error': 'Idiomas não fornecidos'}, status=400)
+    desconhecidos = [str(idioma) for idioma in idiomas if idioma not in motor_traducao.idiomas]
+    if desconhecidos:
+        return JsonResponse({'error': f'Idioma(s) não suportado(s): {", ".join(desconhecidos)}'}, status=400)
+
+    try:
+        lote = motor_traducao.traduzir_varios(text, idiomas, somente_memoria=settings.TRADUCAO_ASSINCRONA)
+    except TraducaoIndisponivel as e:
+        return JsonResponse({'error': str(e)}, status=503)
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
\ No newline at end of file
+        return JsonResponse({'error': f'Erro na tradução: {str(e)}'}, status=500)
+
+    if lote is None:
+        return _resposta_enfileirada(request, text, idiomas)
+
+    response = JsonResponse({'success': True, 'source_lang': 'pt', **lote.as_dict()})
+    response['Server-Timing'] = lote.server_timing()
+    return response
+
+
+@require_permission('servicos.view_ordemservico')
+@require_http_methods(["GET"])
+def translate_job_status(request, pk):
+    """Situação de um trabalho de tradução (o navegador consulta até terminar), só para quem o pediu"""
+    trabalho = get_object_or_404(TrabalhoTraducao, pk=pk)
+    if not pode_consultar(request, trabalho):
+        raise Http404('Trabalho de tradução não encontrado')
+    response = JsonResponse(situacao(trabalho))
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@login_required
+@user_passes_test(_is_staff)
+def traducao_stats(request):
+    """Contadores e tempos médios do motor de tradução deste processo, para a equipe"""
+    return JsonResponse(motor_traducao.estatisticas())
@@ -14,6 +14,10 @@
   document.addEventListener("DOMContentLoaded", function () {
     carregarDadosDjango();
     inicializarEventos();
+    // Baixa (ou lê do localStorage) o catálogo antes da primeira seleção
+    obterCatalogo().catch(function (error) {
+      console.warn("Catálogo indisponível, usando AJAX:", error);
+    });
 
     // Preencher campos de texto OS ao editar
     if (djangoData.editando) {
@@ -32,18 +36,35 @@
     }
 
     // Se estiver editando, carregar TODOS os lançamentos
-    if (
-      djangoData.editando &&
-      djangoData.lancamentosData &&
-      djangoData.lancamentosData.length > 0
-    ) {
-      carregarLancamentosParaEdicao(
-        djangoData.lancamentosData,
-        djangoData.roteiro,
-      );
+    if (djangoData.editando && djangoData.editorPayloadUrl) {
+      carregarPayloadEditor(djangoData.editorPayloadUrl);
     }
   });
 
+  function carregarPayloadEditor(url) {
+    // Itens da OS vêm de um endpoint próprio (ETag): a página fica pequena
+    // e o navegador revalida o payload com If-None-Match
+    fetch(url, {
+      credentials: "same-origin",
+      headers: { Accept: "application/json" },
+    })
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error("HTTP " + response.status);
+        }
+        return response.json();
+      })
+      .then(function (payload) {
+        if (payload.lancamentos && payload.lancamentos.length > 0) {
+          carregarLancamentosParaEdicao(payload.lancamentos, payload.roteiro);
+        }
+      })
+      .catch(function (error) {
+        console.error("Erro ao carregar os itens da OS:", error);
+        alert("Não foi possível carregar os serviços desta OS. Recarregue a página.");
+      });
+  }
+
   function carregarDadosDjango() {
     const scriptData = document.getElementById("django-data");
     if (scriptData) {
@@ -51,8 +72,7 @@
         djangoData = JSON.parse(scriptData.textContent);
         console.log("=== DADOS DJANGO CARREGADOS ===");
         console.log("Editando?", djangoData.editando);
-        console.log("Lançamentos:", djangoData.lancamentosData);
-        console.log("Roteiro:", djangoData.roteiro);
+        console.log("Payload do editor:", djangoData.editorPayloadUrl);
         console.log("URLs:", djangoData.urls);
       } catch (e) {
         console.error("Erro ao parsear dados Django:", e);
@@ -110,6 +130,117 @@
       btnVerRegras.addEventListener("click", exibirRegrasNovamente);
   }
 
+  // ==================== CATÁLOGO ====================
+  // Categorias, serviços, tipos de meia e transfers vêm de catalog.json,
+  // versionado pela revisão do catálogo informada pela página. A cópia fica
+  // no localStorage e só é baixada de novo quando a revisão muda; se o
+  // catálogo não estiver disponível, cai nos endpoints AJAX antigos.
+  const CHAVE_CATALOGO = "servicos:catalogo";
+  let catalogoPromise = null;
+
+  function indexarCatalogo(dados) {
+    const servicosPorId = {};
+    const servicosPorCategoria = {};
+    dados.servicos.forEach(function (servico) {
+      servicosPorId[servico.id] = servico;
+      (servicosPorCategoria[servico.categoria_id] =
+        servicosPorCategoria[servico.categoria_id] || []).push(servico);
+    });
+    return {
+      revisao: dados.revisao,
+      servicosPorId: servicosPorId,
+      servicosPorCategoria: servicosPorCategoria,
+      tiposMeia: dados.tipos_meia,
+      transfers: dados.transfers,
+    };
+  }
+
+  function lerCatalogoLocal(revisao) {
+    try {
+      const dados = JSON.parse(localStorage.getItem(CHAVE_CATALOGO));
+      return dados && dados.revisao === revisao ? dados : null;
+    } catch (e) {
+      return null;
+    }
+  }
+
+  function salvarCatalogoLocal(dados) {
+    try {
+      localStorage.setItem(CHAVE_CATALOGO, JSON.stringify(dados));
+    } catch (e) {
+      console.warn("Não foi possível guardar o catálogo localmente:", e);
+    }
+  }
+
+  function obterCatalogo() {
+    if (catalogoPromise) return catalogoPromise;
+
+    const revisao = djangoData.catalogoRevisao;
+    const url = djangoData.urls && djangoData.urls.catalogo;
+    const local = lerCatalogoLocal(revisao);
+    if (local) {
+      catalogoPromise = Promise.resolve(indexarCatalogo(local));
+    } else if (!url) {
+      return Promise.reject(new Error("Catálogo indisponível"));
+    } else {
+      catalogoPromise = fetch(url + "?v=" + revisao, {
+        credentials: "same-origin",
+      })
+        .then(function (response) {
+          if (!response.ok) throw new Error("HTTP " + response.status);
+          return response.json();
+        })
+        .then(function (dados) {
+          salvarCatalogoLocal(dados);
+          return indexarCatalogo(dados);
+        });
+      catalogoPromise.catch(function () {
+        catalogoPromise = null;
+      });
+    }
+    return catalogoPromise;
+  }
+
+  function buscarJson(url) {
+    return fetch(url).then(function (response) {
+      return response.json();
+    });
+  }
+
+  function listarServicosDaCategoria(categoriaId) {
+    return obterCatalogo()
+      .then(function (catalogo) {
+        return catalogo.servicosPorCategoria[categoriaId] || [];
+      })
+      .catch(function () {
+        return buscarJson(
+          "/servicos/ajax/subcategorias/?categoria_id=" + categoriaId,
+        );
+      });
+  }
+
+  function obterServicoInfo(servicoId) {
+    return obterCatalogo()
+      .then(function (catalogo) {
+        const servico = catalogo.servicosPorId[servicoId];
+        if (!servico) throw new Error("Serviço fora do catálogo");
+        return servico;
+      })
+      .catch(function () {
+        return buscarJson("/servicos/ajax/servico-info/?servico_id=" + servicoId);
+      });
+  }
+
+  function listarTiposMeia() {
+    return obterCatalogo()
+      .then(function (catalogo) {
+        return catalogo.tiposMeia;
+      })
+      .catch(function () {
+        return buscarJson("/servicos/ajax/tipos-meia/");
+      });
+  }
+
   function aoMudarCategoria() {
     const categoriaId = this.value;
     const servicoSelect = document.getElementById("servico");
@@ -124,16 +255,9 @@
       return;
     }
 
-    const url = "/servicos/ajax/subcategorias/?categoria_id=" + categoriaId;
-    console.log("Buscando serviços:", url);
-
-    fetch(url)
-      .then(function (response) {
-        console.log("Response status:", response.status);
-        return response.json();
-      })
+    listarServicosDaCategoria(categoriaId)
       .then(function (data) {
-        console.log("Serviços recebidos:", data);
+        console.log("Serviços da categoria:", data);
         servicoSelect.innerHTML =
           '<option value="">Selecione o serviço...</option>';
         data.forEach(function (servico) {
@@ -158,12 +282,7 @@
       return;
     }
 
-    const url = "/servicos/ajax/servico-info/?servico_id=" + servicoId;
-
-    fetch(url)
-      .then(function (response) {
-        return response.json();
-      })
+    obterServicoInfo(servicoId)
       .then(function (data) {
         servicoAtualInfo = data;
         console.log("Dados do serviço recebidos:", data);
@@ -385,10 +504,7 @@
     if (qtd > 0) {
       campoTiposMeia.style.display = "block";
 
-      fetch("/servicos/ajax/tipos-meia/")
-        .then(function (response) {
-          return response.json();
-        })
+      listarTiposMeia()
         .then(function (tipos) {
           for (let i = 1; i <= qtd; i++) {
             const col = document.createElement("div");
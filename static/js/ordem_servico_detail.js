@@ -68,6 +68,18 @@ function fallbackCopia(text) {
   document.body.removeChild(textArea);
 }
 
+async function aguardarTraducao(statusUrl) {
+  const limite = Date.now() + 3 * 60 * 1000;
+  while (Date.now() < limite) {
+    await new Promise((resolve) => setTimeout(resolve, 1000));
+    const resposta = await fetch(statusUrl, { headers: { Accept: "application/json" } });
+    if (!resposta.ok) throw new Error("Erro ao consultar a tradução.");
+    const dados = await resposta.json();
+    if (dados.status === "concluido" || dados.status === "erro") return dados;
+  }
+  throw new Error("Tradução demorou demais. Tente novamente.");
+}
+
 async function traduzirRoteiro() {
   const languageSelector = document.getElementById("languageSelector");
   const targetLang = languageSelector.value;
@@ -133,7 +145,12 @@ async function traduzirRoteiro() {
       throw new Error("Erro servidor (500/403).");
     }
 
-    const data = await response.json();
+    let data = await response.json();
+
+    // Tradução na fila (202): consultar até terminar
+    if (response.status === 202) {
+      data = await aguardarTraducao(data.status_url);
+    }
 
     if (response.ok && data.success) {
       const translatedText = data.translated_text;
@@ -141,6 +141,27 @@ MEDIA_ROOT = BASE_DIR / 'media'
 FILE_UPLOAD_MAX_MEMORY_SIZE = 12 * 1024 * 1024  # 12MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 12 * 1024 * 1024  # 12MB
 
+# Tradução de roteiros (servicos/translation.py): carrega os modelos do
+# Argos em segundo plano quando cada worker sobe, em vez de na primeira tradução
+TRADUCAO_AQUECER = config('TRADUCAO_AQUECER', default=False, cast=bool)
+# Traduções que não estão na memória de tradução vão para a fila, processada
+# pelo comando processar_traducoes (False = traduz dentro da requisição). Só
+# ative onde o processar_traducoes roda como serviço: os scripts de deploy
+# (scripts/deploy_vps.sh e deploy_vps_lite.sh) instalam o serviço
+# webreceptivo-traducao e ligam a opção no .env. Sem ele os trabalhos ficam
+# pendentes para sempre
+TRADUCAO_ASSINCRONA = config('TRADUCAO_ASSINCRONA', default=False, cast=bool)
+# Traduções executadas ao mesmo tempo pelo processar_traducoes
+TRADUCAO_MAX_SIMULTANEAS = config('TRADUCAO_MAX_SIMULTANEAS', default=1, cast=int)
+
+# Auditoria (audit_system/writer.py): os logs de cada requisição são gravados
+# em lote no fim dela; com AUDIT_GRAVACAO_ASSINCRONA uma thread do processo
+# grava os lotes, recebidos por uma fila de até AUDIT_FILA_MAX registros
+AUDIT_GRAVACAO_ASSINCRONA = config('AUDIT_GRAVACAO_ASSINCRONA', default=False, cast=bool)
+AUDIT_FILA_MAX = config('AUDIT_FILA_MAX', default=10000, cast=int)
+# Segundos que a requisição espera por espaço na fila antes de gravar ela mesma
+AUDIT_FILA_ESPERA = config('AUDIT_FILA_ESPERA', default=0.5, cast=float)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
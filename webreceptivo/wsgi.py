@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'webreceptivo.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.TRADUCAO_AQUECER:
+    from servicos.translation import motor  # noqa: E402
+
+    motor.aquecer_em_segundo_plano()